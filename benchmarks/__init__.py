@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for PSTimer.
+
+Run with ``python -m benchmarks``; see benchmarks/__main__.py for options.
+"""
@@ -0,0 +1,100 @@
+"""
+Command line runner for the PSTimer benchmarks.
+
+Usage:
+    python -m benchmarks                      # run and compare to baseline
+    python -m benchmarks --output out.json    # also save results as JSON
+    python -m benchmarks --update-baseline    # store results as the baseline
+    python -m benchmarks -k statistics        # only names containing a string
+
+The first run records the baseline. Exits with status 1 when a benchmark
+is slower than a baseline from this machine by more than its threshold;
+a baseline from another machine is only reported against.
+"""
+
+import argparse
+import os
+import sys
+
+from .harness import (
+    DEFAULT_THRESHOLD,
+    compare,
+    format_seconds,
+    load_json,
+    run_benchmarks,
+    same_machine,
+    save_json,
+)
+from .suite import all_benchmarks
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None):
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description="PSTimer benchmarks")
+    parser.add_argument("-k", dest="filter", help="only run names containing this")
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slowdown, e.g. 0.25 for 25%% (default %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="minimum seconds per repeat"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="save the results as the new baseline",
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = all_benchmarks()
+    if args.filter:
+        benchmarks = [b for b in benchmarks if args.filter in b.name]
+
+    def progress(result):
+        print(f"{result['name']:<36} {format_seconds(result['min']):>12}")
+
+    document = run_benchmarks(benchmarks, args.repeat, args.min_time, progress)
+    for skipped in document["skipped"]:
+        print(f"{skipped['name']:<36} {'skipped':>12}  ({skipped['reason']})")
+
+    if args.output:
+        save_json(document, args.output)
+    if args.update_baseline or not os.path.exists(args.baseline):
+        save_json(document, args.baseline)
+        print(f"\nBaseline recorded: {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    rows = compare(document, baseline, args.threshold, benchmarks)
+    print(f"\n{'benchmark':<36} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    regressions = 0
+    for name, base, current, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(
+            f"{name:<36} {format_seconds(base):>12} {format_seconds(current):>12} "
+            f"{ratio:>6.2f}x{flag}"
+        )
+        regressions += regressed
+
+    if regressions and not same_machine(document, baseline):
+        print(
+            f"\n{regressions} benchmark(s) slower than a baseline from another "
+            "machine; run with --update-baseline to record one here"
+        )
+        return 0
+    if regressions:
+        print(f"\n{regressions} benchmark(s) regressed")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Benchmark timing, JSON results and baseline comparison.
+"""
+
+import gc
+import json
+import math
+import platform
+import sys
+import time
+from datetime import datetime
+
+# Default allowed slowdown before a benchmark counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a benchmark's setup when it cannot run on this machine."""
+
+
+class Benchmark:
+    """A named, repeatable timing of func.
+
+    setup is called once before timing and its return value is passed to
+    func on every call; it can raise BenchmarkSkipped. Noisy benchmarks
+    (e.g. subprocess startup) can set their own regression threshold.
+    """
+
+    def __init__(self, name, func, setup=None, group="", threshold=None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.group = group
+        self.threshold = threshold
+
+    def run(self, repeat=5, min_time=0.2):
+        """Time the benchmark and return a result dict (seconds per call).
+
+        Like timeit's autorange, the number of calls per repeat grows until
+        one repeat takes at least min_time.
+        """
+        arg = self.setup() if self.setup is not None else None
+        func = self.func
+
+        number = 1
+        while True:
+            elapsed = _time_calls(func, arg, number)
+            if elapsed >= min_time or number >= 1_000_000:
+                break
+            number *= 10 if elapsed < min_time / 10 else 2
+
+        samples = [elapsed / number]
+        for _ in range(repeat - 1):
+            samples.append(_time_calls(func, arg, number) / number)
+
+        # Computed by hand: src/statistics.py shadows the stdlib module when
+        # src/ is on sys.path (as it is under the test suite)
+        mean = sum(samples) / len(samples)
+        variance = sum((s - mean) ** 2 for s in samples) / max(1, len(samples) - 1)
+        ordered = sorted(samples)
+        middle = len(ordered) // 2
+        return {
+            "name": self.name,
+            "group": self.group,
+            "min": ordered[0],
+            "median": (ordered[middle] + ordered[~middle]) / 2,
+            "mean": mean,
+            "stdev": math.sqrt(variance),
+            "number": number,
+            "repeat": len(samples),
+        }
+
+
+def _time_calls(func, arg, number):
+    """Call func(arg) number times and return the elapsed seconds.
+
+    The garbage collector is paused while timing, as timeit does, so a
+    collection triggered by an earlier benchmark's data is not billed here.
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def run_benchmarks(benchmarks, repeat=5, min_time=0.2, progress=None):
+    """Run benchmarks and return a results document.
+
+    Benchmarks that skip themselves are listed under "skipped" with the
+    reason.
+    """
+    results = []
+    skipped = []
+    for bench in benchmarks:
+        try:
+            result = bench.run(repeat=repeat, min_time=min_time)
+        except BenchmarkSkipped as reason:
+            skipped.append({"name": bench.name, "reason": str(reason)})
+            continue
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def machine_info():
+    """Describe the interpreter and platform the results came from."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "frozen": bool(getattr(sys, "frozen", False)),
+    }
+
+
+def same_machine(document, baseline):
+    """Check whether two documents were recorded on the same machine."""
+    return document.get("machine") == baseline.get("machine")
+
+
+def compare(document, baseline, threshold=DEFAULT_THRESHOLD, benchmarks=()):
+    """Compare results against a baseline document.
+
+    Returns a list of (name, baseline_s, current_s, ratio, regressed) tuples,
+    using each result's best (min) time. Benchmarks missing from the
+    baseline are skipped.
+    """
+    thresholds = {b.name: b.threshold for b in benchmarks if b.threshold is not None}
+    base = {r["name"]: r["min"] for r in baseline.get("results", [])}
+
+    rows = []
+    for result in document["results"]:
+        name = result["name"]
+        if name not in base or base[name] <= 0:
+            continue
+        ratio = result["min"] / base[name]
+        limit = 1 + thresholds.get(name, threshold)
+        rows.append((name, base[name], result["min"], ratio, ratio > limit))
+    return rows
+
+
+def load_json(path):
+    """Load a results or baseline document."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(document, path):
+    """Save a results or baseline document."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+
+
+def format_seconds(seconds):
+    """Format a per-call time with a readable unit."""
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.3f} us"
+    return f"{seconds * 1e9:.1f} ns"
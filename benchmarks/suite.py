@@ -0,0 +1,240 @@
+"""
+PSTimer hot-path benchmarks.
+
+Everything here runs headless: UI methods are driven with lightweight
+stand-ins for the Tk widgets they touch.
+"""
+
+import io
+import itertools
+import os
+import random
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from src import cube_state
+from src.cube_state import CubeSimulator
+from src.formatting import TimeFormatter
+from src.scramble import ScrambleManager
+from src.session_io import CSTIMER_HEADER, export_times, import_times
+from src.statistics import Session, SessionManager, SolveTime
+
+from .harness import Benchmark, BenchmarkSkipped
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATS_SIZES = {"10": 10, "1k": 1_000, "100k": 100_000}
+IO_SOLVES = 10_000
+
+
+def make_session(count, seed=1):
+    """Build a session of count solves with realistic times and penalties."""
+    rng = random.Random(seed)
+    scramble = ScrambleManager("3x3x3").generate_new()
+    solves = []
+    for _ in range(count):
+        penalty = rng.choices((None, "+2", "DNF"), (96, 3, 1))[0]
+        time = round(rng.gauss(12.0, 1.5), 3)
+        solves.append(SolveTime(time, scramble, None, penalty))
+    session = Session()
+    session.add_times(solves)
+    return session
+
+
+def make_cstimer_lines(count, seed=2):
+    """Build a csTimer CSV export with count rows."""
+    rng = random.Random(seed)
+    lines = [CSTIMER_HEADER + "\n"]
+    for i in range(1, count + 1):
+        lines.append(
+            f"{i};{rng.uniform(8, 20):.2f};;R U R' U' F2;2024-01-01 12:00:00\n"
+        )
+    return lines
+
+
+def _scramble_benchmarks():
+    """One benchmark per puzzle type."""
+    for puzzle in ScrambleManager.SCRAMBLE_TYPES:
+        yield Benchmark(
+            f"scramble.generate[{puzzle}]",
+            lambda generator: generator.generate(),
+            setup=lambda puzzle=puzzle: ScrambleManager(puzzle).generator,
+            group="scramble",
+        )
+
+
+def _fresh_scrambles():
+    """A pool of scrambles larger than the compiled-scramble cache."""
+    manager = ScrambleManager("3x3x3")
+    return itertools.cycle([manager.generate_new() for _ in range(2000)])
+
+
+def _apply_uncached(scrambles):
+    """Apply a scramble that has to be compiled from scratch."""
+    cube_state._compiled_scrambles.clear()
+    CubeSimulator().apply_scramble(next(scrambles))
+
+
+def _apply_cached(scramble):
+    """Apply a scramble whose compiled permutation is cached."""
+    CubeSimulator().apply_scramble(scramble)
+
+
+def _cube_benchmarks():
+    yield Benchmark(
+        "cube.apply_scramble[uncached]",
+        _apply_uncached,
+        setup=_fresh_scrambles,
+        group="cube",
+    )
+    yield Benchmark(
+        "cube.apply_scramble[cached]",
+        _apply_cached,
+        setup=lambda: ScrambleManager("3x3x3").generate_new(),
+        group="cube",
+    )
+
+
+def _recompute_statistics(session):
+    """Compute statistics as after a new solve (cache invalidated)."""
+    session.mark_changed()
+    session.get_statistics()
+
+
+def _statistics_benchmarks():
+    for label, count in STATS_SIZES.items():
+        yield Benchmark(
+            f"session.get_statistics[{label}]",
+            _recompute_statistics,
+            setup=lambda count=count: make_session(count),
+            group="statistics",
+        )
+
+
+class _FakeListbox:
+    """Listbox stand-in that stores its items."""
+
+    def __init__(self):
+        self.items = []
+
+    def get(self, first, last=None):
+        return tuple(self.items)
+
+    def delete(self, first, last=None):
+        self.items = []
+
+    def insert(self, index, *items):
+        self.items.extend(items)
+
+
+def _times_list_view(count):
+    """Headless stand-in for the main window's times list state."""
+    manager = SessionManager()
+    manager.sessions[manager.current_session_index] = make_session(count)
+    return SimpleNamespace(
+        is_compact_mode=False,
+        session_manager=manager,
+        time_formatter=TimeFormatter(),
+        times_listbox=_FakeListbox(),
+    )
+
+
+def _render_times_list(view):
+    """Render the times list from scratch."""
+    from src.ui import PSTimerUI
+
+    view.times_listbox.items = []
+    PSTimerUI._update_times_list(view)
+
+
+def _times_list_benchmarks():
+    yield Benchmark(
+        "ui.times_list[1k]",
+        _render_times_list,
+        setup=lambda: _times_list_view(1_000),
+        group="ui",
+    )
+    yield Benchmark(
+        "format.format_solves[100k]",
+        lambda session: TimeFormatter().format_solves(session.times),
+        setup=lambda: make_session(100_000),
+        group="ui",
+    )
+
+
+def _export(session):
+    """Export a session to an in-memory file."""
+    session.mark_changed()
+    export_times(io.StringIO(), session, "3x3x3")
+
+
+def _io_benchmarks():
+    yield Benchmark(
+        f"io.import_cstimer[{IO_SOLVES // 1000}k]",
+        import_times,
+        setup=lambda: make_cstimer_lines(IO_SOLVES),
+        group="io",
+    )
+    yield Benchmark(
+        f"io.export[{IO_SOLVES // 1000}k]",
+        _export,
+        setup=lambda: make_session(IO_SOLVES),
+        group="io",
+    )
+
+
+def _import_ui(_):
+    """Import the UI module in a fresh interpreter."""
+    subprocess.run(
+        [sys.executable, "-c", "import src.ui"], cwd=PROJECT_ROOT, check=True
+    )
+
+
+def _profile_startup(_):
+    """Start the full app with --profile-startup in a fresh interpreter."""
+    subprocess.run(
+        [sys.executable, "main.py", "--profile-startup"],
+        cwd=PROJECT_ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def _startup_benchmarks():
+    yield Benchmark("startup.import_ui", _import_ui, group="startup", threshold=0.5)
+    yield Benchmark(
+        "startup.first_usable_timer",
+        _profile_startup,
+        setup=_require_display,
+        group="startup",
+        threshold=0.5,
+    )
+
+
+def _require_display():
+    """Skip unless a Tk window can be created; checked only when run."""
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        raise BenchmarkSkipped("no DISPLAY")
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        raise BenchmarkSkipped(f"no display: {error}") from None
+    root.destroy()
+
+
+def all_benchmarks():
+    """Get every benchmark in the suite."""
+    benchmarks = []
+    for group in (
+        _scramble_benchmarks,
+        _cube_benchmarks,
+        _statistics_benchmarks,
+        _times_list_benchmarks,
+        _io_benchmarks,
+        _startup_benchmarks,
+    ):
+        benchmarks.extend(group())
+    return benchmarks
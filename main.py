@@ -13,22 +13,114 @@ Features:
 
 To run:
     python main.py
+    python main.py --profile-startup   # report startup timings and exit
+    python main.py --instrument        # time hot paths (F12 shows the overlay)
+    python main.py --lag-monitor       # watch for event-loop stalls
+    python main.py --serve 8765        # push times to remote displays
+    python main.py --input moves.txt   # drive the timer from a device
+    python main.py stats               # command line tools, see src/cli.py
 """
 
+import argparse
 import sys
 import os
 
 # Add src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
-from src.ui import PSTimerUI
+# First arguments that select the command line tools instead of the window
+CLI_COMMANDS = (
+    "scramble",
+    "sheets",
+    "add",
+    "import",
+    "export",
+    "stats",
+    "sessions",
+    "summary",
+    "serve",
+    "bench",
+)
 
 
-def main():
+def main(argv=None):
     """Main entry point for PSTimer."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in CLI_COMMANDS:
+        # Headless command line tools; no Tk needed
+        from src.cli import main as cli_main
+
+        sys.exit(cli_main(argv))
+
+    parser = argparse.ArgumentParser(description="PSTimer speedcubing timer")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print import and window construction times, then exit",
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        default=os.environ.get("PSTIMER_INSTRUMENT") == "1",
+        help="time hot paths into histograms (also PSTIMER_INSTRUMENT=1)",
+    )
+    parser.add_argument(
+        "--lag-monitor",
+        action="store_true",
+        default=os.environ.get("PSTIMER_LAG_MONITOR") == "1",
+        help="measure event-loop lag and log stalls (also PSTIMER_LAG_MONITOR=1;"
+        " on with --instrument)",
+    )
+    parser.add_argument(
+        "--instrument-output",
+        metavar="FILE",
+        help="write hot-path timings as JSON to FILE on exit",
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="serve scrambles and times on http://127.0.0.1:PORT/ (0 for any)",
+    )
+    parser.add_argument(
+        "--input",
+        metavar="FILE|HOST:PORT|serial:PORT",
+        help="read a smart cube or Stackmat from a file, socket, WAV or port",
+    )
+    args = parser.parse_args(argv)
+
     try:
-        app = PSTimerUI()
+        if args.profile_startup:
+            run_startup_profile()
+            return
+
+        if args.instrument or args.instrument_output:
+            from src.instrumentation import instrumentation
+
+            # Patch before the window exists so bound callbacks are timed too
+            instrumentation.enable()
+
+        from src.ui import PSTimerUI
+
+        monitor_lag = args.lag_monitor or args.instrument or args.instrument_output
+        app = PSTimerUI(monitor_lag=bool(monitor_lag))
+        server = start_server(app.core, args.serve) if args.serve is not None else None
+        if args.input:
+            from src.input_sources import open_source
+
+            app.attach_input(open_source(args.input, realtime=True))
         app.mainloop()
+        if server is not None:
+            server.stop_thread()
+
+        if args.instrument_output:
+            instrumentation.dump_json(
+                args.instrument_output,
+                {
+                    "input_lag_ms": app.event_clock.lag_stats(),
+                    "event_loop_lag": app.lag_monitor.summary(),
+                },
+            )
     except KeyboardInterrupt:
         print("\nGoodbye!")
     except Exception as e:
@@ -36,5 +128,33 @@ def main():
         sys.exit(1)
 
 
+def start_server(core, port):
+    """Serve the window's timer to remote displays from a background thread."""
+    from src.server import TimerServer
+
+    server = TimerServer(core, port=port)
+    server.start_in_thread()
+    print(f"Serving on {server.url}")
+    return server
+
+
+def run_startup_profile():
+    """Start the UI with a startup profiler and print its report."""
+    from src.startup import StartupProfiler
+
+    profiler = StartupProfiler()
+    with profiler.phase("import src.ui"):
+        from src.ui import PSTimerUI
+
+    app = PSTimerUI(profiler=profiler)
+
+    def finish():
+        print(profiler.report())
+        app.after_idle(app.destroy)
+
+    profiler.on_ready = finish
+    app.mainloop()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,343 @@
+"""
+Command line interface for PSTimer.
+
+Runs on the headless TimerCore, so it works without a display:
+
+    python main.py scramble -p 4x4x4 -n 5
+    python main.py scramble -p Pyraminx -n 5 --images out --format png
+    python main.py sheets packet.html --title "Open 2026" -e 333:3:4 -e sq1
+    python main.py add 12.34 "14.02+" DNF
+    python main.py import cstimer.csv
+    python main.py export session.txt
+    python main.py stats --session 2
+    python main.py sessions
+    python main.py summary -p 3x3x3 --since 2024-05-01
+    python main.py serve --port 8765
+    python main.py bench -k statistics
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+from .core import TimerCore
+from .formatting import TimeParseError, default_formatter, parse_time
+from .scramble import ScrambleManager
+from .statistics import SolveTime
+from .storage import SessionStore
+
+COMMANDS = (
+    "scramble",
+    "sheets",
+    "add",
+    "import",
+    "export",
+    "stats",
+    "sessions",
+    "summary",
+    "serve",
+    "bench",
+)
+
+STAT_LABELS = (
+    ("count", "Solves"),
+    ("best", "Best"),
+    ("worst", "Worst"),
+    ("mean", "Mean"),
+    ("mo3", "mo3"),
+    ("ao5", "ao5"),
+    ("ao12", "ao12"),
+    ("ao100", "ao100"),
+)
+
+
+def build_parser():
+    """Create the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="pstimer", description="PSTimer command line tools"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Options shared by the commands that work on stored sessions
+    storage = argparse.ArgumentParser(add_help=False)
+    storage.add_argument(
+        "--data-dir", help="session storage directory (default ~/.pstimer)"
+    )
+    storage.add_argument(
+        "--session",
+        type=int,
+        metavar="N",
+        help="session number to use (1-based, default: the current session)",
+    )
+
+    scramble = commands.add_parser("scramble", help="generate scrambles")
+    scramble.add_argument(
+        "-p",
+        "--puzzle",
+        default="3x3x3",
+        choices=list(ScrambleManager.SCRAMBLE_TYPES),
+        help="puzzle type",
+    )
+    scramble.add_argument("-n", "--count", type=int, default=1, help="how many")
+    scramble.add_argument(
+        "--images", metavar="DIR", help="also draw each scrambled puzzle into DIR"
+    )
+    scramble.add_argument(
+        "--format", choices=("svg", "png"), default="svg", help="image format"
+    )
+    scramble.add_argument(
+        "--scale", type=float, default=2, help="PNG pixels per SVG unit"
+    )
+
+    sheets = commands.add_parser(
+        "sheets", help="write printable competition scramble sheets (HTML)"
+    )
+    sheets.add_argument("file", help="HTML file to write")
+    sheets.add_argument(
+        "-e",
+        "--event",
+        action="append",
+        metavar="EVENT[:ROUNDS[:GROUPS]]",
+        help="event to include, e.g. 333 or 333:3:4 (default: every event)",
+    )
+    sheets.add_argument("--title", default="Scrambles", help="competition name")
+    sheets.add_argument("--rounds", type=int, default=1, help="rounds per event")
+    sheets.add_argument("--groups", type=int, default=1, help="groups per round")
+    sheets.add_argument(
+        "--workers", type=int, help="worker processes (default: one per CPU)"
+    )
+
+    add = commands.add_parser(
+        "add", parents=[storage], help="add solve times to a session"
+    )
+    add.add_argument("times", nargs="+", help='times such as 12.34, "14.34+", DNF')
+
+    import_ = commands.add_parser(
+        "import", parents=[storage], help="import a csTimer/PSTimer file"
+    )
+    import_.add_argument("file")
+
+    export = commands.add_parser(
+        "export", parents=[storage], help="export a session as text"
+    )
+    export.add_argument("file")
+
+    commands.add_parser("stats", parents=[storage], help="print session statistics")
+    commands.add_parser("sessions", parents=[storage], help="list sessions")
+
+    summary = commands.add_parser(
+        "summary", parents=[storage], help="totals and bests across sessions"
+    )
+    summary.add_argument("-p", "--puzzle", help="only sessions for this puzzle")
+    summary.add_argument(
+        "--since", type=date.fromisoformat, help="first day (YYYY-MM-DD)"
+    )
+    summary.add_argument(
+        "--until", type=date.fromisoformat, help="last day, inclusive (YYYY-MM-DD)"
+    )
+
+    serve = commands.add_parser(
+        "serve", parents=[storage], help="serve the session to remote displays"
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on")
+
+    # Arguments after "bench" go to the benchmark runner (see main)
+    commands.add_parser("bench", help="run the benchmark suite (-h for options)")
+    return parser
+
+
+def main(argv=None, out=None):
+    """Run a command; returns the exit status."""
+    out = out or sys.stdout
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["bench"]:
+        return run_benchmarks(argv[1:])
+    args = build_parser().parse_args(argv)
+
+    if args.command == "scramble":
+        return cmd_scramble(args, out)
+    if args.command == "sheets":
+        return cmd_sheets(args, out)
+    core = TimerCore(store=SessionStore(args.data_dir))
+    if args.session is not None and not core.switch_session(args.session - 1):
+        print(f"No session {args.session}", file=sys.stderr)
+        return 1
+
+    status = COMMAND_HANDLERS[args.command](core, args, out)
+    core.save()
+    return status
+
+
+def cmd_scramble(args, out):
+    """Print scrambles, optionally drawing each one."""
+    generator = ScrambleManager(args.puzzle).generator
+    scrambles = [generator.generate() for _ in range(args.count)]
+    for scramble in scrambles:
+        print(scramble, file=out)
+    if args.images:
+        from .scramble_image import ScrambleRenderer, default_cache_dir
+
+        renderer = ScrambleRenderer(default_cache_dir())
+        images = renderer.render_many(args.puzzle, scrambles, args.format, args.scale)
+        os.makedirs(args.images, exist_ok=True)
+        for number, image in enumerate(images, 1):
+            name = f"{args.puzzle}-{number:03d}.{args.format}"
+            mode = "w" if args.format == "svg" else "wb"
+            encoding = "utf-8" if args.format == "svg" else None
+            with open(os.path.join(args.images, name), mode, encoding=encoding) as f:
+                f.write(image)
+    return 0
+
+
+def cmd_sheets(args, out):
+    """Write a scramble packet for a competition."""
+    from .scramble_sheet import EVENTS, SheetError, parse_event_spec, write_packet
+
+    specs = args.event or [event.id for event in EVENTS]
+    try:
+        schedule = [
+            parse_event_spec(spec, args.rounds, args.groups) for spec in specs
+        ]
+    except SheetError as e:
+        print(e, file=sys.stderr)
+        return 1
+    groups = write_packet(args.file, args.title, schedule, args.workers)
+    count = sum(len(scrambles) for *_, scrambles, _ in groups)
+    print(f"Wrote {len(groups)} groups, {count} scrambles to {args.file}", file=out)
+    return 0
+
+
+def cmd_add(core, args, out):
+    """Add solve times typed on the command line."""
+    status = 0
+    for text in args.times:
+        try:
+            seconds, penalty = parse_time(text)
+        except TimeParseError as e:
+            print(e, file=sys.stderr)
+            status = 1
+            continue
+        solve = core.record_solve(seconds, penalty, scramble="")
+        print(f"Added {solve}", file=out)
+    return status
+
+
+def cmd_import(core, args, out):
+    """Import a times file into the session."""
+    try:
+        result = core.import_file(args.file)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Failed to import times: {e}", file=sys.stderr)
+        return 1
+    print(f"Imported {len(result.solves)} solves", file=out)
+    for line, text, error in result.errors:
+        print(f"line {line}: {error}", file=sys.stderr)
+    return 1 if result.errors else 0
+
+
+def cmd_export(core, args, out):
+    """Export the session to a text file."""
+    try:
+        core.export_file(args.file)
+    except OSError as e:
+        print(f"Failed to export times: {e}", file=sys.stderr)
+        return 1
+    print(f"Exported {len(core.current_session)} solves to {args.file}", file=out)
+    return 0
+
+
+def cmd_stats(core, args, out):
+    """Print the session's statistics."""
+    session = core.current_session
+    stats = core.statistics()
+    print(session.name, file=out)
+    for key, label in STAT_LABELS:
+        value = stats.get(key)
+        if isinstance(value, SolveTime):
+            value = default_formatter.format_solve(value)  # best and worst
+        elif key != "count":
+            value = default_formatter.format(value)
+        print(f"  {label:<7} {value}", file=out)
+    return 0
+
+
+def cmd_sessions(core, args, out):
+    """List the stored sessions."""
+    manager = core.session_manager
+    for number, session in enumerate(manager.sessions, 1):
+        marker = "*" if number - 1 == manager.current_session_index else " "
+        print(
+            f"{marker} {number:3d}. {session.name} ({len(session)} solves)", file=out
+        )
+    return 0
+
+
+def cmd_summary(core, args, out):
+    """Print totals and personal bests across sessions."""
+    index = core.index
+    until = args.until + timedelta(days=1) if args.until else None
+    puzzles = [args.puzzle] if args.puzzle else index.puzzle_types()
+    for puzzle in puzzles:
+        result = index.query(puzzle, args.since, until)
+        print(f"{puzzle}: {result.count} solves, {result.sessions} sessions", file=out)
+        rows = [("Mean", result.mean, None), ("Best", result.best, None)]
+        if args.since is None and args.until is None:
+            for stat in ("ao5", "ao12"):
+                value, summary = index.best(stat, puzzle)
+                rows.append((f"Best {stat}", value, summary))
+            p10, median, p90 = index.quantiles((0.1, 0.5, 0.9), puzzle)
+            rows += [("p10", p10, None), ("Median", median, None), ("p90", p90, None)]
+        for label, value, summary in rows:
+            where = f" ({summary.name})" if summary else ""
+            print(f"  {label:<9} {default_formatter.format(value)}{where}", file=out)
+    return 0
+
+
+def cmd_serve(core, args, out):
+    """Serve scrambles, times and statistics over HTTP/WebSocket."""
+    import asyncio
+
+    from .server import TimerServer
+
+    server = TimerServer(core, args.host, args.port)
+
+    async def serve():
+        await server.start()
+        print(f"Serving on {server.url} (Ctrl+C to stop)", file=out)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except OSError as e:
+        print(f"Failed to start server: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_benchmarks(bench_args):
+    """Run the benchmark suite from a source checkout."""
+    try:
+        from benchmarks.__main__ import main as benchmarks_main
+    except ImportError:
+        print("Benchmarks need a source checkout", file=sys.stderr)
+        return 1
+    return benchmarks_main(bench_args)
+
+
+COMMAND_HANDLERS = {
+    "add": cmd_add,
+    "import": cmd_import,
+    "export": cmd_export,
+    "stats": cmd_stats,
+    "sessions": cmd_sessions,
+    "summary": cmd_summary,
+    "serve": cmd_serve,
+}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
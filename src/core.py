@@ -0,0 +1,421 @@
+"""
+Headless timer core for PSTimer.
+"""
+
+import time
+
+from .formatting import default_formatter
+from .pb_tracker import PBTracker
+from .scramble import ScrambleManager
+from .session_index import SessionIndex
+from .statistics import SessionManager, SolveTime
+from .timer import PrecisionStopwatch
+
+# Outcomes of TimerCore.release()
+STARTED = "started"
+STOPPED = "stopped"
+CANCELLED = "cancelled"  # Released before the hold time
+INSPECTION_DNF = "inspection_dnf"  # Inspection ran over 17 seconds
+
+PENALTIES = (None, "+2", "DNF")
+
+
+class TimerCore:
+    """The solve lifecycle, scrambles, sessions and persistence without Tk.
+
+    The UI, the command line and the server all drive this class. Input is
+    given as press()/release()/stop() calls with perf_counter_ns timestamps;
+    changes are announced to subscribers:
+
+        "state_changed"       the timer became ready, started, stopped or reset
+        "solve_recorded"      solve=SolveTime, session=Session
+        "personal_best"       pb=PersonalBest, session=Session (after the solve)
+        "session_changed"     session=Session (times edited, cleared, switched)
+        "scramble_changed"    scramble=str
+        "inspection_penalty"  penalty="+2" or "DNF"
+    """
+
+    EVENTS = (
+        "state_changed",
+        "solve_recorded",
+        "personal_best",
+        "session_changed",
+        "scramble_changed",
+        "inspection_penalty",
+    )
+
+    def __init__(
+        self,
+        puzzle_type="3x3x3",
+        store=None,
+        hold_time=300,
+        inspection_enabled=False,
+        clock=time.perf_counter_ns,
+    ):
+        self.store = store
+        self.stopwatch = PrecisionStopwatch()
+        self.session_manager = store.load() if store is not None else SessionManager()
+        if len(self.current_session):
+            puzzle_type = self.current_session.puzzle_type  # Carry on with it
+        self.scramble_manager = ScrambleManager(puzzle_type)
+        self.index = SessionIndex(self.session_manager)
+        self.pbs = PBTracker(
+            self.index, store.read_pb_history() if store is not None else None
+        )
+        self.clock = clock
+        # StatisticsWorker that rebuilds summaries after edits; inline if None
+        self.summary_worker = None
+
+        self.hold_time = hold_time  # Milliseconds space must be held
+        self.inspection_enabled = inspection_enabled
+        self.is_ready = False
+        self.ready_start_ns = None
+        self.inspection_start_ns = None
+        self.pending_penalty = None  # Inspection penalty for the running solve
+        self._index_dirty = False  # Session order/selection changed
+        self._listeners = {event: [] for event in self.EVENTS}
+
+    # Events
+
+    def subscribe(self, event, callback):
+        """Call callback(**data) whenever event is emitted."""
+        if event not in self._listeners:
+            raise ValueError(f"Unknown event: {event!r}")
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        """Stop calling callback for event."""
+        try:
+            self._listeners[event].remove(callback)
+        except (KeyError, ValueError):
+            pass
+
+    def emit(self, event, **data):
+        """Notify the subscribers of an event."""
+        for callback in list(self._listeners[event]):
+            callback(**data)
+
+    # Solve lifecycle
+
+    @property
+    def current_session(self):
+        """Get the current session."""
+        return self.session_manager.current_session
+
+    @property
+    def current_scramble(self):
+        """Get the scramble for the next solve."""
+        return self.scramble_manager.get_current()
+
+    def press(self, ts_ns=None):
+        """Start holding the timer key; arms the timer and inspection."""
+        if self.stopwatch.running or self.is_ready:
+            return False
+        ts_ns = self.clock() if ts_ns is None else ts_ns
+        self.is_ready = True
+        self.ready_start_ns = ts_ns
+        self.stopwatch.reset()
+        if self.inspection_enabled:
+            self.inspection_start_ns = ts_ns
+        self.emit("state_changed")
+        return True
+
+    def release(self, ts_ns=None):
+        """Release the timer key: start, stop or cancel.
+
+        Returns STARTED, STOPPED, CANCELLED, INSPECTION_DNF or None when the
+        release does nothing.
+        """
+        ts_ns = self.clock() if ts_ns is None else ts_ns
+        if self.stopwatch.running:
+            self.stop(ts_ns)
+            return STOPPED
+        if not self.is_ready:
+            return None
+
+        self.is_ready = False
+        held_ms = (ts_ns - self.ready_start_ns) / 1_000_000
+        if held_ms < self.hold_time:
+            self.inspection_start_ns = None
+            self.emit("state_changed")
+            return CANCELLED
+
+        self.pending_penalty = None
+        if self.inspection_enabled and self.inspection_start_ns is not None:
+            inspection_s = (ts_ns - self.inspection_start_ns) / 1_000_000_000
+            self.inspection_start_ns = None
+            if inspection_s > 17.0:  # Over 17 seconds = DNF
+                self.emit("inspection_penalty", penalty="DNF")
+                self.emit("state_changed")
+                return INSPECTION_DNF
+            if inspection_s > 15.0:  # Over 15 seconds = +2
+                self.pending_penalty = "+2"
+                self.emit("inspection_penalty", penalty="+2")
+
+        self.stopwatch.start(ts_ns)
+        self.emit("state_changed")
+        return STARTED
+
+    def start(self, ts_ns=None):
+        """Start a solve right away, for devices that signal the start.
+
+        Unlike release() there is no hold time or inspection: a Stackmat or
+        smart cube has already decided the solve began at ts_ns.
+        """
+        if self.stopwatch.running:
+            return False
+        ts_ns = self.clock() if ts_ns is None else ts_ns
+        self.is_ready = False
+        self.inspection_start_ns = None
+        self.pending_penalty = None
+        self.stopwatch.reset()
+        self.stopwatch.start(ts_ns)
+        self.emit("state_changed")
+        return True
+
+    def stop(self, ts_ns=None, reconstruction=None):
+        """Stop a running solve and record it. Returns the SolveTime or None."""
+        if not self.stopwatch.running:
+            return None
+        ts_ns = self.clock() if ts_ns is None else ts_ns
+        elapsed_ns = self.stopwatch.stop(ts_ns)
+        self.is_ready = False
+        self.emit("state_changed")
+        penalty, self.pending_penalty = self.pending_penalty, None
+        return self.record_solve(
+            elapsed_ns / 1_000_000_000,
+            penalty,
+            reconstruction=reconstruction,
+            elapsed_ns=elapsed_ns,
+        )
+
+    def reset(self):
+        """Reset the timer to zero."""
+        self.stopwatch.reset()
+        self.is_ready = False
+        self.inspection_start_ns = None
+        self.pending_penalty = None
+        self.emit("state_changed")
+
+    # Solves and penalties
+
+    def record_solve(
+        self,
+        seconds,
+        penalty=None,
+        scramble=None,
+        reconstruction=None,
+        elapsed_ns=None,
+    ):
+        """Add a solve to the current session.
+
+        elapsed_ns is the exact time of a solve timed by the stopwatch.
+        """
+        if penalty not in PENALTIES:
+            raise ValueError(f"Unknown penalty: {penalty!r}")
+        if scramble is None:
+            scramble = self.current_scramble
+        solve = SolveTime(
+            seconds,
+            scramble,
+            penalty=penalty,
+            reconstruction=reconstruction,
+            elapsed_ns=elapsed_ns,
+        )
+        session = self.current_session
+        pbs = []
+        if session.puzzle_type == self.scramble_manager.current_type:
+            pbs = self.pbs.check(session, solve)
+        session.add_time(solve)
+        self.index.solve_added(session)
+        self.emit("solve_recorded", solve=solve, session=session)
+        for pb in pbs:
+            self.emit("personal_best", pb=pb, session=session)
+        self.emit("session_changed", session=session)
+        return solve
+
+    def add_solves(self, solves):
+        """Add many solves (oldest first) to the current session."""
+        session = self.current_session
+        session.add_times(solves)
+        self._refresh_bests(session)
+        self.emit("session_changed", session=session)
+
+    def set_penalty(self, index, penalty):
+        """Change the penalty of the solve at index (0 is the newest)."""
+        if penalty not in PENALTIES:
+            raise ValueError(f"Unknown penalty: {penalty!r}")
+        session = self.current_session
+        session.set_penalty(index, penalty)
+        self._refresh_bests(session)
+        self.emit("session_changed", session=session)
+
+    def set_reconstruction(self, index, reconstruction):
+        """Attach a Reconstruction (or None) to the solve at index."""
+        session = self.current_session
+        session.set_reconstruction(index, reconstruction)
+        self.emit("session_changed", session=session)
+
+    def delete_solve(self, index):
+        """Remove the solve at index (0 is the newest)."""
+        session = self.current_session
+        solve = session.remove_time(index)
+        if solve is not None:
+            self._refresh_bests(session)
+            self.emit("session_changed", session=session)
+        return solve
+
+    def _refresh_bests(self, session):
+        """Recompute a session's bests after an edit, then reseed the PBs.
+
+        With a summary_worker the scan runs off-thread and the personal
+        bests keep their old values until it lands, so recording the next
+        solve never waits for it.
+        """
+        if self.summary_worker is None:
+            session.refresh_summary()
+            self._bests_refreshed(session)
+        else:
+            self.summary_worker.submit_summary(session, self._bests_refreshed)
+
+    def _bests_refreshed(self, session):
+        """Reseed the personal bests from a session's rebuilt summary."""
+        self.pbs.invalidate(session.puzzle_type)
+
+    def statistics(self):
+        """Get the statistics of the current session."""
+        return self.current_session.get_statistics()
+
+    # Scrambles
+
+    def new_scramble(self):
+        """Generate the scramble for the next solve."""
+        scramble = self.scramble_manager.generate_new()
+        self.emit("scramble_changed", scramble=scramble)
+        return scramble
+
+    def previous_scramble(self):
+        """Go back to the previous scramble, if any."""
+        scramble = self.scramble_manager.get_previous()
+        if scramble:
+            self.emit("scramble_changed", scramble=scramble)
+        return scramble
+
+    def next_scramble(self):
+        """Go forward in the scramble history, generating at the end."""
+        scramble = self.scramble_manager.get_next()
+        self.emit("scramble_changed", scramble=scramble)
+        return scramble
+
+    def set_puzzle_type(self, puzzle_type):
+        """Switch puzzles and generate a scramble for the new one.
+
+        A session holds solves of one puzzle: an empty session takes on the
+        new puzzle, otherwise the latest session of that puzzle becomes
+        current, or a new one is created for it.
+        """
+        if not self.scramble_manager.set_type(puzzle_type):
+            return False
+        session = self.current_session
+        if session.puzzle_type != puzzle_type:
+            if not len(session):
+                session.puzzle_type = puzzle_type
+                self._index_dirty = True
+            else:
+                self._switch_to_puzzle(puzzle_type)
+        self.new_scramble()
+        return True
+
+    def _switch_to_puzzle(self, puzzle_type):
+        """Make the latest session of a puzzle current, creating one if needed."""
+        sessions = self.session_manager.sessions
+        for index in range(len(sessions) - 1, -1, -1):
+            if sessions[index].puzzle_type == puzzle_type:
+                self.session_manager.switch_session(index)
+                self._index_dirty = True
+                self.emit("session_changed", session=self.current_session)
+                return
+        self.new_session()
+
+    # Sessions
+
+    def new_session(self, name=None):
+        """Create a session for the current puzzle and switch to it."""
+        session = self.session_manager.new_session(
+            name, self.scramble_manager.current_type
+        )
+        self._index_dirty = True
+        self.emit("session_changed", session=session)
+        return session
+
+    def switch_session(self, index):
+        """Switch to the session at index, and to its puzzle if it has solves."""
+        if not self.session_manager.switch_session(index):
+            return False
+        self._index_dirty = True
+        session = self.current_session
+        if len(session) and session.puzzle_type != self.scramble_manager.current_type:
+            self.scramble_manager.set_type(session.puzzle_type)
+            self.new_scramble()
+        self.emit("session_changed", session=session)
+        return True
+
+    def delete_session(self, index):
+        """Delete the session at index (the last session cannot be deleted)."""
+        if not self.session_manager.delete_session(index):
+            return False
+        self._index_dirty = True
+        self.pbs.invalidate()
+        self.emit("session_changed", session=self.current_session)
+        return True
+
+    def clear_session(self):
+        """Remove every solve from the current session."""
+        session = self.current_session
+        session.clear()
+        self.pbs.invalidate(session.puzzle_type)
+        self.emit("session_changed", session=session)
+
+    # Import, export and persistence
+
+    def import_file(self, path):
+        """Import solves from a file into the current session."""
+        from .session_io import import_file
+
+        result = import_file(path)
+        if result.solves:
+            self.add_solves(result.solves)
+        return result
+
+    def export_file(self, path, formatter=default_formatter):
+        """Export the current session as a PSTimer text export."""
+        from .session_io import export_times
+
+        puzzle_type = self.scramble_manager.current_type
+        with open(path, "w", encoding="utf-8") as f:
+            export_times(f, self.current_session, puzzle_type, formatter)
+
+    def needs_save(self):
+        """Check whether there are unsaved changes."""
+        if self.store is None:
+            return False
+        return (
+            self._index_dirty
+            or self.pbs.history_dirty
+            or self.store.is_dirty(self.session_manager)
+        )
+
+    def save(self, compact=False):
+        """Write unsaved changes to the store. Returns sessions written.
+
+        Edits are appended to the session journals; compact rewrites the
+        journalled sessions whole, e.g. on exit (see SessionStore.save).
+        """
+        if self.store is None:
+            return 0
+        written = self.store.save(self.session_manager, compact)
+        if self.pbs.history_dirty:
+            self.store.save_pb_history(self.pbs.history)
+            self.pbs.history_dirty = False
+        self._index_dirty = False
+        return written
@@ -0,0 +1,595 @@
+"""
+Headless 3x3x3 cube state for PSTimer: the simulator, compiled moves and
+compact state keys shared by the cube view, smart-cube tracking,
+reconstructions and scramble images.
+"""
+
+import re
+
+from .cache import LRUCache
+
+# Flattened facelet order used by compiled moves and state keys
+FACE_ORDER = ("U", "D", "F", "B", "L", "R")
+
+# 3-bit codes used when packing facelets into a state key
+_COLOR_CODES = {"W": 0, "Y": 1, "G": 2, "B": 3, "O": 4, "R": 5}
+
+# Outer turns, wide turns and rotations; "2'" turns the same as "2"
+MOVE_TOKEN = re.compile(r"([UDFBLR]w?|[xyz])(2'|2|'|)")
+_QUARTER_TURNS = {"": 1, "2": 2, "'": 3}
+
+# A wide turn of a 3x3x3 is its opposite face turned with the whole cube
+_WIDE_TURNS = {
+    "R": ("L", "x"),
+    "L": ("R", "x'"),
+    "U": ("D", "y"),
+    "D": ("U", "y'"),
+    "F": ("B", "z"),
+    "B": ("F", "z'"),
+}
+
+
+class CubeSimulator:
+    """Simulates a 3x3x3 Rubik's cube state and moves."""
+
+    def __init__(self):
+        self.reset_to_solved()
+
+    def reset_to_solved(self):
+        """Reset cube to solved state with correct WCA orientation."""
+        # Standard WCA cube orientation: White top, Green front
+        self.state = {
+            "U": [["W", "W", "W"], ["W", "W", "W"], ["W", "W", "W"]],  # White (Up)
+            "D": [["Y", "Y", "Y"], ["Y", "Y", "Y"], ["Y", "Y", "Y"]],  # Yellow (Down)
+            "F": [["G", "G", "G"], ["G", "G", "G"], ["G", "G", "G"]],  # Green (Front)
+            "B": [["B", "B", "B"], ["B", "B", "B"], ["B", "B", "B"]],  # Blue (Back)
+            "L": [["O", "O", "O"], ["O", "O", "O"], ["O", "O", "O"]],  # Orange (Left)
+            "R": [["R", "R", "R"], ["R", "R", "R"], ["R", "R", "R"]],  # Red (Right)
+        }
+
+    def _rotate_face_clockwise(self, face):
+        """Rotate a face 90 degrees clockwise."""
+        old_face = [row[:] for row in self.state[face]]
+        for i in range(3):
+            for j in range(3):
+                self.state[face][i][j] = old_face[2 - j][i]
+
+    def _rotate_face_counterclockwise(self, face):
+        """Rotate a face 90 degrees counterclockwise."""
+        old_face = [row[:] for row in self.state[face]]
+        for i in range(3):
+            for j in range(3):
+                self.state[face][i][j] = old_face[j][2 - i]
+
+    def _move_u(self):
+        """Perform U move (Up face clockwise)."""
+        self._rotate_face_clockwise("U")
+        # Correctly cycle the top rows of F, R, B, L in reverse direction
+        temp = self.state["F"][0][:]
+        self.state["F"][0] = self.state["R"][0][:]
+        self.state["R"][0] = self.state["B"][0][:]
+        self.state["B"][0] = self.state["L"][0][:]
+        self.state["L"][0] = temp
+
+    def _move_d(self):
+        """Perform D move (Down face clockwise)."""
+        self._rotate_face_clockwise("D")
+        # Correctly cycle the bottom rows of F, L, B, R (opposite of U)
+        temp = self.state["F"][2][:]
+        self.state["F"][2] = self.state["L"][2][:]
+        self.state["L"][2] = self.state["B"][2][:]
+        self.state["B"][2] = self.state["R"][2][:]
+        self.state["R"][2] = temp
+
+    def _move_f(self):
+        """Perform F move (Front face clockwise)."""
+        self._rotate_face_clockwise("F")
+        # Correctly cycle U, R, D, L edges
+        temp = self.state["U"][2][:]
+        self.state["U"][2][0] = self.state["L"][2][2]
+        self.state["U"][2][1] = self.state["L"][1][2]
+        self.state["U"][2][2] = self.state["L"][0][2]
+
+        self.state["L"][0][2] = self.state["D"][0][0]
+        self.state["L"][1][2] = self.state["D"][0][1]
+        self.state["L"][2][2] = self.state["D"][0][2]
+
+        self.state["D"][0][0] = self.state["R"][2][0]
+        self.state["D"][0][1] = self.state["R"][1][0]
+        self.state["D"][0][2] = self.state["R"][0][0]
+
+        self.state["R"][0][0] = temp[0]
+        self.state["R"][1][0] = temp[1]
+        self.state["R"][2][0] = temp[2]
+
+    def _move_b(self):
+        """Perform B move (Back face clockwise)."""
+        self._rotate_face_clockwise("B")
+        # Correctly cycle U, L, D, R edges (note: B is opposite F)
+        temp = self.state["U"][0][:]
+        self.state["U"][0][0] = self.state["R"][0][2]
+        self.state["U"][0][1] = self.state["R"][1][2]
+        self.state["U"][0][2] = self.state["R"][2][2]
+
+        self.state["R"][0][2] = self.state["D"][2][2]
+        self.state["R"][1][2] = self.state["D"][2][1]
+        self.state["R"][2][2] = self.state["D"][2][0]
+
+        self.state["D"][2][0] = self.state["L"][0][0]
+        self.state["D"][2][1] = self.state["L"][1][0]
+        self.state["D"][2][2] = self.state["L"][2][0]
+
+        self.state["L"][0][0] = temp[2]
+        self.state["L"][1][0] = temp[1]
+        self.state["L"][2][0] = temp[0]
+
+    def _move_l(self):
+        """Perform L move (Left face clockwise)."""
+        self._rotate_face_clockwise("L")
+        # L' cycle is reverse of current L: U ← B ← D ← F ← U
+        temp = [self.state["U"][0][0], self.state["U"][1][0], self.state["U"][2][0]]
+
+        # U left column ← B right column (reversed)
+        self.state["U"][0][0] = self.state["B"][2][2]
+        self.state["U"][1][0] = self.state["B"][1][2]
+        self.state["U"][2][0] = self.state["B"][0][2]
+
+        # B right column ← D left column (reversed)
+        self.state["B"][0][2] = self.state["D"][2][0]
+        self.state["B"][1][2] = self.state["D"][1][0]
+        self.state["B"][2][2] = self.state["D"][0][0]
+
+        # D left column ← F left column
+        self.state["D"][0][0] = self.state["F"][0][0]
+        self.state["D"][1][0] = self.state["F"][1][0]
+        self.state["D"][2][0] = self.state["F"][2][0]
+
+        # F left column ← U left column
+        self.state["F"][0][0] = temp[0]
+        self.state["F"][1][0] = temp[1]
+        self.state["F"][2][0] = temp[2]
+
+    def _move_r(self):
+        """Perform R move (Right face clockwise) - WCA standard."""
+        self._rotate_face_clockwise("R")
+        # Correct WCA R move cycle: U←F←D←B←U
+        temp = [self.state["U"][0][2], self.state["U"][1][2], self.state["U"][2][2]]
+
+        # U right column ← F right column
+        self.state["U"][0][2] = self.state["F"][0][2]
+        self.state["U"][1][2] = self.state["F"][1][2]
+        self.state["U"][2][2] = self.state["F"][2][2]
+
+        # F right column ← D right column
+        self.state["F"][0][2] = self.state["D"][0][2]
+        self.state["F"][1][2] = self.state["D"][1][2]
+        self.state["F"][2][2] = self.state["D"][2][2]
+
+        # D right column ← B left column (reversed order)
+        self.state["D"][0][2] = self.state["B"][2][0]
+        self.state["D"][1][2] = self.state["B"][1][0]
+        self.state["D"][2][2] = self.state["B"][0][0]
+
+        # B left column ← U right column (reversed order)
+        self.state["B"][0][0] = temp[2]
+        self.state["B"][1][0] = temp[1]
+        self.state["B"][2][0] = temp[0]
+
+    def _move_u_prime(self):
+        """U' move: Up face counterclockwise"""
+        self._rotate_face_counterclockwise("U")
+        # Reverse the cycle: F←L←B←R←F (original direction)
+        temp = self.state["F"][0][:]
+        self.state["F"][0] = self.state["L"][0][:]
+        self.state["L"][0] = self.state["B"][0][:]
+        self.state["B"][0] = self.state["R"][0][:]
+        self.state["R"][0] = temp
+
+    def _move_d_prime(self):
+        """D' move: Down face counterclockwise"""
+        self._rotate_face_counterclockwise("D")
+        # Reverse the cycle: F←R←B←L←F (opposite of D move)
+        temp = self.state["F"][2][:]
+        self.state["F"][2] = self.state["R"][2][:]
+        self.state["R"][2] = self.state["B"][2][:]
+        self.state["B"][2] = self.state["L"][2][:]
+        self.state["L"][2] = temp
+
+    def _move_f_prime(self):
+        """F' move: Front face counterclockwise"""
+        self._rotate_face_counterclockwise("F")
+        # Reverse the F move cycle
+        temp = self.state["U"][2][:]
+        self.state["U"][2][0] = self.state["R"][0][0]
+        self.state["U"][2][1] = self.state["R"][1][0]
+        self.state["U"][2][2] = self.state["R"][2][0]
+
+        self.state["R"][0][0] = self.state["D"][0][2]
+        self.state["R"][1][0] = self.state["D"][0][1]
+        self.state["R"][2][0] = self.state["D"][0][0]
+
+        self.state["D"][0][0] = self.state["L"][0][2]
+        self.state["D"][0][1] = self.state["L"][1][2]
+        self.state["D"][0][2] = self.state["L"][2][2]
+
+        self.state["L"][0][2] = temp[2]
+        self.state["L"][1][2] = temp[1]
+        self.state["L"][2][2] = temp[0]
+
+    def _move_b_prime(self):
+        """B' move: Back face counterclockwise"""
+        self._rotate_face_counterclockwise("B")
+        # Reverse the B move cycle
+        temp = self.state["U"][0][:]
+        self.state["U"][0][0] = self.state["L"][2][0]
+        self.state["U"][0][1] = self.state["L"][1][0]
+        self.state["U"][0][2] = self.state["L"][0][0]
+
+        self.state["L"][0][0] = self.state["D"][2][0]
+        self.state["L"][1][0] = self.state["D"][2][1]
+        self.state["L"][2][0] = self.state["D"][2][2]
+
+        self.state["D"][2][0] = self.state["R"][2][2]
+        self.state["D"][2][1] = self.state["R"][1][2]
+        self.state["D"][2][2] = self.state["R"][0][2]
+
+        self.state["R"][0][2] = temp[0]
+        self.state["R"][1][2] = temp[1]
+        self.state["R"][2][2] = temp[2]
+
+    def _move_l_prime(self):
+        """L' move: Left face counterclockwise"""
+        self._rotate_face_counterclockwise("L")
+        # L move cycle: U ← F ← D ← B ← U (B is reversed)
+        temp = [self.state["U"][0][0], self.state["U"][1][0], self.state["U"][2][0]]
+
+        # U left column ← F left column
+        self.state["U"][0][0] = self.state["F"][0][0]
+        self.state["U"][1][0] = self.state["F"][1][0]
+        self.state["U"][2][0] = self.state["F"][2][0]
+
+        # F left column ← D left column
+        self.state["F"][0][0] = self.state["D"][0][0]
+        self.state["F"][1][0] = self.state["D"][1][0]
+        self.state["F"][2][0] = self.state["D"][2][0]
+
+        # D left column ← B right column (reversed)
+        self.state["D"][0][0] = self.state["B"][2][2]
+        self.state["D"][1][0] = self.state["B"][1][2]
+        self.state["D"][2][0] = self.state["B"][0][2]
+
+        # B right column ← U left column (reversed)
+        self.state["B"][0][2] = temp[2]
+        self.state["B"][1][2] = temp[1]
+        self.state["B"][2][2] = temp[0]
+
+    def _move_r_prime(self):
+        """R' move: Right face counterclockwise"""
+        self._rotate_face_counterclockwise("R")
+        # R' cycle is opposite of R: U←B←D←F←U
+        temp = [self.state["U"][0][2], self.state["U"][1][2], self.state["U"][2][2]]
+
+        # U right column ← B left column (reversed)
+        self.state["U"][0][2] = self.state["B"][2][0]
+        self.state["U"][1][2] = self.state["B"][1][0]
+        self.state["U"][2][2] = self.state["B"][0][0]
+
+        # B left column ← D right column (reversed)
+        self.state["B"][0][0] = self.state["D"][2][2]
+        self.state["B"][1][0] = self.state["D"][1][2]
+        self.state["B"][2][0] = self.state["D"][0][2]
+
+        # D right column ← F right column
+        self.state["D"][0][2] = self.state["F"][0][2]
+        self.state["D"][1][2] = self.state["F"][1][2]
+        self.state["D"][2][2] = self.state["F"][2][2]
+
+        # F right column ← U right column
+        self.state["F"][0][2] = temp[0]
+        self.state["F"][1][2] = temp[1]
+        self.state["F"][2][2] = temp[2]
+
+    def _rotation_x(self):
+        """x rotation: Rotate entire cube like an R move
+        Cycle: F->U, D->F, B->D, U->B"""
+        # Save the faces that will move
+        temp_f = [row[:] for row in self.state["F"]]
+        temp_u = [row[:] for row in self.state["U"]]
+        temp_b = [row[:] for row in self.state["B"]]
+        temp_d = [row[:] for row in self.state["D"]]
+
+        # Apply cycle: F->U, D->F, B->D, U->B
+        self.state["U"] = temp_f  # Front to Up
+        self.state["F"] = temp_d  # Down to Front
+        self.state["D"] = [
+            [temp_b[2 - i][2 - j] for j in range(3)] for i in range(3)
+        ]  # Back to Down (flipped)
+        self.state["B"] = [
+            [temp_u[2 - i][2 - j] for j in range(3)] for i in range(3)
+        ]  # Up to Back (flipped)
+
+        # Rotate side faces
+        self._rotate_face_clockwise("R")
+        self._rotate_face_counterclockwise("L")
+
+    def _rotation_x_prime(self):
+        """x' rotation: Reverse x rotation
+        Reverse cycle: B->U, D->B, F->D, U->F"""
+        # Save the faces that will move
+        temp_f = [row[:] for row in self.state["F"]]
+        temp_u = [row[:] for row in self.state["U"]]
+        temp_b = [row[:] for row in self.state["B"]]
+        temp_d = [row[:] for row in self.state["D"]]
+
+        # Apply reverse cycle: B->U, D->B, F->D, U->F
+        self.state["U"] = [
+            [temp_b[2 - i][2 - j] for j in range(3)] for i in range(3)
+        ]  # Back to Up (flipped)
+        self.state["B"] = [
+            [temp_d[2 - i][2 - j] for j in range(3)] for i in range(3)
+        ]  # Down to Back (flipped)
+        self.state["D"] = temp_f  # Front to Down
+        self.state["F"] = temp_u  # Up to Front
+
+        # Rotate side faces in reverse
+        self._rotate_face_counterclockwise("R")
+        self._rotate_face_clockwise("L")
+
+    def _rotation_y(self):
+        """y rotation: Rotate entire cube around U-D axis (like U move but whole cube)
+        F -> L, L -> B, B -> R, R -> F"""
+        # Save the faces that will move
+        temp_f = [row[:] for row in self.state["F"]]
+        temp_l = [row[:] for row in self.state["L"]]
+        temp_b = [row[:] for row in self.state["B"]]
+        temp_r = [row[:] for row in self.state["R"]]
+
+        # Rotate faces: F -> L -> B -> R -> F
+        self.state["L"] = temp_f
+        self.state["B"] = temp_l
+        self.state["R"] = temp_b
+        self.state["F"] = temp_r
+
+        # Rotate U and D faces
+        self._rotate_face_clockwise("U")
+        self._rotate_face_counterclockwise("D")
+
+    def _rotation_y_prime(self):
+        """y' rotation: Reverse y rotation"""
+        # Save the faces that will move
+        temp_f = [row[:] for row in self.state["F"]]
+        temp_l = [row[:] for row in self.state["L"]]
+        temp_b = [row[:] for row in self.state["B"]]
+        temp_r = [row[:] for row in self.state["R"]]
+
+        # Rotate faces in reverse: F -> R -> B -> L -> F
+        self.state["R"] = temp_f
+        self.state["B"] = temp_r
+        self.state["L"] = temp_b
+        self.state["F"] = temp_l
+
+        # Rotate U and D faces in reverse
+        self._rotate_face_counterclockwise("U")
+        self._rotate_face_clockwise("D")
+
+    def _rotation_z(self):
+        """z rotation: Rotate entire cube around F-B axis (like F move but whole cube)
+        After z: Orange (left) becomes what you see (new top)"""
+        # Save the faces that will move
+        temp_u = [row[:] for row in self.state["U"]]
+        temp_l = [row[:] for row in self.state["L"]]
+        temp_d = [row[:] for row in self.state["D"]]
+        temp_r = [row[:] for row in self.state["R"]]
+
+        # For z rotation: U->R, L->U, D->L, R->D
+        # This makes Orange (L) go to top (U)
+        self.state["R"] = temp_u
+        self.state["U"] = temp_l
+        self.state["L"] = temp_d
+        self.state["D"] = temp_r
+
+        # Rotate F and B faces, and the moved faces with the cube
+        self._rotate_face_clockwise("F")
+        self._rotate_face_counterclockwise("B")
+        for face in ("U", "R", "D", "L"):
+            self._rotate_face_clockwise(face)
+
+    def _rotation_z_prime(self):
+        """z' rotation: Reverse z rotation
+        After z': Red (right) becomes what you see (new top)"""
+        # Save the faces that will move
+        temp_u = [row[:] for row in self.state["U"]]
+        temp_l = [row[:] for row in self.state["L"]]
+        temp_d = [row[:] for row in self.state["D"]]
+        temp_r = [row[:] for row in self.state["R"]]
+
+        # For z' rotation (reverse of z): U->L, R->U, D->R, L->D
+        # This makes Red (R) go to top (U)
+        self.state["L"] = temp_u
+        self.state["U"] = temp_r
+        self.state["R"] = temp_d
+        self.state["D"] = temp_l
+
+        # Rotate F and B faces in reverse, and the moved faces with the cube
+        self._rotate_face_counterclockwise("F")
+        self._rotate_face_clockwise("B")
+        for face in ("U", "R", "D", "L"):
+            self._rotate_face_counterclockwise(face)
+
+    def execute_move(self, move):
+        """Execute a single move (e.g., 'U', 'R'', 'F2', 'Rw')."""
+        move = move.strip()
+        if not move:
+            return
+        if move.endswith("2'"):
+            move = move[:-1]  # Same as a double turn
+        if move[1:2] == "w" and move[:1] in _WIDE_TURNS:
+            opposite, rotation = _WIDE_TURNS[move[0]]
+            for _ in range(_QUARTER_TURNS.get(move[2:], 0)):
+                self.execute_move(opposite)
+                self.execute_move(rotation)
+            return
+
+        base_move = move[0]
+        modifier = move[1:] if len(move) > 1 else ""
+
+        # Map base moves to methods
+        move_methods = {
+            "U": self._move_u,
+            "D": self._move_d,
+            "F": self._move_f,
+            "B": self._move_b,
+            "L": self._move_l,
+            "R": self._move_r,
+            "x": self._rotation_x,
+            "y": self._rotation_y,
+            "z": self._rotation_z,
+        }
+
+        # Map prime moves to counterclockwise methods
+        prime_methods = {
+            "U": self._move_u_prime,
+            "D": self._move_d_prime,
+            "F": self._move_f_prime,
+            "B": self._move_b_prime,
+            "L": self._move_l_prime,
+            "R": self._move_r_prime,
+            "x": self._rotation_x_prime,
+            "y": self._rotation_y_prime,
+            "z": self._rotation_z_prime,
+        }
+
+        if base_move not in move_methods:
+            return  # Invalid move
+
+        # Execute based on modifier
+        if modifier == "":
+            move_methods[base_move]()
+        elif modifier == "'":
+            # Prime = counterclockwise
+            if base_move in prime_methods:
+                prime_methods[base_move]()
+        elif modifier == "2":
+            # Double turn = 2 clockwise turns
+            move_methods[base_move]()
+            move_methods[base_move]()
+            # Special case for rotations with 2
+            if base_move in ["x", "y", "z"]:
+                pass  # Two rotations already applied above
+
+    def apply_scramble(self, scramble):
+        """Apply a scramble sequence to the cube."""
+        if not scramble:
+            return
+
+        permutation = compile_scramble(scramble)
+        self.set_facelets(apply_permutation(self.facelets(), permutation))
+
+    def facelets(self):
+        """Get the cube state as a flat tuple of 54 stickers."""
+        return flatten_state(self.state)
+
+    def set_facelets(self, facelets):
+        """Replace the cube state from a flat tuple of 54 stickers."""
+        self.state = unflatten_state(facelets)
+
+    def state_key(self):
+        """Get a compact hashable key identifying the current state."""
+        return pack_facelets(self.facelets())
+
+
+IDENTITY_PERMUTATION = tuple(range(54))
+
+
+# Per-move permutations, derived lazily from CubeSimulator.execute_move
+_move_permutations = {}
+
+# Compiled scramble permutations and scrambled-from-solved states
+_compiled_scrambles = LRUCache(512)
+_scramble_states = LRUCache(512)
+
+
+def flatten_state(state):
+    """Flatten a face dictionary into a tuple in FACE_ORDER."""
+    return tuple(
+        sticker for face in FACE_ORDER for row in state[face] for sticker in row
+    )
+
+
+def unflatten_state(facelets):
+    """Build a face dictionary from a flat tuple in FACE_ORDER."""
+    state = {}
+    for index, face in enumerate(FACE_ORDER):
+        base = index * 9
+        state[face] = [
+            list(facelets[base + row * 3 : base + row * 3 + 3]) for row in range(3)
+        ]
+    return state
+
+
+def apply_permutation(facelets, permutation):
+    """Apply a compiled permutation to a flat facelet tuple."""
+    return tuple([facelets[i] for i in permutation])
+
+
+def pack_state(codes):
+    """Pack sticker codes below 8 at 3 bits each into a compact key."""
+    value = 0
+    for code in codes:
+        value = (value << 3) | code
+    return value.to_bytes((3 * len(codes) + 7) // 8, "big")
+
+
+def pack_facelets(facelets):
+    """Pack 54 stickers at 3 bits each into a 21-byte key."""
+    return pack_state([_COLOR_CODES.get(sticker, 7) for sticker in facelets])
+
+
+def is_move(move):
+    """Check whether a token is a turn, wide turn or rotation of a 3x3x3."""
+    return MOVE_TOKEN.fullmatch(move) is not None
+
+
+def move_permutation(move):
+    """Get the facelet permutation performed by a single move token.
+
+    The permutation is derived once by running CubeSimulator.execute_move on
+    a labelled cube, so compiled moves always match the reference simulator.
+    Tokens that are not moves compile to the identity.
+    """
+    match = MOVE_TOKEN.fullmatch(move)
+    if match is None:
+        return IDENTITY_PERMUTATION
+
+    turn, modifier = match.groups()
+    key = turn + modifier[:1]
+    permutation = _move_permutations.get(key)
+    if permutation is None:
+        simulator = CubeSimulator()
+        simulator.state = unflatten_state(IDENTITY_PERMUTATION)
+        simulator.execute_move(key)
+        permutation = flatten_state(simulator.state)
+        _move_permutations[key] = permutation
+    return permutation
+
+
+def compile_scramble(scramble):
+    """Compile a scramble string into a single facelet permutation."""
+    permutation = _compiled_scrambles.get(scramble)
+    if permutation is None:
+        permutation = IDENTITY_PERMUTATION
+        for move in scramble.split():
+            permutation = apply_permutation(permutation, move_permutation(move))
+        _compiled_scrambles.put(scramble, permutation)
+    return permutation
+
+
+def scramble_state(scramble):
+    """Get the facelets of a solved cube after applying a scramble."""
+    facelets = _scramble_states.get(scramble)
+    if facelets is None:
+        simulator = CubeSimulator()
+        simulator.apply_scramble(scramble)
+        facelets = simulator.facelets()
+        _scramble_states.put(scramble, facelets)
+    return facelets
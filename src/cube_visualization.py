@@ -4,454 +4,8 @@
 
 import tkinter as tk
 from tkinter import Canvas
-import math
-import copy
 
-
-class CubeSimulator:
-    """Simulates a 3x3x3 Rubik's cube state and moves."""
-
-    def __init__(self):
-        self.reset_to_solved()
-
-    def reset_to_solved(self):
-        """Reset cube to solved state with correct WCA orientation."""
-        # Standard WCA cube orientation: White top, Green front
-        self.state = {
-            "U": [["W", "W", "W"], ["W", "W", "W"], ["W", "W", "W"]],  # White (Up)
-            "D": [["Y", "Y", "Y"], ["Y", "Y", "Y"], ["Y", "Y", "Y"]],  # Yellow (Down)
-            "F": [["G", "G", "G"], ["G", "G", "G"], ["G", "G", "G"]],  # Green (Front)
-            "B": [["B", "B", "B"], ["B", "B", "B"], ["B", "B", "B"]],  # Blue (Back)
-            "L": [["O", "O", "O"], ["O", "O", "O"], ["O", "O", "O"]],  # Orange (Left)
-            "R": [["R", "R", "R"], ["R", "R", "R"], ["R", "R", "R"]],  # Red (Right)
-        }
-
-    def _rotate_face_clockwise(self, face):
-        """Rotate a face 90 degrees clockwise."""
-        old_face = [row[:] for row in self.state[face]]
-        for i in range(3):
-            for j in range(3):
-                self.state[face][i][j] = old_face[2 - j][i]
-
-    def _rotate_face_counterclockwise(self, face):
-        """Rotate a face 90 degrees counterclockwise."""
-        old_face = [row[:] for row in self.state[face]]
-        for i in range(3):
-            for j in range(3):
-                self.state[face][i][j] = old_face[j][2 - i]
-
-    def _move_u(self):
-        """Perform U move (Up face clockwise)."""
-        self._rotate_face_clockwise("U")
-        # Correctly cycle the top rows of F, R, B, L in reverse direction
-        temp = self.state["F"][0][:]
-        self.state["F"][0] = self.state["R"][0][:]
-        self.state["R"][0] = self.state["B"][0][:]
-        self.state["B"][0] = self.state["L"][0][:]
-        self.state["L"][0] = temp
-
-    def _move_d(self):
-        """Perform D move (Down face clockwise)."""
-        self._rotate_face_clockwise("D")
-        # Correctly cycle the bottom rows of F, L, B, R (opposite of U)
-        temp = self.state["F"][2][:]
-        self.state["F"][2] = self.state["L"][2][:]
-        self.state["L"][2] = self.state["B"][2][:]
-        self.state["B"][2] = self.state["R"][2][:]
-        self.state["R"][2] = temp
-
-    def _move_f(self):
-        """Perform F move (Front face clockwise)."""
-        self._rotate_face_clockwise("F")
-        # Correctly cycle U, R, D, L edges
-        temp = self.state["U"][2][:]
-        self.state["U"][2][0] = self.state["L"][2][2]
-        self.state["U"][2][1] = self.state["L"][1][2]
-        self.state["U"][2][2] = self.state["L"][0][2]
-
-        self.state["L"][0][2] = self.state["D"][0][0]
-        self.state["L"][1][2] = self.state["D"][0][1]
-        self.state["L"][2][2] = self.state["D"][0][2]
-
-        self.state["D"][0][0] = self.state["R"][2][0]
-        self.state["D"][0][1] = self.state["R"][1][0]
-        self.state["D"][0][2] = self.state["R"][0][0]
-
-        self.state["R"][0][0] = temp[2]
-        self.state["R"][1][0] = temp[1]
-        self.state["R"][2][0] = temp[0]
-
-    def _move_b(self):
-        """Perform B move (Back face clockwise)."""
-        self._rotate_face_clockwise("B")
-        # Correctly cycle U, L, D, R edges (note: B is opposite F)
-        temp = self.state["U"][0][:]
-        self.state["U"][0][0] = self.state["R"][0][2]
-        self.state["U"][0][1] = self.state["R"][1][2]
-        self.state["U"][0][2] = self.state["R"][2][2]
-
-        self.state["R"][0][2] = self.state["D"][2][2]
-        self.state["R"][1][2] = self.state["D"][2][1]
-        self.state["R"][2][2] = self.state["D"][2][0]
-
-        self.state["D"][2][0] = self.state["L"][0][0]
-        self.state["D"][2][1] = self.state["L"][1][0]
-        self.state["D"][2][2] = self.state["L"][2][0]
-
-        self.state["L"][0][0] = temp[2]
-        self.state["L"][1][0] = temp[1]
-        self.state["L"][2][0] = temp[0]
-
-    def _move_l(self):
-        """Perform L move (Left face clockwise)."""
-        self._rotate_face_clockwise("L")
-        # L' cycle is reverse of current L: U ← B ← D ← F ← U
-        temp = [self.state["U"][0][0], self.state["U"][1][0], self.state["U"][2][0]]
-
-        # U left column ← B right column (reversed)
-        self.state["U"][0][0] = self.state["B"][2][2]
-        self.state["U"][1][0] = self.state["B"][1][2]
-        self.state["U"][2][0] = self.state["B"][0][2]
-
-        # B right column ← D left column (reversed)
-        self.state["B"][0][2] = self.state["D"][2][0]
-        self.state["B"][1][2] = self.state["D"][1][0]
-        self.state["B"][2][2] = self.state["D"][0][0]
-
-        # D left column ← F left column
-        self.state["D"][0][0] = self.state["F"][0][0]
-        self.state["D"][1][0] = self.state["F"][1][0]
-        self.state["D"][2][0] = self.state["F"][2][0]
-
-        # F left column ← U left column
-        self.state["F"][0][0] = temp[0]
-        self.state["F"][1][0] = temp[1]
-        self.state["F"][2][0] = temp[2]
-
-    def _move_r(self):
-        """Perform R move (Right face clockwise) - WCA standard."""
-        self._rotate_face_clockwise("R")
-        # Correct WCA R move cycle: U←F←D←B←U
-        temp = [self.state["U"][0][2], self.state["U"][1][2], self.state["U"][2][2]]
-
-        # U right column ← F right column
-        self.state["U"][0][2] = self.state["F"][0][2]
-        self.state["U"][1][2] = self.state["F"][1][2]
-        self.state["U"][2][2] = self.state["F"][2][2]
-
-        # F right column ← D right column
-        self.state["F"][0][2] = self.state["D"][0][2]
-        self.state["F"][1][2] = self.state["D"][1][2]
-        self.state["F"][2][2] = self.state["D"][2][2]
-
-        # D right column ← B left column (reversed order)
-        self.state["D"][0][2] = self.state["B"][2][0]
-        self.state["D"][1][2] = self.state["B"][1][0]
-        self.state["D"][2][2] = self.state["B"][0][0]
-
-        # B left column ← U right column (reversed order)
-        self.state["B"][0][0] = temp[2]
-        self.state["B"][1][0] = temp[1]
-        self.state["B"][2][0] = temp[0]
-
-    def _move_u_prime(self):
-        """U' move: Up face counterclockwise"""
-        self._rotate_face_counterclockwise("U")
-        # Reverse the cycle: F←L←B←R←F (original direction)
-        temp = self.state["F"][0][:]
-        self.state["F"][0] = self.state["L"][0][:]
-        self.state["L"][0] = self.state["B"][0][:]
-        self.state["B"][0] = self.state["R"][0][:]
-        self.state["R"][0] = temp
-
-    def _move_d_prime(self):
-        """D' move: Down face counterclockwise"""
-        self._rotate_face_counterclockwise("D")
-        # Reverse the cycle: F←R←B←L←F (opposite of D move)
-        temp = self.state["F"][2][:]
-        self.state["F"][2] = self.state["R"][2][:]
-        self.state["R"][2] = self.state["B"][2][:]
-        self.state["B"][2] = self.state["L"][2][:]
-        self.state["L"][2] = temp
-
-    def _move_f_prime(self):
-        """F' move: Front face counterclockwise"""
-        self._rotate_face_counterclockwise("F")
-        # Reverse the F move cycle
-        temp = self.state["U"][2][:]
-        self.state["U"][2][0] = self.state["R"][0][0]
-        self.state["U"][2][1] = self.state["R"][1][0]
-        self.state["U"][2][2] = self.state["R"][2][0]
-
-        self.state["R"][0][0] = self.state["D"][0][2]
-        self.state["R"][1][0] = self.state["D"][0][1]
-        self.state["R"][2][0] = self.state["D"][0][0]
-
-        self.state["D"][0][0] = self.state["L"][2][2]
-        self.state["D"][0][1] = self.state["L"][1][2]
-        self.state["D"][0][2] = self.state["L"][0][2]
-
-        self.state["L"][0][2] = temp[2]
-        self.state["L"][1][2] = temp[1]
-        self.state["L"][2][2] = temp[0]
-
-    def _move_b_prime(self):
-        """B' move: Back face counterclockwise"""
-        self._rotate_face_counterclockwise("B")
-        # Reverse the B move cycle
-        temp = self.state["U"][0][:]
-        self.state["U"][0][0] = self.state["L"][0][0]
-        self.state["U"][0][1] = self.state["L"][1][0]
-        self.state["U"][0][2] = self.state["L"][2][0]
-
-        self.state["L"][0][0] = self.state["D"][2][2]
-        self.state["L"][1][0] = self.state["D"][2][1]
-        self.state["L"][2][0] = self.state["D"][2][0]
-
-        self.state["D"][2][0] = self.state["R"][2][2]
-        self.state["D"][2][1] = self.state["R"][1][2]
-        self.state["D"][2][2] = self.state["R"][0][2]
-
-        self.state["R"][0][2] = temp[2]
-        self.state["R"][1][2] = temp[1]
-        self.state["R"][2][2] = temp[0]
-
-    def _move_l_prime(self):
-        """L' move: Left face counterclockwise"""
-        self._rotate_face_counterclockwise("L")
-        # L move cycle: U ← F ← D ← B ← U (B is reversed)
-        temp = [self.state["U"][0][0], self.state["U"][1][0], self.state["U"][2][0]]
-
-        # U left column ← F left column
-        self.state["U"][0][0] = self.state["F"][0][0]
-        self.state["U"][1][0] = self.state["F"][1][0]
-        self.state["U"][2][0] = self.state["F"][2][0]
-
-        # F left column ← D left column
-        self.state["F"][0][0] = self.state["D"][0][0]
-        self.state["F"][1][0] = self.state["D"][1][0]
-        self.state["F"][2][0] = self.state["D"][2][0]
-
-        # D left column ← B right column (reversed)
-        self.state["D"][0][0] = self.state["B"][2][2]
-        self.state["D"][1][0] = self.state["B"][1][2]
-        self.state["D"][2][0] = self.state["B"][0][2]
-
-        # B right column ← U left column (reversed)
-        self.state["B"][0][2] = temp[2]
-        self.state["B"][1][2] = temp[1]
-        self.state["B"][2][2] = temp[0]
-
-    def _move_r_prime(self):
-        """R' move: Right face counterclockwise"""
-        self._rotate_face_counterclockwise("R")
-        # R' cycle is opposite of R: U←B←D←F←U
-        temp = [self.state["U"][0][2], self.state["U"][1][2], self.state["U"][2][2]]
-
-        # U right column ← B left column (reversed)
-        self.state["U"][0][2] = self.state["B"][2][0]
-        self.state["U"][1][2] = self.state["B"][1][0]
-        self.state["U"][2][2] = self.state["B"][0][0]
-
-        # B left column ← D right column (reversed)
-        self.state["B"][0][0] = self.state["D"][2][2]
-        self.state["B"][1][0] = self.state["D"][1][2]
-        self.state["B"][2][0] = self.state["D"][0][2]
-
-        # D right column ← F right column
-        self.state["D"][0][2] = self.state["F"][0][2]
-        self.state["D"][1][2] = self.state["F"][1][2]
-        self.state["D"][2][2] = self.state["F"][2][2]
-
-        # F right column ← U right column
-        self.state["F"][0][2] = temp[0]
-        self.state["F"][1][2] = temp[1]
-        self.state["F"][2][2] = temp[2]
-
-    def _rotation_x(self):
-        """x rotation: Makes Blue (back) become front
-        Cycle: B->F, U->B, D->U, F->D"""
-        # Save the faces that will move
-        temp_f = [row[:] for row in self.state["F"]]
-        temp_u = [row[:] for row in self.state["U"]]
-        temp_b = [row[:] for row in self.state["B"]]
-        temp_d = [row[:] for row in self.state["D"]]
-
-        # Apply cycle: B->F, U->B, D->U, F->D
-        self.state["F"] = [
-            [temp_b[2 - i][2 - j] for j in range(3)] for i in range(3)
-        ]  # Back to Front (flipped)
-        self.state["B"] = [
-            [temp_u[2 - i][2 - j] for j in range(3)] for i in range(3)
-        ]  # Up to Back (flipped)
-        self.state["U"] = temp_d  # Down to Up
-        self.state["D"] = temp_f  # Front to Down
-
-        # Rotate side faces
-        self._rotate_face_counterclockwise("R")
-        self._rotate_face_clockwise("L")
-
-    def _rotation_x_prime(self):
-        """x' rotation: Makes Green (front) become top
-        Reverse cycle: F->U, B->D, U->F, D->B"""
-        # Save the faces that will move
-        temp_f = [row[:] for row in self.state["F"]]
-        temp_u = [row[:] for row in self.state["U"]]
-        temp_b = [row[:] for row in self.state["B"]]
-        temp_d = [row[:] for row in self.state["D"]]
-
-        # Apply reverse cycle: F->U, B->D, U->F, D->B
-        self.state["U"] = temp_f  # Front to Up
-        self.state["D"] = [
-            [temp_b[2 - i][2 - j] for j in range(3)] for i in range(3)
-        ]  # Back to Down (flipped)
-        self.state["F"] = temp_u  # Up to Front
-        self.state["B"] = [
-            [temp_d[2 - i][2 - j] for j in range(3)] for i in range(3)
-        ]  # Down to Back (flipped)
-
-        # Rotate side faces in reverse
-        self._rotate_face_clockwise("R")
-        self._rotate_face_counterclockwise("L")
-
-    def _rotation_y(self):
-        """y rotation: Rotate entire cube around U-D axis (like U move but whole cube)
-        F -> L, L -> B, B -> R, R -> F"""
-        # Save the faces that will move
-        temp_f = [row[:] for row in self.state["F"]]
-        temp_l = [row[:] for row in self.state["L"]]
-        temp_b = [row[:] for row in self.state["B"]]
-        temp_r = [row[:] for row in self.state["R"]]
-
-        # Rotate faces: F -> L -> B -> R -> F
-        self.state["L"] = temp_f
-        self.state["B"] = temp_l
-        self.state["R"] = temp_b
-        self.state["F"] = temp_r
-
-        # Rotate U and D faces
-        self._rotate_face_clockwise("U")
-        self._rotate_face_counterclockwise("D")
-
-    def _rotation_y_prime(self):
-        """y' rotation: Reverse y rotation"""
-        # Save the faces that will move
-        temp_f = [row[:] for row in self.state["F"]]
-        temp_l = [row[:] for row in self.state["L"]]
-        temp_b = [row[:] for row in self.state["B"]]
-        temp_r = [row[:] for row in self.state["R"]]
-
-        # Rotate faces in reverse: F -> R -> B -> L -> F
-        self.state["R"] = temp_f
-        self.state["B"] = temp_r
-        self.state["L"] = temp_b
-        self.state["F"] = temp_l
-
-        # Rotate U and D faces in reverse
-        self._rotate_face_counterclockwise("U")
-        self._rotate_face_clockwise("D")
-
-    def _rotation_z(self):
-        """z rotation: Rotate entire cube around F-B axis (like F move but whole cube)
-        After z: Orange (left) becomes what you see (new top)"""
-        # Save the faces that will move
-        temp_u = [row[:] for row in self.state["U"]]
-        temp_l = [row[:] for row in self.state["L"]]
-        temp_d = [row[:] for row in self.state["D"]]
-        temp_r = [row[:] for row in self.state["R"]]
-
-        # For z rotation: U->R, L->U, D->L, R->D
-        # This makes Orange (L) go to top (U)
-        self.state["R"] = temp_u
-        self.state["U"] = temp_l
-        self.state["L"] = temp_d
-        self.state["D"] = temp_r
-
-        # Rotate F and B faces
-        self._rotate_face_clockwise("F")
-        self._rotate_face_counterclockwise("B")
-
-    def _rotation_z_prime(self):
-        """z' rotation: Reverse z rotation
-        After z': Red (right) becomes what you see (new top)"""
-        # Save the faces that will move
-        temp_u = [row[:] for row in self.state["U"]]
-        temp_l = [row[:] for row in self.state["L"]]
-        temp_d = [row[:] for row in self.state["D"]]
-        temp_r = [row[:] for row in self.state["R"]]
-
-        # For z' rotation (reverse of z): U->L, R->U, D->R, L->D
-        # This makes Red (R) go to top (U)
-        self.state["L"] = temp_u
-        self.state["U"] = temp_r
-        self.state["R"] = temp_d
-        self.state["D"] = temp_l
-
-        # Rotate F and B faces in reverse
-        self._rotate_face_counterclockwise("F")
-        self._rotate_face_clockwise("B")
-
-    def execute_move(self, move):
-        """Execute a single move (e.g., 'U', 'R'', 'F2')."""
-        move = move.strip()
-        if not move:
-            return
-
-        base_move = move[0]
-        modifier = move[1:] if len(move) > 1 else ""
-
-        # Map base moves to methods
-        move_methods = {
-            "U": self._move_u,
-            "D": self._move_d,
-            "F": self._move_f,
-            "B": self._move_b,
-            "L": self._move_l,
-            "R": self._move_r,
-            "x": self._rotation_x,
-            "y": self._rotation_y,
-            "z": self._rotation_z,
-        }
-
-        # Map prime moves to counterclockwise methods
-        prime_methods = {
-            "U": self._move_u_prime,
-            "D": self._move_d_prime,
-            "F": self._move_f_prime,
-            "B": self._move_b_prime,
-            "L": self._move_l_prime,
-            "R": self._move_r_prime,
-            "x": self._rotation_x_prime,
-            "y": self._rotation_y_prime,
-            "z": self._rotation_z_prime,
-        }
-
-        if base_move not in move_methods:
-            return  # Invalid move
-
-        # Execute based on modifier
-        if modifier == "":
-            move_methods[base_move]()
-        elif modifier == "'":
-            # Prime = counterclockwise
-            if base_move in prime_methods:
-                prime_methods[base_move]()
-        elif modifier == "2":
-            # Double turn = 2 clockwise turns
-            move_methods[base_move]()
-            move_methods[base_move]()
-            # Special case for rotations with 2
-            if base_move in ["x", "y", "z"]:
-                pass  # Two rotations already applied above
-
-    def apply_scramble(self, scramble):
-        """Apply a scramble sequence to the cube."""
-        if not scramble:
-            return
-
-        moves = scramble.split()
-        for move in moves:
-            self.execute_move(move)
+from .cube_state import CubeSimulator, scramble_state
 
 
 class CubeVisualization:
@@ -479,6 +33,10 @@ class CubeVisualization:
         self.face_size = 66  # Increased for better visibility
         self.sticker_size = 20  # Increased for better visibility
 
+        # Canvas item ids per sticker, so redraws only recolor what changed
+        self._sticker_items = {}
+        self._sticker_colors = {}
+
         self._draw_cube_unfolded()
 
     def _init_solved_state(self):
@@ -495,6 +53,8 @@ class CubeVisualization:
     def _draw_cube_unfolded(self):
         """Draw the cube in an unfolded 2D layout showing all 6 faces."""
         self.canvas.delete("all")
+        self._sticker_items.clear()
+        self._sticker_colors.clear()
 
         # Calculate positions for the cross layout:
         #     [U]
@@ -541,7 +101,7 @@ class CubeVisualization:
                 color = self.COLOR_MAP.get(sticker, "#cccccc")
 
                 # Draw sticker with better border
-                self.canvas.create_rectangle(
+                item = self.canvas.create_rectangle(
                     x + 1,
                     y + 1,
                     x + self.sticker_size - 1,
@@ -550,6 +110,24 @@ class CubeVisualization:
                     outline="black",
                     width=1,
                 )
+                self._sticker_items[(face_name, row, col)] = item
+                self._sticker_colors[(face_name, row, col)] = color
+
+    def _update_stickers(self):
+        """Recolor only the stickers whose color changed since the last draw."""
+        if not self._sticker_items:
+            self._draw_cube_unfolded()
+            return
+
+        for face_name, rows in self.cube.state.items():
+            for row, stickers in enumerate(rows):
+                for col, sticker in enumerate(stickers):
+                    position = (face_name, row, col)
+                    color = self.COLOR_MAP.get(sticker, "#cccccc")
+                    if self._sticker_colors.get(position) != color:
+                        item = self._sticker_items[position]
+                        self.canvas.itemconfig(item, fill=color)
+                        self._sticker_colors[position] = color
 
     def _draw_face_labels(self, face_positions):
         """Draw labels for each face."""
@@ -562,20 +140,149 @@ class CubeVisualization:
 
     def apply_scramble(self, scramble):
         """Apply a scramble to the cube state."""
-        # Reset to solved state first
-        self.cube.reset_to_solved()
-
-        # Apply the scramble
-        self.cube.apply_scramble(scramble)
+        # Scrambled states are cached, so history navigation is a lookup
+        self.cube.set_facelets(scramble_state(scramble or ""))
 
         # Redraw the cube
-        self._draw_cube_unfolded()
+        self._update_stickers()
 
     def reset_to_solved(self):
         """Reset cube to solved state."""
         self.cube.reset_to_solved()
-        self._draw_cube_unfolded()
+        self._update_stickers()
+
+    def show_facelets(self, facelets):
+        """Show a cube state given as a flat tuple of 54 stickers."""
+        self.cube.set_facelets(facelets)
+        self._update_stickers()
 
     def get_canvas(self):
         """Get the canvas widget."""
         return self.canvas
+
+
+class ReplayWindow:
+    """Window that replays a solve's reconstruction on the cube.
+
+    The slider seeks to any time in the solve and Play runs it in real
+    time. Every position is looked up in a ReconstructionPlayer, whose
+    checkpoints keep each seek to a few moves however long the solve is.
+    """
+
+    FRAME_MS = 16
+
+    def __init__(self, parent, theme_manager, solve):
+        import time
+
+        from .formatting import default_formatter
+        from .reconstruction import ReconstructionPlayer
+
+        self.theme_manager = theme_manager
+        self.solve = solve
+        self.player = ReconstructionPlayer(solve.reconstruction, solve.scramble)
+        self._moves = solve.reconstruction.moves()
+        self._clock = time.perf_counter
+        self._play_id = None
+        self._play_origin = None  # perf_counter() at 0 ms while playing
+        self._shown = None  # Position on the cube
+        self._slider_ms = 0  # Slider value last set by playback
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"Replay - {default_formatter.format_solve(solve)}")
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        theme = self.theme_manager.get_theme()
+        self.dialog.configure(bg=theme["bg"])
+        self.cube_view = CubeVisualization(self.dialog, width=400, height=300)
+        self.cube_view.get_canvas().pack(fill=tk.BOTH, expand=True)
+
+        self.move_label = tk.Label(
+            self.dialog,
+            font=(theme["mono_font"], 11),
+            bg=theme["bg"],
+            fg=theme["text_primary"],
+        )
+        self.move_label.pack(fill=tk.X, padx=8)
+
+        controls = tk.Frame(self.dialog, bg=theme["bg"])
+        controls.pack(fill=tk.X, padx=8, pady=8)
+        self.play_button = tk.Button(
+            controls, text="Play", width=6, command=self.toggle
+        )
+        self.play_button.pack(side=tk.LEFT)
+        self.timeline = tk.Scale(
+            controls,
+            from_=0,
+            to=max(solve.reconstruction.duration_ms, 1),
+            orient=tk.HORIZONTAL,
+            showvalue=False,
+            command=self._on_slide,
+        )
+        self.timeline.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+
+        self.seek(0)
+
+    def seek(self, ms):
+        """Show the cube ms milliseconds into the solve."""
+        position = self.player.position_at(ms)
+        if position != self._shown:
+            self._shown = position
+            self.cube_view.show_facelets(self.player.state_at(position))
+            last = self._moves[position - 1] if position else "-"
+            self.move_label.config(
+                text=f"{ms / 1000:.2f}s  move {position}/{len(self.player)}  {last}"
+            )
+
+    def _on_slide(self, value):
+        """Seek to where the slider was dragged, carrying on from there."""
+        ms = int(float(value))
+        if ms == self._slider_ms:
+            return  # Moved by playback
+        self._slider_ms = ms
+        self.seek(ms)
+        if self._play_origin is not None:
+            self._play_origin = self._clock() - ms / 1000
+
+    def toggle(self):
+        """Start or pause playback."""
+        if self._play_id is not None:
+            self._stop_playing()
+            return
+        start = self.timeline.get()
+        if start >= self.timeline.cget("to"):
+            start = 0  # Play again from the beginning
+        self._play_origin = self._clock() - start / 1000
+        self.play_button.config(text="Pause")
+        self._play_frame()
+
+    def _play_frame(self):
+        """Advance playback to the current time."""
+        ms = int((self._clock() - self._play_origin) * 1000)
+        end = self.timeline.cget("to")
+        self._slider_ms = min(ms, end)
+        self.timeline.set(self._slider_ms)
+        self.seek(self._slider_ms)
+        if ms >= end:
+            self._stop_playing()
+        else:
+            self._play_id = self.dialog.after(self.FRAME_MS, self._play_frame)
+
+    def _stop_playing(self):
+        """Pause playback where it is."""
+        if self._play_id is not None:
+            self.dialog.after_cancel(self._play_id)
+        self._play_id = None
+        self._play_origin = None
+        self.play_button.config(text="Play")
+
+    def close(self):
+        """Close the replay window."""
+        self._stop_playing()
+        self.dialog.destroy()
+
+    def is_open(self):
+        """Check whether the window still exists."""
+        try:
+            return bool(self.dialog.winfo_exists())
+        except tk.TclError:
+            return False
@@ -0,0 +1,177 @@
+"""
+Performance debug overlay for PSTimer.
+"""
+
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
+
+class DebugOverlay:
+    """Small always-on-top window listing hot-path timings.
+
+    Shows count, p50, p99 and max per instrumented span, the event-loop
+    lag and recent stalls, and the input dispatch lag, refreshed twice a
+    second while open.
+    """
+
+    REFRESH_MS = 500
+
+    def __init__(
+        self,
+        parent,
+        theme_manager,
+        instrumentation,
+        event_clock=None,
+        lag_monitor=None,
+    ):
+        self.parent = parent
+        self.theme_manager = theme_manager
+        self.instrumentation = instrumentation
+        self.event_clock = event_clock
+        self.lag_monitor = lag_monitor
+        self._after_id = None
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("PSTimer Performance")
+        self.dialog.geometry("560x380")
+        self.dialog.attributes("-topmost", True)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        theme = self.theme_manager.get_theme()
+        self.dialog.configure(bg=theme["bg"])
+
+        self._create_widgets()
+        self._refresh()
+
+    def _create_widgets(self):
+        """Create the overlay widgets."""
+        theme = self.theme_manager.get_theme()
+
+        self.text = tk.Text(
+            self.dialog,
+            font=(theme["mono_font"], 10),
+            bg=theme["sidebar_bg"],
+            fg=theme["text_primary"],
+            relief=tk.FLAT,
+            height=16,
+        )
+        self.text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        button_frame = tk.Frame(self.dialog, bg=theme["bg"])
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        for label, command in (
+            ("Dump JSON...", self._dump_json),
+            ("Reset", self._reset),
+            ("Close", self.close),
+        ):
+            tk.Button(
+                button_frame,
+                text=label,
+                command=command,
+                bg=theme["button_bg"],
+                fg=theme["text_primary"],
+                relief=tk.FLAT,
+            ).pack(side=tk.RIGHT, padx=(5, 0))
+
+    def report_lines(self):
+        """Build the table shown in the overlay."""
+        lines = []
+        if self.instrumentation.enabled:
+            lines.append(
+                f"{'span':<26} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+            )
+            for name, summary in self.instrumentation.snapshot().items():
+                if not summary["count"]:
+                    continue
+                lines.append(
+                    f"{name:<26} {summary['count']:>7} {summary['p50_ms']:>8.2f} "
+                    f"{summary['p99_ms']:>8.2f} {summary['max_ms']:>8.2f}"
+                )
+        else:
+            lines.append("Start PSTimer with --instrument to time the hot paths.")
+
+        if self.lag_monitor is not None:
+            lag = self.lag_monitor.summary()
+            if not self.lag_monitor.running:
+                lines.append("")
+                lines.append("Start PSTimer with --lag-monitor to watch for stalls.")
+            elif lag["count"]:
+                lines.append("")
+                lines.append(
+                    f"loop lag ms: p50 {lag['p50_ms']:.1f}  p99 {lag['p99_ms']:.1f}  "
+                    f"max {lag['max_ms']:.1f}  stalls {lag['stalls']}"
+                )
+                lines.append(f"  {self.lag_monitor.format_histogram()}")
+            for stall in list(self.lag_monitor.stalls)[-3:]:
+                lines.append(
+                    f"  stall {stall.lag_ms:.0f} ms: {stall.handler or 'unknown'} "
+                    f"({stall.handler_ms:.0f} ms)"
+                )
+
+        if self.event_clock is not None:
+            lag = self.event_clock.lag_stats()
+            if lag["count"]:
+                lines.append("")
+                lines.append(
+                    f"input lag ms: last {lag['last']:.1f}  "
+                    f"mean {lag['mean']:.1f}  max {lag['max']:.1f}"
+                )
+        return lines
+
+    def _refresh(self):
+        """Redraw the table and schedule the next refresh."""
+        self._after_id = None
+        try:
+            self.text.config(state=tk.NORMAL)
+            self.text.delete("1.0", tk.END)
+            self.text.insert(tk.END, "\n".join(self.report_lines()))
+            self.text.config(state=tk.DISABLED)
+        except tk.TclError:
+            return  # Window was destroyed
+        self._after_id = self.dialog.after(self.REFRESH_MS, self._refresh)
+
+    def _dump_json(self):
+        """Save the current timings to a JSON file."""
+        filename = filedialog.asksaveasfilename(
+            parent=self.dialog,
+            title="Save Performance Data",
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+        )
+        if filename:
+            extra = {}
+            if self.event_clock is not None:
+                extra["input_lag_ms"] = self.event_clock.lag_stats()
+            if self.lag_monitor is not None:
+                extra["event_loop_lag"] = self.lag_monitor.summary()
+                extra["stalls"] = [s._asdict() for s in self.lag_monitor.stalls]
+            try:
+                self.instrumentation.dump_json(filename, extra)
+            except OSError as e:
+                messagebox.showerror(
+                    "Save Error", f"Failed to save:\n{e}", parent=self.dialog
+                )
+
+    def _reset(self):
+        """Clear the recorded timings."""
+        self.instrumentation.reset()
+        if self.event_clock is not None:
+            self.event_clock.lags_ms.clear()
+        if self.lag_monitor is not None:
+            self.lag_monitor.lags_ms.clear()
+            self.lag_monitor.stalls.clear()
+
+    def close(self):
+        """Close the overlay."""
+        if self._after_id is not None:
+            self.dialog.after_cancel(self._after_id)
+            self._after_id = None
+        self.dialog.destroy()
+
+    def is_open(self):
+        """Check whether the overlay window still exists."""
+        try:
+            return bool(self.dialog.winfo_exists())
+        except tk.TclError:
+            return False
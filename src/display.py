@@ -0,0 +1,78 @@
+"""
+Display refresh scheduling for PSTimer.
+"""
+
+
+class DisplayScheduler:
+    """Schedules timer redraws on a Tk widget.
+
+    While the stopwatch is running the render callback is driven at the
+    configured refresh rate. While idle nothing is scheduled; callers request
+    a single redraw whenever the timer state changes.
+    """
+
+    def __init__(self, widget, render, refresh_rate=60):
+        self.widget = widget
+        self.render = render
+        self.running = False
+        self._after_id = None
+        self.set_refresh_rate(refresh_rate)
+
+    def set_refresh_rate(self, refresh_rate):
+        """Set the redraw rate used while running, in frames per second."""
+        self.refresh_rate = max(1, int(refresh_rate))
+        self.interval_ms = max(1, round(1000 / self.refresh_rate))
+
+    def set_running(self, running):
+        """Switch between continuous (running) and on-demand (idle) redraws."""
+        self.running = running
+        self.request_redraw()
+
+    def request_redraw(self):
+        """Schedule a redraw when the event loop is idle, unless one is pending."""
+        if self._after_id is None:
+            self._after_id = self.widget.after_idle(self._tick)
+
+    def cancel(self):
+        """Cancel any pending redraw."""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        """Render once and keep ticking while the stopwatch runs."""
+        self._after_id = None
+        self.render()
+        if self.running:
+            self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+
+class LabelCache:
+    """Remembers the last options applied to each label.
+
+    Reconfiguring a Tk label is not free, so updates are skipped when the
+    text and colors are unchanged.
+    """
+
+    def __init__(self):
+        self._options = {}
+
+    def update(self, label, **options):
+        """Configure label with options if they differ from the last call.
+
+        Returns True when the label was reconfigured.
+        """
+        last = self._options.get(label)
+        if last == options:
+            return False
+        label.config(**options)
+        self._options[label] = options
+        return True
+
+    def forget(self, label):
+        """Drop the cached options for a label."""
+        self._options.pop(label, None)
+
+    def clear(self):
+        """Drop all cached options, e.g. after the widgets are rebuilt."""
+        self._options.clear()
@@ -0,0 +1,217 @@
+"""
+Time formatting and parsing for PSTimer.
+"""
+
+import math
+import re
+from collections import namedtuple
+
+
+class TimeFormatter:
+    """Formats solve times in speedcubing notation (M:SS.cc or SS.cc).
+
+    Times are first converted to integer units (centiseconds or
+    milliseconds) and the resulting strings are cached per unit value, so
+    the display loop, times list and exports mostly hit a dictionary.
+
+    rounding selects how seconds become units:
+        "nearest"  - round to the nearest unit
+        "truncate" - drop everything below one unit
+        "wca"      - WCA regulation 9f: truncate results under 10 minutes,
+                     round results of 10 minutes or more to the nearest second
+    """
+
+    PRECISIONS = {"cs": 100, "ms": 1000}
+    ROUNDING_MODES = ("nearest", "truncate", "wca")
+
+    def __init__(self, precision="cs", rounding="nearest", cache_size=8192):
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision!r}")
+        if rounding not in self.ROUNDING_MODES:
+            raise ValueError(f"Unknown rounding mode: {rounding!r}")
+
+        self.precision = precision
+        self.rounding = rounding
+        self.cache_size = cache_size
+        self.scale = self.PRECISIONS[precision]
+
+        digits = len(str(self.scale)) - 1
+        self._fractions = tuple(f"{i:0{digits}d}" for i in range(self.scale))
+        self._two_digits = tuple(f"{i:02d}" for i in range(60))
+        self._cache = {}
+
+    def to_units(self, seconds):
+        """Convert seconds to integer units using the rounding mode.
+
+        Seconds go to the nearest nanosecond first, which absorbs float
+        error (12.34 is 12.339999...), and then take the same integer path
+        as ns_to_units, so both round halves up.
+        """
+        if seconds <= 0:
+            return 0
+        return self.ns_to_units(round(seconds * 1_000_000_000))
+
+    def ns_to_units(self, ns):
+        """Convert integer nanoseconds to units with integer arithmetic only."""
+        if ns <= 0:
+            return 0
+        unit_ns = 1_000_000_000 // self.scale
+        if self.rounding == "nearest":
+            return (ns + unit_ns // 2) // unit_ns
+        if self.rounding == "wca" and ns >= 600_000_000_000:
+            return (ns + 500_000_000) // 1_000_000_000 * self.scale
+        return ns // unit_ns
+
+    def format_units(self, units):
+        """Format a time given in integer units."""
+        text = self._cache.get(units)
+        if text is None:
+            total_s, fraction = divmod(units, self.scale)
+            if total_s < 60:
+                text = f"{self._two_digits[total_s]}.{self._fractions[fraction]}"
+            else:
+                m, s = divmod(total_s, 60)
+                text = f"{m}:{self._two_digits[s]}.{self._fractions[fraction]}"
+
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[units] = text
+        return text
+
+    def format(self, seconds):
+        """Format a time in seconds; None gives "---" and infinity "DNF"."""
+        if seconds is None:
+            return "---"
+        if math.isinf(seconds):
+            return "DNF"
+        return self.format_units(self.to_units(seconds))
+
+    def format_ns(self, ns):
+        """Format a time in integer nanoseconds, e.g. straight from a timer."""
+        if ns is None:
+            return "---"
+        return self.format_units(self.ns_to_units(ns))
+
+    def format_solve(self, solve):
+        """Format a SolveTime including its penalty.
+
+        Solves timed here keep their exact elapsed_ns, which is used
+        instead of the float seconds when present.
+        """
+        if solve.penalty == "DNF":
+            return "DNF"
+        ns = solve.elapsed_ns
+        if ns is not None:
+            if solve.penalty == "+2":
+                return self.format_ns(ns + 2_000_000_000) + "+"
+            return self.format_ns(ns)
+        if solve.penalty == "+2":
+            return self.format(solve.time + 2.0) + "+"
+        return self.format(solve.time)
+
+    def format_many(self, values):
+        """Format a sequence of times in seconds."""
+        fmt = self.format
+        return [fmt(value) for value in values]
+
+    def format_solves(self, solves):
+        """Format a sequence of SolveTime objects including penalties."""
+        fmt = self.format_solve
+        return [fmt(solve) for solve in solves]
+
+
+class TimeParseError(ValueError):
+    """Raised when a string is not a valid solve time."""
+
+
+# Raw solve time in seconds plus penalty (None, "+2" or "DNF")
+ParsedTime = namedtuple("ParsedTime", ["seconds", "penalty"])
+
+# [M:]S[.f] with up to three fraction digits
+_TIME_RE = re.compile(r"(?:(\d+):)?(\d+)(?:\.(\d{1,3}))?", re.ASCII)
+_FRACTION_MS = (1, 100, 10, 1)  # ms per fraction digit count: "", "x", "xx", "xxx"
+
+
+def _clock_ms(match):
+    """Convert a matched [M:]S[.f] clock value into integer milliseconds."""
+    minutes, seconds, fraction = match.groups()
+    total_ms = int(seconds) * 1000
+    if minutes is not None:
+        if total_ms >= 60000:
+            raise TimeParseError(f"Seconds out of range: {match.group()!r}")
+        total_ms += int(minutes) * 60000
+    if fraction:
+        total_ms += int(fraction) * _FRACTION_MS[len(fraction)]
+    return total_ms
+
+
+def parse_time(text):
+    """Parse a solve time string into a ParsedTime.
+
+    Accepts "12.34", "12", "12.345", "1:02.34", "1:02", penalised times as
+    shown by PSTimer and csTimer ("14.34+" is a 12.34 solve with +2), and
+    "DNF" or "DNF(12.34)". A bare "DNF" has no time and parses as 0.0
+    seconds; statistics go by the penalty and leave it out. Only ASCII
+    digits are accepted. Raises TimeParseError for anything else.
+    """
+    # Fast path: plain "SS", "SS.c", "SS.cc" or "SS.ccc" with no penalty
+    head, dot, fraction = text.partition(".")
+    if (
+        head.isdigit()
+        and head.isascii()
+        and (not dot or (fraction.isdigit() and fraction.isascii()))
+        and len(fraction) <= 3
+    ):
+        total_ms = int(head) * 1000
+        if fraction:
+            total_ms += int(fraction) * _FRACTION_MS[len(fraction)]
+        return ParsedTime(total_ms / 1000, None)
+
+    text = text.strip()
+    penalty = None
+
+    if text[:3].upper() == "DNF":
+        penalty = "DNF"
+        rest = text[3:].strip()
+        if not rest:
+            return ParsedTime(0.0, penalty)
+        if rest[0] != "(" or rest[-1] != ")":
+            raise TimeParseError(f"Invalid DNF time: {text!r}")
+        text = rest[1:-1].strip()
+    elif text.endswith("+"):
+        penalty = "+2"
+        text = text[:-1].rstrip()
+
+    match = _TIME_RE.fullmatch(text)
+    if match is None:
+        raise TimeParseError(f"Invalid time: {text!r}")
+
+    total_ms = _clock_ms(match)
+    if penalty == "+2":
+        if total_ms < 2000:
+            raise TimeParseError(f"+2 time below two seconds: {text!r}")
+        total_ms -= 2000
+    return ParsedTime(total_ms / 1000, penalty)
+
+
+def parse_many(texts):
+    """Parse many time strings, collecting errors instead of raising.
+
+    Returns (results, errors) where results lines up with texts and holds
+    None for rows that failed, and errors is a list of
+    (index, text, message) tuples.
+    """
+    results = []
+    errors = []
+    append = results.append
+    for index, text in enumerate(texts):
+        try:
+            append(parse_time(text))
+        except TimeParseError as e:
+            append(None)
+            errors.append((index, text, str(e)))
+    return results, errors
+
+
+# Formatter matching the historical Stopwatch.format_time output
+default_formatter = TimeFormatter()
@@ -0,0 +1,583 @@
+"""
+Time-series graph of solve times and rolling averages for PSTimer.
+"""
+
+import bisect
+import math
+import queue
+import threading
+import tkinter as tk
+from array import array
+
+from .statistics import DNF, trim_count, trimmed_average
+
+# Rolling averages drawn next to the single times: name -> window size
+AVERAGES = (("ao5", 5), ("ao12", 12), ("ao100", 100))
+SERIES = ("single",) + tuple(name for name, _ in AVERAGES)
+
+
+def rolling_average(values, size):
+    """Rolling WCA averages of size over display times, oldest first.
+
+    Returns (indexes, averages): the index of the newest solve of each
+    window that has a (non-DNF) average, as parallel arrays. The window is
+    kept sorted, so each step costs O(size) instead of a sort.
+    """
+    indexes = array("l")
+    averages = array("d")
+    if len(values) < size:
+        return indexes, averages
+    trim = trim_count(size)
+    kept = size - 2 * trim
+    window = sorted(values[:size])
+    for i in range(size - 1, len(values)):
+        if i >= size:
+            window.pop(bisect.bisect_left(window, values[i - size]))
+            bisect.insort(window, values[i])
+        if window[size - trim - 1] != math.inf:
+            indexes.append(i)
+            averages.append(sum(window[trim : size - trim]) / kept)
+    return indexes, averages
+
+
+def window_average(values, size):
+    """WCA average of the last size values, or None if it is a DNF."""
+    average = trimmed_average(values[-size:])
+    return None if average == DNF else average
+
+
+class MinMaxLevels:
+    """Level-of-detail pyramid over a series of values.
+
+    Level k holds the min and max (with their positions in the series) of
+    every block of BLOCK ** (k + 1) values, so a wide view can be reduced
+    from a few thousand blocks instead of every point. update() refreshes
+    only the blocks from a position onwards, which keeps appends cheap.
+    """
+
+    BLOCK = 8
+
+    def __init__(self, values):
+        self.values = values
+        self.levels = []  # [(span, mins, min_pos, maxs, max_pos), ...]
+        self.update(0)
+
+    def update(self, from_pos=0):
+        """Recompute the blocks that cover positions from_pos onwards."""
+        block = self.BLOCK
+        source = None  # The raw values
+        count = len(self.values)
+        span = 1
+        depth = 0
+        while count > block:
+            span *= block
+            first = from_pos // span
+            if depth < len(self.levels):
+                level = self.levels[depth]
+                for column in level[1:]:
+                    del column[first:]
+            else:
+                level = (span, array("d"), array("l"), array("d"), array("l"))
+                self.levels.append(level)
+            _, mins, min_pos, maxs, max_pos = level
+
+            for a in range(first * block, count, block):
+                z = a + block
+                if source is None:
+                    chunk = self.values[a:z]
+                    low, high = min(chunk), max(chunk)
+                    mins.append(low)
+                    min_pos.append(a + chunk.index(low))
+                    maxs.append(high)
+                    max_pos.append(a + chunk.index(high))
+                else:
+                    chunk = source[1][a:z]
+                    low = min(chunk)
+                    mins.append(low)
+                    min_pos.append(source[2][a + chunk.index(low)])
+                    chunk = source[3][a:z]
+                    high = max(chunk)
+                    maxs.append(high)
+                    max_pos.append(source[4][a + chunk.index(high)])
+
+            source = level
+            count = len(mins)
+            depth += 1
+        del self.levels[depth:]
+
+    def level_for(self, points_per_bucket):
+        """Get the coarsest level with at least two blocks per bucket."""
+        best = None
+        for level in self.levels:
+            if level[0] * 2 > points_per_bucket:
+                break
+            best = level
+        return best
+
+
+def minmax_downsample(indexes, values, start, end, buckets, levels=None):
+    """Reduce the points with start <= index < end to a min and max per bucket.
+
+    Returns [(index, value), ...] in index order, at most 2 * buckets points.
+    Keeping each bucket's extremes preserves spikes (unlike averaging), and
+    with one bucket per pixel the drawn line looks the same as drawing
+    every point. With MinMaxLevels the buckets are reduced from its blocks,
+    whose edges may shift bucket boundaries by less than a block.
+    """
+    lo = bisect.bisect_left(indexes, start)
+    hi = bisect.bisect_left(indexes, end)
+    if hi - lo <= 2 * buckets:
+        return list(zip(indexes[lo:hi], values[lo:hi]))
+
+    level = levels.level_for((hi - lo) / buckets) if levels is not None else None
+    if level is None:
+        span, mins, min_pos, maxs, max_pos = 1, values, None, values, None
+    else:
+        span, mins, min_pos, maxs, max_pos = level
+
+    points = []
+    step = (end - start) / buckets
+    a = lo // span
+    last = -(-hi // span)  # Partial blocks at the end count
+    for bucket in range(1, buckets + 1):
+        if bucket < buckets:
+            z = bisect.bisect_left(indexes, start + bucket * step, lo, hi) // span
+        else:
+            z = last
+        if z <= a:
+            continue
+        chunk = mins[a:z]
+        low = min(chunk)
+        i = a + chunk.index(low)
+        chunk = maxs[a:z]
+        high = max(chunk)
+        j = a + chunk.index(high)
+        if min_pos is not None:
+            i, j = min_pos[i], max_pos[j]
+        if i == j:
+            points.append((indexes[i], low))
+        elif i < j:
+            points.extend(((indexes[i], low), (indexes[j], high)))
+        else:
+            points.extend(((indexes[j], high), (indexes[i], low)))
+        a = z
+    return points
+
+
+class SessionSeries:
+    """Single times and rolling averages of a session, oldest first.
+
+    Built once per session and extended in place when a solve is added,
+    so panning and zooming only ever re-query these arrays. Other edits
+    rebuild it, which build() can do from a snapshot on another thread.
+    """
+
+    def __init__(self):
+        self.values = []  # Display times, DNF as infinity
+        self.series = {}  # name -> (indexes, values, MinMaxLevels)
+        self._rebuild([])
+        self.session = None
+        self.version = -1
+        self._newest = None
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def build(cls, session, version, times):
+        """Build the series of a snapshot of session's times (newest first).
+
+        Only the new object is written to, so this can run off the Tk
+        thread.
+        """
+        series = cls()
+        series._rebuild([solve.display_time for solve in reversed(times)])
+        series._follow(session, version, times)
+        return series
+
+    def is_current(self, session):
+        """Check whether the series shows session as it is."""
+        return session is self.session and session.version == self.version
+
+    def can_append(self, session):
+        """Check whether session only gained a solve since the series was built."""
+        times = session.times
+        return (
+            session is self.session
+            and session.version == self.version + 1
+            and len(times) == len(self.values) + 1
+            and len(times) > 1
+            and times[1] is self._newest
+        )
+
+    def update(self, session):
+        """Catch up with session; returns True if anything changed."""
+        if self.is_current(session):
+            return False
+        times = session.times
+        if self.can_append(session):
+            self._append(times[0].display_time)
+        else:
+            self._rebuild([solve.display_time for solve in reversed(times)])
+        self._follow(session, session.version, times)
+        return True
+
+    def _follow(self, session, version, times):
+        """Record which session version the series shows."""
+        self.session = session
+        self.version = version
+        self._newest = times[0] if times else None
+
+    def _rebuild(self, values):
+        """Recompute every series."""
+        self.values = values
+        indexes, singles = array("l"), array("d")
+        for i, value in enumerate(values):
+            if value != math.inf:
+                indexes.append(i)
+                singles.append(value)
+        self.series = {"single": (indexes, singles, MinMaxLevels(singles))}
+        for name, size in AVERAGES:
+            indexes, averages = rolling_average(values, size)
+            self.series[name] = (indexes, averages, MinMaxLevels(averages))
+
+    def _append(self, value):
+        """Add the newest solve to every series."""
+        self.values.append(value)
+        index = len(self.values) - 1
+        if value != math.inf:
+            self._extend("single", index, value)
+        for name, size in AVERAGES:
+            if len(self.values) >= size:
+                average = window_average(self.values, size)
+                if average is not None:
+                    self._extend(name, index, average)
+
+    def _extend(self, name, index, value):
+        """Append a point to a series and refresh its last blocks."""
+        indexes, values, levels = self.series[name]
+        indexes.append(index)
+        values.append(value)
+        levels.update(len(values) - 1)
+
+
+class GraphModel:
+    """The visible range of a SessionSeries and its projection to pixels.
+
+    With offload_threshold set, sessions of at least that many solves are
+    rebuilt on a thread (a new solve is still appended in place): loading
+    is set until poll() swaps the new series in.
+    """
+
+    MARGIN_LEFT = 48
+    MARGIN = 12
+
+    def __init__(self, offload_threshold=None):
+        self.data = SessionSeries()
+        self.start = 0  # Visible solve indexes: [start, end)
+        self.end = None  # None follows the newest solve
+        self.offload_threshold = offload_threshold
+        self.loading = False  # A rebuild is running on a thread
+        self._building = None  # (session, version) being rebuilt
+        self._built = queue.SimpleQueue()  # SessionSeries from the threads
+
+    def update(self, session):
+        """Pick up session changes; True if a redraw is needed."""
+        if self.data.is_current(session):
+            if not self.loading:
+                return False
+            self._building = None  # Back to what is shown; drop the rebuild
+            self.loading = False
+            return True
+        if (
+            self.offload_threshold is not None
+            and len(session) >= self.offload_threshold
+            and not self.data.can_append(session)
+        ):
+            if self._building != (session, session.version):
+                self._build(session)
+            return True
+        switched = session is not self.data.session
+        self.data.update(session)
+        self._building = None
+        self.loading = False
+        if switched:
+            self.reset()
+        return True
+
+    def _build(self, session):
+        """Rebuild the series of session on a thread."""
+        version = session.version
+        times = list(session.times)
+        self._building = (session, version)
+        self.loading = True
+        threading.Thread(
+            target=self._run_build,
+            args=(session, version, times),
+            name="pstimer-graph",
+            daemon=True,
+        ).start()
+
+    def _run_build(self, session, version, times):
+        """Thread body: build the series and hand it to poll()."""
+        self._built.put(SessionSeries.build(session, version, times))
+
+    def poll(self):
+        """Swap in the series built on a thread; True if it arrived."""
+        arrived = False
+        while True:
+            try:
+                series = self._built.get_nowait()
+            except queue.Empty:
+                return arrived
+            if self._building != (series.session, series.version):
+                continue  # Superseded by a later rebuild
+            switched = series.session is not self.data.session
+            self.data = series
+            self._building = None
+            self.loading = False
+            if switched:
+                self.reset()
+            arrived = True
+
+    def view(self):
+        """Get the visible [start, end) solve range."""
+        end = len(self.data) if self.end is None else self.end
+        return self.start, max(end, self.start + 1)
+
+    def reset(self):
+        """Show every solve."""
+        self.start = 0
+        self.end = None
+
+    def zoom(self, factor, anchor=0.5):
+        """Zoom by factor (<1 zooms in) keeping the fraction anchor in place."""
+        start, end = self.view()
+        total = len(self.data)
+        width = min(max((end - start) * factor, 5), max(total, 5))
+        center = start + (end - start) * anchor
+        self._set_view(center - width * anchor, width)
+
+    def pan(self, fraction):
+        """Scroll by a fraction of the visible width (positive is newer)."""
+        start, end = self.view()
+        self._set_view(start + (end - start) * fraction, end - start)
+
+    def _set_view(self, start, width):
+        """Move the view, keeping it inside the session."""
+        total = len(self.data)
+        start = min(max(start, 0), max(total - width, 0))
+        self.start = start
+        self.end = None if start + width >= total else start + width
+
+    def plot(self, width, height):
+        """Project the visible series to canvas coordinates.
+
+        Returns (lines, (low, high)): lines maps each series name to a flat
+        [x0, y0, x1, y1, ...] list, at most two points per pixel column;
+        low and high are the times at the bottom and top of the plot.
+        """
+        start, end = self.view()
+        left = self.MARGIN_LEFT
+        right = max(width - self.MARGIN, left + 1)
+        top = self.MARGIN
+        bottom = max(height - self.MARGIN, top + 1)
+        buckets = max(1, int(right - left))
+
+        sampled = {}
+        for name in SERIES:
+            indexes, values, levels = self.data.series[name]
+            sampled[name] = minmax_downsample(
+                indexes, values, start, end, buckets, levels
+            )
+        shown = [value for points in sampled.values() for _, value in points]
+        if not shown:
+            return {}, (None, None)
+        low, high = min(shown), max(shown)
+        pad = max((high - low) * 0.05, 0.01)
+        low, high = max(low - pad, 0.0), high + pad
+
+        x_scale = (right - left) / max(end - 1 - start, 1)
+        y_scale = (bottom - top) / (high - low)
+        lines = {}
+        for name, points in sampled.items():
+            coords = []
+            for index, value in points:
+                coords.append(left + (index - start) * x_scale)
+                coords.append(bottom - (value - low) * y_scale)
+            lines[name] = coords
+        return lines, (low, high)
+
+
+class GraphWindow:
+    """Window with a Canvas graph of the current session.
+
+    Mouse wheel zooms around the pointer, dragging pans and a double click
+    shows the whole session again. Large sessions are rebuilt off the Tk
+    thread after an edit, with a loading message until they are ready.
+    """
+
+    OFFLOAD_THRESHOLD = 5000  # Solves from which rebuilds run on a thread
+
+    def __init__(self, parent, theme_manager, get_session):
+        self.parent = parent
+        self.theme_manager = theme_manager
+        self.get_session = get_session
+        self.model = GraphModel(self.OFFLOAD_THRESHOLD)
+        self._drag_x = None
+        self._poll_id = None
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("PSTimer Graph")
+        self.dialog.geometry("720x360")
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        theme = self.theme_manager.get_theme()
+        self.canvas = tk.Canvas(
+            self.dialog, bg=theme["bg"], highlightthickness=0, width=720, height=360
+        )
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", self._on_wheel)  # X11 scroll up
+        self.canvas.bind("<Button-5>", self._on_wheel)  # X11 scroll down
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<Double-Button-1>", self._on_reset)
+
+        self.refresh()
+
+    def refresh(self):
+        """Redraw if the current session changed."""
+        if self.model.update(self.get_session()):
+            self.redraw()
+            if self.model.loading and self._poll_id is None:
+                self._poll_id = self.dialog.after(15, self._poll_build)
+
+    def _poll_build(self):
+        """Draw the rebuilt series once its thread is done."""
+        self._poll_id = None
+        if not self.is_open():
+            return
+        if self.model.poll():
+            self.redraw()
+        elif self.model.loading:
+            self._poll_id = self.dialog.after(15, self._poll_build)
+
+    def redraw(self):
+        """Draw the visible part of the series."""
+        canvas = self.canvas
+        theme = self.theme_manager.get_theme()
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        canvas.delete("all")
+
+        if self.model.loading:
+            self._draw_message("Loading...", width, height, theme)
+            return
+        lines, (low, high) = self.model.plot(width, height)
+        if low is None:
+            self._draw_message("No solves yet", width, height, theme)
+            return
+
+        self._draw_axis(width, height, low, high, theme)
+        colors = {
+            "single": theme["text_hint"],
+            "ao5": theme["accent"],
+            "ao12": theme["timer_running"],
+            "ao100": theme["timer_ready"],
+        }
+        for name in SERIES:
+            coords = lines.get(name)
+            if coords and len(coords) >= 4:
+                canvas.create_line(*coords, fill=colors[name], width=1)
+
+        legend_x = GraphModel.MARGIN_LEFT + 8
+        for name in SERIES:
+            canvas.create_text(
+                legend_x,
+                GraphModel.MARGIN + 8,
+                text=name,
+                anchor=tk.W,
+                fill=colors[name],
+                font=(theme["font_family"], 9),
+            )
+            legend_x += 48
+
+    def _draw_message(self, text, width, height, theme):
+        """Draw a note in the middle of the canvas instead of the graph."""
+        self.canvas.create_text(
+            width / 2,
+            height / 2,
+            text=text,
+            fill=theme["text_hint"],
+            font=(theme["font_family"], 12),
+        )
+
+    def _draw_axis(self, width, height, low, high, theme):
+        """Draw horizontal grid lines labelled in seconds."""
+        from .formatting import default_formatter
+
+        top = GraphModel.MARGIN
+        bottom = height - GraphModel.MARGIN
+        for step in range(5):
+            value = low + (high - low) * step / 4
+            y = bottom - (bottom - top) * step / 4
+            self.canvas.create_line(
+                GraphModel.MARGIN_LEFT,
+                y,
+                width - GraphModel.MARGIN,
+                y,
+                fill=theme["border"],
+            )
+            self.canvas.create_text(
+                GraphModel.MARGIN_LEFT - 4,
+                y,
+                text=default_formatter.format(value),
+                anchor=tk.E,
+                fill=theme["text_secondary"],
+                font=(theme["mono_font"], 8),
+            )
+
+    def _plot_fraction(self, x):
+        """Get the fraction of the plot width at canvas x."""
+        left = GraphModel.MARGIN_LEFT
+        right = self.canvas.winfo_width() - GraphModel.MARGIN
+        return min(max((x - left) / max(right - left, 1), 0.0), 1.0)
+
+    def _on_wheel(self, event):
+        """Zoom around the pointer."""
+        zoom_in = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.model.zoom(0.8 if zoom_in else 1.25, self._plot_fraction(event.x))
+        self.redraw()
+
+    def _on_press(self, event):
+        self._drag_x = event.x
+
+    def _on_drag(self, event):
+        """Pan with the pointer."""
+        if self._drag_x is None:
+            return
+        width = self.canvas.winfo_width() - GraphModel.MARGIN_LEFT - GraphModel.MARGIN
+        self.model.pan((self._drag_x - event.x) / max(width, 1))
+        self._drag_x = event.x
+        self.redraw()
+
+    def _on_reset(self, event):
+        self.model.reset()
+        self.redraw()
+
+    def close(self):
+        """Close the graph window."""
+        if self._poll_id is not None:
+            self.dialog.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.dialog.destroy()
+
+    def is_open(self):
+        """Check whether the window still exists."""
+        try:
+            return bool(self.dialog.winfo_exists())
+        except tk.TclError:
+            return False
@@ -0,0 +1,252 @@
+"""
+Time distribution histogram for PSTimer.
+"""
+
+import bisect
+import math
+import tkinter as tk
+
+# Display bin widths in seconds; the panel picks the first that gives at
+# most MAX_ROWS rows
+DISPLAY_WIDTHS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 30, 60)
+MAX_ROWS = 24
+
+
+class TimeHistogram:
+    """Fixed-width bins of display times, updated one solve at a time.
+
+    Bins are sparse (a dict from bin number to count) with a sorted list
+    of the occupied bins, so adding or removing a solve is O(log bins) and
+    a percentile walks the bins instead of sorting the session. DNFs are
+    counted separately and left out of the bins and percentiles.
+    Percentiles are interpolated inside a bin, so they are exact to within
+    bin_width.
+    """
+
+    def __init__(self, bin_width=0.1):
+        self.bin_width = bin_width
+        self.counts = {}  # Bin number -> solves in [n * width, (n + 1) * width)
+        self.keys = []  # Occupied bin numbers, sorted
+        self.count = 0  # Non-DNF solves
+        self.dnf_count = 0
+
+    def bin_of(self, seconds):
+        """Get the bin number of a time."""
+        # Round first so that e.g. 0.3 / 0.1 = 2.9999... lands in bin 3
+        return math.floor(round(seconds / self.bin_width, 9))
+
+    def add(self, seconds):
+        """Count a display time (infinity for a DNF)."""
+        if seconds == math.inf:
+            self.dnf_count += 1
+            return
+        key = self.bin_of(seconds)
+        count = self.counts.get(key, 0)
+        if not count:
+            bisect.insort(self.keys, key)
+        self.counts[key] = count + 1
+        self.count += 1
+
+    def remove(self, seconds):
+        """Uncount a display time previously added."""
+        if seconds == math.inf:
+            self.dnf_count -= 1
+            return
+        key = self.bin_of(seconds)
+        count = self.counts[key] - 1
+        if count:
+            self.counts[key] = count
+        else:
+            del self.counts[key]
+            del self.keys[bisect.bisect_left(self.keys, key)]
+        self.count -= 1
+
+    def clear(self):
+        """Remove every solve."""
+        self.counts.clear()
+        self.keys.clear()
+        self.count = 0
+        self.dnf_count = 0
+
+    def percentile(self, p):
+        """Get the time below which p percent of the non-DNF solves fall."""
+        if not self.count:
+            return None
+        rank = min(max(p, 0.0), 100.0) / 100 * self.count
+        seen = 0
+        for key in self.keys:
+            count = self.counts[key]
+            if seen + count >= rank:
+                return (key + (rank - seen) / count) * self.bin_width
+            seen += count
+        return (self.keys[-1] + 1) * self.bin_width
+
+    def bins(self, width=None):
+        """Get [(lower edge, count), ...] merged into bins of width seconds.
+
+        width must be a multiple of bin_width; empty bins between occupied
+        ones are included so the result can be drawn directly.
+        """
+        if not self.keys:
+            return []
+        factor = max(1, round((width or self.bin_width) / self.bin_width))
+        first = self.keys[0] // factor
+        merged = [0] * (self.keys[-1] // factor - first + 1)
+        for key in self.keys:
+            merged[key // factor - first] += self.counts[key]
+        step = factor * self.bin_width
+        return [((first + i) * step, count) for i, count in enumerate(merged)]
+
+    def display_width(self, max_rows=MAX_ROWS):
+        """Pick a display bin width that fits the spread in max_rows rows."""
+        if not self.keys:
+            return DISPLAY_WIDTHS[0]
+        spread = (self.keys[-1] - self.keys[0] + 1) * self.bin_width
+        for width in DISPLAY_WIDTHS:
+            if width >= self.bin_width and spread / width <= max_rows:
+                return width
+        return DISPLAY_WIDTHS[-1]
+
+
+class DistributionWindow:
+    """Window with a bar chart of the current session's time distribution.
+
+    Bars are drawn from the session's TimeHistogram, which the session
+    keeps current as solves are added and removed; p25, p50 and p90 are
+    marked on the side.
+    """
+
+    MARKERS = (25, 50, 90)
+
+    def __init__(self, parent, theme_manager, get_session):
+        self.parent = parent
+        self.theme_manager = theme_manager
+        self.get_session = get_session
+        self._drawn = None  # (session, version) last drawn
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("PSTimer Distribution")
+        self.dialog.geometry("420x460")
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        theme = self.theme_manager.get_theme()
+        self.canvas = tk.Canvas(
+            self.dialog, bg=theme["bg"], highlightthickness=0, width=420, height=460
+        )
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+
+        self.refresh()
+
+    def refresh(self):
+        """Redraw if the current session changed."""
+        session = self.get_session()
+        if self._drawn != (session, session.version):
+            self.redraw()
+
+    def redraw(self):
+        """Draw one bar per display bin with percentile markers."""
+        from .formatting import default_formatter
+
+        session = self.get_session()
+        self._drawn = (session, session.version)
+        histogram = session.histogram()
+        canvas = self.canvas
+        theme = self.theme_manager.get_theme()
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        canvas.delete("all")
+
+        font = (theme["mono_font"], 9)
+        bins = histogram.bins(histogram.display_width())
+        if not bins:
+            canvas.create_text(
+                width / 2,
+                height / 2,
+                text="No solves yet",
+                fill=theme["text_hint"],
+                font=(theme["font_family"], 12),
+            )
+            return
+
+        label_width = 64
+        count_width = 48
+        top = 10
+        bottom = height - 30
+        row = (bottom - top) / len(bins)
+        step = bins[1][0] - bins[0][0] if len(bins) > 1 else histogram.bin_width
+        most = max(count for _, count in bins)
+        bar_space = max(width - label_width - count_width - 10, 1)
+
+        for i, (lower, count) in enumerate(bins):
+            y = top + i * row
+            canvas.create_text(
+                label_width - 6,
+                y + row / 2,
+                text=default_formatter.format(lower) + "+",
+                anchor=tk.E,
+                fill=theme["text_secondary"],
+                font=font,
+            )
+            if count:
+                canvas.create_rectangle(
+                    label_width,
+                    y + 1,
+                    label_width + bar_space * count / most,
+                    y + max(row - 1, 2),
+                    fill=theme["accent"],
+                    outline="",
+                )
+                canvas.create_text(
+                    label_width + bar_space * count / most + 4,
+                    y + row / 2,
+                    text=str(count),
+                    anchor=tk.W,
+                    fill=theme["text_primary"],
+                    font=font,
+                )
+
+        # Percentile markers as ticks on the time axis
+        first = bins[0][0]
+        for p in self.MARKERS:
+            value = histogram.percentile(p)
+            y = top + (value - first) / step * row
+            canvas.create_line(
+                label_width - 4,
+                y,
+                width - 4,
+                y,
+                fill=theme["timer_running"],
+                dash=(3, 3),
+            )
+            canvas.create_text(
+                width - 6,
+                y - 2,
+                text=f"p{p} {default_formatter.format(value)}",
+                anchor=tk.SE,
+                fill=theme["timer_running"],
+                font=font,
+            )
+
+        summary = f"{histogram.count} solves"
+        if histogram.dnf_count:
+            summary += f", {histogram.dnf_count} DNF"
+        canvas.create_text(
+            label_width,
+            height - 12,
+            text=summary,
+            anchor=tk.W,
+            fill=theme["text_hint"],
+            font=font,
+        )
+
+    def close(self):
+        """Close the distribution window."""
+        self.dialog.destroy()
+
+    def is_open(self):
+        """Check whether the window still exists."""
+        try:
+            return bool(self.dialog.winfo_exists())
+        except tk.TclError:
+            return False
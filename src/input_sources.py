@@ -0,0 +1,275 @@
+"""
+External input devices (smart cubes, Stackmat timers) for PSTimer.
+"""
+
+import socket
+import threading
+import time
+
+from .cube_state import (
+    IDENTITY_PERMUTATION,
+    apply_permutation,
+    move_permutation,
+    scramble_state,
+)
+from .reconstruction import MOVE_CODES, Reconstruction
+
+# Kinds of InputEvent
+MOVE = "move"  # A smart cube turned; move is the token, e.g. "R'"
+START = "start"  # The device started a solve (a Stackmat's hands lifted)
+STOP = "stop"  # The device stopped a solve
+SOLVED = "solved"  # The cube is solved right now; resynchronizes tracking
+RESET = "reset"  # The device abandoned the solve (a running Stackmat reset)
+
+EVENT_KINDS = (MOVE, START, STOP, SOLVED, RESET)
+
+
+class InputEvent:
+    """Something a device reported, stamped on the perf_counter_ns clock."""
+
+    __slots__ = ("kind", "ts_ns", "move")
+
+    def __init__(self, kind, ts_ns, move=None):
+        self.kind = kind
+        self.ts_ns = ts_ns
+        self.move = move
+
+    def __repr__(self):
+        move = f" {self.move}" if self.move else ""
+        return f"InputEvent({self.kind}{move} @{self.ts_ns})"
+
+
+class InputSource:
+    """A device that reports InputEvents.
+
+    Subclasses implement events(), a generator that blocks until the
+    device reports something. pump() hands events to a handler on the
+    calling thread; start() does the same on a background thread, so the
+    handler must pass events on to the thread that owns the TimerCore
+    (see InputController and PSTimerUI.attach_input).
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._closed = False
+
+    def events(self):
+        """Yield InputEvents until the device goes away."""
+        raise NotImplementedError
+
+    def pump(self, handler, limit=None):
+        """Call handler(event) for each event; returns how many were handled."""
+        handled = 0
+        for event in self.events():
+            if self._closed:
+                break
+            handler(event)
+            handled += 1
+            if limit is not None and handled >= limit:
+                break
+        return handled
+
+    def start(self, handler):
+        """Pump events to handler from a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.pump, args=(handler,), name="pstimer-input", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """Stop reading from the device."""
+        self._closed = True
+
+
+class SimulatedDevice(InputSource):
+    """A device simulated from lines of text, for testing without hardware.
+
+    Each line is "<ms> <token>", where ms counts milliseconds from the
+    start of the stream and token is a move ("R", "U'", "F2", ...) or one
+    of "start", "stop", "solved" and "reset". Blank lines and lines
+    starting with "#" are skipped. Times are mapped onto the clock from
+    when reading began; with realtime the device also waits until each
+    event is due, like real hardware, otherwise it replays as fast as it
+    can.
+    """
+
+    def __init__(self, stream, clock=time.perf_counter_ns, realtime=False):
+        super().__init__()
+        self.stream = stream
+        self.clock = clock
+        self.realtime = realtime
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Replay a recorded move file."""
+        return cls(open(path, encoding="utf-8"), **kwargs)
+
+    @classmethod
+    def from_socket(cls, host, port, **kwargs):
+        """Read lines from a TCP socket, e.g. a test harness or a bridge."""
+        connection = socket.create_connection((host, port))
+        return cls(connection.makefile("r", encoding="utf-8"), **kwargs)
+
+    @staticmethod
+    def parse_line(line, origin_ns):
+        """Parse one line into an InputEvent, or None for a blank/comment."""
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return None
+        try:
+            ms, token = line.split()
+            ts_ns = origin_ns + round(float(ms) * 1_000_000)
+        except ValueError:
+            raise ValueError(f"Expected '<ms> <move or event>': {line!r}") from None
+        if token in MOVE_CODES:
+            return InputEvent(MOVE, ts_ns, token)
+        if token in EVENT_KINDS:
+            return InputEvent(token, ts_ns)
+        raise ValueError(f"Unknown move or event: {token!r}")
+
+    def events(self):
+        origin_ns = self.clock()
+        for line in self.stream:
+            event = self.parse_line(line, origin_ns)
+            if event is None:
+                continue
+            if self.realtime:
+                wait_ns = event.ts_ns - self.clock()
+                if wait_ns > 0:
+                    time.sleep(wait_ns / 1_000_000_000)
+            yield event
+
+    def close(self):
+        super().close()
+        self.stream.close()
+
+
+def is_solved(facelets):
+    """Check whether every face shows a single color, in any orientation."""
+    return all(
+        facelets[base : base + 9].count(facelets[base]) == 9
+        for base in range(0, 54, 9)
+    )
+
+
+class CubeTracker:
+    """Follows a smart cube's state one move at a time.
+
+    Each move is one compiled facelet permutation (see move_permutation)
+    and the solved check only compares stickers within each face, so a
+    move costs a few microseconds.
+    """
+
+    def __init__(self):
+        self.facelets = scramble_state("")
+
+    def reset(self, facelets=None):
+        """Set the tracked state (solved by default)."""
+        self.facelets = facelets if facelets is not None else scramble_state("")
+
+    def apply(self, move):
+        """Turn the tracked cube; returns whether it is now solved."""
+        permutation = move_permutation(move)
+        if permutation is not IDENTITY_PERMUTATION:
+            self.facelets = apply_permutation(self.facelets, permutation)
+        return is_solved(self.facelets)
+
+    @property
+    def solved(self):
+        """Check whether the tracked cube is solved in any orientation."""
+        return is_solved(self.facelets)
+
+
+class InputController:
+    """Turns InputEvents into TimerCore calls.
+
+    "start" and "stop" events start and stop the timer directly, and
+    "reset" abandons a running solve. Moves are tracked with a
+    CubeTracker: once the cube matches the current scramble it is armed,
+    the next move starts the timer at that move's timestamp, and the move
+    that solves the cube stops it with the moves in between saved as the
+    solve's Reconstruction. All stamps come from the device, so the
+    recorded time does not depend on how quickly the event was handled.
+
+    Call handle() on the thread that owns the core.
+    """
+
+    def __init__(self, core):
+        self.core = core
+        self.tracker = CubeTracker()
+        self.armed = False  # Cube matches the scramble; next move starts
+        self._solve_start_ns = None  # Set while timing a smart cube solve
+        self._reconstruction = None
+
+    def handle(self, event):
+        """Apply one event to the core."""
+        if event.kind == MOVE:
+            self._move(event)
+        elif event.kind == START:
+            self.core.start(event.ts_ns)
+        elif event.kind == STOP:
+            self._finish(event.ts_ns)
+        elif event.kind == SOLVED:
+            self.tracker.reset()
+            self.armed = False
+        elif event.kind == RESET:
+            self._solve_start_ns = None
+            self._reconstruction = None
+            if self.core.stopwatch.running:
+                self.core.reset()
+
+    def _move(self, event):
+        """Track a move, starting or stopping a smart cube solve."""
+        if self._solve_start_ns is not None and not self.core.stopwatch.running:
+            self._solve_start_ns = None  # Stopped from the keyboard
+            self._reconstruction = None
+        if self._solve_start_ns is None and self.armed:
+            if self.core.start(event.ts_ns):
+                self._solve_start_ns = event.ts_ns
+                self._reconstruction = Reconstruction()
+            self.armed = False
+
+        solved = self.tracker.apply(event.move)
+        if self._solve_start_ns is not None:
+            elapsed_ms = (event.ts_ns - self._solve_start_ns) // 1_000_000
+            self._reconstruction.append(event.move, elapsed_ms)
+            if solved:
+                self._finish(event.ts_ns)
+        elif not self.core.stopwatch.running:
+            self.armed = self._matches_scramble()
+
+    def _matches_scramble(self):
+        """Check whether the tracked cube shows the current 3x3x3 scramble."""
+        if self.core.scramble_manager.current_type != "3x3x3":
+            return False
+        scramble = self.core.current_scramble
+        return bool(scramble) and self.tracker.facelets == scramble_state(scramble)
+
+    def _finish(self, ts_ns):
+        """Stop the timer, keeping the moves if this was a smart cube solve."""
+        reconstruction = self._reconstruction
+        self._solve_start_ns = None
+        self._reconstruction = None
+        return self.core.stop(ts_ns, reconstruction=reconstruction)
+
+
+def open_source(spec, **kwargs):
+    """Open a device from a spec.
+
+    "serial:PORT" is a Stackmat on a serial port and a .wav file is a
+    recording of a Stackmat's audio output (see stackmat.py); otherwise
+    spec is "HOST:PORT" or a file path for a SimulatedDevice.
+    """
+    if spec.startswith("serial:"):
+        from .stackmat import StackmatSource
+
+        kwargs.pop("realtime", None)  # A port is always live
+        return StackmatSource.from_serial(spec[len("serial:") :], **kwargs)
+    if spec.lower().endswith(".wav"):
+        from .stackmat import StackmatSource
+
+        return StackmatSource.from_wav(spec, **kwargs)
+    host, _, port = spec.rpartition(":")
+    if host and port.isdigit():
+        return SimulatedDevice.from_socket(host, int(port), **kwargs)
+    return SimulatedDevice.from_file(spec, **kwargs)
@@ -0,0 +1,77 @@
+"""
+Input event timestamping for PSTimer.
+"""
+
+import time
+from collections import deque
+
+
+class EventClock:
+    """Maps Tk event timestamps onto the perf_counter clock.
+
+    Tk stamps every key event with the millisecond time at which the window
+    system saw it (``event.time``). Handlers run later, once the event loop
+    gets to them, so timing solves from the handler adds any event loop
+    backlog to the result. This class converts event stamps into
+    perf_counter nanoseconds so start/stop use the moment the key moved.
+
+    The offset between the two clocks is estimated as the smallest observed
+    difference between dispatch time and event time; every observation is an
+    upper bound on the true offset, so the minimum converges on it. The gap
+    between each event's stamp and its dispatch is kept as the dispatch lag.
+    """
+
+    WRAP_MS = 1 << 32  # X server time is an unsigned 32-bit millisecond count
+
+    def __init__(self, history=256, resync_ms=5000):
+        self.resync_ms = resync_ms
+        self.lags_ms = deque(maxlen=history)
+        self._offset_ns = None
+        self._last_event_ms = None
+        self._wraps = 0
+
+    def event_ns(self, event, now_ns=None):
+        """Get the perf_counter_ns timestamp at which an event happened."""
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+
+        event_ms = getattr(event, "time", None)
+        if not isinstance(event_ms, int) or event_ms <= 0:
+            # Synthetic events carry no timestamp; dispatch time is all we have
+            self.lags_ms.append(0.0)
+            return now_ns
+
+        event_ns = self._unwrap(event_ms) * 1_000_000
+        candidate = now_ns - event_ns
+        if (
+            self._offset_ns is None
+            or candidate < self._offset_ns
+            or candidate - self._offset_ns > self.resync_ms * 1_000_000
+        ):
+            # First event, a better estimate, or a clock discontinuity
+            self._offset_ns = candidate
+
+        stamp_ns = min(event_ns + self._offset_ns, now_ns)
+        self.lags_ms.append((now_ns - stamp_ns) / 1_000_000)
+        return stamp_ns
+
+    def _unwrap(self, event_ms):
+        """Extend the 32-bit event time across counter wrap-arounds."""
+        if (
+            self._last_event_ms is not None
+            and event_ms < self._last_event_ms - self.WRAP_MS // 2
+        ):
+            self._wraps += 1
+        self._last_event_ms = event_ms
+        return event_ms + self._wraps * self.WRAP_MS
+
+    def lag_stats(self):
+        """Get dispatch lag statistics in milliseconds."""
+        if not self.lags_ms:
+            return {"count": 0, "last": None, "mean": None, "max": None}
+        return {
+            "count": len(self.lags_ms),
+            "last": self.lags_ms[-1],
+            "mean": sum(self.lags_ms) / len(self.lags_ms),
+            "max": max(self.lags_ms),
+        }
@@ -0,0 +1,203 @@
+"""
+Opt-in hot-path instrumentation for PSTimer.
+"""
+
+import functools
+import importlib
+import json
+import time
+from contextlib import contextmanager
+
+# (module, class, method, span name) timed while instrumentation is enabled
+HOT_PATHS = (
+    ("core", "TimerCore", "record_solve", "core.record_solve"),
+    ("ui", "PSTimerUI", "_update_statistics", "ui.update_statistics"),
+    ("ui", "PSTimerUI", "_update_times_list", "ui.update_times_list"),
+    ("ui", "PSTimerUI", "_generate_new_scramble", "ui.generate_new_scramble"),
+    ("ui", "PSTimerUI", "_update_timer_display", "ui.display_frame"),
+    ("ui", "PSTimerUI", "_flush_session_refresh", "ui.session_refresh"),
+    ("graph", "GraphWindow", "redraw", "graph.redraw"),
+    (
+        "cube_visualization",
+        "CubeVisualization",
+        "apply_scramble",
+        "cube.apply_scramble",
+    ),
+)
+
+
+class Histogram:
+    """Log-linear histogram of durations in nanoseconds.
+
+    Values below 32 ns get their own bucket; above that each power of two
+    is split into 16 buckets, so percentiles are accurate to about 6% while
+    memory stays bounded no matter how many samples are recorded.
+    """
+
+    SUB_BUCKETS = 16
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Drop all samples."""
+        self.buckets = {}
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+
+    @classmethod
+    def bucket_index(cls, ns):
+        """Get the bucket index for a duration."""
+        if ns < 2 * cls.SUB_BUCKETS:
+            return ns
+        shift = ns.bit_length() - 5
+        return cls.SUB_BUCKETS * (shift + 1) + (ns >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def bucket_bounds(cls, index):
+        """Get the (lowest, highest) duration that falls into a bucket."""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index, index
+        shift, offset = divmod(index, cls.SUB_BUCKETS)
+        shift -= 1
+        low = (cls.SUB_BUCKETS + offset) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, ns):
+        """Add one duration."""
+        if ns < 0:
+            ns = 0
+        index = self.bucket_index(ns)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if self.max_ns is None or ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p):
+        """Estimate the duration below which p percent of samples fall."""
+        if not self.count:
+            return None
+        rank = max(1, round(self.count * p / 100))
+        if rank >= self.count:
+            return self.max_ns
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                low, high = self.bucket_bounds(index)
+                estimate = (low + high) // 2
+                return min(max(estimate, self.min_ns), self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        """Get count, mean, p50, p99 and max, with times in milliseconds."""
+
+        def ms(ns):
+            return None if ns is None else ns / 1_000_000
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total_ns / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(50)),
+            "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.max_ns),
+        }
+
+
+class Instrumentation:
+    """Times hot paths into per-span histograms.
+
+    Nothing is patched until enable() is called, so a disabled instance adds
+    no overhead at all. enable() replaces the HOT_PATHS methods on their
+    classes with timing wrappers; call it before the main window is built so
+    that callbacks bound during construction are timed too. disable()
+    restores the original methods.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self._patches = []  # (owner, attribute, original)
+
+    def histogram(self, name):
+        """Get (creating if needed) the histogram for a span name."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block when enabled."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.histogram(name).record(time.perf_counter_ns() - start)
+
+    def wrap(self, owner, attribute, name):
+        """Replace owner.attribute with a timed wrapper until disable()."""
+        original = owner.__dict__[attribute]
+        record = self.histogram(name).record
+        clock = time.perf_counter_ns
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                record(clock() - start)
+
+        setattr(owner, attribute, timed)
+        self._patches.append((owner, attribute, original))
+
+    def enable(self, hot_paths=HOT_PATHS):
+        """Start timing the hot paths."""
+        if self.enabled:
+            return
+        for module_name, class_name, method, name in hot_paths:
+            module = importlib.import_module(f".{module_name}", __package__)
+            self.wrap(getattr(module, class_name), method, name)
+        self.enabled = True
+
+    def disable(self):
+        """Stop timing and restore the original methods."""
+        while self._patches:
+            owner, attribute, original = self._patches.pop()
+            setattr(owner, attribute, original)
+        self.enabled = False
+
+    def reset(self):
+        """Drop all recorded samples."""
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+    def snapshot(self):
+        """Get a summary of every span, keyed by span name."""
+        return {
+            name: histogram.summary()
+            for name, histogram in sorted(self.histograms.items())
+        }
+
+    def dump_json(self, path, extra=None):
+        """Write the span summaries (plus any extra data) to a JSON file."""
+        document = {"spans": self.snapshot()}
+        if extra:
+            document.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        return document
+
+
+# Shared instance used by the UI and the command line flag
+instrumentation = Instrumentation()
@@ -0,0 +1,210 @@
+"""
+Tk event-loop lag monitoring for PSTimer.
+"""
+
+import logging
+import time
+import tkinter
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# A late tick: when it happened, how late it was and the slowest handler
+# that ran since the previous tick (the likely culprit)
+Stall = namedtuple("Stall", ["at_ns", "lag_ms", "handler", "handler_ms"])
+
+
+def unwrap_callback(func):
+    """Get the user function behind a Tk callback.
+
+    after() and after_idle() register a "callit" closure around the function
+    they were given; look through it so stalls name the real handler.
+    """
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+        return func.__closure__[code.co_freevars.index("func")].cell_contents
+    return func
+
+
+def callback_name(func):
+    """Get a readable name for a Tk callback."""
+    func = unwrap_callback(func)
+    func = getattr(func, "__func__", func)  # Bound methods
+    name = getattr(func, "__qualname__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+class LagMonitor:
+    """Watchdog that measures how late after() callbacks fire.
+
+    A tick is scheduled every interval_ms; the difference between when it
+    was due and when it actually ran is the event-loop lag. Every Tk
+    callback (key bindings, after() jobs, button commands) is also timed
+    while the monitor runs, so a tick that is later than stall_ms is
+    attributed to the slowest handler that ran in between. Lags are kept
+    for the last history ticks; stalls are logged as warnings.
+    """
+
+    def __init__(
+        self,
+        widget,
+        interval_ms=50,
+        stall_ms=100,
+        history=1200,
+        max_stalls=50,
+        log_interval_s=60,
+        clock=time.perf_counter_ns,
+    ):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.stall_ms = stall_ms
+        self.log_interval_ns = int(log_interval_s * 1e9)
+        self.clock = clock
+        self.lags_ms = deque(maxlen=history)
+        self.stalls = deque(maxlen=max_stalls)
+        self.running = False
+        self._after_id = None
+        self._due_ns = None
+        self._next_log_ns = None
+        self._slowest = (0, None)  # (duration_ns, handler name) since last tick
+        self._original_call = None
+
+    def start(self):
+        """Start ticking and timing Tk callbacks."""
+        if self.running:
+            return
+        self.running = True
+        self._install_callback_timer()
+        self._schedule()
+
+    def stop(self):
+        """Stop ticking and restore Tk callback dispatch."""
+        self.running = False
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tkinter.TclError:
+                pass
+            self._after_id = None
+        self._uninstall_callback_timer()
+
+    def _schedule(self):
+        """Schedule the next tick."""
+        self._due_ns = self.clock() + self.interval_ms * 1_000_000
+        self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        """Measure how late this tick is and schedule the next one."""
+        self._after_id = None
+        if not self.running:
+            return
+        now = self.clock()
+        self.observe(now, (now - self._due_ns) / 1_000_000)
+        if self._next_log_ns is None:
+            self._next_log_ns = now + self.log_interval_ns
+        elif now >= self._next_log_ns:
+            self._next_log_ns = now + self.log_interval_ns
+            self._log_summary()
+        self._schedule()
+
+    def _log_summary(self):
+        """Log the recent lag distribution."""
+        summary = self.summary()
+        logger.info(
+            "Event loop lag over %d ticks: p50 %.1f ms, p99 %.1f ms, max %.1f ms, "
+            "%d stalls; histogram %s",
+            summary["count"],
+            summary["p50_ms"],
+            summary["p99_ms"],
+            summary["max_ms"],
+            summary["stalls"],
+            self.format_histogram(),
+        )
+
+    def observe(self, now_ns, lag_ms):
+        """Record one lag sample, reporting a stall if it is over threshold."""
+        lag_ms = max(0.0, lag_ms)
+        self.lags_ms.append(lag_ms)
+
+        handler_ns, handler = self._slowest
+        self._slowest = (0, None)
+        if lag_ms >= self.stall_ms:
+            stall = Stall(now_ns, lag_ms, handler, handler_ns / 1_000_000)
+            self.stalls.append(stall)
+            logger.warning(
+                "Event loop stalled %.0f ms (slowest handler: %s, %.0f ms)",
+                stall.lag_ms,
+                stall.handler or "unknown",
+                stall.handler_ms,
+            )
+
+    def handler_ran(self, func, duration_ns):
+        """Note that a Tk callback took duration_ns."""
+        if duration_ns > self._slowest[0] and unwrap_callback(func) != self._tick:
+            self._slowest = (duration_ns, callback_name(func))
+
+    def _install_callback_timer(self):
+        """Time every Python callback Tk dispatches."""
+        if self._original_call is not None:
+            return
+        original = self._original_call = tkinter.CallWrapper.__call__
+        clock = self.clock
+        monitor = self
+
+        def timed_call(wrapper, *args):
+            start = clock()
+            try:
+                return original(wrapper, *args)
+            finally:
+                monitor.handler_ran(wrapper.func, clock() - start)
+
+        tkinter.CallWrapper.__call__ = timed_call
+
+    def _uninstall_callback_timer(self):
+        """Restore the original Tk callback dispatch."""
+        if self._original_call is not None:
+            tkinter.CallWrapper.__call__ = self._original_call
+            self._original_call = None
+
+    def summary(self):
+        """Get lag percentiles in milliseconds over the recent history."""
+        if not self.lags_ms:
+            return {
+                "count": 0,
+                "p50_ms": None,
+                "p99_ms": None,
+                "max_ms": None,
+                "stalls": 0,
+            }
+        ordered = sorted(self.lags_ms)
+        count = len(ordered)
+        return {
+            "count": count,
+            "p50_ms": ordered[(count - 1) // 2],
+            "p99_ms": ordered[min(count - 1, round(count * 0.99) - 1)],
+            "max_ms": ordered[-1],
+            "stalls": len(self.stalls),
+        }
+
+    def histogram(self, edges_ms=(1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)):
+        """Count recent lags per bucket: [(upper edge or None, count), ...]."""
+        counts = [0] * (len(edges_ms) + 1)
+        for lag in self.lags_ms:
+            for i, edge in enumerate(edges_ms):
+                if lag < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return list(zip(list(edges_ms) + [None], counts))
+
+    def format_histogram(self):
+        """Format the lag histogram compactly, e.g. "<1:950 <2:40 >=1000:0"."""
+        parts = []
+        last_edge = None
+        for edge, count in self.histogram():
+            label = f"<{edge}" if edge is not None else f">={last_edge}"
+            parts.append(f"{label}:{count}")
+            last_edge = edge
+        return " ".join(parts)
@@ -0,0 +1,148 @@
+"""
+Personal-best detection for PSTimer.
+"""
+
+from .statistics import StatisticsCalculator
+
+# Stats tracked for personal bests, with their window sizes
+PB_STATS = {"single": 1, "mo3": 3, "ao5": 5, "ao12": 12, "ao100": 100}
+LARGEST_WINDOW = max(PB_STATS.values())
+
+
+def window_stat(stat, solves):
+    """Compute stat over the newest solves, as StatisticsCalculator shows it.
+
+    Infinity for a DNF, None if there are too few solves.
+    """
+    size = PB_STATS[stat]
+    if stat == "single":
+        return solves[0].display_time if solves else None
+    if stat.startswith("mo"):
+        return StatisticsCalculator.calculate_mean(solves, size)
+    return StatisticsCalculator.calculate_average(solves, size)
+
+
+class PersonalBest:
+    """A new best value of one stat for a puzzle, and when it was set."""
+
+    __slots__ = ("puzzle_type", "stat", "value", "previous", "timestamp", "session_id")
+
+    def __init__(self, puzzle_type, stat, value, previous, timestamp, session_id):
+        self.puzzle_type = puzzle_type
+        self.stat = stat
+        self.value = value
+        self.previous = previous  # None for the first value of the stat
+        self.timestamp = timestamp  # Epoch seconds of the solve that set it
+        self.session_id = session_id
+
+    @property
+    def improvement(self):
+        """Get how much faster than the previous best it is, if there was one."""
+        return None if self.previous is None else self.previous - self.value
+
+    def to_row(self):
+        """Convert to a compact JSON-friendly row."""
+        return [
+            self.puzzle_type,
+            self.stat,
+            self.value,
+            self.previous,
+            self.timestamp,
+            self.session_id,
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        """Rebuild a personal best saved with to_row()."""
+        return cls(*row)
+
+    def __repr__(self):
+        return f"PersonalBest({self.puzzle_type} {self.stat} {self.value!r})"
+
+
+class PBTracker:
+    """Notices personal bests per puzzle type as solves are recorded.
+
+    The best value of every stat in PB_STATS is kept per puzzle, seeded
+    from the best averages the session summaries keep over whole sessions
+    the first time the puzzle is seen, so stored sessions are not loaded.
+    check() is called with each new solve before it is added: a new solve
+    can only set a best through the windows that end with it, so it looks
+    at the newest LARGEST_WINDOW solves and compares against the kept
+    bests, and detection costs the same however many solves there are.
+    Edits other than new solves (penalties, deletions, imports) can change
+    past bests; once the edited session's summary has been rebuilt (see
+    Session.refresh_summary), call invalidate() to reseed from it. Seeding
+    never rebuilds summaries itself, so check() stays cheap: bests still
+    stale from an edit count with their last known values.
+
+    history is the timeline of personal bests, oldest first. It is only
+    ever appended to, never rebuilt from the solves.
+    """
+
+    def __init__(self, index, history=None):
+        self.index = index
+        self.history = list(history or [])
+        self.history_dirty = False  # Appended to since last saved
+        self._bests = {}  # Puzzle type -> {stat: best value or None}
+
+    def bests(self, puzzle_type):
+        """Get {stat: best value} for a puzzle, seeding it if needed."""
+        bests = self._bests.get(puzzle_type)
+        if bests is None:
+            bests = dict.fromkeys(PB_STATS)
+            for summary in self.index.summaries(puzzle_type):
+                for stat in PB_STATS:
+                    value = summary.stat_best(stat)
+                    if value is not None and (
+                        bests[stat] is None or value < bests[stat]
+                    ):
+                        bests[stat] = value
+            self._bests[puzzle_type] = bests
+        return bests
+
+    def invalidate(self, puzzle_type=None):
+        """Forget the bests of a puzzle (or all) after solves were edited."""
+        if puzzle_type is None:
+            self._bests.clear()
+        else:
+            self._bests.pop(puzzle_type, None)
+
+    def check(self, session, solve):
+        """Get the PersonalBests that solve sets as the next solve of session.
+
+        Must be called before the solve is added to the session.
+        """
+        bests = self.bests(session.puzzle_type)
+        solves = [solve] + session.times[: LARGEST_WINDOW - 1]
+        found = []
+        for stat, size in PB_STATS.items():
+            if len(solves) < size:
+                break
+            value = window_stat(stat, solves)
+            best = bests[stat]
+            if value != float("inf") and (best is None or value < best):
+                bests[stat] = value
+                found.append(
+                    PersonalBest(
+                        session.puzzle_type,
+                        stat,
+                        value,
+                        best,
+                        solve.timestamp.timestamp(),
+                        session.session_id,
+                    )
+                )
+        if found:
+            self.history.extend(found)
+            self.history_dirty = True
+        return found
+
+    def timeline(self, puzzle_type=None, stat=None):
+        """Get the personal bests set, oldest first, optionally filtered."""
+        return [
+            pb
+            for pb in self.history
+            if (puzzle_type is None or pb.puzzle_type == puzzle_type)
+            and (stat is None or pb.stat == stat)
+        ]
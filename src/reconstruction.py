@@ -0,0 +1,195 @@
+"""
+Move-by-move solve reconstructions for PSTimer.
+"""
+
+import base64
+import bisect
+
+# A move is stored as one byte: face/rotation index * 3 + modifier index
+FACES = "UDFBLRxyz"
+MODIFIERS = ("", "'", "2")
+MOVES = tuple(face + modifier for face in FACES for modifier in MODIFIERS)
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+
+# Moves between stored states in a ReconstructionPlayer
+CHECKPOINT_INTERVAL = 16
+
+
+class ReconstructionError(ValueError):
+    """Raised for moves or data that cannot be stored as a reconstruction."""
+
+
+def encode_varints(values):
+    """Encode non-negative integers as LEB128 varints (7 bits per byte)."""
+    data = bytearray()
+    for value in values:
+        while value >= 0x80:
+            data.append((value & 0x7F) | 0x80)
+            value >>= 7
+        data.append(value)
+    return bytes(data)
+
+
+def decode_varints(data):
+    """Decode LEB128 varints written by encode_varints()."""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    if shift:
+        raise ReconstructionError("Truncated timestamp data")
+    return values
+
+
+class Reconstruction:
+    """The moves of a solve with the time of each, stored compactly.
+
+    Moves are one byte each (see MOVES) and times are milliseconds since
+    the start of the solve, stored as the gaps between moves in varints,
+    so a typical move costs two or three bytes. Moves are the outer
+    turns and rotations the cube simulator knows (U D F B L R x y z with
+    ', 2 or nothing).
+    """
+
+    def __init__(self, codes=b"", deltas=b""):
+        self.codes = bytearray(codes)
+        self.deltas = bytearray(deltas)
+        self._last_ms = None  # Time of the last move, known once decoded
+        if len(decode_varints(self.deltas)) != len(self.codes):
+            raise ReconstructionError("Moves and timestamps do not match")
+
+    @classmethod
+    def from_moves(cls, moves, times_ms=None, duration_ms=None):
+        """Build from move tokens (or a string) and their times in ms.
+
+        Without times, the moves are spread evenly over duration_ms (or
+        given no time at all), as for a reconstruction typed in by hand.
+        """
+        if isinstance(moves, str):
+            moves = moves.split()
+        if times_ms is None:
+            step = duration_ms / len(moves) if duration_ms and moves else 0
+            times_ms = [round(step * (i + 1)) for i in range(len(moves))]
+        if len(times_ms) != len(moves):
+            raise ReconstructionError("Every move needs a time")
+        reconstruction = cls()
+        for move, ms in zip(moves, times_ms):
+            reconstruction.append(move, ms)
+        return reconstruction
+
+    def append(self, move, ms):
+        """Add a move made ms milliseconds into the solve."""
+        code = MOVE_CODES.get(move)
+        if code is None:
+            raise ReconstructionError(f"Unknown move: {move!r}")
+        last = self.duration_ms if self.codes else 0
+        if ms < last:
+            raise ReconstructionError("Move times must not go backwards")
+        self.codes.append(code)
+        self.deltas += encode_varints([int(ms) - last])
+        self._last_ms = int(ms)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def moves(self):
+        """Get the move tokens."""
+        return [MOVES[code] for code in self.codes]
+
+    def times_ms(self):
+        """Get each move's time in ms since the start of the solve."""
+        times = []
+        total = 0
+        for delta in decode_varints(self.deltas):
+            total += delta
+            times.append(total)
+        self._last_ms = total
+        return times
+
+    @property
+    def duration_ms(self):
+        """Get the time of the last move."""
+        if self._last_ms is None:
+            self.times_ms()
+        return self._last_ms
+
+    def text(self):
+        """Get the moves as a space-separated string."""
+        return " ".join(self.moves())
+
+    def to_dict(self):
+        """Convert to JSON-friendly data (base64 of the two byte arrays)."""
+        return {
+            "moves": base64.b64encode(self.codes).decode("ascii"),
+            "ms": base64.b64encode(self.deltas).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a reconstruction saved with to_dict()."""
+        try:
+            codes = base64.b64decode(data["moves"])
+            deltas = base64.b64decode(data["ms"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ReconstructionError(f"Invalid reconstruction: {e}") from e
+        if any(code >= len(MOVES) for code in codes):
+            raise ReconstructionError("Invalid move code")
+        return cls(codes, deltas)
+
+
+class ReconstructionPlayer:
+    """Cube states along a reconstruction, for seeking and playback.
+
+    Building the player applies every move once from the scrambled state
+    and keeps the facelets at every interval-th move. state_at() starts
+    from the nearest checkpoint at or before the position, so a seek
+    applies fewer than interval moves however long the solve is.
+    """
+
+    def __init__(self, reconstruction, scramble="", interval=CHECKPOINT_INTERVAL):
+        from .cube_state import (
+            apply_permutation,
+            move_permutation,
+            scramble_state,
+        )
+
+        self.reconstruction = reconstruction
+        self.interval = interval
+        self.times_ms = reconstruction.times_ms()
+        self._permutations = [move_permutation(move) for move in reconstruction.moves()]
+        self.checkpoints = []  # Facelets after every interval-th move
+        facelets = scramble_state(scramble or "")
+        for position, permutation in enumerate(self._permutations):
+            if position % interval == 0:
+                self.checkpoints.append(facelets)
+            facelets = apply_permutation(facelets, permutation)
+        if len(self._permutations) % interval == 0:
+            self.checkpoints.append(facelets)
+
+    def __len__(self):
+        return len(self._permutations)
+
+    def state_at(self, position):
+        """Get the facelets after the first position moves."""
+        from .cube_state import apply_permutation
+
+        position = min(max(position, 0), len(self._permutations))
+        checkpoint, remainder = divmod(position, self.interval)
+        facelets = self.checkpoints[checkpoint]
+        start = checkpoint * self.interval
+        for permutation in self._permutations[start : start + remainder]:
+            facelets = apply_permutation(facelets, permutation)
+        return facelets
+
+    def position_at(self, ms):
+        """Get how many moves have been made ms into the solve."""
+        return bisect.bisect_right(self.times_ms, ms)
+
+    def state_at_ms(self, ms):
+        """Get the facelets ms milliseconds into the solve."""
+        return self.state_at(self.position_at(ms))
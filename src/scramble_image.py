@@ -0,0 +1,543 @@
+"""
+Headless scramble images (SVG and PNG) for PSTimer.
+
+Each drawable puzzle is a PuzzleModel: its stickers as points in 3D, for
+deriving moves, and as polygons on a flat net, for drawing. A move is a
+rotation of the stickers on one side of a plane, turned into a sticker
+permutation once and reused, so a scrambled state is a few C-level
+lookups per move and an image is a string join (or a scanline fill for
+PNG). The 3x3x3 is turned by the compiled moves of cube_state instead,
+so its images show the same state as the cube view. Images are cached
+by puzzle and packed state key, in memory and optionally on disk, so
+scrambles that reach the same state share one image.
+"""
+
+import hashlib
+import math
+import os
+import re
+import struct
+import zlib
+from operator import itemgetter
+from xml.sax.saxutils import escape
+
+from .cache import LRUCache
+from .cube_state import apply_permutation, compile_scramble, is_move, pack_state
+
+IMAGE_CACHE_SIZE = 2048
+FACE_PX = 60  # Width of one cube face on the net
+GAP_PX = 4  # Space between faces on the net
+STICKER_INSET = 0.84  # Sticker size relative to its cell; the rest is border
+BORDER_COLOR = "#000000"
+NET_SIZE = (4 * FACE_PX + 5 * GAP_PX, 3 * FACE_PX + 4 * GAP_PX)  # Cube nets
+
+# Same palette as the window's cube view
+CUBE_COLORS = ("#ffffff", "#ffff00", "#00ff00", "#0000ff", "#ff8c00", "#ff0000")
+PYRAMINX_COLORS = ("#00ff00", "#ff0000", "#0000ff", "#ffff00")
+
+# Cube faces in FACE_ORDER: name, outward normal, net right and up
+# directions, and (column, row) on the net:   U
+#                                            L F R B
+#                                              D
+CUBE_FACES = (
+    ("U", (0, 1, 0), (1, 0, 0), (0, 0, -1), (1, 0)),
+    ("D", (0, -1, 0), (1, 0, 0), (0, 0, 1), (1, 2)),
+    ("F", (0, 0, 1), (1, 0, 0), (0, 1, 0), (1, 1)),
+    ("B", (0, 0, -1), (-1, 0, 0), (0, 1, 0), (3, 1)),
+    ("L", (-1, 0, 0), (0, 0, 1), (0, 1, 0), (0, 1)),
+    ("R", (1, 0, 0), (0, 0, -1), (0, 1, 0), (2, 1)),
+)
+CUBE_AXES = {name: normal for name, normal, _, _, _ in CUBE_FACES}
+ROTATION_AXES = {"x": CUBE_AXES["R"], "y": CUBE_AXES["U"], "z": CUBE_AXES["F"]}
+
+# Skewb corners as in WCA notation: R = DRB, U = ULB, L = DLF, B = DLB
+SKEWB_AXES = {"R": (1, -1, -1), "U": (-1, 1, -1), "L": (-1, -1, 1), "B": (-1, -1, -1)}
+
+# Pyraminx vertices at alternate corners of a cube; faces opposite B, R,
+# L and U are F, L, R and D, listed with their net corners (in units of
+# the triangle side, unit height)
+PYRAMINX_VERTICES = {
+    "U": (1, 1, 1),
+    "L": (-1, -1, 1),
+    "R": (1, -1, -1),
+    "B": (-1, 1, -1),
+}
+PYRAMINX_FACES = (
+    ("F", "ULR", ((1, 0), (0.5, 1), (1.5, 1))),
+    ("L", "ULB", ((1, 0), (0.5, 1), (0, 0))),
+    ("R", "URB", ((1, 0), (1.5, 1), (2, 0))),
+    ("D", "LRB", ((0.5, 1), (1.5, 1), (1, 2))),
+)
+
+CUBE_MOVE = re.compile(r"^(\d*)([UDFBLR])(w?)(2'|2|'|)$")
+ROTATION_MOVE = re.compile(r"^([xyz])(2'|2|'|)$")
+CORNER_MOVE = re.compile(r"^([A-Za-z])('?)$")
+QUARTER_TURNS = {"": -90, "'": 90, "2": 180, "2'": 180}
+
+
+class ScrambleImageError(ValueError):
+    """Raised for a move a puzzle's image cannot show."""
+
+
+def rotate(point, axis, degrees):
+    """Rotate an integer point about an axis, rounding back to integers."""
+    length = math.sqrt(sum(c * c for c in axis))
+    kx, ky, kz = (c / length for c in axis)
+    x, y, z = point
+    angle = math.radians(degrees)
+    cos, sin = math.cos(angle), math.sin(angle)
+    dot = (kx * x + ky * y + kz * z) * (1 - cos)
+    return (
+        round(x * cos + (ky * z - kz * y) * sin + kx * dot),
+        round(y * cos + (kz * x - kx * z) * sin + ky * dot),
+        round(z * cos + (kx * y - ky * x) * sin + kz * dot),
+    )
+
+
+def inset(polygon, factor=STICKER_INSET):
+    """Shrink a polygon toward its centroid."""
+    cx = sum(x for x, _ in polygon) / len(polygon)
+    cy = sum(y for _, y in polygon) / len(polygon)
+    return tuple((cx + (x - cx) * factor, cy + (y - cy) * factor) for x, y in polygon)
+
+
+class PuzzleModel:
+    """A puzzle's stickers, net drawing and moves.
+
+    points are integer 3D sticker positions (used only to derive moves),
+    faces the face index of each sticker when solved, polygons each
+    sticker's outline on the net and outlines the faces' backgrounds.
+    parse_move(token) returns (axis, degrees, threshold): the move turns
+    every sticker whose dot product with axis exceeds threshold.
+    """
+
+    def __init__(self, name, colors, points, faces, polygons, outlines, size, parse):
+        self.name = name
+        self.colors = colors
+        self.points = points
+        self.solved = bytes(faces)
+        self.polygons = [inset(polygon) for polygon in polygons]
+        self.outlines = list(outlines)
+        self.width, self.height = size
+        self._parse = parse
+        self._index = {point: index for index, point in enumerate(points)}
+        self._moves = {}
+        self._png_spans = {}  # scale -> (width, height, spans per shape)
+        self._svg_stickers = [
+            f'<polygon points="{svg_points(polygon)}" fill="'
+            for polygon in self.polygons
+        ]
+        self._svg_head = "".join(
+            [
+                f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" '
+                f'height="{self.height}" viewBox="0 0 {self.width} {self.height}">'
+            ]
+            + [
+                f'<polygon points="{svg_points(outline)}" fill="{BORDER_COLOR}"/>'
+                for outline in outlines
+            ]
+        )
+
+    def move(self, token):
+        """Get a getter that applies a move to a state tuple."""
+        getter = self._moves.get(token)
+        if getter is None:
+            spec = self._parse(token)
+            if spec is None:
+                raise ScrambleImageError(f"{self.name} has no move {token!r}")
+            axis, degrees, threshold = spec
+            permutation = list(range(len(self.points)))
+            for index, point in enumerate(self.points):
+                if sum(p * a for p, a in zip(point, axis)) > threshold:
+                    permutation[self._index[rotate(point, axis, degrees)]] = index
+            getter = itemgetter(*permutation)
+            self._moves[token] = getter
+        return getter
+
+    def state(self, scramble):
+        """Get the face index shown by each sticker after a scramble."""
+        state = tuple(self.solved)
+        for token in scramble.split():
+            state = self.move(token)(state)
+        return bytes(state)
+
+    def state_key(self, state):
+        """Get the compact cache key of a state."""
+        return pack_state(state)
+
+    def svg(self, state):
+        """Draw a state as an SVG document."""
+        colors = self.colors
+        parts = [self._svg_head]
+        for prefix, face in zip(self._svg_stickers, state):
+            parts.append(f'{prefix}{colors[face]}"/>')
+        parts.append("</svg>")
+        return "".join(parts)
+
+    def png(self, state, scale=1):
+        """Draw a state as PNG bytes, scale pixels per SVG unit.
+
+        The pixel spans of every outline and sticker are worked out once
+        per scale, so drawing a state only paints them.
+        """
+        size = self._png_spans.get(scale)
+        if size is None:
+            width = max(1, round(self.width * scale))
+            height = max(1, round(self.height * scale))
+            spans = [
+                polygon_spans(polygon, scale, width, height)
+                for polygon in self.outlines + self.polygons
+            ]
+            size = self._png_spans[scale] = (width, height, spans)
+        width, height, spans = size
+        colors = [BORDER_COLOR] * len(self.outlines)
+        colors += [self.colors[face] for face in state]
+        return fill_png(width, height, spans, colors)
+
+
+class CubeStateModel(PuzzleModel):
+    """The 3x3x3, turned by cube_state's compiled scrambles.
+
+    Its stickers are in CubeSimulator's facelet order and its face indexes
+    are the state key's color codes, so states and keys match the cube
+    view's.
+    """
+
+    def state(self, scramble):
+        """Get the face index shown by each sticker after a scramble."""
+        for token in scramble.split():
+            if not is_move(token):
+                raise ScrambleImageError(f"{self.name} has no move {token!r}")
+        return bytes(apply_permutation(self.solved, compile_scramble(scramble)))
+
+
+def svg_points(polygon):
+    """Format polygon points for an SVG points attribute."""
+    return " ".join(f"{x:g},{y:g}" for x, y in polygon)
+
+
+def cube_like_model(name, half, stickers, parse, model_class=PuzzleModel):
+    """Build a model whose faces are squares laid out as a cube net.
+
+    stickers lists (polygon, point) in face coordinates from -half to
+    half, right and up; they are placed on each of the six faces.
+    """
+    points, faces, polygons, outlines = [], [], [], []
+    scale = FACE_PX / (2 * half)
+    for face, (_, normal, right, up, (column, row)) in enumerate(CUBE_FACES):
+        left = GAP_PX + column * (FACE_PX + GAP_PX)
+        top = GAP_PX + row * (FACE_PX + GAP_PX)
+        outlines.append(
+            (
+                (left, top),
+                (left + FACE_PX, top),
+                (left + FACE_PX, top + FACE_PX),
+                (left, top + FACE_PX),
+            )
+        )
+        for polygon, (u, v) in stickers:
+            points.append(
+                tuple(half * n + u * r + v * w for n, r, w in zip(normal, right, up))
+            )
+            faces.append(face)
+            polygons.append(
+                tuple(
+                    (left + (x + half) * scale, top + (half - y) * scale)
+                    for x, y in polygon
+                )
+            )
+    return model_class(
+        name, CUBE_COLORS, points, faces, polygons, outlines, NET_SIZE, parse
+    )
+
+
+def cube_model(n):
+    """Model an NxNxN cube, with outer, wide ("Rw", "3Rw") and x/y/z moves."""
+    stickers = []
+    for v in range(n - 1, -n, -2):
+        for u in range(1 - n, n, 2):
+            square = ((u - 1, v + 1), (u + 1, v + 1), (u + 1, v - 1), (u - 1, v - 1))
+            stickers.append((square, (u, v)))
+
+    def parse(token):
+        match = CUBE_MOVE.match(token)
+        if match:
+            count, face, wide, turn = match.groups()
+            depth = int(count) if count else 2 if wide else 1
+            if count and not wide or not 1 <= depth <= n:
+                return None
+            return CUBE_AXES[face], QUARTER_TURNS[turn], n - 2 * depth
+        match = ROTATION_MOVE.match(token)
+        if match:
+            axis, turn = match.groups()
+            return ROTATION_AXES[axis], QUARTER_TURNS[turn], -n - 1
+        return None
+
+    model_class = CubeStateModel if n == 3 else PuzzleModel
+    return cube_like_model(f"{n}x{n}x{n}", n, stickers, parse, model_class)
+
+
+def skewb_model():
+    """Model a Skewb: a center and four corners on each face."""
+    stickers = [(((3, 0), (0, 3), (-3, 0), (0, -3)), (0, 0))]
+    for su, sv in ((-1, 1), (1, 1), (1, -1), (-1, -1)):
+        triangle = ((3 * su, 3 * sv), (0, 3 * sv), (3 * su, 0))
+        stickers.append((triangle, (2 * su, 2 * sv)))
+
+    def parse(token):
+        match = CORNER_MOVE.match(token)
+        if not match or match.group(1) not in SKEWB_AXES:
+            return None
+        return SKEWB_AXES[match.group(1)], 120 if match.group(2) else -120, 0
+
+    return cube_like_model("Skewb", 3, stickers, parse)
+
+
+def pyraminx_model():
+    """Model a Pyraminx: nine triangles per face, tips and two-layer turns."""
+    side = 2 * FACE_PX
+    height = side * math.sqrt(3) / 2
+    points, faces, polygons, outlines = [], [], [], []
+    # Barycentric thirds of each face: upward triangles, then downward
+    triangles = []
+    for i in range(3):
+        for j in range(3 - i):
+            k = 2 - i - j
+            triangles.append(((i + 1, j, k), (i, j + 1, k), (i, j, k + 1)))
+    for i in range(2):
+        for j in range(2 - i):
+            k = 1 - i - j
+            triangles.append(((i, j + 1, k + 1), (i + 1, j, k + 1), (i + 1, j + 1, k)))
+
+    for face, (_, corners, net) in enumerate(PYRAMINX_FACES):
+        vertices = [PYRAMINX_VERTICES[corner] for corner in corners]
+        net = [(GAP_PX + x * side / 2, GAP_PX + y * height) for x, y in net]
+        outlines.append(tuple(net))
+        for triangle in triangles:
+            weights = [sum(corner[c] for corner in triangle) for c in range(3)]
+            # Centroid times 9, so every point is whole
+            points.append(
+                tuple(
+                    sum(w * vertex[axis] for w, vertex in zip(weights, vertices))
+                    for axis in range(3)
+                )
+            )
+            faces.append(face)
+            polygons.append(
+                tuple(
+                    (
+                        sum(b * x for b, (x, _) in zip(corner, net)) / 3,
+                        sum(b * y for b, (_, y) in zip(corner, net)) / 3,
+                    )
+                    for corner in triangle
+                )
+            )
+
+    def parse(token):
+        match = CORNER_MOVE.match(token)
+        if not match or match.group(1).upper() not in PYRAMINX_VERTICES:
+            return None
+        corner, prime = match.groups()
+        # Heights along a vertex run from -9 (opposite face) to 27 (tip),
+        # both scaled by 9; the cuts are at a third and two thirds
+        threshold = 15 if corner.islower() else 3
+        return PYRAMINX_VERTICES[corner.upper()], 120 if prime else -120, threshold
+
+    size = (round(side + 2 * GAP_PX), round(2 * height + 2 * GAP_PX))
+    return PuzzleModel(
+        "Pyraminx", PYRAMINX_COLORS, points, faces, polygons, outlines, size, parse
+    )
+
+
+MODEL_BUILDERS = {
+    "2x2x2": lambda: cube_model(2),
+    "3x3x3": lambda: cube_model(3),
+    "4x4x4": lambda: cube_model(4),
+    "5x5x5": lambda: cube_model(5),
+    "Pyraminx": pyraminx_model,
+    "Skewb": skewb_model,
+}
+_models = {}
+
+
+def puzzle_model(puzzle_type):
+    """Get the model for a puzzle type, or None if it has no state image."""
+    model = _models.get(puzzle_type)
+    if model is None and puzzle_type in MODEL_BUILDERS:
+        model = _models[puzzle_type] = MODEL_BUILDERS[puzzle_type]()
+    return model
+
+
+def placeholder_svg(puzzle_type):
+    """An image that says the puzzle has no state diagram."""
+    width, height = NET_SIZE
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+        f'height="{height}" viewBox="0 0 {width} {height}">'
+        f'<rect x="1" y="1" width="{width - 2}" height="{height - 2}" '
+        'fill="#f4f4f4" stroke="#999999" stroke-dasharray="6 4"/>'
+        f'<text x="{width / 2:g}" y="{height / 2:g}" text-anchor="middle" '
+        f'font-family="sans-serif" font-size="14" fill="#666666">'
+        f"{escape(puzzle_type)}: no diagram</text></svg>"
+    )
+
+
+def placeholder_png(scale=1):
+    """A blank PNG the size of a placeholder image."""
+    width, height = NET_SIZE
+    box = ((1, 1), (width - 1, 1), (width - 1, height - 1), (1, height - 1))
+    return rasterize(width, height, [(box, "#f4f4f4")], scale, "#999999")
+
+
+def polygon_spans(polygon, scale, width, height):
+    """Get the (row, start, end) pixel spans that fill a convex polygon."""
+    points = [(x * scale, y * scale) for x, y in polygon]
+    edges = list(zip(points, points[1:] + points[:1]))
+    top = max(0, math.ceil(min(y for _, y in points) - 0.5))
+    bottom = min(height - 1, math.floor(max(y for _, y in points) - 0.5))
+    spans = []
+    for row in range(top, bottom + 1):
+        y = row + 0.5  # Sample at pixel centers
+        crossings = [
+            x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+            for (x1, y1), (x2, y2) in edges
+            if (y1 <= y < y2) or (y2 <= y < y1)
+        ]
+        if len(crossings) < 2:
+            continue
+        start = max(0, math.ceil(min(crossings) - 0.5))
+        end = min(width, math.floor(max(crossings) - 0.5) + 1)
+        if end > start:
+            spans.append((row, start * 3, end * 3))
+    return spans
+
+
+def rasterize(width, height, shapes, scale=1, background="#ffffff"):
+    """Fill convex polygons (with "#rrggbb" colors) into PNG bytes."""
+    width = max(1, round(width * scale))
+    height = max(1, round(height * scale))
+    spans = [polygon_spans(polygon, scale, width, height) for polygon, _ in shapes]
+    return fill_png(width, height, spans, [color for _, color in shapes], background)
+
+
+def fill_png(width, height, spans, colors, background="#ffffff"):
+    """Encode a PNG of shapes given as pixel spans, painted in order."""
+    rows = [bytearray(bytes.fromhex(background[1:]) * width) for _ in range(height)]
+    pixels = {}
+    for shape, color in zip(spans, colors):
+        rgb = pixels.get(color)
+        if rgb is None:
+            rgb = pixels[color] = bytes.fromhex(color[1:])
+        for row, start, end in shape:
+            rows[row][start:end] = rgb * ((end - start) // 3)
+    raw = b"".join(b"\x00" + bytes(row) for row in rows)
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+            png_chunk(b"IDAT", zlib.compress(raw, 6)),
+            png_chunk(b"IEND", b""),
+        ]
+    )
+
+
+def png_chunk(kind, data):
+    """Frame one PNG chunk with its length and CRC."""
+    crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+
+def default_cache_dir():
+    """Get the image cache directory inside the data directory."""
+    from .storage import default_data_dir
+
+    return os.path.join(default_data_dir(), "cache", "images")
+
+
+class ScrambleRenderer:
+    """Renders scramble images through an LRU and an optional disk cache.
+
+    Images are keyed by puzzle, format and the scrambled state's packed
+    key, not the scramble text, so different scrambles that reach the same
+    state (and the same scramble asked for again) are drawn once. With
+    cache_dir, images are also kept as files named by a hash of that key,
+    so they survive restarts.
+    """
+
+    def __init__(self, cache_dir=None, memory_size=IMAGE_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.cache = LRUCache(memory_size)
+        self.rendered = 0  # Images drawn rather than found in a cache
+
+    def svg(self, puzzle_type, scramble):
+        """Get an SVG document of the puzzle after the scramble."""
+        return self._image(puzzle_type, scramble, "svg", 1).decode("utf-8")
+
+    def png(self, puzzle_type, scramble, scale=1):
+        """Get PNG bytes of the puzzle after the scramble."""
+        return self._image(puzzle_type, scramble, "png", scale)
+
+    def render_many(self, puzzle_type, scrambles, fmt="svg", scale=1):
+        """Render a batch, e.g. every scramble of a competition round."""
+        if fmt == "svg":
+            return [self.svg(puzzle_type, scramble) for scramble in scrambles]
+        if fmt == "png":
+            return [self.png(puzzle_type, scramble, scale) for scramble in scrambles]
+        raise ValueError(f"Unknown image format: {fmt!r}")
+
+    def _image(self, puzzle_type, scramble, fmt, scale):
+        """Look up or draw an image as bytes."""
+        model = puzzle_model(puzzle_type)
+        state = model.state(scramble) if model is not None else b""
+        key = (puzzle_type, fmt, scale, model.state_key(state) if model else b"")
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+        path = self._path(key)
+        image = self._read(path)
+        if image is None:
+            image = self._draw(model, puzzle_type, state, fmt, scale)
+            self.rendered += 1
+            self._write(path, image)
+        self.cache.put(key, image)
+        return image
+
+    @staticmethod
+    def _draw(model, puzzle_type, state, fmt, scale):
+        """Draw an image that is in no cache."""
+        if fmt == "svg":
+            svg = model.svg(state) if model else placeholder_svg(puzzle_type)
+            return svg.encode("utf-8")
+        return model.png(state, scale) if model else placeholder_png(scale)
+
+    def _path(self, key):
+        """Get the disk cache file for a key, or None without a disk cache."""
+        if self.cache_dir is None:
+            return None
+        puzzle_type, fmt, scale, state_key = key
+        digest = hashlib.sha1(f"{puzzle_type}|{scale}|".encode() + state_key)
+        return os.path.join(self.cache_dir, f"{digest.hexdigest()}.{fmt}")
+
+    @staticmethod
+    def _read(path):
+        """Read a cached image file, or None."""
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, path, image):
+        """Atomically write an image file; the cache is best effort."""
+        if path is None:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
@@ -0,0 +1,233 @@
+"""
+Printable competition scramble sheets for PSTimer.
+
+A packet has one page per group of every round of each event: the
+numbered attempt scrambles, then the extras, each beside a diagram of
+the scrambled puzzle. Groups are generated in parallel worker processes.
+The packet is a single HTML file (print it to PDF from a browser); the
+sticker geometry of each puzzle is written once in a shared SVG <defs>
+section, and every diagram only references it with a color per sticker.
+
+The events are the WCA events ScrambleManager has a generator for; 6x6x6,
+7x7x7 and Clock have none yet.
+"""
+
+import os
+import re
+import string
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from .scramble import ScrambleManager
+from .scramble_image import (
+    BORDER_COLOR,
+    NET_SIZE,
+    placeholder_svg,
+    puzzle_model,
+    svg_points,
+)
+
+Event = namedtuple("Event", ["id", "name", "puzzle_type", "attempts", "extras"])
+
+# WCA events with their scrambles per group
+EVENTS = (
+    Event("333", "3x3x3 Cube", "3x3x3", 5, 2),
+    Event("222", "2x2x2 Cube", "2x2x2", 5, 2),
+    Event("444", "4x4x4 Cube", "4x4x4", 5, 2),
+    Event("555", "5x5x5 Cube", "5x5x5", 5, 2),
+    Event("333bf", "3x3x3 Blindfolded", "3x3x3", 3, 2),
+    Event("333fm", "3x3x3 Fewest Moves", "3x3x3", 3, 1),
+    Event("333oh", "3x3x3 One-Handed", "3x3x3", 5, 2),
+    Event("minx", "Megaminx", "Megaminx", 5, 2),
+    Event("pyram", "Pyraminx", "Pyraminx", 5, 2),
+    Event("skewb", "Skewb", "Skewb", 5, 2),
+    Event("sq1", "Square-1", "Square-1", 5, 2),
+    Event("444bf", "4x4x4 Blindfolded", "4x4x4", 3, 2),
+    Event("555bf", "5x5x5 Blindfolded", "5x5x5", 3, 2),
+    Event("333mbf", "3x3x3 Multi-Blind", "3x3x3", 35, 0),  # Cubes per attempt
+)
+EVENTS_BY_ID = {event.id: event for event in EVENTS}
+
+SHEET_STYLE = """
+@page { size: A4; margin: 12mm; }
+body { font-family: sans-serif; margin: 0; }
+.sheet { break-after: page; }
+.sheet:last-child { break-after: auto; }
+h1 { font-size: 14pt; margin: 0; }
+h2 { font-size: 12pt; margin: 2pt 0 8pt; font-weight: normal; }
+table { border-collapse: collapse; width: 100%; }
+td { border: 1px solid #999999; padding: 3pt; vertical-align: middle; }
+td.number { width: 8mm; text-align: center; font-weight: bold; }
+td.scramble { font-family: monospace; font-size: 11pt; }
+td.diagram { width: 45mm; }
+td.diagram svg { width: 45mm; height: auto; display: block; }
+tr.extras td { border: 0; padding-top: 8pt; font-style: italic; }
+"""
+
+
+class SheetError(ValueError):
+    """Raised for an event spec the sheet generator cannot use."""
+
+
+def parse_event_spec(spec, rounds=1, groups=1):
+    """Parse "EVENT[:ROUNDS[:GROUPS]]" into (event, rounds, groups)."""
+    event_id, *counts = spec.split(":")
+    event = EVENTS_BY_ID.get(event_id)
+    if event is None:
+        known = ", ".join(EVENTS_BY_ID)
+        raise SheetError(f"Unknown event {event_id!r} (known: {known})")
+    try:
+        counts = [int(count) for count in counts]
+    except ValueError:
+        raise SheetError(f"Expected EVENT[:ROUNDS[:GROUPS]]: {spec!r}") from None
+    if len(counts) > 2 or any(count < 1 for count in counts):
+        raise SheetError(f"Expected EVENT[:ROUNDS[:GROUPS]]: {spec!r}")
+    counts += [rounds, groups][len(counts) :]
+    return event, counts[0], counts[1]
+
+
+def group_name(index):
+    """Name a group by letter: A to Z, then AA, AB, ..."""
+    letters = string.ascii_uppercase
+    name = letters[index % 26]
+    while index >= 26:
+        index = index // 26 - 1
+        name = letters[index % 26] + name
+    return name
+
+
+def def_id(puzzle_type):
+    """Get the id prefix of a puzzle's shared SVG definitions."""
+    return "p" + re.sub(r"\W", "", puzzle_type).lower()
+
+
+def svg_defs(puzzle_types):
+    """Get the hidden SVG holding every sticker and outline, once per puzzle."""
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" width="0" height="0" '
+        'style="position:absolute"><defs>'
+    ]
+    for puzzle_type in puzzle_types:
+        prefix = def_id(puzzle_type)
+        model = puzzle_model(puzzle_type)
+        if model is None:
+            parts.append(f'<g id="{prefix}">{placeholder_svg(puzzle_type)}</g>')
+            continue
+        parts.append(f'<g id="{prefix}-bg" fill="{BORDER_COLOR}">')
+        parts += [
+            f'<polygon points="{svg_points(outline)}"/>' for outline in model.outlines
+        ]
+        parts.append("</g>")
+        parts += [
+            f'<polygon id="{prefix}-{index}" points="{svg_points(polygon)}"/>'
+            for index, polygon in enumerate(model.polygons)
+        ]
+    parts.append("</defs></svg>")
+    return "".join(parts)
+
+
+def diagram(puzzle_type, scramble):
+    """Draw a scramble's state as references into the shared definitions.
+
+    Stickers are grouped by color, so each sticker costs one <use>.
+    """
+    prefix = def_id(puzzle_type)
+    model = puzzle_model(puzzle_type)
+    if model is None:
+        width, height = NET_SIZE
+        return f'<svg viewBox="0 0 {width} {height}"><use href="#{prefix}"/></svg>'
+    by_color = {}
+    for index, face in enumerate(model.state(scramble)):
+        by_color.setdefault(face, []).append(f'<use href="#{prefix}-{index}"/>')
+    parts = [
+        f'<svg viewBox="0 0 {model.width} {model.height}">'
+        f'<use href="#{prefix}-bg"/>'
+    ]
+    for face, uses in sorted(by_color.items()):
+        parts.append(f'<g fill="{model.colors[face]}">{"".join(uses)}</g>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def group_rows(event, scrambles):
+    """Get the table rows of one group: attempts, then extras."""
+    rows = []
+    for index, scramble in enumerate(scrambles):
+        if index < event.attempts:
+            number = str(index + 1)
+        else:
+            number = f"E{index - event.attempts + 1}"
+            if index == event.attempts:
+                rows.append('<tr class="extras"><td colspan="3">Extras</td></tr>')
+        rows.append(
+            f'<tr><td class="number">{number}</td>'
+            f'<td class="scramble">{escape(scramble)}</td>'
+            f'<td class="diagram">{diagram(event.puzzle_type, scramble)}</td></tr>'
+        )
+    return "".join(rows)
+
+
+def generate_group(task):
+    """Generate one group's scrambles and table rows.
+
+    task is (event id, round, group); runs in a worker process.
+    """
+    event = EVENTS_BY_ID[task[0]]
+    generator = ScrambleManager(event.puzzle_type).generator
+    scrambles = [generator.generate() for _ in range(event.attempts + event.extras)]
+    return scrambles, group_rows(event, scrambles)
+
+
+def generate_packet(schedule, workers=None):
+    """Generate every group of a schedule of (event, rounds, groups).
+
+    Returns (event, round, group index, scrambles, rows) per group in
+    schedule order. Groups are spread over workers processes (default:
+    one per CPU); workers=1 generates them in this process.
+    """
+    tasks = [
+        (event.id, round_number, group)
+        for event, rounds, groups in schedule
+        for round_number in range(1, rounds + 1)
+        for group in range(groups)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        results = [generate_group(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            results = list(executor.map(generate_group, tasks, chunksize=chunksize))
+    return [
+        (EVENTS_BY_ID[event_id], round_number, group, scrambles, rows)
+        for (event_id, round_number, group), (scrambles, rows) in zip(tasks, results)
+    ]
+
+
+def packet_html(title, groups):
+    """Lay out generated groups as a printable HTML document."""
+    puzzle_types = list(dict.fromkeys(event.puzzle_type for event, *_ in groups))
+    title = escape(title)
+    parts = [
+        "<!DOCTYPE html>",
+        f'<html><head><meta charset="utf-8"><title>{title}</title>',
+        f"<style>{SHEET_STYLE}</style></head><body>",
+        svg_defs(puzzle_types),
+    ]
+    for event, round_number, group, _, rows in groups:
+        parts.append(
+            f'<section class="sheet"><h1>{title}</h1>'
+            f"<h2>{escape(event.name)} &#8212; Round {round_number} &#8212; "
+            f"Group {group_name(group)}</h2><table>{rows}</table></section>"
+        )
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def write_packet(path, title, schedule, workers=None):
+    """Generate a packet and write it as HTML; returns the generated groups."""
+    groups = generate_packet(schedule, workers)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(packet_html(title, groups))
+    return groups
@@ -0,0 +1,487 @@
+"""
+Local HTTP/WebSocket server for PSTimer remote displays.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+
+from .formatting import default_formatter
+from .scramble_image import ScrambleImageError, ScrambleRenderer, placeholder_svg
+from .statistics import SolveTime, StatisticsCalculator
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_REQUEST_BYTES = 16 * 1024
+MAX_FRAME_BYTES = 64 * 1024
+
+OVERLAY_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>PSTimer</title>
+<style>
+body { background: transparent; color: #fff; font-family: sans-serif;
+       text-shadow: 0 0 4px #000; }
+#time { font-size: 96px; font-weight: bold; }
+#scramble, #stats { font-size: 24px; }
+</style></head>
+<body><div id="scramble"></div><div id="time">0.00</div><div id="stats"></div>
+<script>
+const $ = (id) => document.getElementById(id);
+const ws = new WebSocket(`ws://${location.host}/ws`);
+ws.onmessage = (msg) => {
+  const event = JSON.parse(msg.data);
+  if (event.type === "scramble" || event.type === "snapshot") {
+    $("scramble").textContent = event.scramble || "";
+  }
+  if (event.type === "solve") $("time").textContent = event.text;
+  const stats = event.type === "stats" ? event : event.stats;
+  if (stats) {
+    $("stats").textContent = ["ao5", "ao12"].map(
+      (k) => `${k}: ${stats.text[k]}`).join("  ");
+  }
+};
+</script></body></html>
+"""
+
+
+def stats_payload(stats):
+    """Convert a statistics dict into JSON-friendly seconds and display text."""
+    seconds = {}
+    text = {}
+    for key, value in stats.items():
+        if key == "count":
+            continue
+        if isinstance(value, SolveTime):
+            text[key] = default_formatter.format_solve(value)
+            value = value.display_time
+        else:
+            text[key] = default_formatter.format(value)
+        seconds[key] = None if value is None or value == float("inf") else value
+    return {"count": stats.get("count", 0), "seconds": seconds, "text": text}
+
+
+def encode_frame(payload, opcode=0x1):
+    """Encode a single unmasked server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_frame(reader):
+    """Read one (possibly masked) WebSocket frame: (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def accept_key(key):
+    """Compute Sec-WebSocket-Accept for a client's Sec-WebSocket-Key."""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+class _Client:
+    """A connected WebSocket client with its own bounded send queue."""
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def offer(self, frame):
+        """Queue a frame, dropping the oldest one if the client is behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class TimerServer:
+    """Pushes TimerCore events to WebSocket clients and serves state over HTTP.
+
+    Endpoints: "/" (a minimal stream overlay page), "/state", "/scramble",
+    "/stats" (JSON), "/scramble.svg" (the scrambled puzzle) and "/ws"
+    (WebSocket event stream). The server runs on its own asyncio loop,
+    normally in a background thread next to the Tk loop. Core events are
+    turned into JSON once and handed to the loop with
+    call_soon_threadsafe; each client has a bounded queue that drops its
+    oldest message when full, so a slow client never holds up the
+    timer or other clients. Statistics are computed on the server side
+    from a snapshot of the session, never on the timer's thread.
+    """
+
+    def __init__(self, core, host="127.0.0.1", port=8765, queue_size=64):
+        self.core = core
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.clients = set()
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._stats_snapshot = None  # Newest (version, times) to compute
+        self._stats_task = None
+        self.renderer = ScrambleRenderer()
+
+        # State served over HTTP, only touched on the server loop
+        self.state = {}
+        self._snapshot_core()
+
+        for event, handler in (
+            ("state_changed", self._on_state_changed),
+            ("solve_recorded", self._on_solve_recorded),
+            ("personal_best", self._on_personal_best),
+            ("session_changed", self._on_session_changed),
+            ("scramble_changed", self._on_scramble_changed),
+        ):
+            core.subscribe(event, handler)
+
+    # Core events (called on the thread that drives the core)
+
+    def _timer_state(self):
+        """Describe the timer for clients."""
+        stopwatch = self.core.stopwatch
+        return {
+            "running": stopwatch.running,
+            "ready": self.core.is_ready,
+            "elapsed_ms": stopwatch.get_time_ns() // 1_000_000,
+        }
+
+    def _snapshot_core(self):
+        """Capture everything the HTTP endpoints serve.
+
+        Runs on the timer's thread, so statistics are taken from the
+        session's cache when they are current; otherwise empty ones are
+        served until the server loop has computed them.
+        """
+        session = self.core.current_session
+        history = self.core.scramble_manager.history
+        stats = session.cached_statistics()
+        if stats is None:
+            stats = dict(StatisticsCalculator.calculate_all([]), count=len(session))
+            self._stats_snapshot = (session.name, session.version, list(session.times))
+        self.state = {
+            "timer": self._timer_state(),
+            "scramble": history[self.core.scramble_manager.current_index]
+            if history
+            else None,
+            "puzzle_type": self.core.scramble_manager.current_type,
+            "session": {"name": session.name, "count": len(session)},
+            "stats": stats_payload(stats),
+        }
+
+    def _on_state_changed(self):
+        self.publish({"type": "state", **self._timer_state()})
+
+    def _on_solve_recorded(self, solve, session):
+        self.publish(
+            {
+                "type": "solve",
+                "time": solve.time,
+                "penalty": solve.penalty,
+                "text": str(solve),
+                "scramble": solve.scramble,
+                "timestamp": solve.timestamp.isoformat(),
+                "count": len(session),
+            }
+        )
+
+    def _on_personal_best(self, pb, session):
+        self.publish(
+            {
+                "type": "pb",
+                "puzzle_type": pb.puzzle_type,
+                "stat": pb.stat,
+                "value": pb.value,
+                "previous": pb.previous,
+                "text": default_formatter.format(pb.value),
+                "timestamp": pb.timestamp,
+            }
+        )
+
+    def _on_session_changed(self, session):
+        snapshot = (session.name, session.version, list(session.times))
+        self._call_soon(self._schedule_stats, snapshot)
+
+    def _on_scramble_changed(self, scramble):
+        self.publish(
+            {
+                "type": "scramble",
+                "scramble": scramble,
+                "puzzle_type": self.core.scramble_manager.current_type,
+            }
+        )
+
+    # Publishing (thread safe)
+
+    def publish(self, message):
+        """Send a message to every WebSocket client."""
+        self._call_soon(self._broadcast, message)
+
+    def _call_soon(self, callback, *args):
+        """Run callback on the server loop from any thread."""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(callback, *args)
+            except RuntimeError:
+                pass  # Loop is shutting down
+
+    def _broadcast(self, message):
+        """Update served state and queue one encoded frame per client."""
+        kind = message["type"]
+        if kind == "state":
+            self.state["timer"] = {k: v for k, v in message.items() if k != "type"}
+        elif kind == "scramble":
+            self.state["scramble"] = message["scramble"]
+            self.state["puzzle_type"] = message["puzzle_type"]
+        elif kind == "stats":
+            self.state["stats"] = {k: message[k] for k in ("count", "seconds", "text")}
+            self.state["session"] = message["session"]
+
+        frame = encode_frame(json.dumps(message).encode("utf-8"))
+        for client in self.clients:
+            client.offer(frame)
+
+    def _schedule_stats(self, snapshot):
+        """Compute statistics for the newest snapshot, coalescing bursts."""
+        self._stats_snapshot = snapshot
+        if self._stats_task is None or self._stats_task.done():
+            self._stats_task = self.loop.create_task(self._compute_stats())
+
+    async def _compute_stats(self):
+        """Compute and publish statistics off the timer's thread."""
+        while self._stats_snapshot is not None:
+            name, version, times = self._stats_snapshot
+            self._stats_snapshot = None
+            stats = await self.loop.run_in_executor(
+                None, StatisticsCalculator.calculate_all, times
+            )
+            self._broadcast(
+                {
+                    "type": "stats",
+                    "version": version,
+                    "session": {"name": name, "count": len(times)},
+                    **stats_payload(stats),
+                }
+            )
+
+    # Connections
+
+    async def _handle_connection(self, reader, writer):
+        """Serve one HTTP request or WebSocket session."""
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        lines = request.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = lines[0].split(" ", 2)
+        except ValueError:
+            await self._respond(writer, 400, "text/plain", b"Bad request")
+            return
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        path = path.split("?", 1)[0]
+        if method != "GET":
+            await self._respond(writer, 405, "text/plain", b"Method not allowed")
+        elif path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+            await self._serve_websocket(reader, writer, headers)
+        elif path == "/":
+            await self._respond(writer, 200, "text/html", OVERLAY_PAGE.encode())
+        elif path in ("/state", "/scramble", "/stats"):
+            await self._respond(writer, 200, "application/json", self._json(path))
+        elif path == "/scramble.svg":
+            await self._respond(writer, 200, "image/svg+xml", self._scramble_svg())
+        else:
+            await self._respond(writer, 404, "text/plain", b"Not found")
+
+    def _json(self, path):
+        """Build the JSON body for an HTTP endpoint."""
+        if path == "/scramble":
+            body = {
+                "scramble": self.state["scramble"],
+                "puzzle_type": self.state["puzzle_type"],
+            }
+        elif path == "/stats":
+            body = {"session": self.state["session"], **self.state["stats"]}
+        else:
+            body = self.state
+        return json.dumps(body).encode("utf-8")
+
+    def _scramble_svg(self):
+        """Draw the current scramble; the renderer caches it by state."""
+        puzzle_type = self.state["puzzle_type"]
+        try:
+            svg = self.renderer.svg(puzzle_type, self.state["scramble"] or "")
+        except ScrambleImageError:
+            svg = placeholder_svg(puzzle_type)
+        return svg.encode("utf-8")
+
+    async def _respond(self, writer, status, content_type, body):
+        """Write a complete HTTP response and close the connection."""
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}.get(
+            status, "Method Not Allowed"
+        )
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-store\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_websocket(self, reader, writer, headers):
+        """Complete the WebSocket handshake and stream events."""
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, 400, "text/plain", b"Missing key")
+            return
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+            ).encode("latin-1")
+        )
+
+        client = _Client(writer, self.queue_size)
+        client.offer(
+            encode_frame(json.dumps({"type": "snapshot", **self.state}).encode())
+        )
+        self.clients.add(client)
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            await self._receive_loop(reader, client)
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, client):
+        """Write queued frames to a client at whatever pace it reads."""
+        try:
+            while True:
+                frame = await client.queue.get()
+                client.writer.write(frame)
+                await client.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _receive_loop(self, reader, client):
+        """Answer pings and wait for the client to close."""
+        while True:
+            try:
+                opcode, payload = await read_frame(reader)
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                return
+            if opcode == 0x8:  # Close
+                client.writer.write(encode_frame(payload[:2], opcode=0x8))
+                return
+            if opcode == 0x9:  # Ping
+                client.offer(encode_frame(payload, opcode=0xA))
+
+    # Lifecycle
+
+    async def start(self):
+        """Start listening on the current event loop."""
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+            limit=MAX_REQUEST_BYTES,
+            backlog=512,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]  # For port 0
+        if self._stats_snapshot is not None:  # Left over from _snapshot_core
+            self._stats_task = self.loop.create_task(self._compute_stats())
+
+    async def stop(self):
+        """Stop listening and disconnect clients."""
+        if self._server is not None:
+            self._server.close()
+            for client in list(self.clients):
+                client.writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        """Start (unless already listening) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def start_in_thread(self):
+        """Run the server on its own loop in a daemon thread."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.start())
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self.stop())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="pstimer-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop_thread(self):
+        """Stop a server started with start_in_thread()."""
+        if self.loop is not None and self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @property
+    def url(self):
+        """Get the base HTTP URL."""
+        return f"http://{self.host}:{self.port}/"
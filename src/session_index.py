@@ -0,0 +1,394 @@
+"""
+Cross-session index and summaries for PSTimer.
+"""
+
+from datetime import datetime
+
+from .sketch import KLLSketch
+from .statistics import DNF, best_average, best_mean, trimmed_average, window_mean
+
+AVERAGE_SIZES = (5, 12, 100)
+MEAN_SIZES = (3,)
+
+
+def _day(value):
+    """Get the date ordinal of a date, datetime or epoch timestamp."""
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal()
+
+
+class SessionSummary:
+    """Aggregates over one session's solves, cheap to keep and to persist.
+
+    Per-day buckets hold [count, dnf_count, total, best] so date-range
+    queries never touch individual solves. Times are display times (with
+    +2 applied); DNFs are counted but left out of totals and bests.
+
+    New solves, penalty changes and deletions update the counts, totals
+    and day buckets in place. An edit can worsen a best, which only a scan
+    of the solves can tell, so it leaves the bests (best, the day bests,
+    best_averages and best_means) as they were and sets bests_stale until
+    the summary is rebuilt.
+    """
+
+    def __init__(self, session_id, name="", puzzle_type="3x3x3", version=0):
+        self.session_id = session_id
+        self.name = name
+        self.puzzle_type = puzzle_type
+        self.version = version  # Session version the summary describes
+        self.count = 0
+        self.dnf_count = 0
+        self.total = 0.0
+        self.best = None
+        self.best_averages = {size: None for size in AVERAGE_SIZES}
+        self.best_means = {size: None for size in MEAN_SIZES}
+        self.first_ts = None
+        self.last_ts = None
+        self.days = {}  # Date ordinal -> [count, dnf_count, total, best]
+        self.bests_stale = False  # Edited since the bests were computed
+
+    @classmethod
+    def from_session(cls, session):
+        """Summarize a loaded session."""
+        return cls.from_times(
+            session.session_id,
+            session.name,
+            session.puzzle_type,
+            session.version,
+            session.times,
+        )
+
+    @classmethod
+    def from_times(cls, session_id, name, puzzle_type, version, times):
+        """Summarize solves given newest first, such as a snapshot of a session."""
+        summary = cls(session_id, name, puzzle_type, version)
+        for solve in times:
+            summary._add(solve)
+        values = [solve.display_time for solve in reversed(times)]
+        for size in AVERAGE_SIZES:
+            summary.best_averages[size] = best_average(values, size)
+        for size in MEAN_SIZES:
+            summary.best_means[size] = best_mean(values, size)
+        return summary
+
+    def _add(self, solve):
+        """Count one solve into the totals and its day bucket."""
+        ts = solve.timestamp.timestamp()
+        value = solve.display_time
+        bucket = self.days.setdefault(solve.timestamp.toordinal(), [0, 0, 0.0, None])
+        self.count += 1
+        bucket[0] += 1
+        if value == DNF:
+            self.dnf_count += 1
+            bucket[1] += 1
+        else:
+            self.total += value
+            bucket[2] += value
+            if self.best is None or value < self.best:
+                self.best = value
+            if bucket[3] is None or value < bucket[3]:
+                bucket[3] = value
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+
+    def _remove(self, solve, value):
+        """Take a solve counted with display time value out of the totals."""
+        day = solve.timestamp.toordinal()
+        bucket = self.days[day]
+        self.count -= 1
+        bucket[0] -= 1
+        if value == DNF:
+            self.dnf_count -= 1
+            bucket[1] -= 1
+        else:
+            self.total -= value
+            bucket[2] -= value
+        if not bucket[0]:
+            del self.days[day]
+
+    def solve_added(self, session):
+        """Update for the newest solve of session; False if out of step."""
+        if session.version != self.version + 1 or not session.times:
+            return False
+        self._add(session.times[0])
+        for bests, sizes, stat in (
+            (self.best_averages, AVERAGE_SIZES, trimmed_average),
+            (self.best_means, MEAN_SIZES, window_mean),
+        ):
+            for size in sizes:
+                if len(session.times) >= size:
+                    latest = stat(
+                        [solve.display_time for solve in session.times[:size]]
+                    )
+                    best = bests[size]
+                    if latest != DNF and (best is None or latest < best):
+                        bests[size] = latest
+        self.version = session.version
+        return True
+
+    def solves_added(self, session, solves):
+        """Update for solves just added to session in one go (e.g. an import).
+
+        The bests are left stale. Returns False if out of step.
+        """
+        if session.version != self.version + 1:
+            return False
+        for solve in solves:
+            self._add(solve)
+        self.bests_stale = True
+        self.version = session.version
+        return True
+
+    def solve_removed(self, session, solve):
+        """Update for a solve just removed from session; False if out of step."""
+        if session.version != self.version + 1:
+            return False
+        self._remove(solve, solve.display_time)
+        self.bests_stale = True
+        self.version = session.version
+        return True
+
+    def penalty_changed(self, session, solve, old_value):
+        """Update for a solve whose display time was old_value before an edit.
+
+        Returns False if the summary is out of step with session.
+        """
+        if session.version != self.version + 1:
+            return False
+        self._remove(solve, old_value)
+        self._add(solve)
+        self.bests_stale = True
+        self.version = session.version
+        return True
+
+    @property
+    def mean(self):
+        """Get the mean of the non-DNF solves."""
+        valid = self.count - self.dnf_count
+        return self.total / valid if valid else None
+
+    def stat_best(self, stat):
+        """Get the best "single", "mo3" or "ao5"/"ao12"/"ao100"."""
+        if stat == "single":
+            return self.best
+        if stat.startswith("mo"):
+            return self.best_means[int(stat[2:])]
+        return self.best_averages[int(stat[2:])]
+
+    def to_dict(self):
+        """Convert to JSON-friendly data."""
+        data = {
+            "count": self.count,
+            "dnf_count": self.dnf_count,
+            "total": self.total,
+            "best": self.best,
+            "best_averages": {
+                str(size): value for size, value in self.best_averages.items()
+            },
+            "best_means": {
+                str(size): value for size, value in self.best_means.items()
+            },
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "days": [[day] + bucket for day, bucket in sorted(self.days.items())],
+        }
+        if self.bests_stale:
+            data["bests_stale"] = True
+        return data
+
+    @classmethod
+    def from_dict(cls, data, session_id, name, puzzle_type, version=0):
+        """Rebuild a summary saved with to_dict()."""
+        summary = cls(session_id, name, puzzle_type, version)
+        summary.count = data["count"]
+        summary.dnf_count = data["dnf_count"]
+        summary.total = data["total"]
+        summary.best = data["best"]
+        for bests, key in (
+            (summary.best_averages, "best_averages"),
+            (summary.best_means, "best_means"),
+        ):
+            stored = data.get(key, {})
+            for size in bests:
+                if str(size) not in stored:
+                    summary.version = -1  # Saved by an older version; rebuild
+                bests[size] = stored.get(str(size))
+        summary.first_ts = data["first_ts"]
+        summary.last_ts = data["last_ts"]
+        summary.days = {row[0]: list(row[1:]) for row in data["days"]}
+        summary.bests_stale = data.get("bests_stale", False)
+        return summary
+
+
+class QueryResult:
+    """Aggregate answer to a cross-session query."""
+
+    def __init__(self):
+        self.count = 0
+        self.dnf_count = 0
+        self.total = 0.0
+        self.best = None
+        self.sessions = 0
+
+    @property
+    def mean(self):
+        """Get the mean of the non-DNF solves."""
+        valid = self.count - self.dnf_count
+        return self.total / valid if valid else None
+
+    def add(self, count, dnf_count, total, best):
+        """Merge in one bucket."""
+        self.count += count
+        self.dnf_count += dnf_count
+        self.total += total
+        if best is not None and (self.best is None or best < self.best):
+            self.best = best
+
+
+class SessionIndex:
+    """Answers queries across sessions by puzzle type, date and session.
+
+    Summaries are cached on each session and kept in step with its edits
+    (see SessionSummary); bests left stale by an edit are recomputed only
+    when a query needs them, never while saving. Queries over date
+    ranges add up per-day buckets, so they cost O(sessions x days)
+    regardless of how many solves there are, and sessions whose solves are
+    not loaded are answered from the summaries saved with them.
+    """
+
+    def __init__(self, session_manager):
+        self.session_manager = session_manager
+        self._sketches = {}  # Query -> ((session_id, version), ...), merged sketch
+
+    def summary(self, session):
+        """Get the up-to-date summary of a session."""
+        return session.summary()
+
+    def solve_added(self, session):
+        """Update a session's summary for its newest solve, if it has one."""
+        summary = session.cached_summary
+        if summary is not None:
+            summary.solve_added(session)  # Otherwise rebuilt when next asked
+
+    def summaries(self, puzzle_type=None, sessions=None, fresh=False):
+        """Get summaries, optionally for one puzzle type or some session ids.
+
+        With fresh, bests left stale by edits are recomputed first.
+        """
+        return [
+            session.refresh_summary() if fresh else session.summary()
+            for session in self.session_manager.sessions
+            if (puzzle_type is None or session.puzzle_type == puzzle_type)
+            and (sessions is None or session.session_id in sessions)
+        ]
+
+    def puzzle_types(self):
+        """Get the puzzle types that have sessions, in session order."""
+        return list(
+            dict.fromkeys(
+                session.puzzle_type for session in self.session_manager.sessions
+            )
+        )
+
+    def query(self, puzzle_type=None, start=None, end=None, sessions=None):
+        """Aggregate solves in [start, end) days (dates or datetimes)."""
+        start = _day(start) if start is not None else None
+        end = _day(end) if end is not None else None
+        result = QueryResult()
+        for summary in self.summaries(puzzle_type, sessions, fresh=True):
+            if not summary.count:
+                continue
+            if start is None and end is None:
+                result.add(
+                    summary.count, summary.dnf_count, summary.total, summary.best
+                )
+                result.sessions += 1
+                continue
+            matched = False
+            for day, bucket in summary.days.items():
+                if (start is None or day >= start) and (end is None or day < end):
+                    result.add(*bucket)
+                    matched = True
+            result.sessions += matched
+        return result
+
+    def solves(self, puzzle_type=None, start=None, end=None, sessions=None):
+        """Get the solves in [start, end) as (session, SolveTime), newest first.
+
+        Sessions whose date range misses the query are skipped without
+        touching (or loading) their solves.
+        """
+        start_ts = self._timestamp(start)
+        end_ts = self._timestamp(end)
+        found = []
+        for session in self.session_manager.sessions:
+            if puzzle_type is not None and session.puzzle_type != puzzle_type:
+                continue
+            if sessions is not None and session.session_id not in sessions:
+                continue
+            summary = self.summary(session)
+            if not summary.count:
+                continue
+            if start_ts is not None and summary.last_ts < start_ts:
+                continue
+            if end_ts is not None and summary.first_ts >= end_ts:
+                continue
+            for solve in session.times:
+                ts = solve.timestamp.timestamp()
+                if (start_ts is None or ts >= start_ts) and (
+                    end_ts is None or ts < end_ts
+                ):
+                    found.append((session, solve))
+        self.session_manager.trim()
+        found.sort(key=lambda item: item[1].timestamp, reverse=True)
+        return found
+
+    def sketch(self, puzzle_type=None, sessions=None):
+        """Get a KLLSketch of every matching session's solves, merged.
+
+        The merge is cached until one of the sessions changes, so repeated
+        lookups cost only the quantile search.
+        """
+        matching = [
+            session
+            for session in self.session_manager.sessions
+            if (puzzle_type is None or session.puzzle_type == puzzle_type)
+            and (sessions is None or session.session_id in sessions)
+        ]
+        key = (puzzle_type, frozenset(sessions) if sessions is not None else None)
+        state = tuple((session.session_id, session.version) for session in matching)
+        cached = self._sketches.get(key)
+        if cached is None or cached[0] != state:
+            merged = KLLSketch()
+            for session in matching:
+                merged.merge(session.sketch())
+            cached = self._sketches[key] = (state, merged)
+        return cached[1]
+
+    def quantiles(self, qs=(0.1, 0.5, 0.9), puzzle_type=None, sessions=None):
+        """Get approximate quantiles of the non-DNF solves across sessions."""
+        return self.sketch(puzzle_type, sessions).quantiles(qs)
+
+    def best(self, stat="single", puzzle_type=None):
+        """Get (value, summary) of the best single, mo3 or aoN across sessions."""
+        best = (None, None)
+        for summary in self.summaries(puzzle_type, fresh=True):
+            value = summary.stat_best(stat)
+            if value is not None and (best[0] is None or value < best[0]):
+                best = (value, summary)
+        return best
+
+    @staticmethod
+    def _timestamp(value):
+        """Convert a date or datetime to an epoch timestamp."""
+        if value is None:
+            return None
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return value.timestamp()
+
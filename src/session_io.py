@@ -0,0 +1,148 @@
+"""
+Importing and exporting solve times for PSTimer.
+"""
+
+import csv
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from .formatting import TimeParseError, default_formatter, parse_time
+from .statistics import SolveTime
+
+# Solves in chronological order plus (line_number, text, message) errors
+ImportResult = namedtuple("ImportResult", ["solves", "errors"])
+
+CSTIMER_HEADER = "No.;Time;Comment;Scramble;Date"
+PSTIMER_HEADER = "PSTimer Session Export"
+
+# "  1.    12.34 - R U R' U'" rows written by the PSTimer exporter
+_PSTIMER_ROW_RE = re.compile(r"\s*\d+\.\s+(\S+)\s+-\s?(.*)")
+
+
+def import_times(lines):
+    """Import solves from csTimer CSV, a PSTimer export or plain text.
+
+    lines is any iterable of text lines (e.g. an open file). The format is
+    detected from the first non-empty line. Malformed rows are reported in
+    ImportResult.errors rather than imported as zero.
+    """
+    lines = iter(lines)
+    for first_number, first in enumerate(lines, 1):
+        if first.strip():
+            break
+    else:
+        return ImportResult([], [])
+
+    if first.startswith(CSTIMER_HEADER):
+        return _import_cstimer(lines, first_number)
+    if first.startswith(PSTIMER_HEADER):
+        return _import_pstimer(lines, first_number)
+    return _import_plain(first, lines, first_number)
+
+
+def import_file(path):
+    """Import solves from a file on disk."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return import_times(f)
+
+
+def export_times(f, session, puzzle_type, formatter=default_formatter):
+    """Write a session as a PSTimer export (newest solve first) to f."""
+    f.write(f"{PSTIMER_HEADER}\n")
+    f.write(f"Puzzle Type: {puzzle_type}\n")
+    f.write(f"Total Solves: {len(session)}\n")
+    f.write("=" * 50 + "\n\n")
+
+    formatted = formatter.format_solves(session.times)
+    f.writelines(
+        f"{i:3d}. {time_str:>8s} - {solve.scramble}\n"
+        for i, (time_str, solve) in enumerate(zip(formatted, session.times), 1)
+    )
+
+    # Add statistics
+    fmt = formatter.format
+    stats = session.get_statistics()
+    f.write("\n" + "=" * 50 + "\n")
+    f.write("Statistics:\n")
+    f.write(f"Best: {stats.get('best', 'N/A')}\n")
+    if stats.get("ao5"):
+        f.write(f"ao5: {fmt(stats['ao5'])}\n")
+    if stats.get("ao12"):
+        f.write(f"ao12: {fmt(stats['ao12'])}\n")
+    if stats.get("ao100"):
+        f.write(f"ao100: {fmt(stats['ao100'])}\n")
+
+
+def _import_cstimer(lines, header_number):
+    """Import csTimer CSV rows (oldest first)."""
+    solves = []
+    errors = []
+    append = solves.append
+    rows = csv.reader(lines, delimiter=";")
+    for line_number, row in enumerate(rows, header_number + 1):
+        if not row:
+            continue
+        if len(row) < 2:
+            errors.append((line_number, ";".join(row), "Missing time column"))
+            continue
+        try:
+            seconds, penalty = parse_time(row[1])
+        except TimeParseError as e:
+            errors.append((line_number, row[1], str(e)))
+            continue
+        scramble = row[3] if len(row) > 3 else ""
+        timestamp = _parse_timestamp(row[4]) if len(row) > 4 else None
+        append(SolveTime(seconds, scramble, timestamp, penalty))
+    return ImportResult(solves, errors)
+
+
+def _import_pstimer(lines, header_number):
+    """Import a PSTimer text export (newest first)."""
+    solves = []
+    errors = []
+    for line_number, line in enumerate(lines, header_number + 1):
+        if line.startswith("Statistics:"):
+            break
+        match = _PSTIMER_ROW_RE.fullmatch(line.rstrip("\r\n"))
+        if match is None:
+            continue  # Header, separator or blank line
+        try:
+            seconds, penalty = parse_time(match.group(1))
+        except TimeParseError as e:
+            errors.append((line_number, match.group(1), str(e)))
+            continue
+        solves.append(SolveTime(seconds, match.group(2), None, penalty))
+    solves.reverse()
+    return ImportResult(solves, errors)
+
+
+def _import_plain(first, lines, first_number):
+    """Import one time per line (oldest first)."""
+    solves = []
+    errors = []
+    for line_number, line in enumerate(_chain(first, lines), first_number):
+        text = line.strip()
+        if not text:
+            continue
+        try:
+            seconds, penalty = parse_time(text)
+        except TimeParseError as e:
+            errors.append((line_number, text, str(e)))
+            continue
+        solves.append(SolveTime(seconds, "", None, penalty))
+    return ImportResult(solves, errors)
+
+
+def _chain(first, rest):
+    """Yield the first line followed by the remaining lines."""
+    yield first
+    yield from rest
+
+
+def _parse_timestamp(text):
+    """Parse an ISO-like timestamp, returning None when it is not one."""
+    try:
+        return datetime.fromisoformat(text.strip())
+    except ValueError:
+        return None
@@ -27,7 +27,7 @@ class SettingsDialog:
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("PSTimer Settings")
-        self.dialog.geometry("400x600")  # Increased height for compact mode controls
+        self.dialog.geometry("400x660")  # Increased height for compact mode controls
         self.dialog.resizable(False, False)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -221,6 +221,24 @@ class SettingsDialog:
         )
         hold_time_entry.pack(anchor=tk.W, padx=10, pady=(5, 10))
 
+        # Display refresh rate while the timer runs
+        tk.Label(
+            timer_frame,
+            text="Display refresh rate while running (Hz):",
+            font=(theme["font_family"], 10),
+            bg=theme["bg"],
+            fg=theme["text_primary"],
+        ).pack(anchor=tk.W, padx=10, pady=(5, 0))
+
+        self.refresh_rate_var = tk.StringVar(value="60")
+        refresh_rate_entry = tk.Entry(
+            timer_frame,
+            textvariable=self.refresh_rate_var,
+            width=10,
+            font=(theme["mono_font"], 10),
+        )
+        refresh_rate_entry.pack(anchor=tk.W, padx=10, pady=(5, 10))
+
         # Scramble settings
         scramble_frame = tk.LabelFrame(
             main_frame,
@@ -380,6 +398,7 @@ class SettingsDialog:
             "puzzle_type": self.puzzle_type_var.get(),
             "inspection": self.inspection_var.get(),
             "hold_time": int(self.hold_time_var.get()),
+            "refresh_rate": int(self.refresh_rate_var.get()),
             "scramble_length": int(self.scramble_length_var.get()),
             "autosave": self.autosave_var.get(),
             "show_mo3": self.show_mo3_var.get(),
@@ -402,6 +421,7 @@ class SettingsDialog:
         self.puzzle_type_var.set("3x3x3")
         self.inspection_var.set(False)
         self.hold_time_var.set("300")
+        self.refresh_rate_var.set("60")
         self.scramble_length_var.set("20")
         self.autosave_var.set(True)
         self.show_mo3_var.set(True)
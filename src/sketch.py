@@ -0,0 +1,166 @@
+"""
+Streaming quantile sketch for lifetime statistics in PSTimer.
+"""
+
+import bisect
+import math
+import random
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang and Liberty, 2016).
+
+    Values go into a stack of compactors. When a compactor fills up it is
+    sorted and every other item (a random half: odd or even positions) is
+    promoted to the next level, where each item stands for twice as many
+    values. Capacities shrink by c = 2/3 per level below the top, so the
+    sketch keeps about k / (1 - c) = 3k items however many values it has
+    seen, and two sketches merge by concatenating their levels.
+
+    Error bound: a quantile's rank is off by at most about 1.7% of the
+    count (at 99% confidence) for the default k = 200, independent of the
+    number of values; for example, the reported median lies between the
+    true 48.3rd and 51.7th percentiles. The error scales as roughly 1 / k.
+    min and max are exact.
+    """
+
+    def __init__(self, k=200, c=2 / 3, seed=None):
+        self.k = k
+        self.c = c
+        self.compactors = [[]]
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._rng = random.Random(seed)
+        self._cdf = None  # (sorted values, cumulative weights), until changed
+
+    def _capacity(self, level):
+        """Get how many items level can hold before compacting."""
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * self.c**depth)) + 1
+
+    def _grow(self):
+        """Add a level on top."""
+        self.compactors.append([])
+        self._max_size = sum(
+            self._capacity(level) for level in range(len(self.compactors))
+        )
+
+    def __len__(self):
+        return self.count
+
+    def update(self, value):
+        """Add one value."""
+        self.compactors[0].append(value)
+        self._size += 1
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self._cdf = None
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        """Compact full levels until the sketch is back under its size."""
+        for level in range(len(self.compactors)):
+            if len(self.compactors[level]) >= self._capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self._grow()
+                items = sorted(self.compactors[level])
+                leftover = [items.pop()] if len(items) % 2 else []
+                promoted = items[self._rng.random() < 0.5 :: 2]
+                self.compactors[level] = leftover
+                self.compactors[level + 1].extend(promoted)
+                self._size = sum(len(items) for items in self.compactors)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        for bound in (other.min, other.max):
+            if bound is not None:
+                if self.min is None or bound < self.min:
+                    self.min = bound
+                if self.max is None or bound > self.max:
+                    self.max = bound
+        self._size = sum(len(items) for items in self.compactors)
+        self._cdf = None
+        while self._size >= self._max_size:
+            before = self._size
+            self._compress()
+            if self._size == before:
+                break
+
+    def _weights(self):
+        """Get the sorted retained values and their cumulative weights."""
+        if self._cdf is None:
+            weighted = sorted(
+                (value, 1 << level)
+                for level, items in enumerate(self.compactors)
+                for value in items
+            )
+            values = [value for value, _ in weighted]
+            cumulative = []
+            total = 0
+            for _, weight in weighted:
+                total += weight
+                cumulative.append(total)
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def quantile(self, q):
+        """Get the value at quantile q (0 to 1), or None if empty."""
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        values, cumulative = self._weights()
+        index = bisect.bisect_left(cumulative, q * cumulative[-1])
+        return values[min(index, len(values) - 1)]
+
+    def quantiles(self, qs):
+        """Get the values at several quantiles."""
+        return [self.quantile(q) for q in qs]
+
+    def rank(self, value):
+        """Get the fraction of values less than or equal to value."""
+        if not self.count:
+            return None
+        values, cumulative = self._weights()
+        index = bisect.bisect_right(values, value)
+        return cumulative[index - 1] / cumulative[-1] if index else 0.0
+
+    def to_dict(self):
+        """Convert to JSON-friendly data."""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "compactors": self.compactors,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a sketch saved with to_dict()."""
+        sketch = cls(data["k"])
+        sketch.compactors = [list(items) for items in data["compactors"]] or [[]]
+        sketch.count = data["count"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch._size = sum(len(items) for items in sketch.compactors)
+        sketch._max_size = sum(
+            sketch._capacity(level) for level in range(len(sketch.compactors))
+        )
+        return sketch
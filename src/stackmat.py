@@ -0,0 +1,417 @@
+"""
+Stackmat timer decoding for PSTimer.
+
+A Stackmat sends its display out of the data jack as 1200 baud 8N1
+serial data. Each packet is a status character, the time digits (five on
+a Gen 3 timer: M SS hh; six on a Gen 4: M SS hhh), a checksum character
+(64 + the sum of the digits) and "\\n\\r". Through a sound card the same
+signal arrives as audio samples, so packets can be decoded from a serial
+port, from live audio or from a WAV recording.
+"""
+
+import sys
+import time
+import wave
+from array import array
+
+from .input_sources import RESET, START, STOP, InputEvent, InputSource
+
+BAUD_RATE = 1200
+BYTE_NS = 10 * 1_000_000_000 // BAUD_RATE  # Start bit, 8 data bits, stop bit
+
+# Status characters
+IDLE = "I"  # Reset to zero
+READY = "A"  # Hands down long enough; lifting them starts the timer
+RUNNING = " "
+STOPPED = "S"
+LEFT_HAND = "L"
+RIGHT_HAND = "R"
+BOTH_HANDS = "C"  # Both hands down, not ready yet
+STATUSES = (IDLE, READY, RUNNING, STOPPED, LEFT_HAND, RIGHT_HAND, BOTH_HANDS)
+
+PACKET_END = b"\n\r"
+MAX_PACKET = 10  # Gen 4: status, 6 digits, checksum and "\n\r"
+
+# Audio decoding
+EDGE_THRESHOLD = 0.4  # Change within half a bit that is an edge, of the peak
+NOISE_FLOOR = 2000  # Changes smaller than this (16-bit scale) are never edges
+IDLE_BITS = 12  # A run this long is the idle line between packets
+CHUNK_FRAMES = 4096  # Frames read from a WAV file at a time
+
+
+class StackmatError(Exception):
+    """Raised for recordings or ports that cannot be read."""
+
+
+class StackmatPacket:
+    """One display reading: status, time in ms and when it was sent.
+
+    ts_ns is when the packet's first start bit arrived, on the same clock
+    as the other InputEvents.
+    """
+
+    __slots__ = ("status", "ms", "ts_ns")
+
+    def __init__(self, status, ms, ts_ns):
+        self.status = status
+        self.ms = ms
+        self.ts_ns = ts_ns
+
+    def __repr__(self):
+        return f"StackmatPacket({self.status!r} {self.ms}ms @{self.ts_ns})"
+
+
+def encode_packet(status, ms, digits=6):
+    """Build the bytes a timer sends for status and ms (digits 5 or 6)."""
+    minutes, ms = divmod(ms, 60_000)
+    seconds, fraction = divmod(ms, 1000)
+    if digits == 5:
+        text = f"{minutes:d}{seconds:02d}{fraction // 10:02d}"
+    else:
+        text = f"{minutes:d}{seconds:02d}{fraction:03d}"
+    checksum = 64 + sum(int(digit) for digit in text)
+    return f"{status}{text}{chr(checksum)}".encode("ascii") + PACKET_END
+
+
+def parse_packet(data):
+    """Parse a packet without its "\\n\\r"; returns (status, ms) or None.
+
+    None means the packet is damaged: an unknown status, a non-digit, an
+    impossible time or a checksum that does not match.
+    """
+    if len(data) not in (7, 8):
+        return None
+    status = chr(data[0])
+    digits = [byte - 48 for byte in data[1:-1]]
+    if status not in STATUSES or not all(0 <= digit <= 9 for digit in digits):
+        return None
+    if data[-1] != 64 + sum(digits):
+        return None
+    minutes, tens, ones = digits[:3]
+    if tens > 5:
+        return None
+    if len(digits) == 5:
+        fraction = digits[3] * 100 + digits[4] * 10
+    else:
+        fraction = digits[3] * 100 + digits[4] * 10 + digits[5]
+    return status, (minutes * 60 + tens * 10 + ones) * 1000 + fraction
+
+
+class PacketParser:
+    """Assembles packets from bytes as they arrive.
+
+    The last MAX_PACKET bytes are kept, and at each "\\n\\r" the bytes
+    before it are tried as a Gen 4 and then a Gen 3 packet, so a stream
+    joined mid-packet or with a damaged byte resynchronizes on the next
+    good packet. Terminators without a good packet are counted in errors.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._stamps = []  # When each buffered byte began arriving
+        self.packets = 0
+        self.errors = 0
+
+    def push(self, byte, ts_ns):
+        """Add a byte that began arriving at ts_ns; returns a packet or None."""
+        buffer = self._buffer
+        buffer.append(byte)
+        self._stamps.append(ts_ns)
+        if len(buffer) > MAX_PACKET:
+            del buffer[0]
+            del self._stamps[0]
+        if byte != 13 or not buffer.endswith(PACKET_END):
+            return None
+        for length in (MAX_PACKET, MAX_PACKET - 1):
+            if len(buffer) < length:
+                continue
+            parsed = parse_packet(buffer[-length:-2])
+            if parsed is not None:
+                status, ms = parsed
+                packet = StackmatPacket(status, ms, self._stamps[-length])
+                self.packets += 1
+                self.reset()
+                return packet
+        self.errors += 1
+        self.reset()
+        return None
+
+    def feed(self, data, end_ns):
+        """Parse bytes that had all arrived by end_ns; returns the packets.
+
+        Each byte takes BYTE_NS on the wire, so bytes read together are
+        stamped back from end_ns rather than all at the read time.
+        """
+        packets = []
+        first_ns = end_ns - len(data) * BYTE_NS
+        for offset, byte in enumerate(data):
+            packet = self.push(byte, first_ns + offset * BYTE_NS)
+            if packet is not None:
+                packets.append(packet)
+        return packets
+
+    def reset(self):
+        """Drop a partly received packet, e.g. after a framing error."""
+        self._buffer.clear()
+        self._stamps.clear()
+
+
+class AudioDecoder:
+    """Decodes packets from audio samples, a chunk at a time.
+
+    Edges are found where the signal changes by more than EDGE_THRESHOLD
+    of the recent peak within half a bit, rather than by comparing levels
+    with zero: a sound card's coupling capacitor lets the level drift
+    slowly during long runs, but an edge is always a steep swing, and the
+    input volume does not matter. The runs between edges become bits, and
+    the bits are framed like a UART: a start bit, eight data bits, LSB
+    first, and a stop bit. A run of IDLE_BITS or more is the idle line
+    between packets and marks the "1" level, so inverted signals decode
+    too. All state carries over between feed() calls.
+
+    Samples are signed and on a 16-bit scale; packets are stamped
+    origin_ns plus the time of their first start bit.
+    """
+
+    def __init__(self, sample_rate, origin_ns=0, noise_floor=NOISE_FLOOR):
+        self.sample_rate = sample_rate
+        self.origin_ns = origin_ns
+        self.noise_floor = noise_floor
+        self.parser = PacketParser()
+        self.framing_errors = 0
+        self._samples_per_bit = sample_rate / BAUD_RATE
+        self._ns_per_sample = 1_000_000_000 / sample_rate
+        self._lag = max(1, int(self._samples_per_bit / 2))
+        self._tail = None  # The last lag samples of the previous chunk
+        self._peak = 0
+        self._level = None  # 1 after a rising edge, 0 after a falling one
+        self._run_start = 0  # Sample where the current level began
+        self._position = 0  # Samples fed so far
+        self._mark = None  # Level of a "1" bit, once an idle run shows it
+        self._state = -1  # -1 idle, 0-7 data bits so far, 8 expecting stop
+        self._byte = 0
+        self._byte_start = 0
+
+    def feed(self, samples):
+        """Decode the next samples; returns the packets they completed."""
+        packets = []
+        if not len(samples):
+            return packets
+        peak = max(max(samples), -min(samples))
+        threshold = max(self.noise_floor, EDGE_THRESHOLD * max(peak, self._peak))
+        self._peak = peak
+        rise, fall = threshold, -threshold
+        if self._tail is None:
+            self._tail = [samples[0]] * self._lag
+        window = self._tail + list(samples)
+        self._tail = window[-self._lag :]
+        changes = [
+            sample - earlier for sample, earlier in zip(window[self._lag :], window)
+        ]
+        level = self._level
+        run_start = self._run_start
+        if level is None:
+            # The first edge shows which level came before it
+            for position, change in enumerate(changes, self._position):
+                if change > rise or change < fall:
+                    level = 0 if change > rise else 1
+                    break
+            else:
+                self._position += len(samples)
+                return packets
+        for position, change in enumerate(changes, self._position):
+            if level:
+                if change < fall:
+                    self._run(1, run_start, position, packets)
+                    level, run_start = 0, position
+            elif change > rise:
+                self._run(0, run_start, position, packets)
+                level, run_start = 1, position
+        self._level = level
+        self._run_start = run_start
+        self._position += len(samples)
+        return packets
+
+    def _run(self, level, start, end, packets):
+        """Turn a run of one level into bits."""
+        count = round((end - start) / self._samples_per_bit)
+        if count >= IDLE_BITS:
+            self._mark = level
+        if self._mark is None or not count:
+            return
+        bit = level == self._mark
+        spb = self._samples_per_bit
+        while count:
+            state = self._state
+            if state < 0:
+                if bit:
+                    return  # Idle line
+                self._state = 0
+                self._byte = 0
+                self._byte_start = start
+            elif state < 8:
+                take = min(count, 8 - state)
+                if bit:
+                    self._byte |= ((1 << take) - 1) << state
+                self._state = state + take
+                count -= take
+                start += take * spb
+                if self._state == 8:
+                    ts_ns = self.origin_ns + round(
+                        self._byte_start * self._ns_per_sample
+                    )
+                    packet = self.parser.push(self._byte, ts_ns)
+                    if packet is not None:
+                        packets.append(packet)
+                continue
+            elif bit:
+                self._state = -1
+            else:
+                # No stop bit: drop the packet and take this as a start bit
+                self.framing_errors += 1
+                self.parser.reset()
+                self._state = -1
+                continue
+            count -= 1
+            start += spb
+
+
+def pcm_samples(frames, width, channels):
+    """Get the first channel of raw PCM frames as signed 16-bit-scale ints."""
+    if width == 1:
+        return [(byte - 128) << 8 for byte in frames[::channels]]
+    if width == 2:
+        samples = array("h", frames)
+    elif width == 4:
+        samples = array("i", frames)
+    else:
+        raise StackmatError(f"Unsupported sample width: {width * 8} bits")
+    if sys.byteorder == "big":
+        samples.byteswap()  # WAV data is little-endian
+    if channels > 1:
+        samples = samples[::channels]
+    if width == 4:
+        samples = array("i", (sample >> 16 for sample in samples))
+    return samples
+
+
+def wav_packets(path, clock=time.perf_counter_ns, realtime=False):
+    """Yield the packets in a WAV recording.
+
+    The recording is read and decoded CHUNK_FRAMES at a time. With
+    realtime, each chunk waits until it would have been heard, like a
+    timer plugged in live; otherwise the file is decoded as fast as it
+    can be.
+    """
+    try:
+        reader = wave.open(str(path), "rb")
+    except (OSError, EOFError, wave.Error) as e:
+        raise StackmatError(f"Cannot read {path}: {e}") from e
+    with reader:
+        width = reader.getsampwidth()
+        channels = reader.getnchannels()
+        rate = reader.getframerate()
+        origin_ns = clock()
+        decoder = AudioDecoder(rate, origin_ns)
+        frames_read = 0
+        while True:
+            frames = reader.readframes(CHUNK_FRAMES)
+            if not frames:
+                break
+            frames_read += len(frames) // (width * channels)
+            if realtime:
+                wait_ns = origin_ns + frames_read * 1_000_000_000 // rate - clock()
+                if wait_ns > 0:
+                    time.sleep(wait_ns / 1_000_000_000)
+            yield from decoder.feed(pcm_samples(frames, width, channels))
+
+
+def audio_packets(chunks, sample_rate, clock=time.perf_counter_ns):
+    """Yield the packets in live audio, given as chunks of samples.
+
+    Chunks are signed 16-bit-scale samples from any sound library, as
+    they are captured. The first chunk is taken to have ended when it
+    arrived, which puts the origin of the packet stamps one chunk back.
+    """
+    decoder = None
+    for samples in chunks:
+        if decoder is None:
+            duration_ns = len(samples) * 1_000_000_000 // sample_rate
+            decoder = AudioDecoder(sample_rate, clock() - duration_ns)
+        yield from decoder.feed(samples)
+
+
+def serial_packets(port, clock=time.perf_counter_ns):
+    """Yield the packets read from a serial port (a pyserial Serial).
+
+    Reads block until bytes arrive and stop when the port returns nothing.
+    """
+    parser = PacketParser()
+    while True:
+        data = port.read(max(1, port.in_waiting))
+        if not data:
+            break
+        yield from parser.feed(data, clock())
+
+
+class StackmatSource(InputSource):
+    """Start, stop and reset events from a Stackmat's packets.
+
+    A solve starts when the timer starts running, at the packet's stamp
+    less the time it shows, so a source that joins mid-solve still finds
+    the true start. It stops at that start plus the time the stopped
+    timer shows, so the recorded time is exactly the timer's. Resetting
+    a running timer abandons the solve.
+    """
+
+    def __init__(self, packets, close=None):
+        super().__init__()
+        self.packets = packets
+        self._close = close
+
+    @classmethod
+    def from_wav(cls, path, clock=time.perf_counter_ns, realtime=False):
+        """Replay a recording of a timer's audio output."""
+        return cls(wav_packets(path, clock, realtime))
+
+    @classmethod
+    def from_audio(cls, chunks, sample_rate, clock=time.perf_counter_ns):
+        """Decode live audio chunks (see audio_packets)."""
+        return cls(audio_packets(chunks, sample_rate, clock))
+
+    @classmethod
+    def from_serial(cls, port, clock=time.perf_counter_ns):
+        """Read a timer plugged into a serial port; needs pyserial."""
+        try:
+            import serial
+        except ImportError:
+            raise StackmatError(
+                "Reading a serial port needs pyserial (pip install pyserial)"
+            ) from None
+        connection = serial.Serial(port, BAUD_RATE, bytesize=8, parity="N")
+        return cls(serial_packets(connection, clock), close=connection.close)
+
+    def events(self):
+        start_ns = None  # Set while the timer is running
+        previous_ms = None
+        for packet in self.packets:
+            if start_ns is None:
+                if packet.status == RUNNING or (
+                    previous_ms is not None
+                    and packet.ms > previous_ms
+                    and packet.status not in (IDLE, STOPPED)
+                ):
+                    start_ns = packet.ts_ns - packet.ms * 1_000_000
+                    yield InputEvent(START, start_ns)
+            elif packet.status == STOPPED:
+                yield InputEvent(STOP, start_ns + packet.ms * 1_000_000)
+                start_ns = None
+            elif packet.status == IDLE:
+                yield InputEvent(RESET, packet.ts_ns)
+                start_ns = None
+            previous_ms = packet.ms
+
+    def close(self):
+        super().close()
+        if self._close is not None:
+            self._close()
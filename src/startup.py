@@ -0,0 +1,73 @@
+"""
+Startup profiling for PSTimer.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Records how long each startup phase takes.
+
+    Phases are timed with perf_counter relative to the moment the profiler
+    was created, along with how many modules each phase imported. A disabled
+    profiler records nothing, so the UI can call it unconditionally.
+    """
+
+    def __init__(self, enabled=True, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.origin = clock()
+        self.phases = []  # (name, start_s, duration_s, modules_loaded)
+        self.marks = []  # (name, at_s)
+        self.on_ready = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as a named phase."""
+        if not self.enabled:
+            yield
+            return
+        modules = len(sys.modules)
+        start = self.clock()
+        try:
+            yield
+        finally:
+            end = self.clock()
+            self.phases.append(
+                (name, start - self.origin, end - start, len(sys.modules) - modules)
+            )
+
+    def mark(self, name):
+        """Record a point in time, e.g. the first frame being drawn."""
+        if self.enabled:
+            self.marks.append((name, self.clock() - self.origin))
+
+    def ready(self):
+        """Mark startup as complete and notify on_ready."""
+        self.mark("startup complete")
+        if self.enabled and self.on_ready is not None:
+            self.on_ready()
+
+    def mark_time(self, name):
+        """Get the time of a mark in seconds since startup, or None."""
+        for mark_name, at in self.marks:
+            if mark_name == name:
+                return at
+        return None
+
+    def report(self):
+        """Format the recorded phases and marks as a text report."""
+        lines = ["PSTimer startup profile", ""]
+        lines.append(f"{'phase':<32} {'start ms':>9} {'took ms':>9} {'modules':>8}")
+        for name, start, duration, modules in self.phases:
+            lines.append(
+                f"{name:<32} {start * 1000:>9.1f} {duration * 1000:>9.1f} "
+                f"{modules:>8}"
+            )
+        if self.marks:
+            lines.append("")
+            for name, at in self.marks:
+                lines.append(f"{name:<32} {at * 1000:>9.1f}")
+        return "\n".join(lines)
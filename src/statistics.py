@@ -2,80 +2,164 @@
 Statistics calculation for speedcubing times.
 """
 
+import bisect
+import uuid
 from datetime import datetime
 
+DNF = float("inf")  # Display time of a DNF, and of an average that is one
+
+
+def trim_count(size):
+    """Get how many solves a WCA average drops at each end: 5%, at least one."""
+    return max(1, -(-size * 5 // 100))
+
+
+def trimmed_average(values):
+    """WCA average of display times: drop the best and worst trim_count.
+
+    DNFs (infinity) count as the slowest; too many of them make the average
+    a DNF (infinity).
+    """
+    trim = trim_count(len(values))
+    ordered = sorted(values)
+    middle = ordered[trim:-trim]
+    if middle[-1] == DNF:
+        return DNF
+    return sum(middle) / len(middle)
+
+
+def window_mean(values):
+    """Mean of display times, or infinity if any is a DNF."""
+    if DNF in values:
+        return DNF
+    return sum(values) / len(values)
+
+
+def best_average(values, size):
+    """Best rolling average of size over display times, oldest first."""
+    if len(values) < size:
+        return None
+    trim = trim_count(size)
+    window = sorted(values[:size])
+    best = trimmed_average(window)
+    for i in range(size, len(values)):
+        window.pop(bisect.bisect_left(window, values[i - size]))
+        bisect.insort(window, values[i])
+        middle = window[trim:-trim]
+        if middle[-1] != DNF:
+            best = min(best, sum(middle) / len(middle))
+    return None if best == DNF else best
+
+
+def best_mean(values, size):
+    """Best rolling mean of size over display times, oldest first.
+
+    Windows with a DNF (infinity) have no mean and are skipped.
+    """
+    best = None
+    for i in range(size, len(values) + 1):
+        mean = window_mean(values[i - size : i])
+        if mean != DNF and (best is None or mean < best):
+            best = mean
+    return best
+
 
 class StatisticsCalculator:
-    """Calculates speedcubing statistics like ao5, ao12, mo3, etc."""
+    """Calculates speedcubing statistics like ao5, ao12, mo3, etc.
+
+    Statistics follow the WCA rules on display times: +2 is included,
+    and an average or mean that is a DNF is infinity (formatted "DNF").
+    """
 
     @staticmethod
-    def calculate_mo3(times):
-        """Calculate Mean of 3 (simple average of last 3 times)."""
-        if len(times) < 3:
+    def calculate_average(times, size):
+        """Calculate the WCA average of the newest size solves, or None."""
+        if len(times) < size:
             return None
-        recent_3 = [t.time for t in times[:3]]
-        return sum(recent_3) / 3
+        return trimmed_average([t.display_time for t in times[:size]])
 
     @staticmethod
-    def calculate_ao5(times):
-        """Calculate Average of 5 (remove best and worst, average the rest)."""
-        if len(times) < 5:
+    def calculate_mean(times, size):
+        """Calculate the mean of the newest size solves, or None."""
+        if len(times) < size:
             return None
-        recent_5 = [t.time for t in times[:5]]
-        recent_5.sort()
-        # Remove best (first) and worst (last), average the middle 3
-        return sum(recent_5[1:4]) / 3
+        return window_mean([t.display_time for t in times[:size]])
 
-    @staticmethod
-    def calculate_ao12(times):
+    @classmethod
+    def calculate_mo3(cls, times):
+        """Calculate Mean of 3 (a DNF if any of the 3 is)."""
+        return cls.calculate_mean(times, 3)
+
+    @classmethod
+    def calculate_ao5(cls, times):
+        """Calculate Average of 5 (remove best and worst, average the rest)."""
+        return cls.calculate_average(times, 5)
+
+    @classmethod
+    def calculate_ao12(cls, times):
         """Calculate Average of 12 (remove best and worst, average the rest)."""
-        if len(times) < 12:
-            return None
-        recent_12 = [t.time for t in times[:12]]
-        recent_12.sort()
-        # Remove best and worst, average the middle 10
-        return sum(recent_12[1:11]) / 10
+        return cls.calculate_average(times, 12)
 
-    @staticmethod
-    def calculate_ao100(times):
+    @classmethod
+    def calculate_ao100(cls, times):
         """Calculate Average of 100 (remove best 5 and worst 5, average the rest)."""
-        if len(times) < 100:
-            return None
-        recent_100 = [t.time for t in times[:100]]
-        recent_100.sort()
-        # Remove best 5 and worst 5, average the middle 90
-        return sum(recent_100[5:95]) / 90
+        return cls.calculate_average(times, 100)
 
     @staticmethod
     def get_best_time(times):
-        """Get the best (fastest) time."""
+        """Get the best (fastest) solve, with penalties; a DNF only if all are."""
         if not times:
             return None
-        return min(times, key=lambda t: t.time)
+        return min(times, key=lambda t: t.display_time)
 
     @staticmethod
     def get_worst_time(times):
-        """Get the worst (slowest) time."""
+        """Get the worst (slowest) solve, with penalties; DNFs count as slowest."""
         if not times:
             return None
-        return max(times, key=lambda t: t.time)
+        return max(times, key=lambda t: t.display_time)
 
     @staticmethod
     def get_session_mean(times):
-        """Calculate mean of all times in session."""
-        if not times:
+        """Calculate the mean of the non-DNF times, with +2 applied."""
+        valid = [t.display_time for t in times if t.penalty != "DNF"]
+        if not valid:
             return None
-        return sum(t.time for t in times) / len(times)
+        return sum(valid) / len(valid)
+
+    @classmethod
+    def calculate_all(cls, times):
+        """Calculate every session statistic for a newest-first list of times."""
+        return {
+            "count": len(times),
+            "mo3": cls.calculate_mo3(times),
+            "ao5": cls.calculate_ao5(times),
+            "ao12": cls.calculate_ao12(times),
+            "ao100": cls.calculate_ao100(times),
+            "best": cls.get_best_time(times),
+            "worst": cls.get_worst_time(times),
+            "mean": cls.get_session_mean(times),
+        }
 
 
 class SolveTime:
     """Represents a single solve time with metadata."""
 
-    def __init__(self, time, scramble="", timestamp=None, penalty=None):
-        self.time = time
+    def __init__(
+        self,
+        time,
+        scramble="",
+        timestamp=None,
+        penalty=None,
+        reconstruction=None,
+        elapsed_ns=None,
+    ):
+        self.time = time  # Seconds
+        self.elapsed_ns = elapsed_ns  # Exact time for solves timed here
         self.scramble = scramble
         self.timestamp = timestamp or datetime.now()
         self.penalty = penalty  # None, "+2", "DNF"
+        self.reconstruction = reconstruction  # Reconstruction of the moves
 
     @property
     def display_time(self):
@@ -94,82 +178,310 @@ class SolveTime:
         return str(self)
 
     def __str__(self):
-        from .timer import Stopwatch
+        from .formatting import default_formatter
 
-        time_str = Stopwatch.format_time(self.time)
-        if self.penalty == "DNF":
-            return "DNF"
-        elif self.penalty == "+2":
-            return f"{Stopwatch.format_time(self.time + 2.0)}+"
-        return time_str
+        return default_formatter.format_solve(self)
 
 
-class Session:
-    """Manages a session of solves."""
+# Rough memory use of one loaded SolveTime with its datetime and scramble
+SOLVE_BYTES = 300
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
 
-    def __init__(self, name="Session 1"):
+
+class Session:
+    """Manages a session of solves.
+
+    A session can be a lightweight handle: given a loader, its times are
+    read on first access and can be dropped again with unload() once they
+    are saved. cached_summary (a SessionSummary) answers len() and index
+    queries without loading. changes lists the edits since the last save,
+    which SessionStore appends to the session's journal.
+    """
+
+    def __init__(
+        self, name="Session 1", session_id=None, puzzle_type="3x3x3", loader=None
+    ):
         self.name = name
-        self.times = []
+        self.session_id = session_id or uuid.uuid4().hex  # Stable storage key
+        self.puzzle_type = puzzle_type
+        self.loader = loader  # Returns the stored times, newest first
+        self._times = None if loader is not None else []
+        self.saved_version = None  # Version last written by the store
+        self.changes = []  # Edits since the last save; None if not recorded
+        self.cached_summary = None
+        self._histogram = None  # TimeHistogram, built on first use
+        self.sketch_loader = None  # Returns the stored KLLSketch, if any
+        self._sketch = None
+        self._sketch_version = -1
+        self.last_used = 0  # SessionManager clock for evicting
         self.stats_calc = StatisticsCalculator()
+        self.version = 0  # Bumped on every change to the times
+        self._stats_cache = None
+        self._stats_version = -1
+
+    @property
+    def times(self):
+        """Get the solves, newest first, loading them if needed."""
+        if self._times is None:
+            self._times = self.loader()
+        return self._times
+
+    @times.setter
+    def times(self, value):
+        self._times = value
+        self._histogram = None
+
+    @property
+    def loaded(self):
+        """Check whether the solves are in memory."""
+        return self._times is not None
+
+    def unload(self):
+        """Drop the solves from memory if they are saved; True if dropped."""
+        if self.loader is None or self.saved_version != self.version:
+            return False
+        if self._times is not None:
+            self.summary()  # Keep answering len() and queries
+            self._times = None
+            self._histogram = None
+            self._stats_cache = None
+            self._stats_version = -1
+        return True
+
+    def memory_estimate(self):
+        """Estimate the bytes held by the loaded solves."""
+        return len(self._times) * SOLVE_BYTES if self._times is not None else 0
+
+    def summary(self):
+        """Get the SessionSummary of the solves.
+
+        It is rebuilt only if it fell out of step; after edits its bests
+        may be stale (see refresh_summary).
+        """
+        from .session_index import SessionSummary
+
+        summary = self.cached_summary
+        if summary is None or summary.version != self.version:
+            summary = self.cached_summary = SessionSummary.from_session(self)
+        summary.name = self.name
+        summary.puzzle_type = self.puzzle_type
+        return summary
+
+    def refresh_summary(self):
+        """Get the SessionSummary with bests recomputed if edits left them stale."""
+        from .session_index import SessionSummary
+
+        if self.summary().bests_stale:
+            self.cached_summary = SessionSummary.from_session(self)
+        return self.summary()
+
+    def apply_summary(self, summary):
+        """Use a summary built elsewhere, e.g. off-thread, if it is current.
+
+        Returns False (and keeps the old one) if the session has changed
+        since.
+        """
+        if summary.version != self.version:
+            return False
+        self.cached_summary = summary
+        return True
+
+    def mark_changed(self, change=None):
+        """Record that the times changed, e.g. after editing a penalty.
+
+        change describes the edit for the store's journal, such as
+        ("penalty", index, penalty); without one the next save rewrites
+        the whole session.
+        """
+        self.version += 1
+        if change is None:
+            self.changes = None
+        elif self.changes is not None:
+            self.changes.append(change)
 
     def add_time(self, solve_time):
         """Add a solve time to the session."""
+        sketch_current = self._sketch_version == self.version
         self.times.insert(0, solve_time)  # Insert at beginning for newest first
+        if self._histogram is not None:
+            self._histogram.add(solve_time.display_time)
+        self.mark_changed(("add", [solve_time]))
+        if sketch_current:
+            self._sketch_add([solve_time])
+
+    def add_times(self, solve_times):
+        """Add many solve times at once, given oldest first."""
+        sketch_current = self._sketch_version == self.version
+        self.times[:0] = reversed(solve_times)
+        if self._histogram is not None:
+            for solve_time in solve_times:
+                self._histogram.add(solve_time.display_time)
+        self.mark_changed(("add", list(solve_times)))
+        if self.cached_summary is not None:
+            self.cached_summary.solves_added(self, solve_times)
+        if sketch_current:
+            self._sketch_add(solve_times)
 
     def remove_time(self, index):
         """Remove a time from the session."""
         if 0 <= index < len(self.times):
-            return self.times.pop(index)
+            self.mark_changed(("delete", index))
+            solve_time = self.times.pop(index)
+            if self._histogram is not None:
+                self._histogram.remove(solve_time.display_time)
+            if self.cached_summary is not None:
+                self.cached_summary.solve_removed(self, solve_time)
+            return solve_time
         return None
 
+    def set_penalty(self, index, penalty):
+        """Change the penalty of the solve at index."""
+        solve_time = self.times[index]
+        old_value = solve_time.display_time
+        if self._histogram is not None:
+            self._histogram.remove(old_value)
+        solve_time.penalty = penalty
+        if self._histogram is not None:
+            self._histogram.add(solve_time.display_time)
+        self.mark_changed(("penalty", index, penalty))
+        if self.cached_summary is not None:
+            self.cached_summary.penalty_changed(self, solve_time, old_value)
+
+    def set_reconstruction(self, index, reconstruction):
+        """Attach a Reconstruction (or None) to the solve at index.
+
+        Times are unchanged, so the summary, sketch and statistics stay
+        current.
+        """
+        self.times[index].reconstruction = reconstruction
+        summary = self.cached_summary
+        summary_current = summary is not None and summary.version == self.version
+        sketch_current = self._sketch_version == self.version
+        stats_current = self._stats_version == self.version
+        self.mark_changed(("reconstruction", index, reconstruction))
+        if summary_current:
+            summary.version = self.version
+        if sketch_current:
+            self._sketch_version = self.version
+        if stats_current:
+            self._stats_version = self.version
+
     def clear_times(self):
         """Clear all times from the session."""
+        from .session_index import SessionSummary
+
         self.times.clear()
+        if self._histogram is not None:
+            self._histogram.clear()
+        self.mark_changed(("clear",))
+        self.cached_summary = SessionSummary.from_session(self)
+
+    def sketch(self):
+        """Get a KLLSketch of the non-DNF display times.
+
+        Solves added with add_time/add_times go straight into the sketch;
+        other edits rebuild it when it is next asked for. A session that is
+        not loaded uses its stored sketch rather than reading its solves.
+        """
+        if self._sketch_version != self.version:
+            sketch = None
+            if not self.loaded and self.sketch_loader is not None:
+                sketch = self.sketch_loader()
+            if sketch is None:
+                from .sketch import KLLSketch
+
+                self._sketch = KLLSketch()
+                self._sketch_add(reversed(self.times))
+            else:
+                self._sketch = sketch
+                self._sketch_version = self.version
+        return self._sketch
+
+    def _sketch_add(self, solve_times):
+        """Add solves to the up-to-date sketch."""
+        for solve_time in solve_times:
+            seconds = solve_time.display_time
+            if seconds != float("inf"):
+                self._sketch.update(seconds)
+        self._sketch_version = self.version
+
+    def histogram(self):
+        """Get the TimeHistogram of the display times, kept current on edits."""
+        if self._histogram is None:
+            from .histogram import TimeHistogram
+
+            histogram = TimeHistogram()
+            for solve_time in self.times:
+                histogram.add(solve_time.display_time)
+            self._histogram = histogram
+        return self._histogram
 
     def clear(self):
         """Alias for clear_times for consistency."""
         self.clear_times()
 
     def get_statistics(self):
-        """Get all statistics for the session."""
-        return {
-            "count": len(self.times),
-            "mo3": self.stats_calc.calculate_mo3(self.times),
-            "ao5": self.stats_calc.calculate_ao5(self.times),
-            "ao12": self.stats_calc.calculate_ao12(self.times),
-            "ao100": self.stats_calc.calculate_ao100(self.times),
-            "best": self.stats_calc.get_best_time(self.times),
-            "worst": self.stats_calc.get_worst_time(self.times),
-            "mean": self.stats_calc.get_session_mean(self.times),
-        }
+        """Get all statistics for the session, cached until the times change."""
+        if self._stats_version != self.version:
+            self._stats_cache = self.stats_calc.calculate_all(self.times)
+            self._stats_version = self.version
+        return self._stats_cache
+
+    def cached_statistics(self):
+        """Get the statistics if they are up to date, otherwise None."""
+        if self._stats_version == self.version:
+            return self._stats_cache
+        return None
+
+    def cache_statistics(self, version, stats):
+        """Store statistics computed elsewhere for the given version.
+
+        Returns False (and stores nothing) if the session has changed since.
+        """
+        if version != self.version:
+            return False
+        self._stats_cache = stats
+        self._stats_version = version
+        return True
 
     def __len__(self):
+        if self._times is None and self.cached_summary is not None:
+            return self.cached_summary.count
         return len(self.times)
 
 
 class SessionManager:
-    """Manages multiple sessions."""
+    """Manages multiple sessions.
 
-    def __init__(self):
+    Sessions handed out by SessionStore load their solves on first use;
+    trim() unloads the least recently used saved sessions (never the
+    current one) while the loaded solves are estimated to use more than
+    memory_budget bytes.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
         self.sessions = [Session("Session 1")]
         self.current_session_index = 0
+        self.memory_budget = memory_budget
+        self._clock = 0
 
     @property
     def current_session(self):
         """Get the current active session."""
         return self.sessions[self.current_session_index]
 
-    def add_session(self, name=None):
+    def add_session(self, name=None, puzzle_type="3x3x3"):
         """Add a new session."""
         if name is None:
             name = f"Session {len(self.sessions) + 1}"
-        session = Session(name)
+        session = Session(name, puzzle_type=puzzle_type)
         self.sessions.append(session)
         return session
 
-    def new_session(self, name=None):
+    def new_session(self, name=None, puzzle_type="3x3x3"):
         """Create a new session and switch to it."""
-        session = self.add_session(name)
+        session = self.add_session(name, puzzle_type)
         self.current_session_index = len(self.sessions) - 1
         return session
 
@@ -177,9 +489,27 @@ class SessionManager:
         """Switch to a different session."""
         if 0 <= index < len(self.sessions):
             self.current_session_index = index
+            self._clock += 1
+            self.sessions[index].last_used = self._clock
+            self.trim()
             return True
         return False
 
+    def trim(self):
+        """Unload inactive saved sessions until within the memory budget."""
+        current = self.current_session
+        loaded = [s for s in self.sessions if s.loaded and s is not current]
+        # The current session counts even before its solves are read
+        used = len(current) * SOLVE_BYTES
+        used += sum(session.memory_estimate() for session in loaded)
+        for session in sorted(loaded, key=lambda s: s.last_used):
+            if used <= self.memory_budget:
+                break
+            estimate = session.memory_estimate()
+            if session.unload():
+                used -= estimate
+        return used
+
     def delete_session(self, index):
         """Delete a session."""
         if len(self.sessions) > 1 and 0 <= index < len(self.sessions):
@@ -0,0 +1,138 @@
+"""
+Background statistics computation for PSTimer.
+"""
+
+import queue
+import threading
+import weakref
+
+from .session_index import SessionSummary
+from .statistics import StatisticsCalculator
+
+
+class StatisticsWorker:
+    """Computes session statistics on a background thread.
+
+    The Tk thread submits a snapshot of a session's times tagged with the
+    session version, and later polls for results (e.g. from an after()
+    callback). Requests superseded by a newer version of the same session
+    are skipped by the worker, and stale results are dropped on poll, so
+    only statistics matching the current session state reach the UI.
+
+    It also rebuilds session summaries whose bests were left stale by an
+    edit (see submit_summary), which takes a scan of every solve.
+    """
+
+    def __init__(self, inline_threshold=5000):
+        # Sessions smaller than this are cheap enough to compute inline
+        self.inline_threshold = inline_threshold
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = weakref.WeakKeyDictionary()  # session -> newest version
+        self._summaries = weakref.WeakKeyDictionary()  # session -> (version, cb)
+        self._thread = None
+
+    def should_offload(self, session):
+        """Check whether a session is large enough to compute off-thread."""
+        return len(session) >= self.inline_threshold
+
+    def submit(self, session):
+        """Queue a statistics snapshot of session at its current version."""
+        version = session.version
+        self._latest[session] = version
+        self._requests.put(("stats", session, version, list(session.times)))
+        self._ensure_started()
+
+    def submit_summary(self, session, callback=None):
+        """Queue a rebuild of session's summary from a snapshot of its times.
+
+        poll() swaps the result in if the session has not changed since and
+        then calls callback(session); if it has, the rebuild is queued again.
+        """
+        version = session.version
+        self._summaries[session] = (version, callback)
+        self._requests.put(("summary", session, version, list(session.times)))
+        self._ensure_started()
+
+    @property
+    def pending(self):
+        """Number of submitted requests whose results have not been polled."""
+        return len(self._latest) + len(self._summaries)
+
+    def poll(self):
+        """Collect finished results, dropping stale ones.
+
+        Returns a list of (session, version, stats) for results that match
+        the session's current version. Fresh results are also stored in the
+        session's statistics cache.
+        """
+        fresh = []
+        while True:
+            try:
+                kind, session, version, result = self._results.get_nowait()
+            except queue.Empty:
+                return fresh
+
+            if kind == "summary":
+                self._apply_summary(session, version, result)
+                continue
+            stats = result
+            if self._latest.get(session) == version:
+                del self._latest[session]
+            if session.cache_statistics(version, stats):
+                fresh.append((session, version, stats))
+
+    def _apply_summary(self, session, version, summary):
+        """Swap in a rebuilt summary, or rebuild again if it is already old."""
+        request = self._summaries.get(session)
+        if request is None or request[0] != version:
+            return  # Superseded by a newer submission
+        del self._summaries[session]
+        callback = request[1]
+        if session.apply_summary(summary):
+            if callback is not None:
+                callback(session)
+            return
+        current = session.cached_summary
+        if current is not None and current.version == session.version:
+            if current.bests_stale:
+                self.submit_summary(session, callback)
+
+    def stop(self):
+        """Ask the worker thread to exit."""
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _ensure_started(self):
+        """Start the worker thread on first use."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="pstimer-stats", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """Worker loop: compute statistics for the newest request per session."""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+
+            kind, session, version, times = request
+            if kind == "summary":
+                if self._summaries.get(session, (None,))[0] != version:
+                    continue  # Superseded by a newer submission
+                result = SessionSummary.from_times(
+                    session.session_id,
+                    session.name,
+                    session.puzzle_type,
+                    version,
+                    times,
+                )
+            else:
+                if self._latest.get(session) != version:
+                    continue  # Superseded by a newer submission
+                result = StatisticsCalculator.calculate_all(times)
+            self._results.put((kind, session, version, result))
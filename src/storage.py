@@ -0,0 +1,380 @@
+"""
+Session persistence for PSTimer.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+from .pb_tracker import PersonalBest
+from .reconstruction import Reconstruction, ReconstructionError
+from .session_index import SessionSummary
+from .sketch import KLLSketch
+from .statistics import DEFAULT_MEMORY_BUDGET, Session, SessionManager, SolveTime
+
+FORMAT_VERSION = 1
+
+# Journal rows above which a save rewrites the session file instead
+JOURNAL_LIMIT = 10_000
+
+
+def default_data_dir():
+    """Get the directory sessions are stored in (PSTIMER_HOME overrides)."""
+    return os.environ.get("PSTIMER_HOME") or os.path.join(
+        os.path.expanduser("~"), ".pstimer"
+    )
+
+
+def default_memory_budget():
+    """Get the bytes of solves to keep loaded (PSTIMER_MEMORY_MB overrides)."""
+    megabytes = os.environ.get("PSTIMER_MEMORY_MB")
+    if megabytes:
+        return int(float(megabytes) * 1024 * 1024)
+    return DEFAULT_MEMORY_BUDGET
+
+
+class SessionStore:
+    """Stores sessions as JSON files in a directory.
+
+    index.json lists the sessions in order plus the current one, with a
+    summary of each (see SessionSummary); each session's solves live in
+    sessions/<session_id>.json as parallel columns (newest first, like
+    Session.times), which is compact and quick to load, next to a small
+    <session_id>.sketch.json quantile sketch. Reconstructions are one
+    more column, written only if a solve has one. pbs.json holds the
+    personal best timeline as compact rows. Loading reads only the index:
+    sessions are handles that read their solves on first use, so startup
+    does not grow with the lifetime solve count. Files are written to a
+    temporary name and renamed into place so a crash never leaves a
+    half-written file behind.
+
+    Saving appends a session's edits since the last save (Session.changes)
+    to <session_id>.journal as JSON lines, so a save costs the edits, not
+    the session. Reading replays the journal over the session file. A
+    compacting save, or a journal past JOURNAL_LIMIT rows, rewrites the
+    file and drops the journal. The journal names the file generation it
+    applies to, so one left behind by a crash mid-rewrite is ignored.
+    """
+
+    def __init__(self, root=None, memory_budget=None):
+        self.root = root or default_data_dir()
+        self.memory_budget = memory_budget or default_memory_budget()
+        self.sessions_dir = os.path.join(self.root, "sessions")
+        self.index_path = os.path.join(self.root, "index.json")
+        self.pb_path = os.path.join(self.root, "pbs.json")
+        self._saved_versions = {}  # session_id -> version last written
+        self._generations = {}  # session_id -> generation of the read file
+        self._journal_rows = {}  # session_id -> rows in its journal
+
+    def exists(self):
+        """Check whether anything has been saved yet."""
+        return os.path.exists(self.index_path)
+
+    def session_path(self, session_id):
+        """Get the file a session's solves are stored in."""
+        return os.path.join(self.sessions_dir, f"{session_id}.json")
+
+    def sketch_path(self, session_id):
+        """Get the file a session's quantile sketch is stored in."""
+        return os.path.join(self.sessions_dir, f"{session_id}.sketch.json")
+
+    def journal_path(self, session_id):
+        """Get the file a session's edits since its last rewrite go to."""
+        return os.path.join(self.sessions_dir, f"{session_id}.journal")
+
+    def load(self):
+        """Load a SessionManager of session handles; fresh if nothing is stored."""
+        manager = SessionManager(self.memory_budget)
+        if not self.exists():
+            return manager
+
+        index = self._read_json(self.index_path)
+        sessions = []
+        for entry in index.get("sessions", []):
+            session = self.load_session(
+                entry["id"],
+                entry.get("name", "Session"),
+                entry.get("puzzle_type", "3x3x3"),
+                entry.get("summary"),
+            )
+            sessions.append(session)
+        if sessions:
+            manager.sessions = sessions
+            current = index.get("current", 0)
+            manager.current_session_index = min(max(current, 0), len(sessions) - 1)
+        return manager
+
+    def load_session(self, session_id, name, puzzle_type="3x3x3", summary=None):
+        """Make a handle for a stored session; its solves load on first use."""
+        session = Session(
+            name, session_id, puzzle_type, loader=lambda: self.read_times(session_id)
+        )
+        if summary is not None:
+            session.cached_summary = SessionSummary.from_dict(
+                summary, session_id, name, puzzle_type, session.version
+            )
+        session.sketch_loader = lambda: self.read_sketch(session_id)
+        session.saved_version = session.version
+        self._saved_versions[session_id] = session.version
+        return session
+
+    def read_times(self, session_id):
+        """Read a session's solves, newest first, with its journal applied."""
+        path = self.session_path(session_id)
+        times = []
+        generation = None
+        if os.path.exists(path):
+            data = self._read_json(path)
+            generation = data.get("generation")
+            times = [
+                SolveTime(time, scramble, datetime.fromtimestamp(ts), penalty)
+                for time, penalty, scramble, ts in zip(
+                    data["times"],
+                    data["penalties"],
+                    data["scrambles"],
+                    data["timestamps"],
+                )
+            ]
+            for solve, stored in zip(times, data.get("reconstructions") or ()):
+                solve.reconstruction = self._read_reconstruction(stored)
+        self._generations[session_id] = generation
+        self._replay_journal(session_id, times, generation)
+        return times
+
+    def _replay_journal(self, session_id, times, generation):
+        """Apply a session's journal to its stored solves (newest first)."""
+        path = self.journal_path(session_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            self._journal_rows[session_id] = 0
+            return
+        if not lines or self._parse_row(lines[0]) != ["base", generation]:
+            self._remove(path)  # Left behind by an interrupted rewrite
+            self._journal_rows[session_id] = 0
+            return
+        self._journal_rows[session_id] = len(lines)
+        times.reverse()  # Oldest first, so adds append; indices count from the end
+        for line in lines[1:]:
+            row = self._parse_row(line)
+            if row is None:
+                break  # Cut short by a crash mid-write
+            kind = row[0]
+            if kind == "add":
+                time, penalty, scramble, ts, stored = row[1:]
+                solve = SolveTime(time, scramble, datetime.fromtimestamp(ts), penalty)
+                solve.reconstruction = self._read_reconstruction(stored)
+                times.append(solve)
+            elif kind == "penalty":
+                times[-1 - row[1]].penalty = row[2]
+            elif kind == "delete":
+                del times[-1 - row[1]]
+            elif kind == "reconstruction":
+                stored = row[2]
+                times[-1 - row[1]].reconstruction = self._read_reconstruction(stored)
+            elif kind == "clear":
+                times.clear()
+        times.reverse()
+
+    @staticmethod
+    def _parse_row(line):
+        """Parse one journal line; None if it is incomplete."""
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _read_reconstruction(stored):
+        """Rebuild a stored Reconstruction; None if absent or unreadable."""
+        if stored is None:
+            return None
+        try:
+            return Reconstruction.from_dict(stored)
+        except ReconstructionError:
+            return None  # Keep the solve without its unreadable moves
+
+    def read_sketch(self, session_id):
+        """Read a session's KLLSketch; None if missing, unreadable or stale."""
+        if os.path.exists(self.journal_path(session_id)):
+            return None  # Edited since it was written
+        try:
+            return KLLSketch.from_dict(self._read_json(self.sketch_path(session_id)))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None  # Rebuilt from the solves instead
+
+    def read_pb_history(self):
+        """Read the PersonalBest timeline; empty if missing or unreadable."""
+        try:
+            rows = self._read_json(self.pb_path)["history"]
+            return [PersonalBest.from_row(row) for row in rows]
+        except (OSError, ValueError, KeyError, TypeError):
+            return []
+
+    def save_pb_history(self, history):
+        """Write the PersonalBest timeline."""
+        os.makedirs(self.root, exist_ok=True)
+        self._write_json(
+            self.pb_path,
+            {"format": FORMAT_VERSION, "history": [pb.to_row() for pb in history]},
+        )
+
+    def save(self, manager, compact=False):
+        """Write changed sessions and the index; remove deleted sessions.
+
+        Edits are appended to the session journals; with compact, sessions
+        with a journal are rewritten whole instead (loaded ones only, the
+        rest keep their journal). Returns the number of sessions written.
+        """
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        written = 0
+        for session in manager.sessions:
+            session_id = session.session_id
+            if self._saved_versions.get(session_id) != session.version:
+                if compact or not self.append_session(session):
+                    self.save_session(session)
+                written += 1
+            elif compact and self._journal_rows.get(session_id):
+                if session.loaded:
+                    self.save_session(session)
+                    written += 1
+
+        live = {session.session_id for session in manager.sessions}
+        for session_id in list(self._saved_versions):
+            if session_id not in live:
+                self._remove(self.session_path(session_id))
+                self._remove(self.sketch_path(session_id))
+                self._remove(self.journal_path(session_id))
+                del self._saved_versions[session_id]
+
+        self._write_json(
+            self.index_path,
+            {
+                "format": FORMAT_VERSION,
+                "current": manager.current_session_index,
+                "sessions": [
+                    {
+                        "id": session.session_id,
+                        "name": session.name,
+                        "puzzle_type": session.puzzle_type,
+                        "summary": session.summary().to_dict(),
+                    }
+                    for session in manager.sessions
+                ],
+            },
+        )
+        manager.trim()  # Saved sessions can now be unloaded
+        return written
+
+    def save_session(self, session):
+        """Write one session's solves whole, replacing its journal.
+
+        A session made at runtime gets loaders once written, so it can be
+        unloaded under the memory budget like one that was read.
+        """
+        if not session.loaded:
+            return  # Unchanged since it was read
+        session_id = session.session_id
+        times = session.times
+        generation = uuid.uuid4().hex
+        data = {
+            "format": FORMAT_VERSION,
+            "generation": generation,
+            "name": session.name,
+            "times": [solve.time for solve in times],
+            "penalties": [solve.penalty for solve in times],
+            "scrambles": [solve.scramble for solve in times],
+            "timestamps": [solve.timestamp.timestamp() for solve in times],
+        }
+        if any(solve.reconstruction is not None for solve in times):
+            data["reconstructions"] = [
+                solve.reconstruction.to_dict() if solve.reconstruction else None
+                for solve in times
+            ]
+        self._write_json(self.session_path(session_id), data)
+        self._remove(self.journal_path(session_id))
+        self._generations[session_id] = generation
+        self._journal_rows[session_id] = 0
+        self._write_json(self.sketch_path(session_id), session.sketch().to_dict())
+        self._mark_saved(session)
+        if session.loader is None:
+            session.loader = lambda: self.read_times(session_id)
+            session.sketch_loader = lambda: self.read_sketch(session_id)
+
+    def append_session(self, session):
+        """Append a session's edits since it was last saved to its journal.
+
+        Returns False, writing nothing, if the session has to be written
+        whole: it was never written, its edits were not recorded, or the
+        journal would grow past JOURNAL_LIMIT rows.
+        """
+        session_id = session.session_id
+        changes = session.changes
+        if not session.loaded or session.saved_version is None or changes is None:
+            return False
+        rows = [row for change in changes for row in self._journal_rows_for(change)]
+        existing = self._journal_rows.get(session_id, 0)
+        if existing + len(rows) + 1 > JOURNAL_LIMIT:
+            return False
+        if not existing:
+            rows.insert(0, ["base", self._generations.get(session_id)])
+        with open(self.journal_path(session_id), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+        self._journal_rows[session_id] = existing + len(rows)
+        self._mark_saved(session)
+        return True
+
+    @staticmethod
+    def _journal_rows_for(change):
+        """Turn one of Session.changes into journal rows."""
+        kind = change[0]
+        if kind == "add":
+            return [
+                [
+                    "add",
+                    solve.time,
+                    solve.penalty,
+                    solve.scramble,
+                    solve.timestamp.timestamp(),
+                    solve.reconstruction.to_dict() if solve.reconstruction else None,
+                ]
+                for solve in change[1]
+            ]
+        if kind == "reconstruction":
+            _, index, reconstruction = change
+            return [[kind, index, reconstruction.to_dict() if reconstruction else None]]
+        return [list(change)]
+
+    def _mark_saved(self, session):
+        """Record that a session's current version is on disk."""
+        self._saved_versions[session.session_id] = session.version
+        session.saved_version = session.version
+        session.changes = []
+
+    def is_dirty(self, manager):
+        """Check whether any session changed since it was last saved."""
+        return any(
+            self._saved_versions.get(session.session_id) != session.version
+            for session in manager.sessions
+        )
+
+    def _read_json(self, path):
+        """Read a JSON file."""
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path, data):
+        """Atomically write a JSON file."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _remove(self, path):
+        """Delete a file if it exists."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
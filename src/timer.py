@@ -3,6 +3,9 @@ Timer core functionality for PSTimer.
 """
 
 import time
+from array import array
+
+from .formatting import TimeParseError, default_formatter, parse_time
 
 
 class Stopwatch:
@@ -13,16 +16,24 @@ class Stopwatch:
         self.start_ts = None
         self.elapsed = 0.0  # seconds
 
-    def start(self):
-        """Start the timer."""
+    def start(self, ts=None):
+        """Start the timer.
+
+        ts is an optional time.perf_counter() timestamp, so callers can start
+        from the moment the input happened rather than when it was handled.
+        """
         if not self.running:
-            self.start_ts = time.perf_counter()
+            self.start_ts = time.perf_counter() if ts is None else ts
             self.running = True
 
-    def stop(self):
-        """Stop the timer and return final time."""
+    def stop(self, ts=None):
+        """Stop the timer and return final time.
+
+        ts is an optional time.perf_counter() timestamp, as for start().
+        """
         if self.running:
-            self.elapsed += time.perf_counter() - self.start_ts
+            end_ts = time.perf_counter() if ts is None else ts
+            self.elapsed += max(0.0, end_ts - self.start_ts)
             self.start_ts = None
             self.running = False
             return self.elapsed
@@ -43,35 +54,125 @@ class Stopwatch:
     @staticmethod
     def format_time(seconds):
         """Format time in speedcubing format (M:SS.cc or SS.cc)."""
-        if seconds is None:
-            return "---"
-
-        total_cs = int(round(seconds * 100))
-        cs = total_cs % 100
-        total_s = total_cs // 100
-        s = total_s % 60
-        m = total_s // 60
-
-        if total_s >= 60:
-            return f"{m}:{s:02d}.{cs:02d}"
-        else:
-            return f"{s:02d}.{cs:02d}"
+        return default_formatter.format(seconds)
 
     @staticmethod
     def time_to_seconds(time_str):
-        """Convert formatted time string back to seconds."""
+        """Convert formatted time string back to seconds.
+
+        Returns 0.0 for invalid input; use formatting.parse_time to get errors
+        and penalties instead.
+        """
         try:
-            if ":" in time_str:
-                parts = time_str.split(":")
-                minutes = int(parts[0])
-                sec_parts = parts[1].split(".")
-                seconds = int(sec_parts[0])
-                centiseconds = int(sec_parts[1])
-                return minutes * 60 + seconds + centiseconds / 100
-            else:
-                sec_parts = time_str.split(".")
-                seconds = int(sec_parts[0])
-                centiseconds = int(sec_parts[1])
-                return seconds + centiseconds / 100
-        except (ValueError, IndexError):
+            return parse_time(time_str).seconds
+        except TimeParseError:
             return 0.0
+
+
+class PrecisionStopwatch:
+    """Integer-nanosecond stopwatch with split support.
+
+    Timestamps come from time.perf_counter_ns() (or are passed in by the
+    caller), and all arithmetic is done on integers, so elapsed and split
+    times are exact with no float accumulation. Splits, e.g. the phases of a
+    CFOP solve, are written into a preallocated array.
+    """
+
+    format_time = staticmethod(Stopwatch.format_time)
+    time_to_seconds = staticmethod(Stopwatch.time_to_seconds)
+
+    def __init__(self, max_splits=16):
+        self.running = False
+        self.start_ns = None  # Raw perf_counter_ns of the last start
+        self.stop_ns = None  # Raw perf_counter_ns of the last stop
+        self.elapsed_ns = 0
+        self.max_splits = max_splits
+        self._splits = array("q", bytes(8 * max_splits))
+        self._phases = array("q", bytes(8 * (max_splits + 1)))
+        self.split_count = 0
+        self.phase_count = 0
+
+    def start(self, ts_ns=None):
+        """Start the timer, optionally at an explicit perf_counter_ns stamp."""
+        if not self.running:
+            self.start_ns = time.perf_counter_ns() if ts_ns is None else ts_ns
+            self.stop_ns = None
+            self.running = True
+
+    def split(self, ts_ns=None):
+        """Record a split and return the phase time since the previous one in ns."""
+        if not self.running:
+            raise RuntimeError("Cannot split a stopwatch that is not running")
+        if self.split_count >= self.max_splits:
+            raise IndexError(f"At most {self.max_splits} splits per solve")
+
+        ts_ns = time.perf_counter_ns() if ts_ns is None else ts_ns
+        previous = (
+            self._splits[self.split_count - 1] if self.split_count else self.start_ns
+        )
+        phase = max(0, ts_ns - previous)
+        self._splits[self.split_count] = ts_ns
+        self._phases[self.split_count] = phase
+        self.split_count += 1
+        self.phase_count = self.split_count
+        return phase
+
+    def stop(self, ts_ns=None):
+        """Stop the timer and return the final time in integer nanoseconds.
+
+        Convert to seconds only for display (see TimeFormatter.format_ns).
+        """
+        if self.running:
+            self.stop_ns = time.perf_counter_ns() if ts_ns is None else ts_ns
+            self.elapsed_ns += max(0, self.stop_ns - self.start_ns)
+            self.running = False
+            previous = (
+                self._splits[self.split_count - 1]
+                if self.split_count
+                else self.start_ns
+            )
+            self._phases[self.split_count] = max(0, self.stop_ns - previous)
+            self.phase_count = self.split_count + 1
+        return self.elapsed_ns
+
+    def reset(self):
+        """Reset the timer and splits to zero."""
+        self.running = False
+        self.start_ns = None
+        self.stop_ns = None
+        self.elapsed_ns = 0
+        self.split_count = 0
+        self.phase_count = 0
+
+    def get_time_ns(self):
+        """Get current elapsed time in nanoseconds."""
+        if self.running:
+            return self.elapsed_ns + (time.perf_counter_ns() - self.start_ns)
+        return self.elapsed_ns
+
+    def get_time(self):
+        """Get current elapsed time in seconds."""
+        return self.get_time_ns() / 1_000_000_000
+
+    @property
+    def elapsed_ms(self):
+        """Elapsed time in whole milliseconds (truncated)."""
+        return self.elapsed_ns // 1_000_000
+
+    @property
+    def elapsed_cs(self):
+        """Elapsed time in whole centiseconds (truncated, as WCA rules)."""
+        return self.elapsed_ns // 10_000_000
+
+    def splits_ns(self):
+        """Get the raw perf_counter_ns stamp of each split."""
+        return self._splits[: self.split_count].tolist()
+
+    def phase_times_ns(self):
+        """Get the duration of each phase in ns, ending with the final phase.
+
+        Phases are written as splits and the stop are recorded (never
+        negative, even if stamps arrive out of order). The result is a
+        copy, so it stays valid after the stopwatch is reset and reused.
+        """
+        return self._phases[: self.phase_count]
@@ -4,37 +4,48 @@ Main UI for PSTimer - csTimer-inspired Rubik's cube timer.
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
-import time
 import os
+import queue
 
-from .timer import Stopwatch
-from .scramble import ScrambleManager
-from .statistics import SessionManager, SolveTime
+from .core import TimerCore
+from .storage import SessionStore
 from .themes import ThemeManager
-from .cube_visualization import CubeVisualization
-from .settings import show_settings_dialog
-from .about import show_about_dialog
+from .display import DisplayScheduler, LabelCache
+from .formatting import TimeFormatter, TimeParseError, parse_time
+from .input_timing import EventClock
+from .stats_worker import StatisticsWorker
+from .startup import StartupProfiler
+from .instrumentation import instrumentation
+from .lag_monitor import LagMonitor
 
 
 class PSTimerUI(tk.Tk):
     """Main application window for PSTimer."""
 
-    def __init__(self):
-        super().__init__()
+    # Displays refreshed after the current session changes
+    SESSION_DISPLAYS = ("statistics", "times_list", "session")
+
+    # How often events from input devices are handed to the core
+    INPUT_POLL_MS = 2
+
+    def __init__(self, profiler=None, monitor_lag=False):
+        # Startup phase timings (recorded only with --profile-startup)
+        self.profiler = profiler or StartupProfiler(enabled=False)
+        self.monitor_lag = monitor_lag  # Run the lag monitor (--lag-monitor)
+
+        with self.profiler.phase("create Tk root"):
+            super().__init__()
 
         # Initialize core components
-        self.stopwatch = Stopwatch()
-        self.scramble_manager = ScrambleManager()
-        self.session_manager = SessionManager()
-        self.theme_manager = ThemeManager()
+        with self.profiler.phase("core components"):
+            self.core = self._create_core()
+            self.stopwatch = self.core.stopwatch
+            self.scramble_manager = self.core.scramble_manager
+            self.session_manager = self.core.session_manager
+            self.theme_manager = ThemeManager()
 
         # UI state
-        self.is_ready = False
-        self.ready_start_time = None
-        self.inspection_time = None
-        self.inspection_enabled = False
-        self.hold_time = 300  # Default hold time in milliseconds
+        self.display_refresh_rate = 60  # Timer redraws per second while running
         self.transparency = 1.0  # Default transparency (fully opaque)
         self.user_settings = {}  # Store user settings
 
@@ -50,14 +61,78 @@ class PSTimerUI(tk.Tk):
         self.pulse_scale = 1.0
         self.bg_animation_id = None
 
+        # Built after the first frame is drawn (see _create_deferred_panels)
+        self.cube_viz = None
+        self.debug_overlay = None
+        self.graph_window = None
+        self.distribution_window = None
+        self.replay_window = None
+        self.input_controller = None
+        self._input_queue = queue.SimpleQueue()
+
         # Logo cache
         self.logo_images = {}  # Cache for different logo sizes
 
-        self._setup_window()
-        self._create_ui()
-        self._setup_bindings()
-        self._update_session_display()  # Initialize session display
-        self._start_ui_loop()
+        # Shared time formatter (cached, used by every time display)
+        self.time_formatter = TimeFormatter()
+
+        # Input event timestamps (and dispatch lag metrics)
+        self.event_clock = EventClock()
+
+        # Event-loop stall watchdog (stalls delay key handling); it ticks and
+        # wraps every Tk callback, so it only runs when asked for
+        self.lag_monitor = LagMonitor(self)
+
+        # Display refresh state
+        self._dirty_displays = set()
+        self._refresh_id = None
+        self.stats_worker = StatisticsWorker()
+        self.core.summary_worker = self.stats_worker  # Rebuilds after edits
+        self._stats_poll_id = None
+        self._save_id = None
+        self._pb_clear_id = None
+        self._pb_messages = []
+        self.label_cache = LabelCache()
+        self.display_scheduler = DisplayScheduler(
+            self, self._update_timer_display, self.display_refresh_rate
+        )
+
+        # React to the core's timer, solve, session and scramble events
+        self.core.subscribe("state_changed", self._on_timer_state_change)
+        self.core.subscribe("solve_recorded", self._on_solve_recorded)
+        self.core.subscribe("personal_best", self._on_personal_best)
+        self.core.subscribe("session_changed", self._on_session_changed)
+        self.core.subscribe("scramble_changed", self._show_scramble)
+        self.core.subscribe("inspection_penalty", self._on_inspection_penalty)
+
+        with self.profiler.phase("window setup"):
+            self._setup_window()
+        with self.profiler.phase("build timer UI"):
+            self._create_ui()
+        with self.profiler.phase("bindings and first refresh"):
+            self._setup_bindings()
+            self._update_session_display()  # Initialize session display
+            self._start_ui_loop()
+
+    def _create_core(self):
+        """Create the timer core, loading saved sessions if possible."""
+        try:
+            return TimerCore(store=SessionStore())
+        except (OSError, ValueError, KeyError) as e:
+            # Never overwrite sessions we could not read: run without saving
+            message = (
+                "Saved sessions could not be loaded and will not be saved "
+                f"this time:\n{e}"
+            )
+            self.after_idle(
+                lambda: messagebox.showwarning("Sessions Not Loaded", message)
+            )
+            return TimerCore()
+
+    @property
+    def is_ready(self):
+        """Whether the timer is armed (space held)."""
+        return self.core.is_ready
 
     def _setup_window(self):
         """Setup main window properties."""
@@ -157,8 +232,31 @@ class PSTimerUI(tk.Tk):
         # Center panel (timer and scramble)
         self._create_center_panel(main_frame)
 
-        # Right panel (cube visualization)
-        self._create_right_panel(main_frame)
+        # Right panel (cube visualization) is built once the timer is on screen
+        self._after_first_paint(lambda: self._create_deferred_panels(main_frame))
+
+    def _after_first_paint(self, callback):
+        """Run callback after the pending layout and redraw have been shown.
+
+        after_idle alone would run in the same idle pass that draws the window;
+        hopping through after(0) lets Tk display the first frame in between.
+        """
+        self.after_idle(lambda: self.after(0, callback))
+
+    def _create_deferred_panels(self, parent):
+        """Build the panels that are not needed to start timing."""
+        if self.is_compact_mode or not parent.winfo_exists():
+            # The normal layout was torn down before we got here; startup
+            # is still over, so --profile-startup reports and exits
+            self.profiler.mark("right panel skipped")
+            self.profiler.ready()
+            return
+
+        self.profiler.mark("first paint")
+        with self.profiler.phase("build right panel"):
+            self._create_right_panel(parent)
+            self._show_scramble_on_cube(self.scramble_manager.get_current())
+        self.profiler.ready()
 
     def _create_top_bar(self):
         """Create the top navigation bar."""
@@ -229,7 +327,7 @@ class PSTimerUI(tk.Tk):
         right_frame.pack(side=tk.RIGHT, padx=10, pady=10)
 
         # Scramble type dropdown
-        self.scramble_type_var = tk.StringVar(value="3x3x3")
+        self.scramble_type_var = tk.StringVar(value=self.scramble_manager.current_type)
         scramble_combo = ttk.Combobox(
             right_frame,
             textvariable=self.scramble_type_var,
@@ -435,6 +533,7 @@ class PSTimerUI(tk.Tk):
         )
         self.times_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=self.times_listbox.yview)
+        self.times_listbox.bind("<Double-Button-1>", self._replay_solve)
 
         # Add sample data
         sample_times = [
@@ -516,6 +615,16 @@ class PSTimerUI(tk.Tk):
         )
         delta_label.pack()
 
+        # Personal best announcement, empty until one is set
+        self.pb_label = tk.Label(
+            stats_below_frame,
+            text="",
+            font=(theme["font_family"], 18, "bold"),
+            bg=theme["bg"],
+            fg=theme["accent"],
+        )
+        self.pb_label.pack()
+
     def _create_right_panel(self, parent):
         """Create the right cube visualization panel."""
         theme = self.theme_manager.get_theme()
@@ -528,6 +637,8 @@ class PSTimerUI(tk.Tk):
         cube_frame = tk.Frame(right_panel, bg=theme["sidebar_bg"])
         cube_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        from .cube_visualization import CubeVisualization
+
         # Add the cube visualization (now shows all 6 faces unfolded)
         self.cube_viz = CubeVisualization(cube_frame, width=260, height=200)
         self.cube_viz.get_canvas().pack(expand=True, fill=tk.BOTH)
@@ -577,33 +688,53 @@ class PSTimerUI(tk.Tk):
             "<Control-4>", lambda e: self._set_compact_position("bottom-right")
         )  # Ctrl + 4
 
+        # Graph of times and averages
+        self.bind("<Control-g>", lambda e: self._toggle_graph())
+        self.bind("<Control-d>", lambda e: self._toggle_distribution())
+
+        # Performance overlay (timings need --instrument)
+        self.bind("<F12>", lambda e: self._toggle_debug_overlay())
+
         self.bind("<KeyPress>", self._on_any_key)
 
         self.focus_set()  # Ensure window can receive key events
 
+    def destroy(self):
+        """Save sessions and stop the lag monitor before the window goes away."""
+        self.lag_monitor.stop()
+        self._save_sessions(final=True)
+        super().destroy()
+
     def _start_ui_loop(self):
         """Start the main UI update loop."""
-        self._update_timer_display()
+        if self.monitor_lag:
+            self.lag_monitor.start()
+        self.display_scheduler.request_redraw()
         self._generate_new_scramble()
 
+    def _on_timer_state_change(self):
+        """Redraw the timer after a state change and adapt the refresh rate."""
+        self.display_scheduler.set_running(self.stopwatch.running)
+
     def _update_timer_display(self):
         """Update the timer display."""
-        current_time = self.stopwatch.get_time()
-        formatted_time = self.stopwatch.format_time(current_time)
+        formatted_time = self.time_formatter.format_ns(self.stopwatch.get_time_ns())
 
         # Update main timer (if in normal mode and widget exists)
         if not self.is_compact_mode and hasattr(self, "timer_label"):
             try:
-                self.timer_label.config(text=formatted_time)
-
                 # Change color based on state
                 theme = self.theme_manager.get_theme()
                 if self.is_ready:
-                    self.timer_label.config(fg=theme["timer_ready"])
+                    color = theme["timer_ready"]
                 elif self.stopwatch.running:
-                    self.timer_label.config(fg=theme["timer_running"])
+                    color = theme["timer_running"]
                 else:
-                    self.timer_label.config(fg=theme["timer_color"])
+                    color = theme["timer_color"]
+
+                self.label_cache.update(
+                    self.timer_label, text=formatted_time, fg=color
+                )
             except tk.TclError:
                 # Widget has been destroyed, ignore
                 pass
@@ -612,146 +743,182 @@ class PSTimerUI(tk.Tk):
         if self.is_compact_mode:
             self._update_compact_display()
 
-        # Schedule next update
-        self.after(50, self._update_timer_display)
+    def _event_timestamp(self, event):
+        """Get the perf_counter_ns time at which an input event happened."""
+        return self.event_clock.event_ns(event)
 
     def _on_space_press(self, event):
         """Handle space key press."""
-        if self.stopwatch.running:
-            return  # Space press ignored while running
-
-        if not self.is_ready:
-            self.is_ready = True
-            self.ready_start_time = time.time()
-            self.stopwatch.reset()
-
-            # Start inspection time if enabled
-            if self.inspection_enabled:
-                self.inspection_time = time.time()
+        self.core.press(self._event_timestamp(event))
 
     def _on_space_release(self, event):
         """Handle space key release."""
-        if self.stopwatch.running:
-            # Stop the timer
-            final_time = self.stopwatch.stop()
-            self._record_solve(final_time)
-            self.is_ready = False
-        elif self.is_ready:
-            # Check if held long enough
-            hold_time = time.time() - (self.ready_start_time or 0)
-            hold_threshold = self.hold_time / 1000.0  # Convert ms to seconds
-
-            if hold_time >= hold_threshold:
-                # Check inspection time if enabled
-                if self.inspection_enabled and self.inspection_time:
-                    inspection_elapsed = time.time() - self.inspection_time
-                    if inspection_elapsed > 17.0:  # Over 17 seconds = DNF
-                        messagebox.showwarning(
-                            "Inspection Time",
-                            "Inspection time exceeded 17 seconds - DNF!",
-                        )
-                        self.is_ready = False
-                        self.inspection_time = None
-                        return
-                    elif inspection_elapsed > 15.0:  # Over 15 seconds = +2 penalty
-                        messagebox.showinfo(
-                            "Inspection Time",
-                            "Inspection time over 15 seconds - +2 penalty will be applied",
-                        )
-
-                self.stopwatch.start()
-                self.is_ready = False
-                self.inspection_time = None
-            else:
-                self.is_ready = False
-                self.inspection_time = None
+        self.core.release(self._event_timestamp(event))
 
     def _on_any_key(self, event):
         """Handle any key press to stop timer."""
         if self.stopwatch.running and event.keysym not in ["space", "s", "r"]:
-            final_time = self.stopwatch.stop()
-            self._record_solve(final_time)
-
-    def _record_solve(self, solve_time):
-        """Record a completed solve."""
-        scramble = self.scramble_manager.get_current()
-        solve = SolveTime(solve_time, scramble)
-        self.session_manager.current_session.add_time(solve)
-
-        # Update displays
-        self._update_statistics()
-        self._update_times_list()
-        self._update_session_display()
+            self.core.stop(self._event_timestamp(event))
+
+    def _on_inspection_penalty(self, penalty):
+        """Tell the user about an inspection penalty."""
+        if penalty == "DNF":
+            messagebox.showwarning(
+                "Inspection Time",
+                "Inspection time exceeded 17 seconds - DNF!",
+            )
+        else:
+            messagebox.showinfo(
+                "Inspection Time",
+                "Inspection time over 15 seconds - +2 penalty will be applied",
+            )
 
-        # Generate new scramble for next solve
+    def _on_solve_recorded(self, solve, session):
+        """Move on to a new scramble after a solve."""
         self.after(100, self._generate_new_scramble)
 
-    def _update_statistics(self):
+    def _on_personal_best(self, pb, session):
+        """Announce a new personal best with a bell and a short message."""
+        if pb.previous is None:
+            return  # The first value of a stat is not worth announcing
+        fmt = self.time_formatter.format
+        if self._pb_clear_id is None:
+            self.bell()
+        else:
+            self.after_cancel(self._pb_clear_id)  # Same solve, another stat
+        self._pb_messages.append(
+            f"New PB {pb.stat}: {fmt(pb.value)} (-{fmt(pb.improvement)})"
+        )
+        self._pb_clear_id = self.after(5000, self._clear_personal_best)
+        self._show_personal_best("\n".join(self._pb_messages))
+
+    def _clear_personal_best(self):
+        """Remove the personal best message."""
+        self._pb_clear_id = None
+        self._pb_messages = []
+        self._show_personal_best("")
+
+    def _show_personal_best(self, text):
+        """Set the personal best message below the timer, if it is shown."""
+        if not self.is_compact_mode and hasattr(self, "pb_label"):
+            try:
+                self.pb_label.config(text=text)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+
+    def _on_session_changed(self, session):
+        """Refresh session displays and schedule saving."""
+        self._mark_session_changed()
+        self._schedule_save()
+
+    def _schedule_save(self, delay_ms=2000):
+        """Save sessions soon, coalescing bursts of changes into one write."""
+        if self._save_id is None and self.core.store is not None:
+            self._save_id = self.after(delay_ms, self._save_sessions)
+
+    def _save_sessions(self, final=False):
+        """Write unsaved session changes to disk.
+
+        Autosaves only append to the session journals, and wait until the
+        solve being timed is over; the final save on exit compacts them.
+        """
+        if self._save_id is not None:
+            self.after_cancel(self._save_id)
+            self._save_id = None
+        if not final:
+            if self.stopwatch.running:
+                self._schedule_save()  # Try again after the solve
+                return
+            if not self.core.needs_save():
+                return
+        try:
+            self.core.save(compact=final)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"Failed to save sessions:\n{e}")
+
+    def _mark_session_changed(self, *parts):
+        """Flag session displays as dirty and coalesce them into one refresh.
+
+        parts is any of "statistics", "times_list" and "session"; with no
+        arguments everything is refreshed.
+        """
+        self._dirty_displays.update(parts or self.SESSION_DISPLAYS)
+        if self._refresh_id is None:
+            self._refresh_id = self.after_idle(self._flush_session_refresh)
+
+    def _flush_session_refresh(self):
+        """Refresh all dirty session displays, computing statistics once."""
+        self._refresh_id = None
+        dirty = self._dirty_displays
+        self._dirty_displays = set()
+
+        if "statistics" in dirty:
+            session = self.session_manager.current_session
+            stats = session.cached_statistics()
+            if stats is None and self.stats_worker.should_offload(session):
+                # Large session: compute off the Tk thread and apply when ready
+                self.stats_worker.submit(session)
+            else:
+                self._update_statistics(stats)
+        if self.stats_worker.pending:
+            self._schedule_stats_poll()  # Statistics and rebuilt summaries
+        if "times_list" in dirty:
+            self._update_times_list()
+        if "session" in dirty:
+            self._update_session_display()
+        for window in (self.graph_window, self.distribution_window):
+            if window is not None and window.is_open():
+                window.refresh()
+
+    def _schedule_stats_poll(self):
+        """Poll the statistics worker until its pending results arrive."""
+        if self._stats_poll_id is None:
+            self._stats_poll_id = self.after(15, self._poll_statistics)
+
+    def _poll_statistics(self):
+        """Apply finished background statistics and summaries."""
+        self._stats_poll_id = None
+        current = self.session_manager.current_session
+        for session, _, stats in self.stats_worker.poll():
+            if session is current:
+                self._update_statistics(stats)
+        if self.stats_worker.pending:
+            self._schedule_stats_poll()
+
+    def _update_statistics(self, stats=None):
         """Update all statistics displays."""
-        stats = self.session_manager.current_session.get_statistics()
-
         # Only update UI elements if not in compact mode
-        if not self.is_compact_mode:
-            # Update current stats in left panel
-            if "mo3" in self.stats_labels:
-                current_label, _ = self.stats_labels["mo3"]
-                mo3_text = (
-                    self.stopwatch.format_time(stats["mo3"]) if stats["mo3"] else "---"
-                )
-                try:
-                    current_label.config(text=mo3_text)
-                except tk.TclError:
-                    # Widget has been destroyed, ignore
-                    pass
+        if self.is_compact_mode:
+            return
 
-            if "ao5" in self.stats_labels:
-                current_label, _ = self.stats_labels["ao5"]
-                ao5_text = (
-                    self.stopwatch.format_time(stats["ao5"]) if stats["ao5"] else "---"
-                )
-                try:
-                    current_label.config(text=ao5_text)
-                except tk.TclError:
-                    # Widget has been destroyed, ignore
-                    pass
+        if stats is None:
+            stats = self.session_manager.current_session.get_statistics()
+        fmt = self.time_formatter.format
+        update = self.label_cache.update
 
-            if "ao12" in self.stats_labels:
-                current_label, _ = self.stats_labels["ao12"]
-                ao12_text = (
-                    self.stopwatch.format_time(stats["ao12"])
-                    if stats["ao12"]
-                    else "---"
-                )
-                try:
-                    current_label.config(text=ao12_text)
-                except tk.TclError:
-                    # Widget has been destroyed, ignore
-                    pass
+        try:
+            # Update current stats in left panel
+            for stat_name in ("mo3", "ao5", "ao12"):
+                if stat_name in self.stats_labels:
+                    current_label, _ = self.stats_labels[stat_name]
+                    value = stats[stat_name]
+                    update(current_label, text=fmt(value) if value else "---")
 
             # Update center panel stats
-            try:
-                if stats["ao5"]:
-                    self.ao5_below_label.config(
-                        text=f"ao5: {self.stopwatch.format_time(stats['ao5'])}"
-                    )
-                if stats["ao12"]:
-                    self.ao12_below_label.config(
-                        text=f"ao12: {self.stopwatch.format_time(stats['ao12'])}"
-                    )
-
-                # Update solve count
-                session = self.session_manager.current_session
-                self.solve_count_label.config(
-                    text=f"solve: {len(session)}/{len(session)}"
-                )
+            if stats["ao5"]:
+                update(self.ao5_below_label, text=f"ao5: {fmt(stats['ao5'])}")
+            if stats["ao12"]:
+                update(self.ao12_below_label, text=f"ao12: {fmt(stats['ao12'])}")
 
-                if stats["mean"]:
-                    self.mean_label.config(
-                        text=f"mean: {self.stopwatch.format_time(stats['mean'])}"
-                    )
-            except tk.TclError:
-                # Widgets have been destroyed, ignore
-                pass
+            # Update solve count
+            count = stats["count"]
+            update(self.solve_count_label, text=f"solve: {count}/{count}")
+
+            if stats["mean"]:
+                update(self.mean_label, text=f"mean: {fmt(stats['mean'])}")
+        except tk.TclError:
+            # Widgets have been destroyed, ignore
+            pass
 
     def _update_times_list(self):
         """Update the times list display."""
@@ -760,36 +927,39 @@ class PSTimerUI(tk.Tk):
             return
 
         session = self.session_manager.current_session
+        fmt = self.time_formatter.format
+        lines = []
+
+        # Add times with stats
+        for i, solve in enumerate(session.times[:20]):  # Show last 20
+            time_str = fmt(solve.time)
+
+            # Calculate ao5 and ao12 for this position
+            ao5_str = "---"
+            ao12_str = "---"
+
+            if i >= 4:  # Need at least 5 times for ao5
+                recent_5 = session.times[i - 4 : i + 1]
+                if len(recent_5) == 5:
+                    ao5_val = session.stats_calc.calculate_ao5(recent_5)
+                    if ao5_val:
+                        ao5_str = fmt(ao5_val)
+
+            if i >= 11:  # Need at least 12 times for ao12
+                recent_12 = session.times[i - 11 : i + 1]
+                if len(recent_12) == 12:
+                    ao12_val = session.stats_calc.calculate_ao12(recent_12)
+                    if ao12_val:
+                        ao12_str = fmt(ao12_val)
+
+            solve_num = len(session.times) - i
+            lines.append(f"{solve_num:3d}  {time_str:>6}  {ao5_str:>6}  {ao12_str:>6}")
 
         try:
-            # Clear current list
-            self.times_listbox.delete(0, tk.END)
-
-            # Add times with stats
-            for i, solve in enumerate(session.times[:20]):  # Show last 20
-                time_str = self.stopwatch.format_time(solve.time)
-
-                # Calculate ao5 and ao12 for this position
-                ao5_str = "---"
-                ao12_str = "---"
-
-                if i >= 4:  # Need at least 5 times for ao5
-                    recent_5 = session.times[i - 4 : i + 1]
-                    if len(recent_5) == 5:
-                        ao5_val = session.stats_calc.calculate_ao5(recent_5)
-                        if ao5_val:
-                            ao5_str = self.stopwatch.format_time(ao5_val)
-
-                if i >= 11:  # Need at least 12 times for ao12
-                    recent_12 = session.times[i - 11 : i + 1]
-                    if len(recent_12) == 12:
-                        ao12_val = session.stats_calc.calculate_ao12(recent_12)
-                        if ao12_val:
-                            ao12_str = self.stopwatch.format_time(ao12_val)
-
-                solve_num = len(session.times) - i
-                line = f"{solve_num:3d}  {time_str:>6}  {ao5_str:>6}  {ao12_str:>6}"
-                self.times_listbox.insert(tk.END, line)
+            # Only rebuild the listbox when its contents changed
+            if lines != list(self.times_listbox.get(0, tk.END)):
+                self.times_listbox.delete(0, tk.END)
+                self.times_listbox.insert(tk.END, *lines)
         except tk.TclError:
             # Widget has been destroyed, ignore
             pass
@@ -805,8 +975,9 @@ class PSTimerUI(tk.Tk):
 
         # Update session label
         try:
-            self.session_label.config(
-                text=f"Session - {puzzle_type} ({solve_count} solves)"
+            self.label_cache.update(
+                self.session_label,
+                text=f"Session - {puzzle_type} ({solve_count} solves)",
             )
         except tk.TclError:
             # Widget has been destroyed, ignore
@@ -814,9 +985,10 @@ class PSTimerUI(tk.Tk):
 
     def _generate_new_scramble(self):
         """Generate and display a new scramble."""
-        scramble = self.scramble_manager.generate_new()
+        self.core.new_scramble()
 
-        # Update scramble display based on current mode
+    def _show_scramble(self, scramble):
+        """Display a scramble in the current mode and on the cube."""
         if self.is_compact_mode:
             try:
                 self.compact_widgets["scramble"].config(text=scramble)
@@ -828,67 +1000,32 @@ class PSTimerUI(tk.Tk):
             except tk.TclError:
                 pass
 
-        # Apply to cube visualization (only in normal mode)
-        if not self.is_compact_mode:
-            try:
-                self.cube_viz.apply_scramble(scramble)
-            except tk.TclError:
-                pass
+        self._show_scramble_on_cube(scramble)
+
+    def _show_scramble_on_cube(self, scramble):
+        """Apply a scramble to the cube visualization (only in normal mode)."""
+        if self.is_compact_mode or self.cube_viz is None:
+            return
+        try:
+            self.cube_viz.apply_scramble(scramble)
+        except tk.TclError:
+            pass
 
     def _previous_scramble(self):
         """Go to previous scramble."""
-        scramble = self.scramble_manager.get_previous()
-        if scramble:
-            # Update scramble display based on current mode
-            if self.is_compact_mode:
-                try:
-                    self.compact_widgets["scramble"].config(text=scramble)
-                except (tk.TclError, KeyError):
-                    pass
-            else:
-                try:
-                    self.scramble_label.config(text=scramble)
-                except tk.TclError:
-                    pass
-            # Apply to cube visualization (only in normal mode)
-            if not self.is_compact_mode:
-                try:
-                    self.cube_viz.apply_scramble(scramble)
-                except tk.TclError:
-                    pass
+        self.core.previous_scramble()
 
     def _next_scramble(self):
         """Go to next scramble."""
-        scramble = self.scramble_manager.get_next()
-
-        # Update scramble display based on current mode
-        if self.is_compact_mode:
-            try:
-                self.compact_widgets["scramble"].config(text=scramble)
-            except (tk.TclError, KeyError):
-                pass
-        else:
-            try:
-                self.scramble_label.config(text=scramble)
-            except tk.TclError:
-                pass
-        # Apply to cube visualization (only in normal mode)
-        if not self.is_compact_mode:
-            try:
-                self.cube_viz.apply_scramble(scramble)
-            except tk.TclError:
-                pass
+        self.core.next_scramble()
 
     def _on_scramble_type_change(self, event):
         """Handle scramble type change."""
-        new_type = self.scramble_type_var.get()
-        if self.scramble_manager.set_type(new_type):
-            self._generate_new_scramble()
+        self.core.set_puzzle_type(self.scramble_type_var.get())
 
     def _reset_timer(self):
         """Reset the timer to zero."""
-        self.stopwatch.reset()
-        self.is_ready = False
+        self.core.reset()
 
     def _adjust_transparency(self, delta):
         """Adjust window transparency by delta amount."""
@@ -934,6 +1071,7 @@ class PSTimerUI(tk.Tk):
         # Hide all existing widgets by destroying main UI
         for widget in self.winfo_children():
             widget.destroy()
+        self.label_cache.clear()
 
         # Create compact UI first
         self._create_compact_ui()
@@ -960,6 +1098,7 @@ class PSTimerUI(tk.Tk):
         for widget in self.winfo_children():
             widget.destroy()
         self.compact_widgets.clear()
+        self.label_cache.clear()
 
         # Restore normal UI
         self._create_ui()
@@ -972,7 +1111,8 @@ class PSTimerUI(tk.Tk):
             self._center_window(1200, 800)
 
         # Refresh displays
-        self._update_session_display()
+        self._mark_session_changed()
+        self.display_scheduler.request_redraw()
 
     def _create_compact_ui(self):
         """Create the compact mode UI with minimal elements (no top bar)."""
@@ -1119,8 +1259,7 @@ class PSTimerUI(tk.Tk):
 
         # Update timer display
         if "timer" in self.compact_widgets:
-            current_time = self.stopwatch.get_time()
-            time_text = self.stopwatch.format_time(current_time)
+            time_text = self.time_formatter.format_ns(self.stopwatch.get_time_ns())
 
             # Color based on timer state
             theme = self.theme_manager.get_theme()
@@ -1131,13 +1270,17 @@ class PSTimerUI(tk.Tk):
             else:
                 color = theme["timer_color"]
 
-            self.compact_widgets["timer"].config(text=time_text, fg=color)
+            self.label_cache.update(
+                self.compact_widgets["timer"], text=time_text, fg=color
+            )
 
         # Update scramble display
         if "scramble" in self.compact_widgets:
             current_scramble = self.scramble_manager.get_current()
             if current_scramble:
-                self.compact_widgets["scramble"].config(text=current_scramble)
+                self.label_cache.update(
+                    self.compact_widgets["scramble"], text=current_scramble
+                )
 
     def _position_compact_window(self):
         """Position the compact window based on compact_position setting."""
@@ -1189,6 +1332,8 @@ class PSTimerUI(tk.Tk):
 
     def _show_settings(self):
         """Show settings dialog and apply changes."""
+        from .settings import show_settings_dialog
+
         result = show_settings_dialog(
             self,
             self.theme_manager,
@@ -1205,20 +1350,24 @@ class PSTimerUI(tk.Tk):
         # Apply puzzle type change
         if "puzzle_type" in settings:
             new_type = settings["puzzle_type"]
-            if self.scramble_manager.set_type(new_type):
+            # Switches puzzles and generates a scramble for the new type
+            if self.core.set_puzzle_type(new_type):
                 self.scramble_type_var.set(new_type)
-                # Generate new scramble for the new puzzle type
-                self._generate_new_scramble()
                 # Update session display
-                self._update_session_display()
+                self._mark_session_changed("session")
 
         # Apply inspection time setting
         if "inspection" in settings:
-            self.inspection_enabled = settings["inspection"]
+            self.core.inspection_enabled = settings["inspection"]
 
         # Apply hold time setting
         if "hold_time" in settings:
-            self.hold_time = settings["hold_time"]
+            self.core.hold_time = settings["hold_time"]
+
+        # Apply display refresh rate setting
+        if "refresh_rate" in settings:
+            self.display_refresh_rate = settings["refresh_rate"]
+            self.display_scheduler.set_refresh_rate(self.display_refresh_rate)
 
         # Apply transparency setting
         if "transparency" in settings:
@@ -1234,6 +1383,7 @@ class PSTimerUI(tk.Tk):
 
         # Store settings for future use
         self.user_settings = settings
+        self.display_scheduler.request_redraw()
 
         # Show confirmation
         messagebox.showinfo(
@@ -1246,6 +1396,112 @@ class PSTimerUI(tk.Tk):
             f"Theme: {settings.get('theme', 'unchanged')}",
         )
 
+    def _toggle_debug_overlay(self):
+        """Open or close the performance debug overlay."""
+        if self.debug_overlay is not None and self.debug_overlay.is_open():
+            self.debug_overlay.close()
+            self.debug_overlay = None
+            return
+
+        from .debug_overlay import DebugOverlay
+
+        self.debug_overlay = DebugOverlay(
+            self,
+            self.theme_manager,
+            instrumentation,
+            self.event_clock,
+            self.lag_monitor,
+        )
+
+    def _toggle_graph(self):
+        """Open or close the graph of the current session."""
+        if self.graph_window is not None and self.graph_window.is_open():
+            self.graph_window.close()
+            self.graph_window = None
+            return
+
+        from .graph import GraphWindow
+
+        self.graph_window = GraphWindow(
+            self, self.theme_manager, lambda: self.session_manager.current_session
+        )
+
+    def _toggle_distribution(self):
+        """Open or close the time distribution of the current session."""
+        if self.distribution_window is not None and self.distribution_window.is_open():
+            self.distribution_window.close()
+            self.distribution_window = None
+            return
+
+        from .histogram import DistributionWindow
+
+        self.distribution_window = DistributionWindow(
+            self, self.theme_manager, lambda: self.session_manager.current_session
+        )
+
+    def attach_input(self, source):
+        """Drive the timer from an InputSource such as a smart cube.
+
+        The source reads on its own thread and only queues events; they
+        are applied to the core here on the Tk thread. Solve times come
+        from the device stamps, so the poll interval does not affect them.
+        """
+        from .input_sources import InputController
+
+        self.input_controller = InputController(self.core)
+        source.start(self._input_queue.put)
+        self._drain_input()
+
+    def _drain_input(self):
+        """Apply queued device events to the core."""
+        while True:
+            try:
+                event = self._input_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.input_controller.handle(event)
+        self.after(self.INPUT_POLL_MS, self._drain_input)
+
+    def _replay_solve(self, event):
+        """Replay the double-clicked solve, asking for its moves if needed."""
+        from tkinter import simpledialog
+
+        from .reconstruction import Reconstruction, ReconstructionError
+
+        index = self.times_listbox.nearest(event.y)
+        session = self.session_manager.current_session
+        if not 0 <= index < len(session.times):
+            return
+        solve = session.times[index]
+        if solve.reconstruction is None:
+            text = simpledialog.askstring(
+                "Reconstruction",
+                "Moves of this solve (e.g. x2 y R U R' U'):",
+                parent=self,
+            )
+            if not text:
+                return
+            try:
+                reconstruction = Reconstruction.from_moves(
+                    text, duration_ms=round(solve.time * 1000)
+                )
+            except ReconstructionError as e:
+                messagebox.showerror("Invalid Reconstruction", str(e))
+                return
+            self.core.set_reconstruction(index, reconstruction)
+
+        from .cube_visualization import ReplayWindow
+
+        if self.replay_window is not None and self.replay_window.is_open():
+            self.replay_window.close()
+        self.replay_window = ReplayWindow(self, self.theme_manager, solve)
+
+    def _show_about(self):
+        """Show the about dialog."""
+        from .about import show_about_dialog
+
+        show_about_dialog(self, self.theme_manager)
+
     def _show_menu(self):
         """Show main menu."""
         menu = tk.Menu(self, tearoff=0)
@@ -1264,12 +1520,28 @@ class PSTimerUI(tk.Tk):
         )
         menu.add_command(
             label="Import Times",
-            command=lambda: messagebox.showinfo("Menu", "Import not yet implemented"),
+            command=self._import_times,
+        )
+        menu.add_command(
+            label="Enter Time Manually",
+            command=self._enter_time_manually,
+        )
+        menu.add_command(
+            label="Graph (Ctrl+G)",
+            command=self._toggle_graph,
+        )
+        menu.add_command(
+            label="Distribution (Ctrl+D)",
+            command=self._toggle_distribution,
+        )
+        menu.add_command(
+            label="Performance Overlay (F12)",
+            command=self._toggle_debug_overlay,
         )
         menu.add_separator()
         menu.add_command(
             label="About PSTimer",
-            command=lambda: show_about_dialog(self, self.theme_manager),
+            command=self._show_about,
         )
         menu.add_separator()
         menu.add_command(label="Exit", command=self.quit)
@@ -1291,10 +1563,7 @@ class PSTimerUI(tk.Tk):
             if not response:
                 return
 
-        self.session_manager.new_session()
-        self._update_statistics()
-        self._update_times_list()
-        self._update_session_display()
+        self.core.new_session()
         self._generate_new_scramble()
         messagebox.showinfo("New Session", "New session started!")
 
@@ -1309,10 +1578,7 @@ class PSTimerUI(tk.Tk):
             f"Are you sure you want to clear all {len(self.session_manager.current_session)} solves from the current session?",
         )
         if response:
-            self.session_manager.current_session.clear()
-            self._update_statistics()
-            self._update_times_list()
-            self._update_session_display()
+            self.core.clear_session()
             messagebox.showinfo("Clear Session", "Session cleared!")
 
     def _export_times(self):
@@ -1336,33 +1602,62 @@ class PSTimerUI(tk.Tk):
 
         if filename:
             try:
-                with open(filename, "w") as f:
-                    f.write(f"PSTimer Session Export\n")
-                    f.write(f"Puzzle Type: {self.scramble_type_var.get()}\n")
-                    f.write(f"Total Solves: {len(session)}\n")
-                    f.write("=" * 50 + "\n\n")
-
-                    for i, solve in enumerate(session.times, 1):
-                        f.write(
-                            f"{i:3d}. {solve.formatted_time:>8s} - {solve.scramble}\n"
-                        )
-
-                    # Add statistics
-                    stats = session.get_statistics()
-                    f.write("\n" + "=" * 50 + "\n")
-                    f.write("Statistics:\n")
-                    f.write(f"Best: {stats.get('best', 'N/A')}\n")
-                    if stats.get("ao5"):
-                        f.write(f"ao5: {stats['ao5']}\n")
-                    if stats.get("ao12"):
-                        f.write(f"ao12: {stats['ao12']}\n")
-                    if stats.get("ao100"):
-                        f.write(f"ao100: {stats['ao100']}\n")
+                self.core.export_file(filename, self.time_formatter)
 
                 messagebox.showinfo("Export Complete", f"Times exported to {filename}")
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export times:\n{e}")
 
+    def _import_times(self):
+        """Import times from a csTimer CSV, PSTimer export or plain text file."""
+        from tkinter import filedialog
+
+        filename = filedialog.askopenfilename(
+            title="Import Times",
+            filetypes=[
+                ("csTimer / CSV files", "*.csv"),
+                ("Text files", "*.txt"),
+                ("All files", "*.*"),
+            ],
+        )
+        if not filename:
+            return
+
+        try:
+            result = self.core.import_file(filename)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Import Error", f"Failed to import times:\n{e}")
+            return
+
+        message = f"Imported {len(result.solves)} solves."
+        if result.errors:
+            shown = "\n".join(
+                f"line {line}: {error}" for line, _, error in result.errors[:10]
+            )
+            more = len(result.errors) - 10
+            if more > 0:
+                shown += f"\n... and {more} more"
+            message += f"\n\nSkipped {len(result.errors)} malformed rows:\n{shown}"
+        messagebox.showinfo("Import Complete", message)
+
+    def _enter_time_manually(self):
+        """Add a solve typed in by the user, e.g. "12.34", "14.34+" or "DNF"."""
+        from tkinter import simpledialog
+
+        text = simpledialog.askstring(
+            "Enter Time", "Time (e.g. 12.34, 1:02.50, 14.34+, DNF(12.34)):", parent=self
+        )
+        if text is None:
+            return
+
+        try:
+            seconds, penalty = parse_time(text)
+        except TimeParseError as e:
+            messagebox.showerror("Invalid Time", str(e))
+            return
+
+        self.core.record_solve(seconds, penalty)
+
     def _apply_theme(self):
         """Apply the current theme to all UI elements."""
         theme = self.theme_manager.get_theme()
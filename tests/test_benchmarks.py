@@ -0,0 +1,99 @@
+"""
+Test the benchmark harness.
+"""
+
+import pytest
+from benchmarks.__main__ import main
+from benchmarks.harness import (
+    Benchmark,
+    BenchmarkSkipped,
+    compare,
+    format_seconds,
+    machine_info,
+    run_benchmarks,
+    same_machine,
+)
+from benchmarks.suite import all_benchmarks
+
+
+def _document(**times):
+    """Build a results document from name=min_seconds pairs."""
+    return {"results": [{"name": name, "min": t} for name, t in times.items()]}
+
+
+class TestBenchmarkHarness:
+    """Test benchmark timing and baseline comparison."""
+
+    def test_run_reports_per_call_times(self):
+        """Test that a run returns per-call statistics."""
+        calls = []
+        bench = Benchmark("noop", lambda arg: calls.append(arg), setup=lambda: "x")
+        result = bench.run(repeat=3, min_time=0.001)
+
+        assert result["name"] == "noop"
+        assert result["repeat"] == 3
+        assert result["min"] <= result["median"]
+        assert len(calls) >= result["number"] * 3
+        assert set(calls) == {"x"}
+
+    def test_compare_flags_regressions(self):
+        """Test that slowdowns beyond the threshold are regressions."""
+        baseline = _document(fast=1.0, slow=1.0, gone=1.0)
+        current = _document(fast=1.1, slow=1.5, new=1.0)
+        rows = {row[0]: row for row in compare(current, baseline, threshold=0.25)}
+
+        assert set(rows) == {"fast", "slow"}
+        assert rows["fast"][4] is False
+        assert rows["slow"][4] is True
+        assert rows["slow"][3] == pytest.approx(1.5)
+
+    def test_per_benchmark_threshold(self):
+        """Test that a benchmark's own threshold overrides the default."""
+        baseline = _document(noisy=1.0)
+        current = _document(noisy=1.4)
+        noisy = Benchmark("noisy", lambda arg: None, threshold=0.5)
+
+        assert compare(current, baseline, 0.25)[0][4] is True
+        assert compare(current, baseline, 0.25, [noisy])[0][4] is False
+
+    def test_skipped_benchmarks(self):
+        """Test that a benchmark whose setup skips is listed, not timed."""
+
+        def no_display():
+            raise BenchmarkSkipped("no display")
+
+        benches = [
+            Benchmark("runs", lambda arg: None),
+            Benchmark("skips", lambda arg: None, setup=no_display),
+        ]
+        document = run_benchmarks(benches, repeat=1, min_time=0.001)
+        assert [r["name"] for r in document["results"]] == ["runs"]
+        assert document["skipped"] == [{"name": "skips", "reason": "no display"}]
+
+    def test_baseline_from_another_machine(self, tmp_path):
+        """Test that the first run records a baseline and other hosts never fail."""
+        path = tmp_path / "baseline.json"
+        args = ["-k", "format.", "--repeat", "1", "--min-time", "0.001"]
+        assert main(args + ["--baseline", str(path)]) == 0
+        assert path.exists()
+        assert same_machine({"machine": machine_info()}, {"machine": machine_info()})
+        assert not same_machine({"machine": machine_info()}, {"machine": {}})
+
+        path.write_text(
+            '{"machine": {}, "results": [{"name": "format.format_solves[100k]", '
+            '"min": 1e-12}]}'
+        )
+        assert main(args + ["--baseline", str(path)]) == 0
+
+    def test_format_seconds(self):
+        """Test unit selection for per-call times."""
+        assert format_seconds(2.5) == "2.500 s"
+        assert format_seconds(0.0125) == "12.500 ms"
+        assert format_seconds(0.0000125) == "12.500 us"
+
+    def test_suite_names_are_unique(self):
+        """Test that every benchmark in the suite has a distinct name."""
+        names = [bench.name for bench in all_benchmarks()]
+        assert len(names) == len(set(names))
+        assert "session.get_statistics[100k]" in names
+
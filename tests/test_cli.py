@@ -0,0 +1,71 @@
+"""
+Test the command line interface.
+"""
+
+import io
+import pytest
+from src.cli import main
+
+
+def run(*argv):
+    """Run the CLI and return (status, output)."""
+    out = io.StringIO()
+    status = main(list(argv), out=out)
+    return status, out.getvalue()
+
+
+class TestCli:
+    """Test the headless commands."""
+
+    def test_scramble(self):
+        """Test generating several scrambles."""
+        status, output = run("scramble", "-p", "2x2x2", "-n", "3")
+        assert status == 0
+        assert len(output.splitlines()) == 3
+
+    def test_add_and_stats(self, tmp_path):
+        """Test adding times and printing statistics from the store."""
+        data = str(tmp_path)
+        status, _ = run("add", "--data-dir", data, "10.00", "11.00", "12.00")
+        assert status == 0
+
+        status, output = run("stats", "--data-dir", data)
+        assert status == 0
+        assert "Solves  3" in output
+        assert "mo3     11.00" in output
+
+    def test_stats_leave_out_dnf(self, tmp_path):
+        """Test that a bare DNF is not a 0.00 best and agrees with summary."""
+        data = str(tmp_path)
+        run("add", "--data-dir", data, "12.34", "14.50+", "DNF")
+        _, output = run("stats", "--data-dir", data)
+        assert "Best    12.34" in output
+        assert "Worst   DNF" in output
+        assert "Mean    13.42" in output
+        _, output = run("summary", "--data-dir", data)
+        assert "13.42" in output
+
+    def test_invalid_time_sets_status(self, tmp_path):
+        """Test that a bad time is reported but valid ones are still added."""
+        status, _ = run("add", "--data-dir", str(tmp_path), "10.00", "abc")
+        assert status == 1
+        _, output = run("sessions", "--data-dir", str(tmp_path))
+        assert "(1 solves)" in output
+
+    def test_export_import(self, tmp_path):
+        """Test exporting a session and importing it into another."""
+        data = str(tmp_path / "data")
+        export_path = str(tmp_path / "export.txt")
+        run("add", "--data-dir", data, "9.50", "DNF(12.00)")
+        status, _ = run("export", "--data-dir", data, export_path)
+        assert status == 0
+
+        other = str(tmp_path / "other")
+        status, output = run("import", "--data-dir", other, export_path)
+        assert status == 0
+        assert "Imported 2 solves" in output
+
+    def test_missing_session(self, tmp_path):
+        """Test selecting a session that does not exist."""
+        status, _ = run("stats", "--data-dir", str(tmp_path), "--session", "4")
+        assert status == 1
@@ -0,0 +1,374 @@
+"""
+Test the headless timer core.
+"""
+
+import pytest
+from src import storage
+from src.core import CANCELLED, INSPECTION_DNF, STARTED, STOPPED, TimerCore
+from src.reconstruction import Reconstruction
+from src.statistics import SOLVE_BYTES, SolveTime
+from src.storage import SessionStore
+
+MS = 1_000_000  # Nanoseconds per millisecond
+
+
+class EventLog:
+    """Records events emitted by a TimerCore."""
+
+    def __init__(self, core):
+        self.events = []
+        for event in TimerCore.EVENTS:
+            core.subscribe(event, self._recorder(event))
+
+    def _recorder(self, event):
+        return lambda **data: self.events.append((event, data))
+
+    def names(self):
+        return [name for name, _ in self.events]
+
+
+class TestSolveLifecycle:
+    """Test press/release/stop handling."""
+
+    def test_full_solve(self):
+        """Test hold, start, stop and record with explicit timestamps."""
+        core = TimerCore()
+        assert core.press(0)
+        assert core.release(400 * MS) == STARTED
+        solve = core.stop(12_740 * MS)
+
+        assert solve.time == pytest.approx(12.34)
+        assert solve.elapsed_ns == 12_340 * MS
+        assert solve.scramble == core.current_scramble
+        assert core.current_session.times[0] is solve
+        assert not core.stopwatch.running
+
+    def test_release_before_hold_time_cancels(self):
+        """Test that a short hold does not start the timer."""
+        core = TimerCore(hold_time=300)
+        core.press(0)
+        assert core.release(100 * MS) == CANCELLED
+        assert not core.stopwatch.running
+        assert not core.is_ready
+
+    def test_release_while_running_stops(self):
+        """Test that releasing space while running stops and records."""
+        core = TimerCore()
+        core.press(0)
+        core.release(500 * MS)
+        assert core.release(10_500 * MS) == STOPPED
+        assert len(core.current_session) == 1
+
+    def test_inspection_plus_two(self):
+        """Test that 15-17 s of inspection adds +2 to the solve."""
+        core = TimerCore(inspection_enabled=True)
+        log = EventLog(core)
+        core.press(0)
+        assert core.release(16_000 * MS) == STARTED
+        solve = core.stop(26_000 * MS)
+
+        assert solve.penalty == "+2"
+        assert ("inspection_penalty", {"penalty": "+2"}) in log.events
+
+    def test_inspection_dnf(self):
+        """Test that over 17 s of inspection does not start the timer."""
+        core = TimerCore(inspection_enabled=True)
+        core.press(0)
+        assert core.release(18_000 * MS) == INSPECTION_DNF
+        assert not core.stopwatch.running
+        assert len(core.current_session) == 0
+
+    def test_events(self):
+        """Test the events emitted during a solve."""
+        core = TimerCore()
+        log = EventLog(core)
+        core.press(0)
+        core.release(400 * MS)
+        core.stop(1000 * MS)
+
+        assert log.names() == [
+            "state_changed",
+            "state_changed",
+            "state_changed",
+            "solve_recorded",
+            "personal_best",  # The first single
+            "session_changed",
+        ]
+
+    def test_unknown_event_rejected(self):
+        """Test that subscribing to an unknown event fails loudly."""
+        with pytest.raises(ValueError):
+            TimerCore().subscribe("solved", lambda **data: None)
+
+
+class TestSolveEditing:
+    """Test penalties, deletion and sessions."""
+
+    def test_set_penalty_updates_statistics(self):
+        """Test that changing a penalty invalidates cached statistics."""
+        core = TimerCore()
+        for seconds in (10.0, 11.0, 12.0):
+            core.record_solve(seconds)
+        version = core.current_session.version
+        core.set_penalty(0, "+2")
+
+        assert core.current_session.times[0].penalty == "+2"
+        assert core.current_session.version > version
+        with pytest.raises(ValueError):
+            core.set_penalty(0, "+3")
+
+    def test_delete_solve(self):
+        """Test deleting a solve by index."""
+        core = TimerCore()
+        core.record_solve(10.0)
+        core.record_solve(11.0)
+        assert core.delete_solve(0).time == 11.0
+        assert core.delete_solve(5) is None
+        assert len(core.current_session) == 1
+
+    def test_puzzle_type_change_generates_scramble(self):
+        """Test switching puzzles."""
+        core = TimerCore()
+        log = EventLog(core)
+        assert core.set_puzzle_type("2x2x2")
+        assert not core.set_puzzle_type("9x9x9")
+        assert log.names() == ["scramble_changed"]
+
+    def test_puzzle_change_keeps_sessions_to_one_puzzle(self):
+        """Test that solves after a puzzle change go to a session of that puzzle."""
+        core = TimerCore()
+        for seconds in (10.0, 11.0, 12.0, 13.0, 14.0):
+            core.record_solve(seconds)
+        first = core.current_session
+        assert core.set_puzzle_type("2x2x2")
+        core.record_solve(2.0)
+        assert core.current_session is not first and len(first) == 5
+        assert [pb.puzzle_type for pb in core.pbs.timeline(stat="single")][-1] == (
+            "2x2x2"
+        )
+        assert core.index.best("single", "3x3x3")[0] == 10.0
+        assert core.index.best("single", "2x2x2")[0] == 2.0
+        assert core.index.best("mo3", "2x2x2")[0] is None
+
+        assert core.set_puzzle_type("3x3x3")
+        assert core.current_session is first
+
+    def test_switching_sessions_switches_puzzle(self):
+        """Test that a session with solves brings back its own puzzle."""
+        core = TimerCore()
+        core.set_puzzle_type("2x2x2")
+        core.record_solve(3.0)
+        core.new_session()
+        core.set_puzzle_type("Pyraminx")
+        assert core.switch_session(0)
+        assert core.scramble_manager.current_type == "2x2x2"
+
+    def test_restart_resumes_puzzle(self, tmp_path):
+        """Test that a restarted core scrambles for the current session's puzzle."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.set_puzzle_type("Skewb")
+        core.record_solve(5.0)
+        core.save()
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert loaded.scramble_manager.current_type == "Skewb"
+
+
+class TestPersistence:
+    """Test saving and loading sessions through the core."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that sessions, solves and the current session survive a restart."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.record_solve(12.5, "+2", scramble="R U")
+        core.new_session("OH")
+        core.record_solve(30.25)
+        assert core.needs_save()
+        core.save()
+        assert not core.needs_save()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        sessions = loaded.session_manager.sessions
+        assert [s.name for s in sessions] == ["Session 1", "OH"]
+        assert loaded.current_session.name == "OH"
+        first = sessions[0].times[0]
+        assert (first.time, first.penalty, first.scramble) == (12.5, "+2", "R U")
+
+    def test_only_changed_sessions_are_written(self, tmp_path):
+        """Test that saving skips sessions that did not change."""
+        store = SessionStore(tmp_path)
+        core = TimerCore(store=store)
+        core.record_solve(10.0)
+        core.new_session()
+        assert core.save() == 2
+
+        core.record_solve(11.0)
+        assert core.save() == 1
+        assert core.save() == 0
+
+    def test_deleted_session_file_removed(self, tmp_path):
+        """Test that deleting a session removes its file on save."""
+        store = SessionStore(tmp_path)
+        core = TimerCore(store=store)
+        core.new_session()
+        core.save()
+        doomed = core.current_session.session_id
+        core.delete_session(1)
+        core.save()
+
+        assert not (tmp_path / "sessions" / f"{doomed}.json").exists()
+
+
+class TestJournal:
+    """Test saving edits by appending to the session journals."""
+
+    def solves(self, core):
+        """Get (time, penalty, scramble) of the current session's solves."""
+        return [(s.time, s.penalty, s.scramble) for s in core.current_session.times]
+
+    def test_edits_are_appended(self, tmp_path):
+        """Test that saves after the first leave the session file alone."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        for seconds in (10.0, 11.0, 12.0):
+            core.record_solve(seconds, scramble="R")
+        core.save()
+        path = tmp_path / "sessions" / f"{core.current_session.session_id}.json"
+        written = path.read_bytes()
+
+        core.record_solve(9.0, scramble="U")
+        core.set_penalty(1, "+2")
+        core.delete_solve(2)
+        core.set_reconstruction(0, Reconstruction.from_moves("R U"))
+        assert core.save() == 1
+        assert path.read_bytes() == written
+        assert path.with_suffix(".journal").exists()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert self.solves(loaded) == self.solves(core)
+        assert loaded.current_session.times[0].reconstruction.text() == "R U"
+        assert loaded.index.query().count == 3
+
+        assert loaded.save(compact=True) == 1
+        assert not path.with_suffix(".journal").exists()
+        assert self.solves(TimerCore(store=SessionStore(tmp_path))) == (
+            self.solves(core)
+        )
+
+    def test_clear_is_journalled(self, tmp_path):
+        """Test that clearing a session survives a restart."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.record_solve(10.0)
+        core.save()
+        core.clear_session()
+        core.record_solve(8.0, scramble="F")
+        core.save()
+        assert self.solves(TimerCore(store=SessionStore(tmp_path))) == [
+            (8.0, None, "F")
+        ]
+
+    def test_torn_and_stale_journals(self, tmp_path):
+        """Test that a half-written row, or a journal of an old file, is ignored."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.record_solve(10.0, scramble="")
+        core.save()
+        core.record_solve(11.0, scramble="")
+        core.save()
+        journal = tmp_path / "sessions" / f"{core.current_session.session_id}.journal"
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write('["add",12.0,nu')
+        assert len(TimerCore(store=SessionStore(tmp_path)).current_session) == 2
+
+        lines = journal.read_text(encoding="utf-8").splitlines()
+        journal.write_text('["base","other"]\n' + "\n".join(lines[1:]) + "\n")
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert [s.time for s in loaded.current_session.times] == [10.0]
+        assert not journal.exists()
+
+    def test_long_journal_is_rewritten(self, tmp_path, monkeypatch):
+        """Test that a journal past the limit is folded into the session file."""
+        monkeypatch.setattr(storage, "JOURNAL_LIMIT", 4)
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.record_solve(10.0)
+        core.save()
+        journal = tmp_path / "sessions" / f"{core.current_session.session_id}.journal"
+        core.record_solve(11.0)
+        core.save()
+        assert journal.exists()
+        core.add_solves([SolveTime(12.0, "") for _ in range(3)])
+        core.save()
+        assert not journal.exists()
+        assert len(TimerCore(store=SessionStore(tmp_path)).current_session) == 5
+
+
+class TestLazySessions:
+    """Test loading session solves on demand under a memory budget."""
+
+    def make_store(self, tmp_path, sessions=5, solves=100):
+        """Save several sessions and return a store that reloads them."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        for number in range(sessions):
+            if number:
+                core.new_session()
+            core.add_solves([SolveTime(10.0 + i % 7, "R U") for i in range(solves)])
+        core.save()
+        return SessionStore(tmp_path, memory_budget=2 * solves * SOLVE_BYTES)
+
+    def test_load_reads_only_the_index(self, tmp_path):
+        """Test that sessions start unloaded but know their size and stats."""
+        store = self.make_store(tmp_path)
+        core = TimerCore(store=store)
+        sessions = core.session_manager.sessions
+        assert not any(session.loaded for session in sessions)
+        assert [len(session) for session in sessions] == [100] * 5
+        assert core.index.query().count == 500
+        assert not any(session.loaded for session in sessions)
+
+    def test_switch_loads_and_evicts(self, tmp_path):
+        """Test that switching loads solves and unloads old sessions."""
+        core = TimerCore(store=self.make_store(tmp_path))
+        for index in range(5):
+            core.switch_session(index)
+            assert core.current_session.times[0].scramble == "R U"
+            loaded = [s for s in core.session_manager.sessions if s.loaded]
+            assert len(loaded) <= 2
+            assert core.current_session.loaded
+
+    def test_unsaved_sessions_stay_loaded(self, tmp_path):
+        """Test that a session with unsaved changes is never dropped."""
+        core = TimerCore(store=self.make_store(tmp_path))
+        core.switch_session(0)
+        core.record_solve(9.0)
+        for index in range(1, 5):
+            core.switch_session(index)
+            len(core.current_session.times)
+        first = core.session_manager.sessions[0]
+        assert first.loaded and len(first) == 101
+
+        core.save()
+        assert not first.loaded
+        assert len(first) == 101
+        assert first.times[0].time == 9.0
+
+    def test_new_sessions_unload_once_saved(self, tmp_path):
+        """Test that sessions made at runtime fall under the budget too."""
+        store = SessionStore(tmp_path, memory_budget=2 * 100 * SOLVE_BYTES)
+        core = TimerCore(store=store)
+        for number in range(5):
+            if number:
+                core.new_session()
+            core.add_solves([SolveTime(10.0 + i % 7, "R U") for i in range(100)])
+        core.save()
+        sessions = core.session_manager.sessions
+        assert len([s for s in sessions if s.loaded]) <= 2
+        assert core.current_session.loaded
+        assert not sessions[0].loaded
+        assert sessions[0].times[0].scramble == "R U" and len(sessions[0]) == 100
+
+    def test_summary_kept_current(self, tmp_path):
+        """Test that stored summaries follow solves added after loading."""
+        core = TimerCore(store=self.make_store(tmp_path))
+        core.record_solve(1.0)
+        core.save()
+        reloaded = TimerCore(store=SessionStore(tmp_path))
+        value, summary = reloaded.index.best("single")
+        assert (value, summary.count) == (1.0, 101)
+        assert reloaded.index.query().count == 501
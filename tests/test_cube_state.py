@@ -0,0 +1,132 @@
+"""
+Test compiled cube moves, state keys and the scramble state cache.
+"""
+
+import pytest
+from src.cache import LRUCache
+from src.cube_state import (
+    IDENTITY_PERMUTATION,
+    CubeSimulator,
+    compile_scramble,
+    scramble_state,
+)
+from src.scramble import ScrambleManager
+
+
+def _reference_state(scramble):
+    """Apply a scramble move by move with the reference simulator."""
+    cube = CubeSimulator()
+    for move in scramble.split():
+        cube.execute_move(move)
+    return cube.state
+
+
+class TestCompiledMoves:
+    """Test that compiled scrambles match the move-by-move simulator."""
+
+    @pytest.mark.parametrize("puzzle", ["3x3x3", "2x2x2", "4x4x4", "Megaminx"])
+    def test_compiled_matches_reference(self, puzzle):
+        """Test compiled application against execute_move for random scrambles."""
+        manager = ScrambleManager(puzzle)
+        for _ in range(10):
+            scramble = manager.generate_new()
+            cube = CubeSimulator()
+            cube.apply_scramble(scramble)
+            assert cube.state == _reference_state(scramble)
+
+    def test_rotations_and_doubles(self):
+        """Test whole-cube rotations and double turns compile correctly."""
+        scramble = "x y2 R U' z' F2 x' B L2 y'"
+        cube = CubeSimulator()
+        cube.apply_scramble(scramble)
+        assert cube.state == _reference_state(scramble)
+
+    @pytest.mark.parametrize(
+        "rotation,face,color", [("x", 0, "G"), ("y", 2, "R"), ("z", 0, "O")]
+    )
+    def test_rotations_follow_wca(self, rotation, face, color):
+        """Test that x, y and z turn the whole cube like R, U and F."""
+        state = scramble_state(rotation)
+        assert state[face * 9 : face * 9 + 9] == (color,) * 9
+        assert compile_scramble(f"{rotation} {rotation}'") == IDENTITY_PERMUTATION
+        assert compile_scramble(" ".join([rotation] * 4)) == IDENTITY_PERMUTATION
+
+    def test_wide_turns(self):
+        """Test wide turns as a face and rotation, and 2' as a double turn."""
+        assert compile_scramble("Rw L'") == compile_scramble("x")
+        assert compile_scramble("Uw D'") == compile_scramble("y")
+        assert compile_scramble("Fw' B") == compile_scramble("z'")
+        assert compile_scramble("Lw2") == compile_scramble("Lw Lw")
+        assert compile_scramble("R2'") == compile_scramble("R2")
+        assert compile_scramble("R Q r") == compile_scramble("R")
+
+    def test_inverse_returns_to_solved(self):
+        """Test that a move sequence followed by its inverse is solved."""
+        cube = CubeSimulator()
+        solved_key = cube.state_key()
+        cube.apply_scramble("R U R' U'")
+        assert cube.state_key() != solved_key
+        cube.apply_scramble("U R U' R'")
+        assert cube.state_key() == solved_key
+
+    @pytest.mark.parametrize("face", "UDFBLR")
+    def test_prime_undoes_turn_on_labelled_cube(self, face):
+        """Test X X' and X^4 on distinct stickers, not only on solid faces."""
+        assert compile_scramble(f"{face} {face}'") == IDENTITY_PERMUTATION
+        assert compile_scramble(f"{face} {face} {face} {face}") == (
+            IDENTITY_PERMUTATION
+        )
+
+    def test_scramble_then_inverse_is_solved(self):
+        """Test that a full scramble followed by its inverse is solved."""
+        scramble = "F' D F' D2 F' B' L' F2 U L' B U2 F2 L2 D B2 F' L2 R F"
+        undo = {"": "'", "'": "", "2": "2"}
+        inverse = " ".join(m[0] + undo[m[1:]] for m in reversed(scramble.split()))
+        assert scramble_state(f"{scramble} {inverse}") == scramble_state("")
+
+    def test_compiled_scramble_is_cached(self):
+        """Test that compiling the same scramble twice returns the same object."""
+        scramble = "R U R' U' F2 D"
+        assert compile_scramble(scramble) is compile_scramble(scramble)
+        assert scramble_state(scramble) is scramble_state(scramble)
+
+
+class TestStateKeys:
+    """Test compact state keys."""
+
+    def test_key_is_compact_bytes(self):
+        """Test that state keys are 21-byte values."""
+        key = CubeSimulator().state_key()
+        assert isinstance(key, bytes)
+        assert len(key) == 21
+
+    def test_different_states_have_different_keys(self):
+        """Test that distinct states produce distinct keys."""
+        a = CubeSimulator()
+        b = CubeSimulator()
+        b.apply_scramble("R")
+        assert a.state_key() != b.state_key()
+
+
+class TestLRUCache:
+    """Test the LRU cache helper."""
+
+    def test_eviction_order(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    def test_hit_miss_counters(self):
+        """Test hit and miss accounting."""
+        cache = LRUCache()
+        assert cache.get("missing") is None
+        cache.put("k", "v")
+        cache.get("k")
+        assert cache.hits == 1
+        assert cache.misses == 1
@@ -0,0 +1,116 @@
+"""
+Test display refresh scheduling.
+"""
+
+import pytest
+from unittest.mock import Mock
+from src.display import DisplayScheduler, LabelCache
+
+
+class FakeWidget:
+    """Minimal stand-in for the Tk after/after_idle API."""
+
+    def __init__(self):
+        self.pending = {}
+        self.delays = {}
+        self._next_id = 0
+
+    def after(self, delay, callback):
+        self._next_id += 1
+        self.pending[self._next_id] = callback
+        self.delays[self._next_id] = delay
+        return self._next_id
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def run_pending(self):
+        """Run every callback that is currently scheduled."""
+        pending, self.pending = self.pending, {}
+        for callback in pending.values():
+            callback()
+
+
+class TestDisplayScheduler:
+    """Test the adaptive timer redraw scheduler."""
+
+    def test_idle_redraw_runs_once(self):
+        """Test that an idle redraw request renders once and stops."""
+        widget = FakeWidget()
+        render = Mock()
+        scheduler = DisplayScheduler(widget, render)
+
+        scheduler.request_redraw()
+        widget.run_pending()
+        widget.run_pending()
+
+        assert render.call_count == 1
+        assert not widget.pending
+
+    def test_redraw_requests_are_coalesced(self):
+        """Test that several requests before the loop idles render once."""
+        widget = FakeWidget()
+        render = Mock()
+        scheduler = DisplayScheduler(widget, render)
+
+        for _ in range(5):
+            scheduler.request_redraw()
+        widget.run_pending()
+
+        assert render.call_count == 1
+
+    def test_running_redraws_continuously(self):
+        """Test that redraws keep ticking at the refresh rate while running."""
+        widget = FakeWidget()
+        render = Mock()
+        scheduler = DisplayScheduler(widget, render, refresh_rate=100)
+
+        scheduler.set_running(True)
+        for _ in range(4):
+            widget.run_pending()
+
+        assert render.call_count == 4
+        assert list(widget.delays.values())[-1] == 10
+
+        scheduler.set_running(False)
+        widget.run_pending()
+        widget.run_pending()
+        assert render.call_count == 5
+
+    def test_cancel(self):
+        """Test cancelling a pending redraw."""
+        widget = FakeWidget()
+        render = Mock()
+        scheduler = DisplayScheduler(widget, render)
+
+        scheduler.request_redraw()
+        scheduler.cancel()
+        widget.run_pending()
+
+        render.assert_not_called()
+
+
+class TestLabelCache:
+    """Test skipping unchanged label updates."""
+
+    def test_unchanged_options_are_skipped(self):
+        """Test that identical options only configure the label once."""
+        cache = LabelCache()
+        label = Mock()
+
+        assert cache.update(label, text="12.34", fg="#333")
+        assert not cache.update(label, text="12.34", fg="#333")
+        assert cache.update(label, text="12.35", fg="#333")
+        assert label.config.call_count == 2
+
+    def test_clear_forces_update(self):
+        """Test that clearing the cache reapplies options."""
+        cache = LabelCache()
+        label = Mock()
+
+        cache.update(label, text="1")
+        cache.clear()
+        assert cache.update(label, text="1")
@@ -0,0 +1,167 @@
+"""
+Test time formatting.
+"""
+
+import pytest
+from src.formatting import TimeFormatter, TimeParseError, parse_many, parse_time
+from src.statistics import SolveTime
+from src.timer import Stopwatch
+
+
+class TestTimeFormatter:
+    """Test the cached time formatter."""
+
+    @pytest.mark.parametrize(
+        "seconds, expected",
+        [
+            (0, "00.00"),
+            (5.234, "05.23"),
+            (12.345, "12.35"),
+            (59.999, "1:00.00"),
+            (65.432, "1:05.43"),
+            (3725.5, "62:05.50"),
+        ],
+    )
+    def test_default_matches_legacy_format(self, seconds, expected):
+        """Test the default formatter keeps the M:SS.cc / SS.cc layout."""
+        assert TimeFormatter().format(seconds) == expected
+
+    def test_special_values(self):
+        """Test None and DNF values."""
+        formatter = TimeFormatter()
+        assert formatter.format(None) == "---"
+        assert formatter.format(float("inf")) == "DNF"
+
+    def test_truncation(self):
+        """Test truncating instead of rounding, including float edge cases."""
+        formatter = TimeFormatter(rounding="truncate")
+        assert formatter.format(12.349) == "12.34"
+        assert formatter.format(12.34) == "12.34"
+        assert formatter.format(59.999) == "59.99"
+
+    def test_wca_rounding(self):
+        """Test WCA truncation under 10 minutes and whole seconds above."""
+        formatter = TimeFormatter(rounding="wca")
+        assert formatter.format(599.999) == "9:59.99"
+        assert formatter.format(612.6) == "10:13.00"
+
+    def test_millisecond_precision(self):
+        """Test millisecond precision output."""
+        formatter = TimeFormatter(precision="ms", rounding="truncate")
+        assert formatter.format(12.3456) == "12.345"
+        assert formatter.format(75.0019) == "1:15.001"
+
+    def test_integer_nanoseconds(self):
+        """Test formatting exact stopwatch times without float rounding."""
+        assert TimeFormatter(rounding="truncate").format_ns(12_349_999_999) == "12.34"
+        assert TimeFormatter().format_ns(12_345_000_000) == "12.35"
+        assert TimeFormatter(rounding="wca").format_ns(612_600_000_000) == "10:13.00"
+        assert TimeFormatter(precision="ms").format_ns(75_001_900_000) == "1:15.002"
+        assert TimeFormatter().format_ns(None) == "---"
+
+    @pytest.mark.parametrize("rounding", TimeFormatter.ROUNDING_MODES)
+    def test_seconds_match_nanoseconds(self, rounding):
+        """Test that seconds and nanoseconds of one time format the same."""
+        formatter = TimeFormatter(rounding=rounding)
+        for ns in (125_000_000, 12_345_000_000, 12_005_000_000, 600_500_000_000):
+            assert formatter.format(ns / 1e9) == formatter.format_ns(ns)
+        assert TimeFormatter().format(12.345) == "12.35"
+        assert TimeFormatter().format(0.125) == "00.13"
+        solve = SolveTime(0.0, penalty="+2", elapsed_ns=10_004_999_999)
+        assert TimeFormatter(rounding="truncate").format_solve(solve) == "12.00+"
+
+    def test_invalid_options(self):
+        """Test that unknown precision or rounding modes are rejected."""
+        with pytest.raises(ValueError):
+            TimeFormatter(precision="ds")
+        with pytest.raises(ValueError):
+            TimeFormatter(rounding="up")
+
+    def test_format_many(self):
+        """Test bulk formatting matches single formatting."""
+        formatter = TimeFormatter()
+        values = [i * 0.37 for i in range(500)]
+        assert formatter.format_many(values) == [formatter.format(v) for v in values]
+
+    def test_format_solves_with_penalties(self):
+        """Test formatting SolveTime objects with penalties."""
+        formatter = TimeFormatter()
+        solves = [
+            SolveTime(10.5),
+            SolveTime(10.5, penalty="+2"),
+            SolveTime(10.5, penalty="DNF"),
+        ]
+        assert formatter.format_solves(solves) == ["10.50", "12.50+", "DNF"]
+        assert [str(solve) for solve in solves] == ["10.50", "12.50+", "DNF"]
+
+    def test_cache_is_bounded(self):
+        """Test that the result cache never grows past its size."""
+        formatter = TimeFormatter(cache_size=10)
+        formatter.format_many([i / 100 for i in range(100)])
+        assert len(formatter._cache) <= 10
+
+
+class TestParseTime:
+    """Test the strict time parser."""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("12.34", (12.34, None)),
+            ("12", (12.0, None)),
+            ("12.3", (12.3, None)),
+            ("12.345", (12.345, None)),
+            ("1:02.34", (62.34, None)),
+            ("1:02", (62.0, None)),
+            (" 9.99 ", (9.99, None)),
+            ("14.34+", (12.34, "+2")),
+            ("DNF", (0.0, "DNF")),
+            ("DNF(12.34)", (12.34, "DNF")),
+            ("dnf (1:00.00)", (60.0, "DNF")),
+            ("0.00", (0.0, None)),
+        ],
+    )
+    def test_valid_times(self, text, expected):
+        """Test parsing valid time strings."""
+        assert parse_time(text) == expected
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "",
+            "abc",
+            "12.3456",
+            "1:75.00",
+            "-3.00",
+            "1e3",
+            "DNF 12",
+            "1.50+",
+            "\uff10\uff11.\uff12",  # Fullwidth digits
+            "1:\u0661\u0662",  # Arabic-Indic digits
+        ],
+    )
+    def test_invalid_times(self, text):
+        """Test that malformed strings raise instead of returning zero."""
+        with pytest.raises(TimeParseError):
+            parse_time(text)
+
+    def test_round_trip_with_formatter(self):
+        """Test that formatted times parse back to the same value."""
+        formatter = TimeFormatter()
+        for cs in range(0, 20000, 7):
+            seconds = cs / 100
+            assert parse_time(formatter.format(seconds)).seconds == seconds
+
+    def test_parse_many_reports_errors(self):
+        """Test bulk parsing with error reporting."""
+        results, errors = parse_many(["12.34", "oops", "DNF", "0.00"])
+        assert results[0] == (12.34, None)
+        assert results[1] is None
+        assert results[3] == (0.0, None)
+        assert errors == [(1, "oops", "Invalid time: 'oops'")]
+
+    def test_legacy_time_to_seconds(self):
+        """Test the legacy Stopwatch helper still returns 0.0 on bad input."""
+        assert Stopwatch.time_to_seconds("1:05.43") == 65.43
+        assert Stopwatch.time_to_seconds("12") == 12.0
+        assert Stopwatch.time_to_seconds("bad") == 0.0
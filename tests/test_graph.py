@@ -0,0 +1,187 @@
+"""
+Test the graph series, downsampling and viewport.
+"""
+
+import math
+import random
+import time
+from src.graph import (
+    GraphModel,
+    MinMaxLevels,
+    SessionSeries,
+    minmax_downsample,
+    rolling_average,
+)
+from src.statistics import trimmed_average
+from src.statistics import Session, SolveTime
+
+
+def make_session(count, seed=1, dnf_every=0):
+    """Make a session of random solves."""
+    rng = random.Random(seed)
+    session = Session()
+    session.add_times(
+        [
+            SolveTime(
+                rng.uniform(8, 20),
+                "",
+                penalty="DNF" if dnf_every and i % dnf_every == 0 else None,
+            )
+            for i in range(count)
+        ]
+    )
+    return session
+
+
+class TestSeries:
+    """Test the precomputed series."""
+
+    def test_rolling_average_matches_brute_force(self):
+        """Test every window against a direct trimmed average."""
+        rng = random.Random(2)
+        values = [rng.choice([math.inf] + [rng.uniform(8, 20)] * 6) for _ in range(400)]
+        for size in (5, 12, 100):
+            indexes, averages = rolling_average(values, size)
+            expected = [
+                (i, trimmed_average(values[i - size + 1 : i + 1]))
+                for i in range(size - 1, len(values))
+            ]
+            expected = [(i, a) for i, a in expected if a != math.inf]
+            assert list(indexes) == [i for i, _ in expected]
+            for got, (_, want) in zip(averages, expected):
+                assert math.isclose(got, want)
+
+    def test_append_matches_rebuild(self):
+        """Test that adding solves one at a time matches building from scratch."""
+        session = make_session(150, dnf_every=9)
+        series = SessionSeries()
+        series.update(session)
+        for i in range(30):
+            session.add_time(SolveTime(10.0 + i % 4, "", penalty=None))
+            assert series.update(session)
+
+        rebuilt = SessionSeries()
+        rebuilt.update(session)
+        for name, (indexes, values, levels) in rebuilt.series.items():
+            assert series.series[name][0] == indexes
+            assert series.series[name][1] == values
+            assert series.series[name][2].levels == levels.levels
+
+    def test_unchanged_session_is_not_rebuilt(self):
+        """Test that update reports no change for the same version."""
+        session = make_session(10)
+        series = SessionSeries()
+        assert series.update(session)
+        assert not series.update(session)
+
+
+class TestDownsample:
+    """Test min/max downsampling."""
+
+    def test_small_ranges_are_kept(self):
+        """Test that few points are returned unchanged."""
+        points = minmax_downsample([0, 1, 2], [3.0, 1.0, 2.0], 0, 3, 10)
+        assert points == [(0, 3.0), (1, 1.0), (2, 2.0)]
+
+    def test_extremes_preserved(self):
+        """Test that spikes survive downsampling, with and without levels."""
+        rng = random.Random(4)
+        values = [rng.uniform(8, 20) for _ in range(50_000)]
+        values[12_345] = 99.0
+        values[40_000] = 1.0
+        indexes = list(range(len(values)))
+        levels = MinMaxLevels(values)
+        for with_levels in (None, levels):
+            points = minmax_downsample(
+                indexes, values, 0, len(values), 500, with_levels
+            )
+            assert len(points) <= 1000
+            assert (12_345, 99.0) in points
+            assert (40_000, 1.0) in points
+            assert [i for i, _ in points] == sorted(i for i, _ in points)
+
+
+class TestGraphModel:
+    """Test the viewport and projection."""
+
+    def test_zoom_and_pan_stay_in_range(self):
+        """Test that the view never leaves the session."""
+        model = GraphModel()
+        model.update(make_session(1000))
+        model.zoom(0.1, anchor=1.0)
+        start, end = model.view()
+        assert end == 1000 and 99 <= end - start <= 101
+        model.pan(-20)
+        assert model.view()[0] == 0
+        model.zoom(100)
+        assert model.view() == (0, 1000)
+
+    def test_plot_fits_canvas(self):
+        """Test that coordinates lie in the canvas with two points per pixel."""
+        model = GraphModel()
+        model.update(make_session(5000, dnf_every=13))
+        lines, (low, high) = model.plot(400, 200)
+        assert low < high
+        for coords in lines.values():
+            assert len(coords) // 2 <= 2 * 400
+            assert all(0 <= x <= 400 for x in coords[0::2])
+            assert all(0 <= y <= 200 for y in coords[1::2])
+
+    def test_empty_session(self):
+        """Test that an empty session has nothing to draw."""
+        model = GraphModel()
+        model.update(Session())
+        assert model.plot(400, 200) == ({}, (None, None))
+
+    def test_plot_100k_under_budget(self):
+        """Test that a 100k-solve session projects well within 50 ms."""
+        model = GraphModel()
+        model.update(make_session(100_000))
+        model.plot(1000, 400)  # Warm up
+
+        began = time.perf_counter()
+        lines, _ = model.plot(1000, 400)
+        assert time.perf_counter() - began < 0.05
+        assert all(len(coords) // 2 <= 2000 for coords in lines.values())
+
+    def wait_for_build(self, model):
+        """Poll the model until its threaded rebuild has landed."""
+        deadline = time.monotonic() + 5.0
+        while not model.poll() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert not model.loading
+
+    def test_large_rebuilds_run_off_thread(self):
+        """Test that edits to a large session rebuild without blocking."""
+        session = make_session(100_000)
+        model = GraphModel(offload_threshold=1000)
+        began = time.perf_counter()
+        assert model.update(session)
+        assert time.perf_counter() - began < 0.05
+        assert model.loading
+        self.wait_for_build(model)
+        assert len(model.data) == 100_000
+
+        session.add_time(SolveTime(9.0, ""))
+        assert model.update(session) and not model.loading  # Appended in place
+        session.set_penalty(50, "DNF")
+        began = time.perf_counter()
+        assert model.update(session) and model.loading
+        assert time.perf_counter() - began < 0.05
+        self.wait_for_build(model)
+
+        rebuilt = SessionSeries()
+        rebuilt.update(session)
+        for name, (indexes, values, _) in rebuilt.series.items():
+            assert model.data.series[name][0] == indexes
+            assert model.data.series[name][1] == values
+
+    def test_superseded_rebuild_is_dropped(self):
+        """Test that only the rebuild of the newest version is shown."""
+        session = make_session(3000)
+        model = GraphModel(offload_threshold=1000)
+        model.update(session)
+        session.remove_time(0)
+        model.update(session)
+        self.wait_for_build(model)
+        assert model.data.is_current(session) and len(model.data) == 2999
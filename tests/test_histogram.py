@@ -0,0 +1,101 @@
+"""
+Test the incremental time histogram.
+"""
+
+import random
+from src.core import TimerCore
+from src.histogram import TimeHistogram
+from src.statistics import Session, SolveTime
+
+
+def binned(session):
+    """Rebuild a histogram of a session from scratch."""
+    histogram = TimeHistogram()
+    for solve in session.times:
+        histogram.add(solve.display_time)
+    return histogram
+
+
+class TestTimeHistogram:
+    """Test binning and percentiles."""
+
+    def test_bins(self):
+        """Test that times land in fixed-width bins, with gaps filled."""
+        histogram = TimeHistogram(bin_width=1)
+        for seconds in (10.2, 10.9, 13.0):
+            histogram.add(seconds)
+        assert histogram.bins() == [(10, 2), (11, 0), (12, 0), (13, 1)]
+
+    def test_bin_edges(self):
+        """Test that an exact multiple of 0.1 is not put one bin low."""
+        histogram = TimeHistogram()
+        histogram.add(0.3)
+        assert histogram.keys == [3]
+
+    def test_remove_and_dnf(self):
+        """Test removing the last solve of a bin and counting DNFs apart."""
+        histogram = TimeHistogram()
+        histogram.add(12.0)
+        histogram.add(float("inf"))
+        assert (histogram.count, histogram.dnf_count) == (1, 1)
+        histogram.remove(12.0)
+        histogram.remove(float("inf"))
+        assert histogram.keys == [] and histogram.counts == {}
+        assert histogram.percentile(50) is None
+
+    def test_percentile_within_bin_width(self):
+        """Test percentiles against sorting the times."""
+        rng = random.Random(7)
+        values = [rng.gauss(15, 2) for _ in range(5000)]
+        histogram = TimeHistogram()
+        for value in values:
+            histogram.add(value)
+        ordered = sorted(values)
+        for p in (10, 50, 90):
+            exact = ordered[int(p / 100 * len(ordered)) - 1]
+            assert abs(histogram.percentile(p) - exact) <= histogram.bin_width
+
+    def test_merged_bins_and_display_width(self):
+        """Test merging fine bins into display rows."""
+        histogram = TimeHistogram()
+        for seconds in (9.95, 10.05, 10.55, 19.9):
+            histogram.add(seconds)
+        assert histogram.display_width() == 0.5
+        bins = histogram.bins(1)
+        assert bins[0] == (9.0, 1) and bins[1] == (10.0, 2) and len(bins) == 11
+
+
+class TestSessionHistogram:
+    """Test that sessions keep their histogram current."""
+
+    def test_incremental_updates_match_rebuild(self):
+        """Test adding, removing, penalties and clearing against rebinning."""
+        rng = random.Random(3)
+        session = Session()
+        session.add_times([SolveTime(rng.uniform(8, 20), "") for _ in range(50)])
+        histogram = session.histogram()
+
+        session.add_time(SolveTime(11.11, ""))
+        session.add_times([SolveTime(9.0, "", penalty="DNF")])
+        session.remove_time(5)
+        session.set_penalty(3, "+2")
+        session.set_penalty(4, "DNF")
+        assert session.histogram() is histogram
+        expected = binned(session)
+        assert histogram.counts == expected.counts
+        assert histogram.keys == expected.keys
+        assert (histogram.count, histogram.dnf_count) == (
+            expected.count,
+            expected.dnf_count,
+        )
+
+        session.clear()
+        assert histogram.count == 0 and histogram.keys == []
+
+    def test_core_penalty_updates_histogram(self):
+        """Test that penalties set through the core are reflected."""
+        core = TimerCore()
+        core.record_solve(10.0, scramble="")
+        histogram = core.current_session.histogram()
+        core.set_penalty(0, "+2")
+        assert histogram.keys == [120]
@@ -0,0 +1,180 @@
+"""
+Test input devices, the simulated smart cube and auto-stop.
+"""
+
+import io
+import queue
+import socket
+import threading
+import time
+import pytest
+from src.core import TimerCore
+from src.input_sources import (
+    MOVE,
+    START,
+    CubeTracker,
+    InputController,
+    SimulatedDevice,
+    is_solved,
+    open_source,
+)
+
+MS = 1_000_000
+
+
+def inverse(moves):
+    """Get the moves that undo moves."""
+    undo = {"": "'", "'": "", "2": "2"}
+    return [move[0] + undo[move[1:]] for move in reversed(moves)]
+
+
+def smart_cube_lines(scramble, solution, gap_ms=100, pause_ms=5000):
+    """Lines for scrambling, inspecting, then solving on a smart cube."""
+    lines = []
+    ms = 0
+    for move in scramble:
+        ms += gap_ms
+        lines.append(f"{ms} {move}")
+    ms += pause_ms
+    for move in solution:
+        lines.append(f"{ms} {move}")
+        ms += gap_ms
+    return "\n".join(lines) + "\n"
+
+
+class TestSimulatedDevice:
+    """Test reading events from text."""
+
+    def test_parse_line(self):
+        """Test moves, events, comments and bad lines."""
+        event = SimulatedDevice.parse_line("1.5 R'", 1000)
+        assert (event.kind, event.ts_ns, event.move) == (MOVE, 1000 + 1_500_000, "R'")
+        assert SimulatedDevice.parse_line("20 start", 0).kind == START
+        assert SimulatedDevice.parse_line("# comment", 0) is None
+        assert SimulatedDevice.parse_line("   ", 0) is None
+        for bad in ("R", "10 Q", "x R"):
+            with pytest.raises(ValueError):
+                SimulatedDevice.parse_line(bad, 0)
+
+    def test_background_thread(self):
+        """Test pumping a device from its own thread into a queue."""
+        device = SimulatedDevice(io.StringIO("0 R\n5 U\n"), clock=lambda: 0)
+        events = queue.SimpleQueue()
+        device.start(events.put)
+        device._thread.join(timeout=5)
+        assert [events.get().move, events.get().move] == ["R", "U"]
+
+    def test_socket(self):
+        """Test a device fed from a local socket."""
+        listener = socket.create_server(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+
+        def serve():
+            connection, _ = listener.accept()
+            with connection:
+                connection.sendall(b"0 start\n1234 stop\n")
+            listener.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        device = open_source(f"127.0.0.1:{port}", clock=lambda: 0)
+        core = TimerCore()
+        device.pump(InputController(core).handle)
+        device.close()
+        thread.join(timeout=5)
+        assert core.current_session.times[0].time == 1.234
+
+    def test_file(self, tmp_path):
+        """Test replaying a move file."""
+        path = tmp_path / "moves.txt"
+        path.write_text("# stackmat\n100 start\n9100 stop\n", encoding="utf-8")
+        device = open_source(str(path), clock=lambda: 0)
+        core = TimerCore()
+        assert device.pump(InputController(core).handle) == 2
+        device.close()
+        assert core.current_session.times[0].time == 9.0
+
+
+class TestCubeTracker:
+    """Test incremental state tracking."""
+
+    def test_solved_detection(self):
+        """Test solved in any orientation, and not before."""
+        tracker = CubeTracker()
+        assert tracker.solved and is_solved(tracker.facelets)
+        assert not tracker.apply("R")
+        assert tracker.apply("R'")
+        assert tracker.apply("x") and tracker.apply("y2")
+        sexy = ["R", "U", "R'", "U'"]
+        results = [tracker.apply(move) for move in sexy * 6]
+        assert results[-1] and not any(results[:-1])
+
+    def test_move_cost(self):
+        """Test that a move is tracked well within a millisecond."""
+        tracker = CubeTracker()
+        moves = ["R", "U'", "F2", "D", "L'", "B2"] * 2000
+        began = time.perf_counter()
+        for move in moves:
+            tracker.apply(move)
+        assert (time.perf_counter() - began) / len(moves) < 0.0001
+
+
+class TestSmartCubeSolve:
+    """Test arming, starting and auto-stopping from the move stream."""
+
+    def play(self, core, text):
+        """Feed a simulated smart cube to a controller."""
+        controller = InputController(core)
+        SimulatedDevice(io.StringIO(text), clock=lambda: 0).pump(controller.handle)
+        return controller
+
+    def test_auto_start_and_stop(self):
+        """Test a solve timed from the first move to the solving move."""
+        core = TimerCore()
+        scramble = core.current_scramble.split()
+        solution = inverse(scramble)
+        self.play(core, smart_cube_lines(scramble, solution, gap_ms=100))
+
+        solve = core.current_session.times[0]
+        assert solve.time == pytest.approx((len(solution) - 1) * 0.1)
+        assert solve.scramble == " ".join(scramble)
+        assert solve.reconstruction.moves() == solution
+        assert solve.reconstruction.times_ms()[:3] == [0, 100, 200]
+        assert not core.stopwatch.running
+
+    def test_not_armed_without_scramble(self):
+        """Test that turning an unscrambled cube does not start the timer."""
+        core = TimerCore()
+        self.play(core, "0 R\n100 R'\n200 U\n300 U'\n")
+        assert len(core.current_session) == 0 and not core.stopwatch.running
+
+    def test_stopped_from_keyboard(self):
+        """Test that a solve stopped by hand is not stopped again by the cube."""
+        core = TimerCore()
+        scramble = core.current_scramble.split()
+        solution = inverse(scramble)
+        controller = InputController(core)
+        lines = smart_cube_lines(scramble, solution).splitlines()
+        device = SimulatedDevice(io.StringIO("\n".join(lines[:-1])), clock=lambda: 0)
+        device.pump(controller.handle)
+        core.stop()
+        SimulatedDevice(io.StringIO(lines[-1]), clock=lambda: 0).pump(
+            controller.handle
+        )
+        assert len(core.current_session) == 1
+        assert core.current_session.times[0].reconstruction is None
+
+    def test_solving_move_handled_quickly(self):
+        """Test the latency from the solving move to the recorded solve."""
+        core = TimerCore()
+        scramble = core.current_scramble.split()
+        controller = self.play(
+            core, smart_cube_lines(scramble, inverse(scramble)[:-1])
+        )
+        last = inverse(scramble)[-1]
+        event = SimulatedDevice.parse_line(f"999999 {last}", 0)
+
+        began = time.perf_counter()
+        controller.handle(event)
+        assert time.perf_counter() - began < 0.005
+        assert len(core.current_session) == 1
@@ -0,0 +1,70 @@
+"""
+Test input event timestamping.
+"""
+
+import pytest
+from types import SimpleNamespace
+from src.input_timing import EventClock
+
+MS = 1_000_000  # nanoseconds per millisecond
+
+
+class TestEventClock:
+    """Test mapping Tk event times onto perf_counter_ns."""
+
+    def test_first_event_uses_dispatch_time(self):
+        """Test that the first event seeds the offset from its dispatch time."""
+        clock = EventClock()
+        stamp = clock.event_ns(SimpleNamespace(time=1000), now_ns=50_000 * MS)
+        assert stamp == 50_000 * MS
+
+    def test_backlog_is_excluded(self):
+        """Test that a delayed dispatch is stamped at the event time."""
+        clock = EventClock()
+        clock.event_ns(SimpleNamespace(time=1000), now_ns=50_000 * MS)
+
+        # Key released at event time 13000 but handled 40 ms late
+        stamp = clock.event_ns(SimpleNamespace(time=13_000), now_ns=62_040 * MS)
+
+        assert stamp == 62_000 * MS
+        assert clock.lag_stats()["last"] == pytest.approx(40.0)
+
+    def test_offset_converges_to_minimum(self):
+        """Test that a less delayed event improves the offset estimate."""
+        clock = EventClock()
+        clock.event_ns(SimpleNamespace(time=1000), now_ns=50_010 * MS)
+        stamp = clock.event_ns(SimpleNamespace(time=2000), now_ns=51_000 * MS)
+
+        assert stamp == 51_000 * MS
+        assert clock.event_ns(SimpleNamespace(time=3000), now_ns=52_005 * MS) == (
+            52_000 * MS
+        )
+
+    def test_missing_timestamp_falls_back_to_now(self):
+        """Test synthetic events without a time field."""
+        clock = EventClock()
+        assert clock.event_ns(SimpleNamespace(), now_ns=123) == 123
+        assert clock.event_ns(SimpleNamespace(time="??"), now_ns=456) == 456
+
+    def test_counter_wraparound(self):
+        """Test that 32-bit event time wrap-around keeps stamps continuous."""
+        clock = EventClock()
+        last_ms = EventClock.WRAP_MS - 10
+        clock.event_ns(SimpleNamespace(time=last_ms), now_ns=1_000 * MS)
+
+        stamp = clock.event_ns(SimpleNamespace(time=10), now_ns=1_025 * MS)
+
+        assert stamp == 1_020 * MS
+
+    def test_lag_stats(self):
+        """Test the dispatch lag summary."""
+        clock = EventClock()
+        assert clock.lag_stats()["count"] == 0
+
+        clock.event_ns(SimpleNamespace(time=1000), now_ns=10_000 * MS)
+        clock.event_ns(SimpleNamespace(time=1100), now_ns=10_130 * MS)
+        stats = clock.lag_stats()
+
+        assert stats["count"] == 2
+        assert stats["max"] == pytest.approx(30.0)
+        assert stats["mean"] == pytest.approx(15.0)
@@ -0,0 +1,105 @@
+"""
+Test hot-path instrumentation.
+"""
+
+import json
+import pytest
+from src.instrumentation import HOT_PATHS, Histogram, Instrumentation
+
+
+class Widget:
+    """Class with a method to instrument."""
+
+    def work(self, value):
+        return value * 2
+
+
+class TestHistogram:
+    """Test the log-linear duration histogram."""
+
+    def test_buckets_contain_their_values(self):
+        """Test that every value falls within its bucket's bounds."""
+        for ns in list(range(0, 5000)) + [10**6, 123_456_789, 2**40 + 5]:
+            low, high = Histogram.bucket_bounds(Histogram.bucket_index(ns))
+            assert low <= ns <= high
+
+    def test_percentiles_are_close(self):
+        """Test p50/p99 estimates against exact values."""
+        histogram = Histogram()
+        values = [1000 * i for i in range(1, 1001)]  # 1 us .. 1 ms
+        for value in values:
+            histogram.record(value)
+
+        assert histogram.count == 1000
+        assert histogram.percentile(50) == pytest.approx(500_000, rel=0.07)
+        assert histogram.percentile(99) == pytest.approx(990_000, rel=0.07)
+        assert histogram.percentile(100) == 1_000_000
+
+    def test_summary_in_milliseconds(self):
+        """Test the summary of a histogram."""
+        histogram = Histogram()
+        assert histogram.summary()["p50_ms"] is None
+        histogram.record(2_000_000)
+        summary = histogram.summary()
+        assert summary["count"] == 1
+        assert summary["p50_ms"] == pytest.approx(2.0)
+        assert summary["max_ms"] == pytest.approx(2.0)
+
+
+class TestInstrumentation:
+    """Test patching, recording and dumping."""
+
+    def test_disabled_leaves_methods_untouched(self):
+        """Test that nothing is patched until enabled."""
+        original = Widget.__dict__["work"]
+        Instrumentation()
+        assert Widget.__dict__["work"] is original
+
+    def test_wrap_records_and_restores(self):
+        """Test that a wrapped method is timed and restored on disable."""
+        original = Widget.__dict__["work"]
+        inst = Instrumentation()
+        inst.wrap(Widget, "work", "widget.work")
+        inst.enabled = True
+        try:
+            assert Widget().work(21) == 42
+            assert inst.histograms["widget.work"].count == 1
+        finally:
+            inst.disable()
+        assert Widget.__dict__["work"] is original
+
+    def test_enable_patches_hot_paths(self):
+        """Test that enable wraps every configured hot path."""
+        inst = Instrumentation()
+        inst.enable()
+        try:
+            assert len(inst._patches) == len(HOT_PATHS)
+            assert set(inst.histograms) == {name for *_, name in HOT_PATHS}
+        finally:
+            inst.disable()
+        assert not inst.enabled
+
+    def test_span_only_records_when_enabled(self):
+        """Test the span context manager."""
+        inst = Instrumentation()
+        with inst.span("block"):
+            pass
+        assert "block" not in inst.histograms
+        inst.enabled = True
+        with inst.span("block"):
+            pass
+        assert inst.histograms["block"].count == 1
+
+    def test_reset_and_dump_json(self, tmp_path):
+        """Test resetting samples and writing a JSON dump."""
+        inst = Instrumentation()
+        inst.histogram("a").record(1_000_000)
+        path = tmp_path / "perf.json"
+        inst.dump_json(path, {"input_lag_ms": {"count": 0}})
+
+        data = json.loads(path.read_text())
+        assert data["spans"]["a"]["count"] == 1
+        assert data["input_lag_ms"] == {"count": 0}
+
+        inst.reset()
+        assert inst.snapshot()["a"]["count"] == 0
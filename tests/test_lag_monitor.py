@@ -0,0 +1,170 @@
+"""
+Test the event-loop lag monitor.
+"""
+
+import logging
+import tkinter
+from unittest.mock import MagicMock
+import pytest
+from src.lag_monitor import LagMonitor, callback_name, unwrap_callback
+
+
+class FakeWidget:
+    """Widget stand-in that records after() calls."""
+
+    def __init__(self):
+        self.scheduled = []
+        self.cancelled = []
+
+    def after(self, ms, func):
+        self.scheduled.append((ms, func))
+        return f"after#{len(self.scheduled)}"
+
+    def after_cancel(self, after_id):
+        self.cancelled.append(after_id)
+
+
+class FakeClock:
+    """Manually advanced nanosecond clock."""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def slow_handler():
+    """Stand-in for a handler that blocks the event loop."""
+
+
+class TestLagMonitor:
+    """Test lag measurement and stall attribution."""
+
+    def _monitor(self, **kwargs):
+        clock = FakeClock()
+        widget = FakeWidget()
+        monitor = LagMonitor(widget, interval_ms=50, clock=clock, **kwargs)
+        return monitor, widget, clock
+
+    def test_tick_measures_lateness(self):
+        """Test that a tick's lag is the time past its due time."""
+        monitor, widget, clock = self._monitor()
+        monitor.running = True
+        monitor._schedule()
+        clock.now = 62_000_000  # Due at 50 ms, ran at 62 ms
+        monitor._tick()
+
+        assert monitor.lags_ms[-1] == pytest.approx(12.0)
+        assert len(widget.scheduled) == 2  # Rescheduled
+
+    def test_stall_is_attributed_to_slowest_handler(self, caplog):
+        """Test that a late tick blames the slowest handler since the last."""
+        monitor, _, clock = self._monitor(stall_ms=100)
+        monitor.handler_ran(lambda: None, 5_000_000)
+        monitor.handler_ran(slow_handler, 180_000_000)
+
+        with caplog.at_level(logging.WARNING, logger="src.lag_monitor"):
+            monitor.observe(clock(), 185.0)
+
+        stall = monitor.stalls[-1]
+        assert stall.lag_ms == 185.0
+        assert stall.handler.endswith("slow_handler")
+        assert stall.handler_ms == pytest.approx(180.0)
+        assert "slow_handler" in caplog.text
+
+    def test_small_lag_is_not_a_stall(self):
+        """Test that lags under the threshold are only recorded."""
+        monitor, _, clock = self._monitor(stall_ms=100)
+        monitor.handler_ran(slow_handler, 20_000_000)
+        monitor.observe(clock(), 20.0)
+        assert list(monitor.stalls) == []
+        assert monitor._slowest == (0, None)  # Attribution window restarts
+
+    def test_summary_and_histogram(self):
+        """Test lag percentiles and bucket counts."""
+        monitor, _, clock = self._monitor()
+        for lag in [0.5] * 98 + [30.0, 300.0]:
+            monitor.observe(clock(), lag)
+
+        summary = monitor.summary()
+        assert summary["count"] == 100
+        assert summary["p50_ms"] == 0.5
+        assert summary["p99_ms"] == 30.0
+        assert summary["max_ms"] == 300.0
+        buckets = dict(monitor.histogram())
+        assert buckets[1] == 98
+        assert buckets[50] == 1
+        assert buckets[500] == 1
+
+    def test_start_stop_restores_callback_dispatch(self):
+        """Test that stopping puts tkinter's CallWrapper back."""
+        original = tkinter.CallWrapper.__call__
+        monitor, widget, _ = self._monitor()
+        monitor.start()
+        try:
+            assert tkinter.CallWrapper.__call__ is not original
+        finally:
+            monitor.stop()
+        assert tkinter.CallWrapper.__call__ is original
+        assert widget.cancelled == ["after#1"]
+
+    def test_timed_callbacks_are_reported(self):
+        """Test that callbacks dispatched through Tk are timed."""
+        monitor, _, clock = self._monitor()
+        monitor.start()
+        try:
+
+            def handler():
+                clock.now += 7_000_000
+
+            tkinter.CallWrapper(handler, None, None)()
+        finally:
+            monitor.stop()
+        assert monitor._slowest[0] == 7_000_000
+        assert "handler" in monitor._slowest[1]
+
+
+class TestCallbackNames:
+    """Test naming of Tk callbacks."""
+
+    def test_after_wrapper_is_unwrapped(self):
+        """Test that after()'s callit closure resolves to the real function."""
+
+        def make_callit(func):
+            def callit():
+                func()
+
+            return callit
+
+        assert unwrap_callback(make_callit(slow_handler)) is slow_handler
+        assert callback_name(make_callit(slow_handler)).endswith("slow_handler")
+
+    def test_bound_method_name(self):
+        """Test that bound methods are named by class and method."""
+        monitor = LagMonitor(FakeWidget())
+        assert callback_name(monitor.start) == "src.lag_monitor.LagMonitor.start"
+
+
+class TestWindowLagMonitor:
+    """Test that the window only runs the lag monitor when asked to."""
+
+    @pytest.mark.parametrize("monitor_lag", [False, True])
+    def test_opt_in(self, monitor_lag):
+        """Test that an idle window schedules no ticks and wraps no callbacks."""
+        from src.ui import PSTimerUI
+
+        app = PSTimerUI.__new__(PSTimerUI)
+        app.monitor_lag = monitor_lag
+        app.lag_monitor = LagMonitor(FakeWidget())
+        app.display_scheduler = MagicMock()
+        app._generate_new_scramble = MagicMock()
+        original = tkinter.CallWrapper.__call__
+        try:
+            app._start_ui_loop()
+            assert app.lag_monitor.running == monitor_lag
+            assert len(app.lag_monitor.widget.scheduled) == int(monitor_lag)
+            assert (tkinter.CallWrapper.__call__ is original) != monitor_lag
+        finally:
+            app.lag_monitor.stop()
+        assert tkinter.CallWrapper.__call__ is original
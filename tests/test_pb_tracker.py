@@ -0,0 +1,177 @@
+"""
+Test personal-best detection and the PB timeline.
+"""
+
+import random
+import time
+import pytest
+from datetime import datetime, timedelta
+from src.core import TimerCore
+from src.pb_tracker import PB_STATS, window_stat
+from src.session_index import SessionSummary
+from src.statistics import SolveTime, best_mean
+from src.stats_worker import StatisticsWorker
+from src.storage import SessionStore
+
+DNF = float("inf")
+
+
+def brute_force_pbs(values):
+    """Find (solve number, stat, value) of every PB by rescanning, oldest first."""
+    solves = [
+        SolveTime(10.0, "", penalty="DNF") if value == DNF else SolveTime(value, "")
+        for value in values
+    ]
+    found = []
+    bests = dict.fromkeys(PB_STATS)
+    for n in range(1, len(values) + 1):
+        newest_first = solves[:n][::-1]
+        for stat, size in PB_STATS.items():
+            if n < size:
+                continue
+            value = window_stat(stat, newest_first)
+            if value != DNF and (bests[stat] is None or value < bests[stat]):
+                bests[stat] = value
+                found.append((n, stat, value))
+    return found
+
+
+def record_all(core, values):
+    """Record display times as solves; get (solve number, stat, value) PBs."""
+    found = []
+    core.subscribe(
+        "personal_best",
+        lambda pb, session: found.append((len(session), pb.stat, pb.value)),
+    )
+    for value in values:
+        if value == DNF:
+            core.record_solve(10.0, penalty="DNF", scramble="")
+        else:
+            core.record_solve(value, scramble="")
+    return found
+
+
+class TestDetection:
+    """Test which solves are reported as personal bests."""
+
+    def test_matches_rescanning(self):
+        """Test every reported PB against recomputing each stat from scratch."""
+        rng = random.Random(5)
+        values = [
+            DNF if rng.random() < 0.05 else rng.uniform(8, 20) for _ in range(400)
+        ]
+        core = TimerCore()
+        assert record_all(core, values) == brute_force_pbs(values)
+
+    def test_previous_and_timeline(self):
+        """Test that PBs carry the best they beat and are kept in order."""
+        core = TimerCore()
+        record_all(core, [12.0, 13.0, 11.0])
+        singles = core.pbs.timeline(stat="single")
+        assert [(pb.value, pb.previous) for pb in singles] == [
+            (12.0, None),
+            (11.0, 12.0),
+        ]
+        assert singles[1].improvement == 1.0
+        assert [pb.stat for pb in core.pbs.timeline()] == ["single", "single", "mo3"]
+        assert core.pbs.timeline(puzzle_type="2x2x2") == []
+
+    def test_bests_are_per_puzzle(self):
+        """Test that a slower solve on another puzzle is still its first PB."""
+        core = TimerCore()
+        record_all(core, [10.0])
+        core.set_puzzle_type("2x2x2")
+        core.new_session()
+        assert record_all(core, [30.0]) == [(1, "single", 30.0)]
+
+    def test_edits_reseed_bests(self):
+        """Test that deleting the PB solve lets a slower solve be a PB."""
+        core = TimerCore()
+        record_all(core, [10.0, 12.0])
+        core.delete_solve(1)  # The 10.0
+        assert record_all(core, [11.0]) == [(2, "single", 11.0)]
+        assert core.pbs.timeline(stat="single")[-1].previous == 12.0
+
+    def test_edits_rebuild_off_the_stop_path(self, monkeypatch):
+        """Test that the solve after an edit does not rescan the session."""
+        core = TimerCore()
+        core.summary_worker = StatisticsWorker()
+        record_all(core, [10.0, 12.0, 13.0])
+        core.delete_solve(2)  # The 10.0
+        monkeypatch.setattr(SessionSummary, "from_session", None)
+        assert record_all(core, [11.0]) == []  # Old bests until rebuilt
+
+        deadline = time.monotonic() + 5.0
+        while core.summary_worker.pending and time.monotonic() < deadline:
+            core.summary_worker.poll()
+            time.sleep(0.005)
+        core.summary_worker.stop()
+        assert core.pbs.bests("3x3x3")["single"] == 11.0
+        assert (4, "single", 10.5) in record_all(core, [10.5])
+
+    def test_matches_statistics(self):
+        """Test that an average PB is the average shown for the session."""
+        core = TimerCore()
+        record_all(core, [10.0, 11.0, 12.0, 13.0])
+        core.record_solve(9.5, penalty="+2", scramble="")
+        ao5 = core.pbs.timeline(stat="ao5")[-1].value
+        assert ao5 == core.statistics()["ao5"] == pytest.approx(11.5)
+
+    def test_old_edits_reseed_from_whole_session(self):
+        """Test reseeding after an edit further back than the largest window."""
+        core = TimerCore()
+        record_all(core, [8.0] * 5 + [15.0] * 195)
+        assert core.pbs.bests("3x3x3")["ao5"] == 8.0
+        core.set_penalty(199, "DNF")
+        core.set_penalty(198, "DNF")
+        bests = core.pbs.bests("3x3x3")
+        assert bests["ao5"] == pytest.approx(31 / 3) and bests["single"] == 8.0
+        assert (204, "ao5", 9.0) in record_all(core, [8.0, 9.0, 9.0, 9.0, 9.0])
+
+    def test_best_mean_skips_dnfs(self):
+        """Test the best mo3 in a summary."""
+        assert best_mean([10.0, 11.0, DNF, 9.0, 9.0, 9.3], 3) == 9.1
+        assert best_mean([10.0, DNF], 3) is None
+
+
+class TestStoredBests:
+    """Test seeding from stored sessions and saving the timeline."""
+
+    def test_seeded_without_loading(self, tmp_path):
+        """Test that stored sessions' bests count without reading their solves."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        start = datetime(2024, 5, 1)
+        core.add_solves(
+            [
+                SolveTime(10.0 + i % 5, "", start + timedelta(minutes=i))
+                for i in range(120)
+            ]
+        )
+        core.new_session()
+        core.save()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        old = loaded.session_manager.sessions[0]
+        assert not old.loaded
+        assert record_all(loaded, [10.5]) == [] and not old.loaded
+        assert record_all(loaded, [9.5]) == [(2, "single", 9.5)]
+        assert loaded.pbs.bests("3x3x3")["ao100"] == 12.0
+
+    def test_timeline_saved(self, tmp_path):
+        """Test that the PB timeline survives a restart."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        record_all(core, [12.0, 11.0])
+        assert core.needs_save()
+        core.save()
+        assert not core.needs_save()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert [pb.value for pb in loaded.pbs.timeline(stat="single")] == [12.0, 11.0]
+
+    def test_old_summaries_rebuilt(self):
+        """Test that a summary saved without mo3/ao100 bests is marked stale."""
+        summary = SessionSummary("s")
+        data = summary.to_dict()
+        assert SessionSummary.from_dict(data, "s", "", "3x3x3", 4).version == 4
+        del data["best_means"]
+        assert SessionSummary.from_dict(data, "s", "", "3x3x3", 4).version == -1
@@ -0,0 +1,144 @@
+"""
+Test solve reconstructions, their storage and checkpointed replay.
+"""
+
+import random
+import pytest
+from unittest.mock import MagicMock
+from src.core import TimerCore
+from src.cube_visualization import CubeSimulator, ReplayWindow, scramble_state
+from src.reconstruction import (
+    MOVES,
+    Reconstruction,
+    ReconstructionError,
+    ReconstructionPlayer,
+    decode_varints,
+    encode_varints,
+)
+from src.storage import SessionStore
+
+
+def random_reconstruction(count, seed=1):
+    """Make a reconstruction of random moves at increasing times."""
+    rng = random.Random(seed)
+    moves = [rng.choice(MOVES) for _ in range(count)]
+    times = []
+    ms = 0
+    for _ in range(count):
+        ms += rng.choice([0, 40, 120, 900, 20_000])
+        times.append(ms)
+    return Reconstruction.from_moves(moves, times), moves, times
+
+
+class TestReconstruction:
+    """Test the compact move and time encoding."""
+
+    def test_varints(self):
+        """Test that varints round-trip, small values in one byte."""
+        values = [0, 1, 127, 128, 300, 2**31]
+        assert decode_varints(encode_varints(values)) == values
+        assert len(encode_varints([100, 127])) == 2
+        with pytest.raises(ReconstructionError):
+            decode_varints(b"\x80")
+
+    def test_moves_and_times_round_trip(self):
+        """Test storing moves and times and reading them back."""
+        reconstruction, moves, times = random_reconstruction(500)
+        assert reconstruction.moves() == moves
+        assert reconstruction.times_ms() == times
+        assert reconstruction.duration_ms == times[-1]
+        assert len(reconstruction.codes) == 500
+        assert len(reconstruction.deltas) < 2 * 500  # Mostly one-byte gaps
+
+        restored = Reconstruction.from_dict(reconstruction.to_dict())
+        assert restored.moves() == moves and restored.times_ms() == times
+
+    def test_manual_entry_spread_over_solve(self):
+        """Test that moves without times are spread over the solve."""
+        reconstruction = Reconstruction.from_moves("R U R' U'", duration_ms=2000)
+        assert reconstruction.times_ms() == [500, 1000, 1500, 2000]
+        assert reconstruction.text() == "R U R' U'"
+
+    def test_invalid_input(self):
+        """Test that bad moves, times and data are rejected."""
+        with pytest.raises(ReconstructionError):
+            Reconstruction.from_moves("R Q")
+        with pytest.raises(ReconstructionError):
+            Reconstruction.from_moves(["R", "U"], [100, 50])
+        with pytest.raises(ReconstructionError):
+            Reconstruction.from_dict({"moves": "/w==", "ms": "AA=="})
+        with pytest.raises(ReconstructionError):
+            Reconstruction.from_dict({"moves": "AA=="})
+
+
+class TestPlayer:
+    """Test seeking through a reconstruction."""
+
+    def test_every_position_matches_simulator(self):
+        """Test seeks against applying the moves one by one."""
+        reconstruction, moves, _ = random_reconstruction(70, seed=2)
+        scramble = "R U F' D2 L"
+        player = ReconstructionPlayer(reconstruction, scramble, interval=8)
+        assert len(player.checkpoints) == 70 // 8 + 1
+
+        simulator = CubeSimulator()
+        simulator.apply_scramble(scramble)
+        assert player.state_at(0) == simulator.facelets()
+        for position, move in enumerate(moves, 1):
+            simulator.execute_move(move)
+            assert player.state_at(position) == simulator.facelets()
+        assert player.state_at(999) == simulator.facelets()
+
+    def test_seek_by_time(self):
+        """Test that a time maps to the moves made by then."""
+        reconstruction = Reconstruction.from_moves(["U'", "R'"], [300, 800])
+        player = ReconstructionPlayer(reconstruction, "R U")
+        assert player.position_at(299) == 0
+        assert player.position_at(300) == 1
+        assert player.state_at_ms(10_000) == scramble_state("")
+
+    def test_replay_window_shows_seeked_state(self):
+        """Test that seeking in the window draws the player's state."""
+        reconstruction = Reconstruction.from_moves(["U'", "R'"], [300, 800])
+        window = ReplayWindow.__new__(ReplayWindow)
+        window.player = ReconstructionPlayer(reconstruction, "R U")
+        window._moves = reconstruction.moves()
+        window._shown = None
+        window.cube_view = MagicMock()
+        window.move_label = MagicMock()
+
+        window.seek(900)
+        window.cube_view.show_facelets.assert_called_once_with(scramble_state(""))
+        assert "move 2/2  R'" in window.move_label.config.call_args[1]["text"]
+        window.seek(950)  # Same position: nothing redrawn
+        assert window.cube_view.show_facelets.call_count == 1
+
+
+class TestStoredReconstructions:
+    """Test saving reconstructions with their solves."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that reconstructions survive saving and loading."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.record_solve(1.0, scramble="R U")
+        reconstruction = Reconstruction.from_moves(["U'", "R'"], [300, 800])
+        core.record_solve(0.8, scramble="R U", reconstruction=reconstruction)
+        core.save()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        newest, oldest = loaded.current_session.times
+        assert newest.reconstruction.moves() == ["U'", "R'"]
+        assert newest.reconstruction.times_ms() == [300, 800]
+        assert oldest.reconstruction is None
+
+    def test_added_later(self, tmp_path):
+        """Test attaching a reconstruction to a recorded solve."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.record_solve(2.0, scramble="")
+        core.save()
+        core.set_reconstruction(0, Reconstruction.from_moves("R R'"))
+        assert core.needs_save()
+        core.save()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert loaded.current_session.times[0].reconstruction.text() == "R R'"
@@ -0,0 +1,186 @@
+"""
+Test headless scramble images and their caches.
+"""
+
+import asyncio
+import struct
+import time
+import zlib
+import pytest
+from src.core import TimerCore
+from src.cube_state import CubeSimulator, scramble_state
+from src.scramble import ScrambleManager
+from src.scramble_image import (
+    MODEL_BUILDERS,
+    ScrambleImageError,
+    ScrambleRenderer,
+    puzzle_model,
+)
+from src.server import TimerServer
+from tests.test_cli import run
+from tests.test_server import http_get
+
+COLOR_LETTERS = "WYGBOR"  # Cube face indexes as CubeSimulator colors
+
+
+def scrambles(puzzle_type, count):
+    """Generate scrambles for a puzzle."""
+    generator = ScrambleManager(puzzle_type).generator
+    return [generator.generate() for _ in range(count)]
+
+
+def png_pixels(data):
+    """Decode an unfiltered 8-bit RGB PNG into (width, height, rows)."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    idat_length = struct.unpack(">I", data[33:37])[0]
+    raw = zlib.decompress(data[41 : 41 + idat_length])
+    stride = width * 3 + 1
+    rows = [raw[y * stride + 1 : (y + 1) * stride] for y in range(height)]
+    return width, height, rows
+
+
+class TestModels:
+    """Test that puzzle models turn like the puzzles."""
+
+    def test_cube_matches_simulator(self):
+        """Test 3x3x3 states against the window's cube simulator."""
+        model = puzzle_model("3x3x3")
+        extra = ["R U R' U'", "F2 B' L D2", "Rw U2' x' Fw y z2", "x R z' U y"]
+        for scramble in scrambles("3x3x3", 50) + extra:
+            state = "".join(COLOR_LETTERS[face] for face in model.state(scramble))
+            assert tuple(state) == scramble_state(scramble)
+
+    def test_pocket_cube_is_cube_corners(self):
+        """Test that a 2x2x2 shows the corners of a 3x3x3."""
+        small, large = puzzle_model("2x2x2"), puzzle_model("3x3x3")
+        corners = [face * 9 + i for face in range(6) for i in (0, 2, 6, 8)]
+        for scramble in scrambles("2x2x2", 20):
+            state = large.state(scramble)
+            assert small.state(scramble) == bytes(state[i] for i in corners)
+
+    @pytest.mark.parametrize(
+        "puzzle_type,moves,same",
+        [
+            ("3x3x3", "Rw L'", "x"),
+            ("4x4x4", "Rw Lw'", "x"),
+            ("5x5x5", "3Rw 2Lw'", "x"),
+            ("4x4x4", "Uw Uw Uw Uw", ""),
+            ("Pyraminx", "U U U", ""),
+            ("Pyraminx", "u' u'", "u"),
+            ("Skewb", "R R R", ""),
+            ("Skewb", "B' B'", "B"),
+        ],
+    )
+    def test_move_identities(self, puzzle_type, moves, same):
+        """Test wide turns, rotations and the order of each turn."""
+        model = puzzle_model(puzzle_type)
+        assert model.state(moves) == model.state(same)
+
+    def test_every_move_is_a_permutation(self):
+        """Test that every generated scramble keeps each color's count."""
+        for puzzle_type in MODEL_BUILDERS:
+            model = puzzle_model(puzzle_type)
+            for scramble in scrambles(puzzle_type, 5):
+                assert sorted(model.state(scramble)) == sorted(model.solved)
+                assert model.state(scramble) != model.solved
+
+    def test_unknown_move(self):
+        """Test that a move a puzzle does not have is an error."""
+        with pytest.raises(ScrambleImageError):
+            puzzle_model("3x3x3").state("R Q")
+        with pytest.raises(ScrambleImageError):
+            puzzle_model("2x2x2").state("3Rw")
+
+
+class TestRenderer:
+    """Test drawing and caching images."""
+
+    def test_svg(self):
+        """Test an SVG with one polygon per sticker and the right colors."""
+        svg = ScrambleRenderer().svg("3x3x3", "R")
+        assert svg.startswith("<svg") and svg.endswith("</svg>")
+        assert svg.count("<polygon") == 6 + 54
+        assert svg.count('fill="#00ff00"') == 9  # Green moved, none lost
+
+    def test_png(self):
+        """Test that a PNG decodes and shows the sticker colors."""
+        width, height, rows = png_pixels(ScrambleRenderer().png("2x2x2", "", 2))
+        assert (width, height) == (2 * 260, 2 * 196)
+        pixels = {bytes(row[x * 3 : x * 3 + 3]) for row in rows for x in range(width)}
+        for color in ("ffffff", "ffff00", "00ff00", "0000ff", "ff8c00", "ff0000"):
+            assert bytes.fromhex(color) in pixels
+
+    def test_placeholder(self):
+        """Test puzzles without a model get a labelled placeholder."""
+        renderer = ScrambleRenderer()
+        assert "Megaminx: no diagram" in renderer.svg("Megaminx", "R++ D--")
+        assert renderer.png("Square-1", "(1,0) /").startswith(b"\x89PNG")
+
+    def test_cached_by_state(self):
+        """Test that scrambles reaching the same state share one image."""
+        renderer = ScrambleRenderer()
+        first = renderer.svg("3x3x3", "R U")
+        assert renderer.svg("3x3x3", "R U R R' ") == first
+        assert renderer.svg("3x3x3", "Rw L' x' R U") == first
+        assert renderer.rendered == 1
+
+    def test_keyed_like_cube_view(self):
+        """Test that 3x3x3 images are keyed by the simulator's state key."""
+        renderer = ScrambleRenderer()
+        renderer.svg("3x3x3", "R U F'")
+        cube = CubeSimulator()
+        cube.apply_scramble("R U F'")
+        assert ("3x3x3", "svg", 1, cube.state_key()) in renderer.cache
+
+    def test_disk_cache(self, tmp_path):
+        """Test that images drawn once are read back after a restart."""
+        batch = scrambles("Skewb", 10)
+        first = ScrambleRenderer(cache_dir=tmp_path)
+        images = first.render_many("Skewb", batch, "png")
+        assert len(list(tmp_path.iterdir())) == len(set(images))
+
+        second = ScrambleRenderer(cache_dir=tmp_path)
+        assert second.render_many("Skewb", batch, "png") == images
+        assert second.rendered == 0
+
+    def test_batch_speed(self):
+        """Test that a competition's worth of images takes well under seconds."""
+        renderer = ScrambleRenderer()
+        batch = scrambles("3x3x3", 1000)
+        began = time.perf_counter()
+        images = renderer.render_many("3x3x3", batch)
+        assert len(images) == 1000
+        assert time.perf_counter() - began < 2
+
+
+class TestIntegration:
+    """Test images from the command line and the server."""
+
+    def test_cli_images(self, tmp_path, monkeypatch):
+        """Test writing one image per printed scramble."""
+        monkeypatch.setenv("PSTIMER_HOME", str(tmp_path / "home"))
+        out = tmp_path / "images"
+        status, output = run(
+            "scramble", "-p", "Pyraminx", "-n", "3", "--images", str(out)
+        )
+        assert status == 0 and len(output.splitlines()) == 3
+        names = sorted(path.name for path in out.iterdir())
+        assert names == [f"Pyraminx-00{n}.svg" for n in (1, 2, 3)]
+
+    def test_server_image(self):
+        """Test that the server draws the current scramble."""
+        core = TimerCore()
+        scramble = core.new_scramble()
+        server = TimerServer(core, port=0)
+
+        async def main():
+            await server.start()
+            try:
+                return await http_get(server.port, "/scramble.svg")
+            finally:
+                await server.stop()
+
+        status, body = asyncio.run(main())
+        assert status == 200
+        assert body.decode() == server.renderer.svg("3x3x3", scramble)
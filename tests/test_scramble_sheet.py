@@ -0,0 +1,121 @@
+"""
+Test printable competition scramble sheets.
+"""
+
+import re
+import time
+import pytest
+from src.scramble_image import puzzle_model
+from src.scramble_sheet import (
+    EVENTS,
+    EVENTS_BY_ID,
+    SheetError,
+    def_id,
+    diagram,
+    generate_packet,
+    group_name,
+    packet_html,
+    parse_event_spec,
+    svg_defs,
+)
+from tests.test_cli import run
+
+
+def sticker_colors(svg):
+    """Map each sticker index a diagram references to its fill."""
+    colors = {}
+    for fill, uses in re.findall(r'<g fill="([^"]+)">(.*?)</g>', svg):
+        for index in re.findall(r'href="#[^"]+-(\d+)"', uses):
+            colors[int(index)] = fill
+    return colors
+
+
+class TestSheets:
+    """Test laying out scramble sheets."""
+
+    def test_event_specs(self):
+        """Test events with default and explicit rounds and groups."""
+        assert parse_event_spec("333", 2, 3) == (EVENTS_BY_ID["333"], 2, 3)
+        assert parse_event_spec("sq1:4", 2, 3) == (EVENTS_BY_ID["sq1"], 4, 3)
+        assert parse_event_spec("pyram:1:5") == (EVENTS_BY_ID["pyram"], 1, 5)
+        for spec in ("666", "333:x", "333:0", "333:1:2:3"):
+            with pytest.raises(SheetError):
+                parse_event_spec(spec)
+
+    def test_group_names(self):
+        """Test group letters past Z."""
+        assert [group_name(i) for i in (0, 1, 25, 26, 27, 701, 702)] == [
+            "A",
+            "B",
+            "Z",
+            "AA",
+            "AB",
+            "ZZ",
+            "AAA",
+        ]
+
+    @pytest.mark.parametrize("puzzle_type", ["2x2x2", "5x5x5", "Pyraminx", "Skewb"])
+    def test_diagram_matches_state(self, puzzle_type):
+        """Test that each sticker reference gets the state's color."""
+        model = puzzle_model(puzzle_type)
+        scramble = "R U" if puzzle_type != "Pyraminx" else "R U l"
+        state = model.state(scramble)
+        colors = sticker_colors(diagram(puzzle_type, scramble))
+        assert colors == {i: model.colors[face] for i, face in enumerate(state)}
+
+    def test_geometry_shared(self):
+        """Test that sticker shapes are defined once and only referenced."""
+        defs = svg_defs(["3x3x3", "Megaminx"])
+        assert defs.count("<polygon") == 6 + 54
+        assert f'id="{def_id("Megaminx")}"' in defs and "no diagram" in defs
+        image = diagram("3x3x3", "R U R'")
+        assert "<polygon" not in image and image.count("<use") == 1 + 54
+        assert "no diagram" not in diagram("Megaminx", "R++ D--")
+
+    def test_packet(self):
+        """Test one page per group with numbered attempts and extras."""
+        groups = generate_packet([(EVENTS_BY_ID["skewb"], 2, 3)], workers=1)
+        assert [(r, g) for _, r, g, _, _ in groups] == [
+            (r, g) for r in (1, 2) for g in range(3)
+        ]
+        page = packet_html("Open <2026>", groups)
+        assert page.count('<section class="sheet">') == 6
+        assert "Open &lt;2026&gt;" in page and "Round 2 &#8212; Group C" in page
+        assert page.count('class="number">E') == 6 * 2
+        assert page.count("<defs>") == 1
+
+
+class TestPacketGeneration:
+    """Test generating whole packets."""
+
+    def test_parallel_scrambles_differ(self):
+        """Test that worker processes do not repeat each other's scrambles."""
+        groups = generate_packet([(EVENTS_BY_ID["333"], 2, 4)], workers=2)
+        scrambles = [s for *_, group_scrambles, _ in groups for s in group_scrambles]
+        assert len(scrambles) == 8 * 7
+        assert len(set(scrambles)) == len(scrambles)
+
+    def test_full_packet_speed(self):
+        """Test that every event for a large competition takes seconds."""
+        began = time.perf_counter()
+        groups = generate_packet([(event, 4, 4) for event in EVENTS])
+        page = packet_html("Championship", groups)
+        assert len(groups) == len(EVENTS) * 16
+        assert page.count("<defs>") == 1
+        assert time.perf_counter() - began < 20
+
+    def test_cli(self, tmp_path):
+        """Test writing a packet from the command line."""
+        path = tmp_path / "packet.html"
+        status, output = run(
+            "sheets", str(path), "-e", "222:2:2", "-e", "minx", "--workers", "1"
+        )
+        assert status == 0
+        assert output.strip() == f"Wrote 5 groups, 35 scrambles to {path}"
+        assert path.read_text(encoding="utf-8").count('class="sheet"') == 5
+
+    def test_cli_unknown_event(self, tmp_path):
+        """Test that an unknown event is an error."""
+        status, _ = run("sheets", str(tmp_path / "packet.html"), "-e", "clock")
+        assert status == 1
+        assert not (tmp_path / "packet.html").exists()
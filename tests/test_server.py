@@ -0,0 +1,275 @@
+"""
+Test the HTTP/WebSocket server for remote displays.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import struct
+import threading
+from src.core import TimerCore
+from src.statistics import SolveTime, StatisticsCalculator
+from src.server import TimerServer, _Client, accept_key, encode_frame, read_frame
+
+
+async def http_get(port, path):
+    """Make a GET request and return (status, body)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+async def ws_connect(port):
+    """Open a WebSocket and return (reader, writer) after the handshake."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        (
+            "GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode()
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 101")
+    assert accept_key(key).encode() in head
+    return reader, writer
+
+
+async def ws_receive(reader, kind):
+    """Read messages until one of the given type arrives."""
+    while True:
+        opcode, payload = await asyncio.wait_for(read_frame(reader), 5)
+        message = json.loads(payload)
+        if message["type"] == kind:
+            return message
+
+
+def masked_frame(payload, opcode=0x1):
+    """Encode a client-to-server (masked) frame."""
+    mask = os.urandom(4)
+    data = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload)) + mask + data
+
+
+def run_with_server(test, **kwargs):
+    """Run test(core, server) with a server on a free port."""
+
+    async def main():
+        core = TimerCore()
+        core.new_scramble()
+        server = TimerServer(core, port=0, **kwargs)
+        await server.start()
+        try:
+            await test(core, server)
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+class TestFrames:
+    """Test the WebSocket protocol helpers."""
+
+    def test_accept_key(self):
+        """Test the handshake example from RFC 6455."""
+        assert accept_key("dGhlIHNhbXBsZSBub25jZQ==") == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+    def test_frame_lengths_round_trip(self):
+        """Test short, 16-bit and 64-bit payload lengths."""
+
+        async def decode(frame):
+            reader = asyncio.StreamReader()
+            reader.feed_data(frame)
+            return await read_frame(reader)
+
+        for size in (5, 300, 70000):
+            payload = b"x" * size
+            frame = encode_frame(payload)
+            if size > 65535:
+                # Over the read limit, so only check the header
+                assert frame[1] == 127
+                continue
+            assert asyncio.run(decode(frame)) == (0x1, payload)
+
+    def test_masked_frame(self):
+        """Test unmasking a client frame."""
+
+        async def decode():
+            reader = asyncio.StreamReader()
+            reader.feed_data(masked_frame(b"hello", opcode=0x9))
+            return await read_frame(reader)
+
+        assert asyncio.run(decode()) == (0x9, b"hello")
+
+    def test_client_queue_drops_oldest(self):
+        """Test that a full client queue drops the oldest frame."""
+
+        async def check():
+            client = _Client(writer=None, queue_size=2)
+            for frame in (b"1", b"2", b"3"):
+                client.offer(frame)
+            return client.dropped, [client.queue.get_nowait() for _ in range(2)]
+
+        assert asyncio.run(check()) == (1, [b"2", b"3"])
+
+
+class TestTimerServer:
+    """Test serving a TimerCore over HTTP and WebSocket."""
+
+    def test_http_endpoints(self):
+        """Test the JSON endpoints, overlay page and errors."""
+
+        async def test(core, server):
+            status, body = await http_get(server.port, "/scramble")
+            assert status == 200
+            assert json.loads(body)["scramble"] == core.current_scramble
+
+            status, body = await http_get(server.port, "/state")
+            state = json.loads(body)
+            assert state["timer"]["running"] is False
+            assert state["session"]["count"] == 0
+
+            status, body = await http_get(server.port, "/")
+            assert status == 200 and b"WebSocket" in body
+            status, _ = await http_get(server.port, "/missing")
+            assert status == 404
+
+        run_with_server(test)
+
+    def test_websocket_events(self):
+        """Test that solves, statistics and scrambles are pushed."""
+
+        async def test(core, server):
+            reader, writer = await ws_connect(server.port)
+            snapshot = await ws_receive(reader, "snapshot")
+            assert snapshot["scramble"] == core.current_scramble
+
+            for seconds in (10.0, 11.0, 12.0):
+                core.record_solve(seconds)
+            solve = await ws_receive(reader, "solve")
+            assert solve["text"] == "10.00"
+
+            stats = await ws_receive(reader, "stats")
+            while stats["session"]["count"] < 3:  # Bursts are coalesced
+                stats = await ws_receive(reader, "stats")
+            assert stats["text"]["mo3"] == "11.00"
+            assert stats["seconds"]["best"] == 10.0
+
+            scramble = core.new_scramble()
+            assert (await ws_receive(reader, "scramble"))["scramble"] == scramble
+
+            status, body = await http_get(server.port, "/stats")
+            assert json.loads(body)["session"]["count"] == 3
+            writer.close()
+
+        run_with_server(test)
+
+    def test_startup_stats_off_timer_thread(self, monkeypatch):
+        """Test that a new server does not compute statistics on the caller."""
+        core = TimerCore()
+        core.add_solves([SolveTime(seconds) for seconds in (12.0, 10.0, 11.0)])
+        calculate_all = StatisticsCalculator.calculate_all
+        threads = []
+
+        def recording(times):
+            if times:
+                threads.append(threading.current_thread())
+            return calculate_all(times)
+
+        monkeypatch.setattr(StatisticsCalculator, "calculate_all", recording)
+        server = TimerServer(core, port=0)
+        assert server.state["stats"]["count"] == 3
+        assert server.state["stats"]["text"]["mo3"] == "---"
+
+        async def main():
+            await server.start()
+            try:
+                await server._stats_task
+                return await http_get(server.port, "/stats")
+            finally:
+                await server.stop()
+
+        _, body = asyncio.run(main())
+        assert json.loads(body)["text"]["mo3"] == "11.00"
+        assert threads and threading.main_thread() not in threads
+
+    def test_ping_and_close(self):
+        """Test that pings are answered and closing removes the client."""
+
+        async def test(core, server):
+            reader, writer = await ws_connect(server.port)
+            await ws_receive(reader, "snapshot")
+            writer.write(masked_frame(b"hi", opcode=0x9))
+            assert await asyncio.wait_for(read_frame(reader), 5) == (0xA, b"hi")
+
+            writer.write(masked_frame(struct.pack("!H", 1000), opcode=0x8))
+            opcode, _ = await asyncio.wait_for(read_frame(reader), 5)
+            assert opcode == 0x8
+            await asyncio.sleep(0.05)
+            assert not server.clients
+            writer.close()
+
+        run_with_server(test)
+
+    def test_many_clients(self):
+        """Test that hundreds of clients all receive an event."""
+
+        async def test(core, server):
+            connections = await asyncio.gather(
+                *(ws_connect(server.port) for _ in range(200))
+            )
+            assert len(server.clients) == 200
+            scramble = core.new_scramble()
+            messages = await asyncio.gather(
+                *(ws_receive(reader, "scramble") for reader, _ in connections)
+            )
+            assert all(m["scramble"] == scramble for m in messages)
+            for _, writer in connections:
+                writer.close()
+
+        run_with_server(test)
+
+    def test_slow_client_does_not_block(self):
+        """Test that a client that never reads loses messages, not others."""
+
+        async def test(core, server):
+            slow_reader, slow_writer = await ws_connect(server.port)
+            reader, writer = await ws_connect(server.port)
+            padding = "x" * 50_000
+            for i in range(200):
+                server.publish({"type": "bulk", "i": i, "padding": padding})
+                await asyncio.sleep(0)
+            server.publish({"type": "last"})
+            await ws_receive(reader, "last")
+
+            assert max(c.dropped for c in server.clients) > 0  # The slow one
+            assert all(c.queue.qsize() <= 8 for c in server.clients)
+            slow_writer.close()
+            writer.close()
+
+        run_with_server(test, queue_size=8)
+
+    def test_thread_mode(self):
+        """Test running the server in a background thread."""
+        core = TimerCore()
+        server = TimerServer(core, port=0)
+        server.start_in_thread()
+        try:
+            core.new_scramble()
+
+            async def fetch():
+                for _ in range(50):
+                    _, body = await http_get(server.port, "/scramble")
+                    if json.loads(body)["scramble"] == core.current_scramble:
+                        return True
+                    await asyncio.sleep(0.02)
+                return False
+
+            assert asyncio.run(fetch())
+        finally:
+            server.stop_thread()
@@ -0,0 +1,207 @@
+"""
+Test the cross-session index.
+"""
+
+import random
+import time
+from datetime import date, datetime, timedelta
+from src.core import TimerCore
+from src.session_index import SessionIndex, SessionSummary
+from src.statistics import Session, SessionManager, SolveTime
+from src.storage import SessionStore
+
+DNF = float("inf")
+
+
+def solve(seconds, day, penalty=None):
+    """Make a solve on a day of May 2024."""
+    return SolveTime(seconds, "", datetime(2024, 5, day, 12), penalty)
+
+
+def make_manager():
+    """Two 3x3 sessions and one 2x2 session on known days."""
+    manager = SessionManager()
+    first = manager.current_session
+    first.add_times([solve(10.0, 1), solve(12.0, 1), solve(8.0, 3, "+2")])
+    second = manager.add_session("OH")
+    second.add_times([solve(20.0, 2), solve(30.0, 10, "DNF")])
+    small = manager.add_session("2x2", puzzle_type="2x2x2")
+    small.add_times([solve(3.0, 5)])
+    return manager
+
+
+class TestSessionSummary:
+    """Test per-session aggregates."""
+
+    def test_from_session(self):
+        """Test counts, totals, bests and day buckets."""
+        session = make_manager().sessions[0]
+        summary = SessionSummary.from_session(session)
+        assert summary.count == 3
+        assert summary.best == 10.0
+        assert summary.mean == 32.0 / 3  # 10, 12 and 8+2
+        assert summary.days[date(2024, 5, 1).toordinal()] == [2, 0, 22.0, 10.0]
+
+    def test_incremental_matches_rebuild(self):
+        """Test that adding solves one by one gives the same summary."""
+        rng = random.Random(5)
+        session = Session()
+        summary = SessionSummary.from_session(session)
+        for i in range(40):
+            session.add_time(solve(float(rng.randint(8, 20)), 1 + i % 20))
+            assert summary.solve_added(session)
+        rebuilt = SessionSummary.from_session(session)
+        assert summary.to_dict() == rebuilt.to_dict()
+
+    def test_out_of_step_update_is_refused(self):
+        """Test that a skipped version makes solve_added fail."""
+        session = Session()
+        summary = SessionSummary.from_session(session)
+        session.add_time(solve(10.0, 1))
+        session.add_time(solve(11.0, 1))
+        assert not summary.solve_added(session)
+
+    def test_dict_round_trip(self):
+        """Test converting to and from JSON data."""
+        summary = SessionSummary.from_session(make_manager().sessions[1])
+        data = summary.to_dict()
+        restored = SessionSummary.from_dict(data, "id", "OH", "3x3x3")
+        assert restored.to_dict() == data
+
+        summary.bests_stale = True
+        restored = SessionSummary.from_dict(summary.to_dict(), "id", "OH", "3x3x3")
+        assert restored.bests_stale
+
+    def test_edits_update_in_place(self, monkeypatch):
+        """Test that penalties and deletions adjust counts without a rebuild."""
+        rng = random.Random(7)
+        session = Session()
+        session.add_times(
+            [solve(float(rng.randint(8, 20)), 1 + i % 5) for i in range(60)]
+        )
+        summary = session.summary()
+        rebuild = SessionSummary.from_session
+        monkeypatch.setattr(SessionSummary, "from_session", None)
+        for _ in range(30):
+            index = rng.randrange(len(session))
+            if rng.random() < 0.5:
+                session.set_penalty(index, rng.choice([None, "+2", "DNF"]))
+            else:
+                session.remove_time(index)
+            assert session.summary() is summary
+
+        rebuilt = rebuild(session)
+        for field in ("count", "dnf_count", "total", "first_ts", "last_ts"):
+            assert getattr(summary, field) == getattr(rebuilt, field)
+        assert {day: bucket[:3] for day, bucket in summary.days.items()} == {
+            day: bucket[:3] for day, bucket in rebuilt.days.items()
+        }
+        assert summary.bests_stale
+
+        monkeypatch.setattr(SessionSummary, "from_session", rebuild)
+        assert session.refresh_summary().to_dict() == rebuilt.to_dict()
+
+    def test_save_keeps_stale_bests(self, tmp_path, monkeypatch):
+        """Test that saving after an edit writes the summary without a rebuild."""
+        manager = make_manager()
+        for session in manager.sessions:
+            session.summary()
+        manager.sessions[0].set_penalty(0, "DNF")
+        monkeypatch.setattr(SessionSummary, "from_session", None)
+        SessionStore(str(tmp_path)).save(manager)
+
+        monkeypatch.undo()
+        loaded = SessionStore(str(tmp_path)).load().sessions[0]
+        assert loaded.summary().bests_stale and not loaded.loaded
+        assert loaded.refresh_summary().best == 10.0
+
+
+class TestSessionIndex:
+    """Test queries across sessions."""
+
+    def test_query_by_puzzle(self):
+        """Test totals for one puzzle type."""
+        index = SessionIndex(make_manager())
+        result = index.query("3x3x3")
+        assert (result.count, result.dnf_count, result.sessions) == (5, 1, 2)
+        assert result.best == 10.0
+        assert index.query("2x2x2").count == 1
+        assert index.puzzle_types() == ["3x3x3", "2x2x2"]
+
+    def test_query_by_dates(self):
+        """Test that date ranges include start and exclude end."""
+        index = SessionIndex(make_manager())
+        result = index.query("3x3x3", date(2024, 5, 2), date(2024, 5, 10))
+        assert (result.count, result.sessions) == (2, 2)
+        assert result.mean == 15.0  # 20 and 8+2
+
+    def test_solves_in_range(self):
+        """Test listing solves, newest first, across sessions."""
+        index = SessionIndex(make_manager())
+        found = index.solves(start=datetime(2024, 5, 2), end=datetime(2024, 5, 6))
+        assert [s.time for _, s in found] == [3.0, 8.0, 20.0]
+
+    def test_sessions_filter_and_best(self):
+        """Test restricting to session ids and finding the best single."""
+        manager = make_manager()
+        index = SessionIndex(manager)
+        oh = manager.sessions[1]
+        assert index.query(sessions={oh.session_id}).count == 2
+        value, summary = index.best("single", "3x3x3")
+        assert (value, summary.name) == (10.0, "Session 1")
+
+    def test_summaries_follow_changes(self):
+        """Test that edits and deleted sessions are picked up."""
+        manager = make_manager()
+        index = SessionIndex(manager)
+        assert index.query().count == 6
+        manager.sessions[0].remove_time(0)
+        manager.delete_session(2)
+        assert index.query().count == 4
+
+    def test_core_keeps_index_current(self):
+        """Test that recorded solves update the index in place."""
+        core = TimerCore()
+        core.new_scramble()
+        for seconds in (10.0, 11.0, 12.0, 13.0, 14.0):
+            core.record_solve(seconds)
+        value, _ = core.index.best("ao5")
+        assert value == 12.0
+        first = core.current_session
+        core.set_puzzle_type("2x2x2")
+        assert first.puzzle_type == "3x3x3"  # Has solves, so it keeps its puzzle
+        assert core.current_session.puzzle_type == "2x2x2"
+        assert core.new_session().puzzle_type == "2x2x2"
+
+    def test_puzzle_type_persisted(self, tmp_path):
+        """Test that session puzzle types survive a save and load."""
+        manager = make_manager()
+        SessionStore(str(tmp_path)).save(manager)
+        loaded = SessionStore(str(tmp_path)).load()
+        assert [s.puzzle_type for s in loaded.sessions] == [
+            "3x3x3",
+            "3x3x3",
+            "2x2x2",
+        ]
+
+    def test_query_speed(self):
+        """Test that a date query answers from summaries, not solves."""
+        manager = SessionManager()
+        start = datetime(2020, 1, 1)
+        for s in range(20):
+            session = manager.add_session()
+            session.add_times(
+                [
+                    SolveTime(10.0, "", start + timedelta(hours=i + s * 1000))
+                    for i in range(5_000)
+                ]
+            )
+        index = SessionIndex(manager)
+        assert index.query().count == 100_000  # Builds the summaries
+
+        began = time.perf_counter()
+        result = index.query("3x3x3", date(2020, 6, 1), date(2021, 1, 1))
+        assert time.perf_counter() - began < 0.05
+        assert result.count == len(
+            index.solves("3x3x3", date(2020, 6, 1), date(2021, 1, 1))
+        )
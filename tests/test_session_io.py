@@ -0,0 +1,104 @@
+"""
+Test importing solve times.
+"""
+
+import io
+import pytest
+from datetime import datetime
+from src.session_io import export_times, import_file, import_times
+from src.statistics import Session, SolveTime
+
+
+class TestImportTimes:
+    """Test format detection and error reporting of the importer."""
+
+    def test_cstimer_csv(self):
+        """Test importing a csTimer CSV export."""
+        lines = [
+            "No.;Time;Comment;Scramble;Date;P.1\n",
+            "1;12.34;;R U R';2024-03-01 10:00:00;12.34\n",
+            "2;DNF(15.00);;F2 D;2024-03-01 10:01:00;15.00\n",
+            "3;13.50+;;L B';2024-03-01 10:02:00;11.50\n",
+        ]
+        result = import_times(lines)
+
+        assert not result.errors
+        assert [s.time for s in result.solves] == [12.34, 15.0, 11.5]
+        assert [s.penalty for s in result.solves] == [None, "DNF", "+2"]
+        assert result.solves[0].scramble == "R U R'"
+        assert result.solves[0].timestamp == datetime(2024, 3, 1, 10, 0, 0)
+
+    def test_malformed_rows_are_reported(self):
+        """Test that bad rows are reported with line numbers, not zeroed."""
+        lines = [
+            "No.;Time;Comment;Scramble;Date;P.1\n",
+            "1;12.34;;R;2024-03-01 10:00:00;12.34\n",
+            "2;??;;U;2024-03-01 10:00:00;??\n",
+            "3\n",
+        ]
+        result = import_times(lines)
+
+        assert len(result.solves) == 1
+        assert [line for line, _, _ in result.errors] == [3, 4]
+
+    def test_plain_text(self):
+        """Test importing one time per line."""
+        result = import_times(["12.00\n", "\n", "1:01.50\n", "DNF\n", "x\n"])
+
+        assert [s.time for s in result.solves] == [12.0, 61.5, 0.0]
+        assert result.errors[0][0] == 5
+
+    def test_pstimer_export_round_trip(self):
+        """Test importing PSTimer's own text export (newest first)."""
+        lines = [
+            "PSTimer Session Export\n",
+            "Puzzle Type: 3x3x3\n",
+            "Total Solves: 2\n",
+            "=" * 50 + "\n",
+            "\n",
+            "  1.    14.00+ - R U\n",
+            "  2.     9.50 - F D'\n",
+            "\n",
+            "=" * 50 + "\n",
+            "Statistics:\n",
+            "Best: 9.50\n",
+        ]
+        result = import_times(lines)
+
+        assert [(s.time, s.penalty) for s in result.solves] == [
+            (9.5, None),
+            (12.0, "+2"),
+        ]
+        assert result.solves[1].scramble == "R U"
+
+    def test_export_then_import(self):
+        """Test that an exported session imports back unchanged."""
+        session = Session()
+        session.add_times(
+            [SolveTime(11.25, "R U"), SolveTime(12.0, "F", penalty="+2")]
+        )
+        out = io.StringIO()
+        export_times(out, session, "3x3x3")
+
+        result = import_times(out.getvalue().splitlines(keepends=True))
+        assert result.errors == []
+        assert [(s.time, s.penalty, s.scramble) for s in result.solves] == [
+            (11.25, None, "R U"),
+            (12.0, "+2", "F"),
+        ]
+
+    def test_empty_input(self):
+        """Test importing nothing."""
+        result = import_times(["\n", ""])
+        assert result.solves == []
+        assert result.errors == []
+
+    def test_import_file_into_session(self, tmp_path):
+        """Test importing from disk keeps the newest solve first in a session."""
+        path = tmp_path / "times.txt"
+        path.write_text("10.00\n11.00\n12.00\n")
+
+        session = Session()
+        session.add_times(import_file(path).solves)
+
+        assert [s.time for s in session.times] == [12.0, 11.0, 10.0]
@@ -0,0 +1,118 @@
+"""
+Test the KLL quantile sketch and lifetime quantiles.
+"""
+
+import bisect
+import random
+from src.core import TimerCore
+from src.session_index import SessionIndex
+from src.sketch import KLLSketch
+from src.statistics import Session, SessionManager, SolveTime
+from src.storage import SessionStore
+
+
+def rank_error(sketch, ordered):
+    """Get the worst rank error over the percentiles 1..99."""
+    worst = 0.0
+    for percent in range(1, 100):
+        value = sketch.quantile(percent / 100)
+        rank = bisect.bisect_right(ordered, value) / len(ordered)
+        worst = max(worst, abs(rank - percent / 100))
+    return worst
+
+
+class TestKLLSketch:
+    """Test the sketch itself."""
+
+    def test_error_bound_and_memory(self):
+        """Test the documented rank error and that memory stays bounded."""
+        rng = random.Random(1)
+        values = [rng.gauss(15, 2) for _ in range(100_000)]
+        sketch = KLLSketch(seed=1)
+        for value in values:
+            sketch.update(value)
+        assert rank_error(sketch, sorted(values)) < 0.017
+        assert sum(len(items) for items in sketch.compactors) <= 3 * sketch.k
+        assert (sketch.min, sketch.max) == (min(values), max(values))
+
+    def test_merge(self):
+        """Test that merged sketches answer for the union."""
+        rng = random.Random(2)
+        values = [rng.expovariate(0.1) for _ in range(50_000)]
+        parts = [KLLSketch(seed=i) for i in range(10)]
+        for i, value in enumerate(values):
+            parts[i % 10].update(value)
+        merged = KLLSketch(seed=0)
+        for part in parts:
+            merged.merge(part)
+        assert merged.count == len(values)
+        assert rank_error(merged, sorted(values)) < 0.017
+
+    def test_small_and_empty(self):
+        """Test exact answers while nothing has been compacted."""
+        sketch = KLLSketch()
+        assert sketch.quantile(0.5) is None and sketch.rank(1.0) is None
+        for value in (3.0, 1.0, 2.0, 4.0):
+            sketch.update(value)
+        assert sketch.quantiles((0, 0.5, 1)) == [1.0, 2.0, 4.0]
+        assert sketch.rank(2.5) == 0.5
+
+    def test_dict_round_trip(self):
+        """Test saving and restoring a sketch."""
+        sketch = KLLSketch(seed=3)
+        for i in range(5000):
+            sketch.update(float(i))
+        restored = KLLSketch.from_dict(sketch.to_dict())
+        assert restored.quantiles((0.1, 0.5, 0.9)) == sketch.quantiles((0.1, 0.5, 0.9))
+        restored.update(1.0)
+        assert restored.count == 5001
+
+
+class TestSessionSketches:
+    """Test per-session sketches, merging and persistence."""
+
+    def test_added_solves_update_the_sketch(self):
+        """Test that new solves go into the existing sketch."""
+        session = Session()
+        session.add_times([SolveTime(10.0, ""), SolveTime(20.0, "", penalty="DNF")])
+        sketch = session.sketch()
+        session.add_time(SolveTime(12.0, ""))
+        assert session.sketch() is sketch and sketch.count == 2
+
+        session.remove_time(0)
+        assert session.sketch() is not sketch  # Rebuilt after a removal
+        assert session.sketch().count == 1
+
+    def test_quantiles_per_puzzle(self):
+        """Test merging the sessions of one puzzle type."""
+        manager = SessionManager()
+        manager.current_session.add_times(
+            [SolveTime(float(i), "") for i in range(1, 101)]
+        )
+        other = manager.add_session(puzzle_type="2x2x2")
+        other.add_times([SolveTime(3.0, "")])
+        index = SessionIndex(manager)
+        assert index.quantiles((0.1, 0.5, 0.9), "3x3x3") == [10.0, 50.0, 90.0]
+        assert index.quantiles((0.5,), "2x2x2") == [3.0]
+        assert index.sketch("3x3x3") is index.sketch("3x3x3")  # Cached
+
+    def test_stored_sketch_avoids_loading(self, tmp_path):
+        """Test that stored sessions answer quantiles without their solves."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.add_solves([SolveTime(float(i), "") for i in range(1, 101)])
+        core.save()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert loaded.index.quantiles((0.5,)) == [50.0]
+        assert not loaded.current_session.loaded
+
+    def test_missing_sketch_file_is_rebuilt(self, tmp_path):
+        """Test falling back to the solves when the sketch file is gone."""
+        core = TimerCore(store=SessionStore(tmp_path))
+        core.add_solves([SolveTime(5.0, "")])
+        core.save()
+        session_id = core.current_session.session_id
+        (tmp_path / "sessions" / f"{session_id}.sketch.json").unlink()
+
+        loaded = TimerCore(store=SessionStore(tmp_path))
+        assert loaded.index.quantiles((0.5,)) == [5.0]
@@ -0,0 +1,262 @@
+"""
+Test the Stackmat packet, serial and audio decoders.
+"""
+
+import random
+import sys
+import time
+import wave
+from array import array
+import pytest
+from src.core import TimerCore
+from src.input_sources import RESET, START, STOP, InputController, open_source
+from src.stackmat import (
+    BAUD_RATE,
+    BYTE_NS,
+    AudioDecoder,
+    PacketParser,
+    StackmatError,
+    StackmatSource,
+    encode_packet,
+    parse_packet,
+    serial_packets,
+    wav_packets,
+)
+
+MS = 1_000_000
+GAP_BITS = 20  # Idle line between packets
+
+
+def solve_packets(solve_ms, period_ms=90, digits=6):
+    """The (status, ms) a timer sends around a solve of solve_ms."""
+    packets = [("I", 0)] * 3 + [("C", 0), ("A", 0), ("A", 0)]
+    packets += [(" ", ms) for ms in range(0, solve_ms, period_ms)]
+    shown = solve_ms if digits == 6 else solve_ms // 10 * 10
+    packets += [("S", shown)] * 4 + [("I", 0)] * 2
+    return packets
+
+
+def signal(packets, rate, digits=6, invert=False, noise=0, coupled=False, seed=1):
+    """Audio of packets as a timer's output; returns (samples, start samples).
+
+    Each packet follows GAP_BITS of idle line. coupled passes the signal
+    through a high-pass filter like a sound card's coupling capacitor.
+    """
+    rng = random.Random(seed)
+    samples_per_bit = rate / BAUD_RATE
+    samples = []
+    starts = []
+    position = 0.0
+    for status, ms in packets:
+        bits = [1] * GAP_BITS
+        for byte in encode_packet(status, ms, digits):
+            bits += [0] + [(byte >> i) & 1 for i in range(8)] + [1]
+        starts.append(round(position + GAP_BITS * samples_per_bit))
+        for bit in bits:
+            position += samples_per_bit
+            value = 12000 if bit != invert else -12000
+            for _ in range(round(position) - len(samples)):
+                samples.append(value + rng.randint(-noise, noise))
+    if coupled:
+        filtered = [0.0]
+        for previous, sample in zip(samples, samples[1:]):
+            filtered.append(0.998 * (filtered[-1] + sample - previous))
+        samples = filtered
+    return [max(-32768, min(32767, round(sample))) for sample in samples], starts
+
+
+def write_wav(path, samples, rate, width=2, channels=1):
+    """Write samples as a PCM WAV recording."""
+    if width == 1:
+        frames = bytes((sample >> 8) + 128 for sample in samples)
+    else:
+        data = array("h", samples)
+        if sys.byteorder == "big":
+            data.byteswap()
+        frames = data.tobytes()
+    if channels == 2:
+        frames = b"".join(
+            frames[i : i + width] * 2 for i in range(0, len(frames), width)
+        )
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(width)
+        writer.setframerate(rate)
+        writer.writeframes(frames)
+    return path
+
+
+class FakeSerial:
+    """Hands out bytes in the chunks a serial port read would return."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.in_waiting = 0
+
+    def read(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class TestPackets:
+    """Test the packet format."""
+
+    def test_round_trip(self):
+        """Test Gen 3 (hundredths) and Gen 4 (thousandths) packets."""
+        assert encode_packet("S", 83_456, digits=5) == b"S12345O\n\r"
+        assert parse_packet(b"S12345O") == ("S", 83_450)
+        assert parse_packet(encode_packet(" ", 83_456)[:-2]) == (" ", 83_456)
+        assert parse_packet(encode_packet("I", 0)[:-2]) == ("I", 0)
+
+    def test_damaged_packets_rejected(self):
+        """Test checksum, status, digit and length checks."""
+        good = bytearray(encode_packet("S", 9_870)[:-2])
+        for index, byte in ((0, ord("X")), (2, ord("5") + 1), (3, ord("x"))):
+            damaged = bytearray(good)
+            damaged[index] = byte
+            assert parse_packet(damaged) is None
+        assert parse_packet(b"S1604O") is None  # 70 seconds
+        assert parse_packet(good[:3] + good[4:]) is None
+
+    def test_stream_resynchronizes(self):
+        """Test joining mid-packet, garbage and packets split across reads."""
+        stream = encode_packet(" ", 1_000)[4:] + b"\x00garbage"
+        stream += encode_packet(" ", 1_090) + encode_packet("S", 1_100)
+        parser = PacketParser()
+        packets = []
+        for offset in range(0, len(stream), 7):
+            packets += parser.feed(stream[offset : offset + 7], 0)
+        assert [(p.status, p.ms) for p in packets] == [(" ", 1_090), ("S", 1_100)]
+        assert parser.errors == 1
+
+    def test_serial_stamps(self):
+        """Test that bytes read together are stamped back from the read."""
+        packet = encode_packet(" ", 500)
+        parser = PacketParser()
+        (decoded,) = parser.feed(b"\r" + packet, 100 * MS)
+        assert decoded.ts_ns == 100 * MS - len(packet) * BYTE_NS
+
+
+class TestAudioDecoder:
+    """Test decoding audio recordings."""
+
+    @pytest.mark.parametrize(
+        "rate,width,channels,invert,digits",
+        [
+            (44100, 2, 1, False, 6),
+            (48000, 2, 2, True, 6),
+            (8000, 1, 1, False, 5),
+            (22050, 1, 2, True, 5),
+        ],
+    )
+    def test_recordings(self, tmp_path, rate, width, channels, invert, digits):
+        """Test rates, sample sizes, channels, polarity and timer generations."""
+        packets = solve_packets(1_234, digits=digits)
+        samples, _ = signal(packets, rate, digits, invert=invert, noise=2000)
+        path = write_wav(tmp_path / "stackmat.wav", samples, rate, width, channels)
+        decoded = list(wav_packets(path, clock=lambda: 0))
+        assert [(p.status, p.ms) for p in decoded] == packets
+
+    def test_stamps_and_chunking(self):
+        """Test stamps to the sample and any chunk size giving the same packets."""
+        packets = solve_packets(2_000)
+        samples, starts = signal(packets, 44100, coupled=True, noise=800)
+        whole = AudioDecoder(44100, origin_ns=7 * MS).feed(samples)
+        assert [(p.status, p.ms) for p in whole] == packets
+        for packet, start in zip(whole, starts):
+            assert abs(packet.ts_ns - (7 * MS + start * 1e9 / 44100)) < 1e9 / 44100
+
+        rng = random.Random(3)
+        decoder = AudioDecoder(44100, origin_ns=7 * MS)
+        chunked = []
+        offset = 0
+        while offset < len(samples):
+            size = rng.randint(1, 2000)
+            chunked += decoder.feed(samples[offset : offset + size])
+            offset += size
+        assert [(p.status, p.ms, p.ts_ns) for p in chunked] == [
+            (p.status, p.ms, p.ts_ns) for p in whole
+        ]
+
+    def test_silence_and_noise(self):
+        """Test that silence and static decode to nothing."""
+        rng = random.Random(4)
+        decoder = AudioDecoder(44100)
+        assert decoder.feed([0] * 44100) == []
+        assert decoder.feed([rng.randint(-300, 300) for _ in range(44100)]) == []
+
+    def test_faster_than_real_time(self):
+        """Test decoding well within the length of the audio."""
+        samples, _ = signal(solve_packets(10_000), 44100)
+        began = time.perf_counter()
+        decoded = AudioDecoder(44100).feed(samples)
+        elapsed = time.perf_counter() - began
+        assert len(decoded) == len(solve_packets(10_000))
+        assert elapsed < len(samples) / 44100 / 10
+
+    def test_unreadable_file(self, tmp_path):
+        """Test a file that is not a WAV recording."""
+        path = tmp_path / "notes.wav"
+        path.write_text("not audio", encoding="utf-8")
+        with pytest.raises(StackmatError):
+            list(wav_packets(path))
+
+
+class TestStackmatSolve:
+    """Test timing solves from a Stackmat."""
+
+    def test_solve_from_recording(self, tmp_path):
+        """Test that the recorded time is exactly the timer's."""
+        samples, _ = signal(solve_packets(9_876), 44100, noise=1500)
+        path = write_wav(tmp_path / "solve.wav", samples, 44100)
+        core = TimerCore()
+        source = open_source(str(path), clock=lambda: 0)
+        events = []
+        controller = InputController(core)
+
+        def handle(event):
+            events.append(event)
+            controller.handle(event)
+
+        source.pump(handle)
+        assert [event.kind for event in events] == [START, STOP]
+        first_running_bit = 6 * (GAP_BITS + 100) + GAP_BITS
+        assert abs(events[0].ts_ns - first_running_bit * 1e9 / BAUD_RATE) < MS
+        assert core.current_session.times[0].time == 9.876
+
+    def test_joined_mid_solve(self):
+        """Test finding the start from a timer that was already running."""
+        packets = solve_packets(3_000)[-10:]
+        samples, _ = signal(packets, 44100)
+        source = StackmatSource.from_audio([samples], 44100, clock=lambda: 0)
+        core = TimerCore()
+        source.pump(InputController(core).handle)
+        assert core.current_session.times[0].time == 3.0
+
+    def test_reset_abandons_solve(self):
+        """Test that resetting a running timer records nothing."""
+        packets = [(" ", 0), (" ", 90), (" ", 180), ("I", 0), ("I", 0)]
+        samples, _ = signal(packets, 44100)
+        events = list(StackmatSource.from_audio([samples], 44100).events())
+        assert [event.kind for event in events] == [START, RESET]
+        core = TimerCore()
+        controller = InputController(core)
+        for event in events:
+            controller.handle(event)
+        assert not core.stopwatch.running and len(core.current_session) == 0
+
+    def test_serial_port(self):
+        """Test a solve read from a serial port in uneven chunks."""
+        stream = b"".join(
+            encode_packet(status, ms) for status, ms in solve_packets(4_560)
+        )
+        chunks = [stream[offset : offset + 13] for offset in range(0, len(stream), 13)]
+        core = TimerCore()
+        source = StackmatSource(serial_packets(FakeSerial(chunks), lambda: 0))
+        source.pump(InputController(core).handle)
+        assert core.current_session.times[0].time == 4.56
+
+    def test_serial_needs_pyserial(self, monkeypatch):
+        """Test a clear error when pyserial is not installed."""
+        monkeypatch.setitem(sys.modules, "serial", None)
+        with pytest.raises(StackmatError, match="pyserial"):
+            open_source("serial:/dev/ttyUSB0")
@@ -0,0 +1,111 @@
+"""
+Test startup profiling and lazy loading.
+"""
+
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+import pytest
+from src.startup import StartupProfiler
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupProfiler:
+    """Test the startup profiler."""
+
+    def test_phases_are_timed_from_origin(self):
+        """Test that phases record their start and duration."""
+        clock = FakeClock()
+        profiler = StartupProfiler(clock=clock)
+        clock.now = 0.010
+        with profiler.phase("build"):
+            clock.now = 0.035
+
+        name, start, duration, _ = profiler.phases[0]
+        assert name == "build"
+        assert start == pytest.approx(0.010)
+        assert duration == pytest.approx(0.025)
+
+    def test_ready_marks_and_notifies(self):
+        """Test that ready records a mark and calls on_ready."""
+        clock = FakeClock()
+        profiler = StartupProfiler(clock=clock)
+        calls = []
+        profiler.on_ready = lambda: calls.append(True)
+        clock.now = 0.2
+        profiler.ready()
+
+        assert calls == [True]
+        assert profiler.mark_time("startup complete") == pytest.approx(0.2)
+        assert "startup complete" in profiler.report()
+
+    def test_disabled_profiler_records_nothing(self):
+        """Test that a disabled profiler is a no-op."""
+        profiler = StartupProfiler(enabled=False)
+        profiler.on_ready = lambda: pytest.fail("on_ready called")
+        with profiler.phase("build"):
+            pass
+        profiler.mark("first paint")
+        profiler.ready()
+
+        assert profiler.phases == []
+        assert profiler.marks == []
+
+
+    @pytest.mark.parametrize("compact, parent_exists", [(True, True), (False, False)])
+    def test_ready_when_right_panel_skipped(self, compact, parent_exists):
+        """Test that startup completes when the normal layout is gone."""
+        from src.ui import PSTimerUI
+
+        app = PSTimerUI.__new__(PSTimerUI)
+        app.is_compact_mode = compact
+        app.profiler = StartupProfiler()
+        calls = []
+        app.profiler.on_ready = lambda: calls.append(True)
+        app._create_right_panel = lambda parent: pytest.fail("panel built")
+        parent = MagicMock()
+        parent.winfo_exists.return_value = parent_exists
+
+        app._create_deferred_panels(parent)
+        assert calls == [True]
+        assert app.profiler.mark_time("right panel skipped") is not None
+
+
+class TestLazyImports:
+    """Test that heavy modules stay out of the startup import path."""
+
+    def test_ui_import_skips_deferred_modules(self):
+        """Test that importing the UI does not load the cube view or dialogs."""
+        code = (
+            "import sys, src.ui; "
+            "print(' '.join(m for m in sys.modules if m.startswith('src.')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=PROJECT_ROOT,
+            check=True,
+        )
+        loaded = result.stdout.split()
+        assert "src.ui" in loaded
+        for module in (
+            "src.cube_visualization",
+            "src.settings",
+            "src.about",
+            "src.graph",
+            "src.histogram",
+        ):
+            assert module not in loaded
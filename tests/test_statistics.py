@@ -2,9 +2,18 @@
 Test statistics calculations and session management.
 """
 
+import random
 import pytest
 from datetime import datetime, timedelta
-from src.statistics import StatisticsCalculator, SessionManager, SolveTime
+from src.statistics import (
+    DNF,
+    Session,
+    SessionManager,
+    SolveTime,
+    StatisticsCalculator,
+    best_average,
+    trimmed_average,
+)
 
 
 class TestStatisticsCalculator:
@@ -84,6 +93,78 @@ class TestStatisticsCalculator:
         assert statistics_calculator.get_session_mean([]) is None
 
 
+    def test_penalties_in_best_worst_and_mean(self, statistics_calculator):
+        """Test that +2 counts, and DNFs are worst and left out of the mean."""
+        times = [
+            SolveTime(0.0, penalty="DNF"),
+            SolveTime(12.50, penalty="+2"),
+            SolveTime(12.34),
+        ]
+        assert statistics_calculator.get_best_time(times) is times[2]
+        assert statistics_calculator.get_worst_time(times) is times[0]
+        assert statistics_calculator.get_session_mean(times) == pytest.approx(13.42)
+        assert statistics_calculator.get_session_mean(times[:1]) is None
+
+
+class TestAverages:
+    """Test the WCA average helpers."""
+
+    def test_trimmed_average(self):
+        """Test dropping the best and worst, with one DNF allowed."""
+        assert trimmed_average([1.0, 2.0, 3.0, 4.0, 100.0]) == 3.0
+        assert trimmed_average([1.0, 2.0, 3.0, 4.0, DNF]) == 3.0
+        assert trimmed_average([1.0, 2.0, 3.0, DNF, DNF]) == DNF
+
+    def test_best_average_matches_brute_force(self):
+        """Test the rolling window against recomputing every window."""
+        rng = random.Random(3)
+        values = [rng.choice([DNF, rng.uniform(8, 20)]) for _ in range(300)]
+        for size in (5, 12):
+            windows = [
+                trimmed_average(values[i : i + size])
+                for i in range(len(values) - size + 1)
+            ]
+            expected = min(windows)
+            expected = None if expected == DNF else expected
+            assert best_average(values, size) == expected
+
+    def test_too_few_values(self):
+        """Test that short sessions have no average."""
+        assert best_average([1.0, 2.0], 5) is None
+
+    def test_calculator_applies_penalties(self, statistics_calculator):
+        """Test that +2 and DNF count in the averages shown for a session."""
+        times = [
+            SolveTime(10.0),
+            SolveTime(9.0, penalty="+2"),
+            SolveTime(0.0, penalty="DNF"),
+            SolveTime(12.0),
+            SolveTime(8.0),
+        ]
+        assert statistics_calculator.calculate_ao5(times) == pytest.approx(11.0)
+        assert statistics_calculator.calculate_mo3(times) == DNF
+        assert statistics_calculator.calculate_mo3(times[:2] + times[3:]) == 11.0
+        times[0].penalty = "DNF"
+        assert statistics_calculator.calculate_ao5(times) == DNF
+
+    def test_calculator_matches_session_summary(self):
+        """Test that the session's ao5/ao12 agree with its summary's bests."""
+        rng = random.Random(5)
+        session = Session()
+        for _ in range(60):
+            penalty = rng.choice([None, None, None, "+2", "DNF"])
+            session.add_time(SolveTime(rng.uniform(8, 20), penalty=penalty))
+        calculator = StatisticsCalculator()
+        summary = session.summary()
+        for size in (5, 12):
+            windows = [
+                calculator.calculate_average(session.times[i:], size)
+                for i in range(len(session.times) - size + 1)
+            ]
+            valid = [value for value in windows if value != DNF]
+            assert summary.best_averages[size] == (min(valid) if valid else None)
+
+
 class TestSolveTime:
     """Test SolveTime data structure."""
 
@@ -188,3 +269,48 @@ class TestSessionManager:
         # Test removing from empty session
         sm.current_session.clear()
         assert sm.current_session.remove_time(0) is None
+
+
+class TestSessionVersioning:
+    """Test session change tracking and statistics caching."""
+
+    def test_version_bumps_on_changes(self):
+        """Test that every mutation bumps the session version."""
+        session = SessionManager().current_session
+        versions = [session.version]
+
+        session.add_time(SolveTime(10.0))
+        versions.append(session.version)
+        session.add_times([SolveTime(11.0), SolveTime(12.0)])
+        versions.append(session.version)
+        session.remove_time(0)
+        versions.append(session.version)
+        session.clear()
+        versions.append(session.version)
+
+        assert versions == sorted(set(versions))
+
+    def test_statistics_are_cached_until_changed(self):
+        """Test that statistics are computed once per version."""
+        session = SessionManager().current_session
+        for t in (10.0, 11.0, 12.0):
+            session.add_time(SolveTime(t))
+
+        first = session.get_statistics()
+        assert session.get_statistics() is first
+
+        session.add_time(SolveTime(9.0))
+        second = session.get_statistics()
+        assert second is not first
+        assert second["count"] == 4
+
+    def test_mark_changed_invalidates_cache(self):
+        """Test that external edits such as penalties can invalidate stats."""
+        session = SessionManager().current_session
+        session.add_time(SolveTime(10.0))
+        first = session.get_statistics()
+
+        session.times[0].penalty = "+2"
+        session.mark_changed()
+
+        assert session.get_statistics() is not first
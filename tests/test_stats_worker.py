@@ -0,0 +1,122 @@
+"""
+Test background statistics computation.
+"""
+
+import time
+import pytest
+from src.session_index import SessionSummary
+from src.statistics import Session, SolveTime, StatisticsCalculator
+from src.stats_worker import StatisticsWorker
+
+
+def _wait_for_results(worker, timeout=5.0):
+    """Poll the worker until it has no pending requests."""
+    results = []
+    deadline = time.monotonic() + timeout
+    while worker.pending and time.monotonic() < deadline:
+        results.extend(worker.poll())
+        time.sleep(0.005)
+    results.extend(worker.poll())
+    return results
+
+
+def _session(count):
+    """Build a session with count solves."""
+    session = Session()
+    session.add_times([SolveTime(10 + (i % 17) * 0.25) for i in range(count)])
+    return session
+
+
+class TestStatisticsWorker:
+    """Test the off-thread statistics worker."""
+
+    def test_result_matches_inline_computation(self):
+        """Test that background statistics equal the inline ones."""
+        worker = StatisticsWorker()
+        session = _session(500)
+        worker.submit(session)
+
+        results = _wait_for_results(worker)
+        worker.stop()
+
+        assert len(results) == 1
+        result_session, version, stats = results[0]
+        assert result_session is session
+        assert version == session.version
+        assert stats == StatisticsCalculator.calculate_all(session.times)
+
+    def test_result_is_cached_in_session(self):
+        """Test that a fresh result fills the session's statistics cache."""
+        worker = StatisticsWorker()
+        session = _session(200)
+        worker.submit(session)
+        _wait_for_results(worker)
+        worker.stop()
+
+        assert session.cached_statistics() is not None
+
+    def test_stale_results_are_dropped(self):
+        """Test that results for an outdated version never reach the caller."""
+        worker = StatisticsWorker()
+        session = _session(200)
+        worker.submit(session)
+        session.add_time(SolveTime(1.0))  # Changes before the result is polled
+
+        results = _wait_for_results(worker)
+        worker.stop()
+
+        assert results == []
+        assert session.cached_statistics() is None
+
+    def test_superseded_requests_only_report_latest(self):
+        """Test that only the newest submission of a session is reported."""
+        worker = StatisticsWorker()
+        session = _session(200)
+        for _ in range(5):
+            session.add_time(SolveTime(9.0))
+            worker.submit(session)
+
+        results = _wait_for_results(worker)
+        worker.stop()
+
+        assert [version for _, version, _ in results] == [session.version]
+        assert results[0][2]["count"] == 205
+
+    def test_should_offload(self):
+        """Test the inline threshold."""
+        worker = StatisticsWorker(inline_threshold=100)
+        assert not worker.should_offload(_session(99))
+        assert worker.should_offload(_session(100))
+
+    def test_summary_rebuilt_off_thread(self):
+        """Test that an edited session gets its bests back from the worker."""
+        worker = StatisticsWorker()
+        session = _session(300)
+        session.summary()
+        session.set_penalty(0, "DNF")
+        refreshed = []
+        worker.submit_summary(session, refreshed.append)
+        _wait_for_results(worker)
+        worker.stop()
+
+        assert refreshed == [session]
+        assert not session.summary().bests_stale
+        assert session.summary().to_dict() == SessionSummary.from_session(
+            session
+        ).to_dict()
+
+    def test_summary_resubmitted_after_new_solve(self):
+        """Test that a solve recorded during a rebuild does not lose it."""
+        worker = StatisticsWorker()
+        session = _session(300)
+        session.summary()
+        session.remove_time(5)
+        worker.submit_summary(session)
+        session.add_time(SolveTime(1.0))
+        session.cached_summary.solve_added(session)
+        _wait_for_results(worker)
+        worker.stop()
+
+        assert not session.summary().bests_stale
+        assert session.summary().best == 1.0
+
@@ -5,7 +5,7 @@ Test timer functionality and precision.
 import pytest
 import time
 from unittest.mock import patch
-from src.timer import Stopwatch
+from src.timer import PrecisionStopwatch, Stopwatch
 
 
 class TestStopwatch:
@@ -140,3 +140,111 @@ class TestStopwatch:
             assert elapsed > 0
             assert not timer.running
             assert timer.get_time() == elapsed
+
+    def test_explicit_timestamps(self, timer):
+        """Test starting and stopping at explicit perf_counter timestamps."""
+        timer.start(100.0)
+        assert timer.start_ts == 100.0
+
+        elapsed = timer.stop(112.34)
+        assert elapsed == pytest.approx(12.34)
+        assert not timer.running
+
+    def test_stop_timestamp_before_start(self, timer):
+        """Test that a stop stamp earlier than the start never goes negative."""
+        timer.start(5.0)
+        assert timer.stop(4.0) == 0.0
+
+
+class TestPrecisionStopwatch:
+    """Test the integer-nanosecond stopwatch."""
+
+    def test_exact_integer_results(self):
+        """Test that elapsed ms/cs are exact truncated integers."""
+        timer = PrecisionStopwatch()
+        timer.start(1_000_000_000)
+        elapsed_ns = timer.stop(13_456_789_999)
+
+        assert elapsed_ns == timer.elapsed_ns == 12_456_789_999
+        assert timer.elapsed_ms == 12_456
+        assert timer.elapsed_cs == 1_245
+        assert timer.get_time() == pytest.approx(12.456789999)
+
+    def test_raw_stamps_are_exposed(self):
+        """Test that raw start/stop stamps are kept for auditing."""
+        timer = PrecisionStopwatch()
+        timer.start(500)
+        timer.stop(1500)
+
+        assert timer.start_ns == 500
+        assert timer.stop_ns == 1500
+
+    def test_splits_and_phases(self):
+        """Test multi-phase timing with splits."""
+        timer = PrecisionStopwatch()
+        timer.start(0)
+        assert timer.split(2_000) == 2_000  # cross
+        assert timer.split(9_000) == 7_000  # F2L
+        assert timer.split(11_000) == 2_000  # OLL
+        timer.stop(14_000)  # PLL
+
+        assert timer.splits_ns() == [2_000, 9_000, 11_000]
+        assert timer.phase_times_ns().tolist() == [2_000, 7_000, 2_000, 3_000]
+        assert sum(timer.phase_times_ns()) == timer.elapsed_ns
+
+    def test_phases_never_negative(self):
+        """Test that a split stamped before the previous one gives a 0 ns phase."""
+        timer = PrecisionStopwatch()
+        timer.start(1_000)
+        assert timer.split(500) == 0
+        timer.split(3_000)
+        timer.stop(2_000)
+        assert timer.phase_times_ns().tolist() == [0, 2_500, 0]
+
+    def test_phases_outlive_reset(self):
+        """Test that kept phase times are not overwritten by the next solve."""
+        timer = PrecisionStopwatch()
+        timer.start(0)
+        timer.split(1_000)
+        timer.stop(2_000)
+        phases = timer.phase_times_ns()
+        timer.reset()
+        timer.start(0)
+        timer.split(7)
+        timer.stop(9)
+        assert phases.tolist() == [1_000, 1_000]
+        assert timer.phase_times_ns().tolist() == [7, 2]
+
+    def test_split_limits(self):
+        """Test splitting when stopped or when the split buffer is full."""
+        timer = PrecisionStopwatch(max_splits=1)
+        with pytest.raises(RuntimeError):
+            timer.split()
+
+        timer.start(0)
+        timer.split(10)
+        with pytest.raises(IndexError):
+            timer.split(20)
+
+    def test_reset(self):
+        """Test that reset clears time and splits."""
+        timer = PrecisionStopwatch()
+        timer.start(0)
+        timer.split(5)
+        timer.stop(10)
+        timer.reset()
+
+        assert timer.elapsed_ns == 0
+        assert timer.get_time() == 0.0
+        assert timer.splits_ns() == []
+        assert timer.phase_times_ns().tolist() == []
+        assert not timer.running
+
+    def test_get_time_while_running(self):
+        """Test reading the elapsed time of a running stopwatch."""
+        timer = PrecisionStopwatch()
+        timer.start()
+        time.sleep(0.01)
+
+        assert timer.get_time_ns() > 0
+        assert timer.running